@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+动态处理基准测试
+按块把一整张专辑长度的立体声音频送入母带处理链（压缩 → 立体声宽度 → 预读真峰值限制器），
+报告相对实时的倍数；另外在一小段音频上与逐采样 Python 循环的压缩器/限制器对比，
+并对比滑动最大值（预读峰值检测）的 O(n) 分块算法与逐窗口 O(n·L) 做法
+用法: python benchmarks/bench_dynamics.py [分钟数] [对比片段秒数]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.effects.dynamics import sliding_max
+from src.effects.mastering import Limiter, MasteringProcessor
+
+SAMPLE_RATE = 44100
+BLOCK_SIZE = 1 << 16
+
+
+def music(seconds, seed=0):
+    """带鼓点瞬态的和弦音频（立体声，峰值接近满幅）"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    tones = sum(np.sin(2 * np.pi * f * t + rng.uniform(0, 2 * np.pi)) for f in (110.0, 220.0, 277.2, 329.6))
+    beat = np.exp(-30.0 * (t % 0.5)) * rng.standard_normal(len(t))
+    left = 0.15 * tones + 0.5 * beat
+    right = 0.15 * np.roll(tones, 37) + 0.5 * beat
+    return np.stack([left, right], axis=1).astype(np.float32)
+
+
+def naive_master(audio, threshold_db=-20.0, ratio=2.5, ceiling_db=-1.0, lookahead=220, attack_ms=10.0,
+                 release_ms=120.0):
+    """旧方式：逐采样循环的压缩器，加上每个采样都重新扫描预读窗口的限制器"""
+    attack = np.exp(-1.0 / (attack_ms * 1e-3 * SAMPLE_RATE))
+    release = np.exp(-1.0 / (release_ms * 1e-3 * SAMPLE_RATE))
+    ceiling = 10.0 ** (ceiling_db / 20.0)
+    out = np.empty_like(audio)
+    reduction = 0.0
+    for i in range(len(audio)):
+        level = 20.0 * np.log10(max(abs(audio[i, 0]), abs(audio[i, 1]), 1e-10))
+        target = max(level - threshold_db, 0.0) * (1.0 - 1.0 / ratio)
+        coeff = attack if target > reduction else release
+        reduction = coeff * reduction + (1.0 - coeff) * target
+        out[i] = audio[i] * 10.0 ** (-reduction / 20.0)
+    gain = 1.0
+    for i in range(len(out)):
+        peak = np.abs(out[i:i + lookahead]).max()
+        needed = min(1.0, ceiling / max(peak, 1e-10))
+        gain = needed if needed < gain else release * gain + (1.0 - release) * needed
+        out[i] *= gain
+    return out
+
+
+def naive_sliding_max(x, window):
+    return np.array([x[i:i + window].max() for i in range(len(x) - window + 1)])
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def stream_album(minutes):
+    """按块处理 minutes 分钟的音频（循环使用同一段预先生成的音频，内存只占一个块）"""
+    processor = MasteringProcessor(SAMPLE_RATE)
+    processor.chain.limiter = Limiter(-1.0, SAMPLE_RATE, high_freq_protection=True)
+    processor.chain.stereo_enhancer.width_factor = 1.2
+    processor.apply_preset('balanced')
+    chain = processor.chain
+    chain.reset()
+    source = music(BLOCK_SIZE * 8 / SAMPLE_RATE)
+    total = int(minutes * 60 * SAMPLE_RATE)
+    peak = 0.0
+    done = 0
+    while done < total:
+        start = done % len(source)
+        block = source[start:start + min(BLOCK_SIZE, total - done)].copy()
+        peak = max(peak, float(np.abs(chain.process_block(block)).max()))
+        done += len(block)
+    chain.flush()
+    return peak
+
+
+def run(minutes=60.0, excerpt=5.0):
+    print(f"=== 动态处理基准测试: {minutes:g} 分钟立体声, 采样率 {SAMPLE_RATE}Hz, 块大小 {BLOCK_SIZE} ===")
+
+    peak, elapsed = timed(lambda: stream_album(minutes))
+    print(f"母带处理链（分块）   : {elapsed:8.2f}s | 实时倍数 {minutes * 60 / elapsed:8.1f}x | "
+          f"输出峰值 {20 * np.log10(peak):.2f} dBFS")
+
+    audio = music(excerpt, seed=1)
+    processor = MasteringProcessor(SAMPLE_RATE)
+    _, elapsed_new = timed(lambda: processor.process_audio(audio))
+    _, elapsed_old = timed(lambda: naive_master(audio))
+    print(f"{excerpt:g} 秒片段（向量化）  : {elapsed_new * 1000:8.1f}ms | 实时倍数 {excerpt / elapsed_new:8.1f}x")
+    print(f"{excerpt:g} 秒片段（逐采样）  : {elapsed_old * 1000:8.1f}ms | 实时倍数 {excerpt / elapsed_old:8.1f}x")
+    print(f"加速比               : {elapsed_old / elapsed_new:8.1f}x")
+
+    envelope = np.abs(audio).max(axis=1)
+    for window in (64, 220, 1024):
+        fast, elapsed_fast = timed(lambda: sliding_max(envelope, window))
+        slow, elapsed_slow = timed(lambda: naive_sliding_max(envelope, window))
+        assert np.array_equal(fast, slow)
+        print(f"滑动最大值 L={window:<5d}   : O(n) {elapsed_fast * 1000:7.2f}ms | 逐窗口 {elapsed_slow * 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    minutes = float(sys.argv[1]) if len(sys.argv) > 1 else 60.0
+    excerpt = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    run(minutes, excerpt)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多轨混音基准测试
+对比逐轨补齐长度、转为立体声后相加的旧方式与按块累加到预分配缓冲的混音引擎，
+测量耗时和额外内存峰值（tracemalloc）。为控制测试机内存，多个音轨共用少量只读音频，
+其中一半为48kHz，需要先转换到会话采样率（第二次混音使用缓存的转换结果）
+用法: python benchmarks/bench_mixdown.py [音轨数] [每轨分钟数] [不同音频数]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scipy.signal  # noqa: F401  预先导入，避免导入耗时计入首次混音
+
+from src.audio_processing.mixdown import MixdownEngine, track_gains
+
+SESSION_RATE = 44100
+
+
+class BenchTrack:
+    """与录音会话音轨相同的属性"""
+
+    def __init__(self, name, audio_data, sample_rate, volume=1.0, pan=0.0, muted=False):
+        self.name = name
+        self.audio_data = audio_data
+        self.sample_rate = sample_rate
+        self.volume = volume
+        self.pan = pan
+        self.muted = muted
+        self.solo = False
+
+
+def make_tracks(count, minutes, distinct, seed=0):
+    rng = np.random.default_rng(seed)
+    sources = []
+    for i in range(distinct):
+        rate = SESSION_RATE if i % 2 == 0 else 48000
+        frames = int(minutes * 60 * rate * rng.uniform(0.8, 1.0))
+        audio = (rng.standard_normal(frames) * 0.05).astype(np.float32)
+        if i % 4 == 3:
+            audio = np.repeat(audio[:, None], 2, axis=1)  # 部分音轨为立体声
+        audio.flags.writeable = False
+        sources.append((audio, rate))
+    return [BenchTrack(f"音轨{i + 1}", *sources[i % distinct], volume=rng.uniform(0.3, 1.0),
+                       pan=rng.uniform(-1, 1), muted=(i % 16 == 15)) for i in range(count)]
+
+
+def naive_mix(tracks, sample_rate):
+    """旧方式：逐轨转换采样率、补齐到最长长度、转为立体声并乘增益后相加（float64）"""
+    from scipy.signal import resample_poly
+    from src.audio_processing.resampler import rate_ratio
+
+    def lengths():
+        for track in tracks:
+            if track_gains(track) is not None:
+                yield int(np.ceil(len(track.audio_data) * sample_rate / track.sample_rate))
+    mix = np.zeros((max(lengths()), 2))
+    for track in tracks:
+        gains = track_gains(track)
+        if gains is None:
+            continue
+        audio = track.audio_data
+        if track.sample_rate != sample_rate:
+            audio = resample_poly(audio, *rate_ratio(track.sample_rate, sample_rate), axis=0)
+        stereo = np.zeros((len(mix), 2))
+        if audio.ndim == 1:
+            stereo[:len(audio)] = audio[:, None]
+        else:
+            stereo[:len(audio)] = audio[:, :2]
+        mix += stereo * np.array(gains)
+    return mix.astype(np.float32)
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 2 ** 20
+
+
+def run(count=64, minutes=10.0, distinct=8, compare=True):
+    tracks = make_tracks(count, minutes, distinct)
+    print(f"=== 多轨混音基准测试: {count} 轨 x {minutes:g} 分钟, 会话 {SESSION_RATE}Hz, "
+          f"{distinct} 段不同音频（一半为48kHz） ===")
+    engine = MixdownEngine(SESSION_RATE)
+    mixed, first, first_peak = measure(lambda: engine.mix(tracks))
+    output_mb = mixed.nbytes / 2 ** 20
+    print(f"混音引擎（首次，含采样率转换）: {first:6.2f}秒 | 内存峰值 {first_peak:7.0f}MB（输出 {output_mb:.0f}MB）")
+    _, second, second_peak = measure(lambda: engine.mix(tracks, out=mixed))
+    print(f"混音引擎（缓存转换，复用输出）: {second:6.2f}秒 | 内存峰值 {second_peak:7.0f}MB")
+
+    if compare:
+        reference, naive, naive_peak = measure(lambda: naive_mix(tracks, SESSION_RATE))
+        print(f"逐轨补齐相加（旧方式）        : {naive:6.2f}秒 | 内存峰值 {naive_peak:7.0f}MB")
+        print(f"最大差异: {np.max(np.abs(reference - mixed)):.2e}")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    minutes = float(sys.argv[2]) if len(sys.argv) > 2 else 10.0
+    distinct = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    run(count, minutes, distinct)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多频段压缩基准测试
+同一段立体声音频分别经过单段压缩器、3~5段多频段压缩（各频段依次处理 / 线程池并行），
+报告耗时和相对单段的倍数；另外检查压缩比为1时冲激响应的幅频响应是否平坦（各频段相加后只有相位变化）
+用法: python benchmarks/bench_multiband.py [分钟数]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.effects.dynamics import Compressor
+from src.effects.multiband import CROSSOVER_FREQUENCIES, MultibandCompressor
+
+SAMPLE_RATE = 44100
+
+
+def music(seconds, seed=0):
+    """低音、和弦和鼓点瞬态混合的立体声音频"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    bass = 0.3 * np.sin(2 * np.pi * 55.0 * t) * (1.0 + np.sin(2 * np.pi * 0.25 * t)) / 2
+    chords = 0.1 * sum(np.sin(2 * np.pi * f * t) for f in (261.6, 329.6, 392.0, 1046.5))
+    beat = 0.3 * np.exp(-30.0 * (t % 0.5)) * rng.standard_normal(len(t))
+    return np.stack([bass + chords + beat, bass + 0.8 * chords + beat], axis=1).astype(np.float32)
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def run(minutes=10.0):
+    audio = music(minutes * 60)
+    print(f"=== 多频段压缩基准测试: {minutes:g} 分钟立体声, 采样率 {SAMPLE_RATE}Hz, CPU核数 {os.cpu_count()} ===")
+
+    _, single = timed(lambda: Compressor(threshold_db=-20.0, sample_rate=SAMPLE_RATE).process(audio))
+    print(f"单段压缩器           : {single:8.2f}s | 实时倍数 {minutes * 60 / single:7.1f}x")
+
+    for n_bands in sorted(CROSSOVER_FREQUENCIES):
+        _, serial = timed(lambda: MultibandCompressor(SAMPLE_RATE, n_bands, threshold_db=-20.0,
+                                                      workers=1).process(audio))
+        _, parallel = timed(lambda: MultibandCompressor(SAMPLE_RATE, n_bands, threshold_db=-20.0).process(audio))
+        print(f"{n_bands}段 依次 / 并行      : {serial:6.2f}s / {parallel:6.2f}s | "
+              f"相对单段 {serial / single:5.2f}x / {parallel / single:5.2f}x")
+
+    impulse = np.zeros((1 << 15, 1), dtype=np.float32)
+    impulse[0] = 1.0
+    for n_bands in sorted(CROSSOVER_FREQUENCIES):
+        flat = MultibandCompressor(SAMPLE_RATE, n_bands, ratio=1.0, knee_db=0.0)
+        response = np.abs(np.fft.rfft(flat.process(impulse)[:, 0]))
+        print(f"{n_bands}段 不压缩时幅频偏差 : {np.abs(20 * np.log10(response)).max():8.5f} dB")
+
+
+if __name__ == "__main__":
+    run(float(sys.argv[1]) if len(sys.argv) > 1 else 10.0)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分段并行音准修正基准测试
+对比整段串行修正与在静音处分段、多进程并行修正的耗时和输出差异
+音准修正模块不可用时，以WORLD音高引擎（单线程）作为替代的修正算法
+用法: python benchmarks/bench_parallel_pitch.py [时长分钟] [进程数列表，如1,2,4,8]
+"""
+
+import os
+import sys
+import time
+from functools import partial
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.audio_processing.parallel_pitch import (DEFAULT_CROSSFADE, find_phrase_boundaries,
+                                                 parallel_pitch_correction)
+from src.audio_processing.processor import smart_tune
+
+
+def world_tune(audio, sample_rate, strength=0.7):
+    """替代修正算法：WORLD分解后按强度贴合半音"""
+    from src.audio_processing.world_pitch_engine import WorldPitchEngine
+    return WorldPitchEngine(max_workers=1).render(audio, sample_rate, strength=strength)
+
+
+def pick_corrector():
+    try:
+        import src.audio_processing.anti_ai_processing  # noqa: F401
+        return partial(smart_tune, mode='smart', anti_ai=True), "AntiAIPitchCorrector"
+    except ImportError:
+        return world_tune, "WORLD音高引擎（替代）"
+
+
+def synth_vocal(minutes, sample_rate, seed=0):
+    """合成带颤音的乐句，句间有0.3~0.8秒的停顿"""
+    rng = np.random.default_rng(seed)
+    total = int(minutes * 60 * sample_rate)
+    audio = np.zeros(total, dtype=np.float32)
+    pos = 0
+    while pos < total:
+        length = int(rng.uniform(2.0, 6.0) * sample_rate)
+        t = np.arange(min(length, total - pos)) / sample_rate
+        f0 = 220 * 2 ** (rng.integers(-5, 8) / 12 + rng.normal(0, 0.2) / 12)
+        phase = 2 * np.pi * np.cumsum(f0 * (1 + 0.01 * np.sin(2 * np.pi * 5.5 * t))) / sample_rate
+        tone = sum(np.sin(k * phase) / k for k in range(1, 6)) * np.hanning(len(t))
+        audio[pos:pos + len(t)] = 0.3 * tone
+        pos += len(t) + int(rng.uniform(0.3, 0.8) * sample_rate)
+    return audio + (rng.standard_normal(total) * 1e-4).astype(np.float32)
+
+
+def spectral_error_db(reference, result, n_fft=2048):
+    """幅度谱误差（相对参考信号能量，dB）：WORLD等算法的合成脉冲相位取决于处理起点，
+    分段后波形可能整体错开，但幅度谱应保持一致"""
+    from scipy.signal import stft
+    _, _, ref_spec = stft(reference, nperseg=n_fft)
+    _, _, out_spec = stft(result, nperseg=n_fft)
+    error = np.sum((np.abs(ref_spec) - np.abs(out_spec)) ** 2)
+    return 10 * np.log10(error / np.sum(np.abs(ref_spec) ** 2) + 1e-12)
+
+
+def run(minutes=4.0, worker_counts=None, sample_rate=44100):
+    worker_counts = worker_counts or sorted({1, 2, 4, os.cpu_count() or 1})
+    correct, name = pick_corrector()
+    audio = synth_vocal(minutes, sample_rate)
+    splits = find_phrase_boundaries(audio, sample_rate)
+    print(f"=== 并行音准修正基准测试: {minutes:.0f} 分钟, {sample_rate}Hz, 算法: {name} ===")
+    print(f"本机CPU核数: {os.cpu_count()} | 切分为 {len(splits) + 1} 段")
+
+    start = time.perf_counter()
+    serial = correct(audio, sample_rate)
+    serial_time = time.perf_counter() - start
+    print(f"串行: {serial_time:.2f}秒")
+
+    # 交叉淡化区间之外的误差
+    half = int(DEFAULT_CROSSFADE * sample_rate) // 2
+    mask = np.ones(len(audio), dtype=bool)
+    for split in splits:
+        mask[split - half:split + half] = False
+
+    for workers in worker_counts:
+        start = time.perf_counter()
+        result = parallel_pitch_correction(audio, sample_rate, correct, workers=workers)
+        elapsed = time.perf_counter() - start
+        diff = np.abs(result - serial)
+        print(f"{workers:2d} 进程: {elapsed:7.2f}秒 | 加速 {serial_time / elapsed:4.2f}x | "
+              f"淡化区外波形最大误差 {np.max(diff[mask]):.2e} | "
+              f"幅度谱误差 {spectral_error_db(serial, result):.1f} dB")
+
+
+if __name__ == "__main__":
+    minutes = float(sys.argv[1]) if len(sys.argv) > 1 else 4.0
+    counts = [int(c) for c in sys.argv[2].split(',')] if len(sys.argv) > 2 else None
+    run(minutes, counts)
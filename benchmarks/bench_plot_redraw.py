@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图表重绘延迟基准测试（Agg后端，无需显示器）
+对比每次更新都清空图表、重建坐标轴并重新排版的方式与沿用坐标轴、只替换数据的渲染器，
+以及用blit移动播放头的耗时
+用法: python benchmarks/bench_plot_redraw.py [时长分钟列表，如1,10,60] [重复次数]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from src.audio_processing.peak_pyramid import pyramid_for
+from src.ui.plot_renderer import PlotRenderer
+from src.ui.waveform_view import WaveformView
+
+
+def make_versions(minutes, sample_rate, seed=0):
+    """两个只读版本（与版本历史中的快照相同），第二个版本只修改了中间一段"""
+    rng = np.random.default_rng(seed)
+    original = (rng.standard_normal(int(minutes * 60 * sample_rate)) * 0.1).astype(np.float32)
+    processed = original.copy()
+    middle = len(processed) // 2
+    processed[middle:middle + sample_rate] *= 0.5
+    for audio in (original, processed):
+        audio.setflags(write=False)
+        pyramid_for(audio)  # 预先构建金字塔，只测绘图本身
+    return original, processed
+
+
+def rebuild_redraw(figure, canvas, original, processed, sample_rate):
+    """旧方式：清空图表、重建坐标轴和包络、tight_layout后完整绘制"""
+    figure.clear()
+    ax1 = figure.add_subplot(211)
+    WaveformView(ax1, original, sample_rate, color='blue', label="原始音频")
+    ax1.legend()
+    ax1.grid(True)
+    ax2 = figure.add_subplot(212, sharex=ax1)
+    WaveformView(ax2, processed, sample_rate, color='red', label="处理后音频")
+    ax2.legend()
+    ax2.grid(True)
+    figure.tight_layout()
+    canvas.draw()
+
+
+def build_pair(figure):
+    ax1 = figure.add_subplot(211)
+    ax2 = figure.add_subplot(212, sharex=ax1)
+    for ax in (ax1, ax2):
+        ax.grid(True)
+    return [ax1, ax2]
+
+
+def renderer_redraw(renderer, original, processed, sample_rate):
+    """渲染器：布局不变，沿用坐标轴和图形对象，只替换包络数据"""
+    renderer.layout(('waveform_pair',), build_pair, time_axes=True)
+    renderer.waveform(0, original, sample_rate, color='blue')
+    renderer.waveform(1, processed, sample_rate, color='red')
+    renderer.draw(immediate=True)
+
+
+def timed(func, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return np.median(times) * 1000
+
+
+def run(durations=(1, 10, 60), repeats=10, sample_rate=44100):
+    print(f"=== 图表重绘延迟基准测试（Agg, 1000x600像素, 采样率 {sample_rate}Hz, 中位数）===")
+    print(f"{'时长':>6} | {'清空重建':>10} | {'沿用图形':>10} | {'加速':>6} | {'播放头blit':>10}")
+    for minutes in durations:
+        original, processed = make_versions(minutes, sample_rate)
+        versions = [(original, processed), (processed, original)]
+
+        figure = Figure(figsize=(10, 6), dpi=100)
+        canvas = FigureCanvasAgg(figure)
+        rebuild = timed(lambda: rebuild_redraw(figure, canvas, *versions[0], sample_rate), repeats)
+
+        figure = Figure(figsize=(10, 6), dpi=100)
+        canvas = FigureCanvasAgg(figure)
+        renderer = PlotRenderer(figure, canvas)
+        renderer_redraw(renderer, original, processed, sample_rate)  # 首次建立布局
+        state = {'i': 0}
+
+        def update():
+            state['i'] += 1
+            renderer_redraw(renderer, *versions[state['i'] % 2], sample_rate)
+        reuse = timed(update, repeats)
+
+        position = {'t': 0.0}
+
+        def move_playhead():
+            position['t'] += 0.5
+            renderer.set_playhead(position['t'])
+        blit = timed(move_playhead, repeats * 10)
+
+        print(f"{minutes:4g}分 | {rebuild:8.1f}ms | {reuse:8.1f}ms | {rebuild / reuse:5.1f}x | {blit:8.2f}ms")
+        del original, processed, versions
+
+
+if __name__ == "__main__":
+    durations = [float(d) for d in sys.argv[1].split(',')] if len(sys.argv) > 1 else (1, 10, 60)
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    run(durations, repeats)
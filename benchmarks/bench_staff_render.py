@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+五线谱渲染基准测试
+用随机生成的旋律（不含音频分析）测量排版、直接写出SVG、PNG串行与多进程渲染的耗时，
+并与把整首曲子画在一张图上、每个音符单独创建matplotlib图形对象的旧方式对比
+用法: python benchmarks/bench_staff_render.py [分钟数] [进程数] [输出目录]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.audio_processing.audio_to_midi import NOTE_DTYPE
+from src.audio_processing.staff_image_generator import (MEASURES_PER_SYSTEM, STAFF_SPACE, layout,
+                                                        render_pages, staff_steps)
+
+TEMPO = 120.0
+
+
+def lead_sheet(minutes, tempo=TEMPO, seed=0):
+    """随机旋律：十六分到二分音符，音高随机游走"""
+    rng = np.random.default_rng(seed)
+    beat = 60.0 / tempo
+    count = int(minutes * 60 / beat * 2)
+    lengths = rng.choice([0.25, 0.5, 1.0, 2.0, 4.0], size=count, p=[0.2, 0.4, 0.25, 0.1, 0.05]) * beat / 2
+    starts = np.concatenate([[0.0], np.cumsum(lengths)[:-1]])
+    keep = starts < minutes * 60
+    notes = np.zeros(int(keep.sum()), dtype=NOTE_DTYPE)
+    notes['start'] = starts[keep]
+    notes['end'] = starts[keep] + lengths[keep] * 0.9
+    notes['pitch'] = np.clip(67 + np.cumsum(rng.integers(-3, 4, size=len(notes))), 57, 88)
+    notes['velocity'] = 80
+    return notes
+
+
+def naive_render(notes, filepath):
+    """旧方式：整首曲子一张长图，谱线、符头、符干逐个创建图形对象"""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from matplotlib.patches import Ellipse
+    measures = int(notes['start'][-1] * TEMPO / 60 / 4) + 1
+    systems = -(-measures // MEASURES_PER_SYSTEM)
+    figure = Figure(figsize=(8, 1.2 * systems), dpi=100)
+    FigureCanvasAgg(figure)
+    ax = figure.add_axes([0, 0, 1, 1])
+    ax.set_xlim(0, MEASURES_PER_SYSTEM * 4)
+    ax.set_ylim(systems * 12, -4)
+    ax.set_axis_off()
+    for system in range(systems):
+        for line in range(5):
+            ax.plot([0, MEASURES_PER_SYSTEM * 4], [system * 12 + line] * 2, color='black', linewidth=0.8)
+    steps, _ = staff_steps(notes['pitch'], 'treble')
+    beats = notes['start'] * TEMPO / 60
+    for beat, step in zip(beats, steps):
+        system = int(beat // (MEASURES_PER_SYSTEM * 4))
+        x = beat % (MEASURES_PER_SYSTEM * 4)
+        y = system * 12 + 4 - step / 2
+        ax.add_patch(Ellipse((x, y), 0.25, 0.8, color='black'))
+        ax.plot([x + 0.1, x + 0.1], [y, y - 3.5], color='black', linewidth=0.8)
+    figure.savefig(filepath, dpi=150)
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def run(minutes=10.0, workers=None, directory=None, compare=True):
+    directory = directory or tempfile.mkdtemp(prefix='bench_staff_')
+    notes = lead_sheet(minutes)
+    print(f"=== 五线谱渲染基准测试: {minutes:g} 分钟, {len(notes)} 个音符, 速度 {TEMPO:g} BPM ===")
+    pages, elapsed = timed(lambda: layout(notes, TEMPO, "Benchmark"))
+    print(f"排版                 : {elapsed * 1000:8.1f}ms | {len(pages)} 页 ({STAFF_SPACE:g}px 谱线间距)")
+    _, elapsed = timed(lambda: render_pages(pages, os.path.join(directory, 'staff.svg'), 'svg', workers=1))
+    print(f"SVG 直接写出         : {elapsed * 1000:8.1f}ms")
+    _, elapsed = timed(lambda: render_pages(pages, os.path.join(directory, 'staff.png'), 'png', workers=1))
+    print(f"PNG 串行             : {elapsed * 1000:8.1f}ms")
+    workers = workers or os.cpu_count() or 1
+    if workers > 1:
+        _, elapsed = timed(lambda: render_pages(pages, os.path.join(directory, 'staff.png'), 'png', workers=workers))
+        print(f"PNG {workers}进程（含启动）  : {elapsed * 1000:8.1f}ms")
+    if compare:
+        _, elapsed = timed(lambda: naive_render(notes, os.path.join(directory, 'naive.png')))
+        print(f"单张长图逐个图形对象 : {elapsed * 1000:8.1f}ms")
+    print(f"输出目录: {directory}")
+
+
+if __name__ == "__main__":
+    minutes = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    directory = sys.argv[3] if len(sys.argv) > 3 else None
+    run(minutes, workers, directory)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+扒谱基准测试
+合成一段带和弦伴奏和旋律的音频，测量依次调用检测旋律、检测和弦、文字扒谱、扒谱图片的总耗时：
+每次调用都重新分析（不共用分析结果）与共用一次分析对比；
+另外单独对比和弦匹配的逐帧逐模板循环与一次矩阵乘法，并给出和弦识别的正确率
+用法: python benchmarks/bench_transcription.py [分钟数] [输出目录]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.audio_processing.analysis_cache import AnalysisCache
+from src.audio_processing.music_analysis import CHORD_NAMES, CHORD_TEMPLATES, analyze_music
+from src.audio_processing.transcription_generator import TranscriptionGenerator
+
+SAMPLE_RATE = 44100
+PROGRESSION = [('C', (48, 52, 55)), ('Am', (45, 48, 52)), ('F', (41, 45, 48)), ('G', (43, 47, 50))]
+CHORD_SECONDS = 2.0
+NOTE_SECONDS = 0.25
+
+
+def _tone(pitch, frames, amplitude):
+    """带两个泛音和衰减包络的音"""
+    t = np.arange(frames) / SAMPLE_RATE
+    frequency = 440.0 * 2 ** ((pitch - 69) / 12)
+    tone = sum(np.sin(2 * np.pi * frequency * k * t) / k for k in (1, 2, 3))
+    return (tone * amplitude * np.exp(-1.5 * t)).astype(np.float32)
+
+
+def song(minutes, seed=0):
+    """和弦伴奏（每和弦2秒）加上在和弦音上随机走动的十六分音符旋律，返回 (音频, 每秒的正确和弦)"""
+    rng = np.random.default_rng(seed)
+    total = int(minutes * 60 * SAMPLE_RATE)
+    audio = np.zeros(total, dtype=np.float32)
+    chord_frames = int(CHORD_SECONDS * SAMPLE_RATE)
+    note_frames = int(NOTE_SECONDS * SAMPLE_RATE)
+    truth = []
+    for index, start in enumerate(range(0, total, chord_frames)):
+        name, pitches = PROGRESSION[index % len(PROGRESSION)]
+        length = min(chord_frames, total - start)
+        truth.append(name)
+        for pitch in pitches:
+            audio[start:start + length] += _tone(pitch, length, 0.12)
+        for offset in range(0, length, note_frames):
+            pitch = int(rng.choice(pitches)) + 24
+            end = min(offset + note_frames, length)
+            audio[start + offset:start + end] += _tone(pitch, end - offset, 0.25)
+    return audio, truth
+
+
+def naive_chord_labels(chroma):
+    """旧方式：逐帧、逐模板计算相似度"""
+    labels = []
+    for frame in range(chroma.shape[1]):
+        column = chroma[:, frame]
+        norm = np.linalg.norm(column) or 1.0
+        best, best_score = 0, -1.0
+        for index in range(len(CHORD_TEMPLATES)):
+            score = float(np.dot(CHORD_TEMPLATES[index], column)) / norm
+            if score > best_score:
+                best, best_score = index, score
+        labels.append(best)
+    return np.array(labels)
+
+
+def chord_accuracy(chords, truth, duration):
+    """按时间计算和弦识别正确率（每0.1秒取样）"""
+    times = np.arange(0, duration, 0.1)
+    starts = np.array([c['time'] for c in chords])
+    if len(starts) == 0:
+        return 0.0
+    detected = np.array([c['chord'] for c in chords])[np.maximum(np.searchsorted(starts, times, side='right') - 1, 0)]
+    expected = np.array(truth)[np.minimum((times // CHORD_SECONDS).astype(int), len(truth) - 1)]
+    return float(np.mean(detected == expected))
+
+
+def transcribe_all(generator, audio, directory):
+    generator.detect_melody(audio)
+    chords = generator.detect_chords(audio)
+    generator.generate_transcription(audio, os.path.join(directory, 'transcription.txt'), "Benchmark")
+    generator.generate_transcription_image(audio, os.path.join(directory, 'transcription.png'), "Benchmark")
+    return chords
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def run(minutes=5.0, directory=None, compare=True):
+    directory = directory or tempfile.mkdtemp(prefix='bench_transcription_')
+    audio, truth = song(minutes)
+    print(f"=== 扒谱基准测试: {minutes:g} 分钟, 采样率 {SAMPLE_RATE}Hz ===")
+
+    if compare:
+        # 内存缓存容量为0且不写磁盘：每次调用都重新分析
+        separate = TranscriptionGenerator(SAMPLE_RATE, cache=AnalysisCache(max_memory_entries=0, cache_dir=''))
+        _, elapsed_separate = timed(lambda: transcribe_all(separate, audio, directory))
+        print(f"四次调用各自分析     : {elapsed_separate:8.2f}s")
+
+    shared = TranscriptionGenerator(SAMPLE_RATE, cache=AnalysisCache(cache_dir=''))
+    chords, elapsed = timed(lambda: transcribe_all(shared, audio, directory))
+    print(f"四次调用共用一次分析 : {elapsed:8.2f}s")
+    if compare:
+        print(f"加速比               : {elapsed_separate / elapsed:8.2f}x")
+
+    analysis = analyze_music(audio, SAMPLE_RATE, shared.cache, melody=False)
+    chroma = analysis['chroma']
+    _, elapsed = timed(lambda: (CHORD_TEMPLATES @ chroma).argmax(axis=0))
+    print(f"和弦匹配（矩阵乘法） : {elapsed * 1000:8.2f}ms | {chroma.shape[1]} 帧 x {len(CHORD_NAMES)} 个模板")
+    if compare:
+        _, elapsed = timed(lambda: naive_chord_labels(chroma))
+        print(f"和弦匹配（逐帧循环） : {elapsed * 1000:8.2f}ms")
+    print(f"和弦正确率           : {chord_accuracy(chords, truth, minutes * 60) * 100:8.1f}%")
+    print(f"输出目录: {directory}")
+
+
+if __name__ == "__main__":
+    minutes = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    directory = sys.argv[2] if len(sys.argv) > 2 else None
+    run(minutes, directory)
@@ -4,295 +4,61 @@ AI音乐后期工程师 - 音乐修音软件
 """
 
 import sys
+import threading
 import warnings
-from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QTabWidget, QMenuBar, QStatusBar, QLabel, QAction, QFileDialog, QMessageBox, QPushButton, QSlider, QTextEdit, QListWidget, QComboBox, QCheckBox, QAbstractItemView
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QTabWidget, QMenuBar, QStatusBar, QLabel, QAction, QFileDialog, QMessageBox, QPushButton, QSlider, QTextEdit, QListWidget, QComboBox, QCheckBox, QAbstractItemView, QInputDialog, QProgressBar
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QIcon
 
 # 忽略Qt布局警告
 warnings.filterwarnings("ignore", ".*Cannot add a null widget.*")
-import matplotlib
-matplotlib.use('Qt5Agg')
-
-# 设置中文字体支持
-import matplotlib.pyplot as plt
-from matplotlib import font_manager
-
-# 尝试设置支持中文的字体
-try:
-    # 优先使用系统支持的中文字体
-    plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'DejaVu Sans', 'Arial Unicode MS', 'Songti SC', 'PingFang SC']
-    plt.rcParams['axes.unicode_minus'] = False  # 正常显示负号
-except:
-    pass
-
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
+import importlib.util
 import numpy as np
-import librosa
-import soundfile as sf
 
-# 音频播放支持
-try:
-    import sounddevice as sd
-    SOUNDDEVICE_AVAILABLE = True
-except ImportError:
-    SOUNDDEVICE_AVAILABLE = False
+from src.audio_processing.processor import AudioProcessor
+
+# 音频播放支持（只检查是否安装，真正导入推迟到初始化播放器时）
+SOUNDDEVICE_AVAILABLE = importlib.util.find_spec('sounddevice') is not None
+if not SOUNDDEVICE_AVAILABLE:
     print("警告: sounddevice库未安装，播放功能将受限")
 
 
-class AudioProcessor:
-    """音频处理器"""
-    
-    def __init__(self):
-        self.audio_data = None
-        self.sample_rate = None
-        self.original_audio = None
-        self.backup_audio = None  # 用于对比功能的备份音频
-        
-    def load_audio(self, filepath):
-        """加载音频文件"""
-        try:
-            self.audio_data, self.sample_rate = librosa.load(filepath, sr=None)
-            self.original_audio = self.audio_data.copy()
-            self.backup_audio = self.audio_data.copy()  # 备份原始音频用于对比
-            return True
-        except Exception as e:
-            print(f"加载音频文件失败: {e}")
-            return False
+def load_matplotlib_backend():
+    """首次绘图时才导入matplotlib及其Qt后端，并设置中文字体"""
+    import matplotlib
+    matplotlib.use('Qt5Agg')
     
-    def save_audio(self, filepath):
-        """保存音频文件"""
-        try:
-            if self.audio_data is not None:
-                sf.write(filepath, self.audio_data, self.sample_rate)
-                return True
-        except Exception as e:
-            print(f"保存音频文件失败: {e}")
-        return False
+    # 设置中文字体支持（字体选择结果会被缓存）
+    from src.ui.fonts import configure_matplotlib_fonts
+    configure_matplotlib_fonts()
     
-    def equalize(self, bands):
-        """EQ调节 - 均衡器"""
-        if self.audio_data is None or len(bands) == 0:
-            return False
-            
-        try:
-            # 导入均衡器模块
-            from src.effects.equalizer import Equalizer
-            eq = Equalizer(sample_rate=self.sample_rate)
-            
-            # 设置各频段增益
-            eq.set_all_gains(bands)
-            
-            # 应用均衡器
-            processed_audio = eq.apply_equalizer(self.audio_data)
-            
-            # 防止处理累积误差，确保数值稳定
-            processed_audio = np.clip(processed_audio, -1.0, 1.0)
-            
-            self.audio_data = processed_audio
-            
-            return True
-        except ImportError:
-            print("均衡器模块不可用")
-            return False
-        except Exception as e:
-            print(f"EQ调节失败: {e}")
-            return False
+    from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+    from matplotlib.figure import Figure
+    return Figure, FigureCanvas
 
-    def smart_equalize(self, mode='smart', anti_ai=True):
-        """智能一键EQ（可选反AI痕迹）"""
-        if self.audio_data is None:
-            return False
-        
-        try:
-            if anti_ai:
-                # 使用反AI痕迹均衡器
-                from src.audio_processing.anti_ai_processing import AntiAIEqualizer
-                eq = AntiAIEqualizer(sample_rate=self.sample_rate)
-                
-                # 根据模式选择预设
-                mode_presets = {
-                    'smart': [0, 0, 0.2, 0.5, 0.8, 0.6, 0.3, 0.1, 0],  # 智能模式
-                    'vocal': [0, -0.3, 0, 0.5, 1.0, 1.2, 0.8, 0.3, -0.2],  # 人声模式
-                    'instrumental': [0.2, 0.1, 0, 0.3, 0.5, 0.8, 1.0, 0.6, 0.2],  # 乐器模式
-                    'mix': [0, 0, 0.1, 0.3, 0.5, 0.4, 0.2, 0.1, 0],  # 混音模式
-                    'flat': [0, 0, 0, 0, 0, 0, 0, 0, 0],  # 平坦模式
-                    'bright': [0, 0, 0, 0.2, 0.5, 1.0, 1.2, 0.8, 0.3],  # 明亮模式
-                    'warm': [0.5, 0.3, 0.1, 0, -0.2, -0.1, 0, 0, -0.3]  # 温暖模式
-                }
-                
-                bands = mode_presets.get(mode, mode_presets['smart'])
-                self.audio_data = eq.anti_ai_equalize(
-                    self.audio_data, 
-                    bands, 
-                    preserve_natural=True
-                )
-            else:
-                # 使用传统增强版均衡器
-                from src.effects.enhanced_equalizer import EnhancedEqualizer
-                eq = EnhancedEqualizer(sample_rate=self.sample_rate)
-                processed_audio = eq.one_click_eq(self.audio_data, mode=mode)
-                
-                # 防止处理累积误差，确保数值稳定
-                processed_audio = np.clip(processed_audio, -1.0, 1.0)
-                
-                self.audio_data = processed_audio
-            return True
-        except ImportError:
-            print("均衡器模块不可用，使用基础EQ")
-            # 降级到基础EQ
-            return self.equalize([0]*9)  # 应用平坦EQ
-        except Exception as e:
-            print(f"智能EQ失败: {e}")
-            return False
 
-    def pitch_correction(self, semitones=0, strength=1.0):
-        """音准调校 - 变调功能"""
-        if self.audio_data is None:
-            return False
-            
-        try:
-            # 导入音准修正模块
-            from src.audio_processing.pitch_correction import PitchCorrector
-            corrector = PitchCorrector()
-            
-            # 使用更高级的音准修正方法
-            self.audio_data = corrector.auto_tune(
-                self.audio_data,
-                self.sample_rate,
-                strength=strength,
-                pitch_shift_semitones=semitones
-            )
-            return True
-        except ImportError:
-            # 如果音准修正模块不可用，使用降级方案
-            try:
-                self.audio_data = librosa.effects.pitch_shift(
-                    y=self.audio_data,
-                    sr=self.sample_rate,
-                    n_steps=semitones
-                )
-                return True
-            except Exception as e:
-                print(f"音准调校失败: {e}")
-                return False
-        except Exception as e:
-            print(f"音准调校失败: {e}")
-            return False
-    
-    def smart_pitch_correction(self, mode='smart', anti_ai=True):
-        """智能一键音准校准（可选反AI痕迹）"""
-        if self.audio_data is None:
-            return False
-        
-        try:
-            if anti_ai:
-                # 使用反AI痕迹音准修正
-                from src.audio_processing.anti_ai_processing import AntiAIPitchCorrector
-                corrector = AntiAIPitchCorrector()
-                
-                # 根据模式选择参数
-                if mode == 'aggressive':
-                    strength = 0.9
-                    preserve_expression = True
-                    expression_intensity = 0.3
-                elif mode == 'gentle':
-                    strength = 0.5
-                    preserve_expression = True
-                    expression_intensity = 0.6
-                elif mode == 'adaptive':
-                    strength = 0.7
-                    preserve_expression = True
-                    expression_intensity = 0.5
-                else:  # smart模式
-                    strength = 0.7
-                    preserve_expression = True
-                    expression_intensity = 0.4
-                
-                processed_audio = corrector.anti_ai_auto_tune(
-                    self.audio_data,
-                    self.sample_rate,
-                    strength=strength,
-                    preserve_expression=preserve_expression,
-                    expression_intensity=expression_intensity
-                )
-                
-                # 防止处理累积误差，确保数值稳定
-                processed_audio = np.clip(processed_audio, -1.0, 1.0)
-                
-                self.audio_data = processed_audio
-            else:
-                # 使用传统增强版音准修正
-                from src.audio_processing.enhanced_pitch_correction import EnhancedPitchCorrector
-                corrector = EnhancedPitchCorrector()
-                processed_audio = corrector.one_click_tune(
-                    self.audio_data,
-                    self.sample_rate,
-                    mode=mode
-                )
-                
-                # 防止处理累积误差，确保数值稳定
-                processed_audio = np.clip(processed_audio, -1.0, 1.0)
-                
-                self.audio_data = processed_audio
-            return True
-        except ImportError:
-            print("音准修正模块不可用，使用基础校准")
-            # 降级到基础校准
-            return self.pitch_correction(strength=0.5)
-        except Exception as e:
-            print(f"智能音准校准失败: {e}")
-            return False
+def callback_bridge(parent):
+    """创建把后台线程回调转到界面线程执行的转发器（首次用到时才导入任务模块）"""
+    from src.ui.jobs import CallbackBridge
+    return CallbackBridge(parent)
 
-    def smart_master(self, mode='smart'):
-        """智能母带处理"""
-        if self.audio_data is None:
-            return False
-        
-        try:
-            # 导入增强版母带处理模块
-            from src.effects.enhanced_mastering import EnhancedMasteringProcessor
-            mastering_proc = EnhancedMasteringProcessor(sample_rate=self.sample_rate)
-            
-            # 应用智能母带处理
-            self.audio_data = mastering_proc.one_click_master(
-                self.audio_data,
-                mode=mode
-            )
-            return True
-        except ImportError:
-            print("增强版母带处理模块不可用，使用基础处理")
-            # 降级到基础母带处理
-            return self.apply_basic_mastering()
-        except Exception as e:
-            print(f"智能母带处理失败: {e}")
-            return False
-    
-    def apply_basic_mastering(self):
-        """应用基础母带处理作为降级方案"""
-        if self.audio_data is None:
-            return False
-        
-        # 简单的响度调整作为基础母带处理
-        current_rms = np.sqrt(np.mean(self.audio_data ** 2))
-        target_rms = 0.1  # 目标RMS值
-        gain = target_rms / (current_rms + 1e-10)
-        gain = min(gain, 1.5)  # 限制最大增益
-        self.audio_data = self.audio_data * gain
-        
-        # 应用限制以避免削波
-        self.audio_data = np.clip(self.audio_data, -1.0, 1.0)
-        
-        return True
+
+def spectrum_service():
+    """频谱分析服务（首次分析频谱时才导入）"""
+    from src.audio_processing.spectrum_analysis import spectrum_service as shared_service
+    return shared_service()
 
 
 class PitchCorrectionWidget(QWidget):
     """音准调校界面"""
     
+    PREVIEW_SECONDS = 10.0  # 拖动滑块时预览合成的时长
+    
     def __init__(self, processor):
         super().__init__()
         self.processor = processor
+        self.preview_bridge = None  # 后台预览合成结果转回界面线程（首次预览时创建）
+        self._preview_request = 0
         self.init_ui()
         
     def init_ui(self):
@@ -313,6 +79,20 @@ class PitchCorrectionWidget(QWidget):
         layout.addLayout(comparison_layout)
         
         self.pitch_control = None  # 会在主窗口中初始化
+        self.jobs = None  # 后台任务队列，会在主窗口中初始化
+        
+        # 修正强度（0为只移调，100为完全贴合半音）
+        strength_layout = QHBoxLayout()
+        strength_layout.addWidget(QLabel("修正强度:"))
+        self.strength_slider = QSlider(Qt.Horizontal)
+        self.strength_slider.setRange(0, 100)
+        self.strength_slider.setValue(100)
+        self.strength_slider.valueChanged.connect(lambda v: self.strength_label.setText(f"{v}%"))
+        self.strength_slider.sliderReleased.connect(self.preview_pitch_correction)
+        strength_layout.addWidget(self.strength_slider)
+        self.strength_label = QLabel("100%")
+        strength_layout.addWidget(self.strength_label)
+        layout.addLayout(strength_layout)
         
         # 应用按钮
         btn_layout = QHBoxLayout()
@@ -331,6 +111,11 @@ class PitchCorrectionWidget(QWidget):
         self.anti_ai_checkbox.setChecked(True)  # 默认启用
         anti_ai_layout.addWidget(self.anti_ai_checkbox)
         
+        # 多核并行：在句间停顿处分段，多进程同时处理
+        self.parallel_checkbox = QCheckBox("多核并行处理")
+        self.parallel_checkbox.setChecked(False)
+        anti_ai_layout.addWidget(self.parallel_checkbox)
+        
         # 校准模式选择
         mode_layout = QHBoxLayout()
         mode_layout.addWidget(QLabel("校准模式:"))
@@ -354,24 +139,58 @@ class PitchCorrectionWidget(QWidget):
             if show_comparison and self.processor.backup_audio is not None:
                 # 显示对比图
                 self.canvas.plot_comparison(
-                    self.processor.backup_audio[:min(len(self.processor.backup_audio), 10000)],
-                    self.processor.audio_data[:min(len(self.processor.audio_data), 10000)],
+                    self.processor.backup_audio,
+                    self.processor.audio_data,
                     sample_rate=self.processor.sample_rate,
                     plot_type="waveform"
                 )
             else:
-                self.canvas.plot_waveform(self.processor.audio_data[:10000])  # 只显示前10000个采样点
+                self.canvas.plot_waveform(self.processor.audio_data, self.processor.sample_rate)
+    
+    def preview_pitch_correction(self):
+        """松开滑块时在后台线程中只重新合成预览片段，完成后与原波形对比显示
+        
+        连续松开滑块时只显示最后一次请求的结果；期间音频换了版本则丢弃
+        """
+        audio = self.processor.audio_data
+        if not self.pitch_control or audio is None:
+            return
+        semitones = self.pitch_control.value() / 10.0
+        strength = self.strength_slider.value() / 100.0
+        self._preview_request += 1
+        request = self._preview_request
+        
+        def on_preview(preview):
+            if request != self._preview_request or self.processor.audio_data is not audio or preview is None:
+                return
+            self.canvas.plot_comparison(
+                audio[:len(preview)],
+                preview,
+                sample_rate=self.processor.sample_rate,
+                plot_type="waveform"
+            )
+        
+        if self.preview_bridge is None:
+            self.preview_bridge = callback_bridge(self)
+        deliver = self.preview_bridge.wrap(on_preview)
+        threading.Thread(
+            target=lambda: deliver(self.processor.preview_pitch(semitones, strength, duration=self.PREVIEW_SECONDS)),
+            daemon=True
+        ).start()
     
     def apply_pitch_correction(self):
         """应用音准调整"""
         if self.pitch_control:
-            semitones = self.pitch_control.value() / 10.0  # 假设滑块范围是-120到120，对应-12到12半音
-            # 保存当前处理后的音频作为备份，以便对比
-            if self.processor.audio_data is not None:
-                self.processor.backup_audio = self.processor.audio_data.copy()
-            if self.processor.pitch_correction(semitones):
-                self.update_visualization(show_comparison=True)
-                QMessageBox.information(self, "成功", "音准调整已应用！")
+            semitones = self.pitch_control.value() / 10.0  # 滑块范围是-120到120，对应-12到12半音
+            strength = self.strength_slider.value() / 100.0
+            self.jobs.submit(
+                "音准调整",
+                'pitch_correction',
+                {'semitones': semitones, 'strength': strength},
+                on_success=lambda: (self.update_visualization(show_comparison=True),
+                                    QMessageBox.information(self, "成功", "音准调整已应用！")),
+                on_failure=lambda message: QMessageBox.critical(self, "错误", f"音准调整失败: {message}")
+            )
     
     def toggle_comparison_display(self, state):
         """切换对比显示"""
@@ -393,18 +212,22 @@ class PitchCorrectionWidget(QWidget):
         # 获取反AI痕迹选项
         anti_ai = self.anti_ai_checkbox.isChecked()
         
-        # 保存当前处理后的音频作为备份，以便对比
-        if self.processor.audio_data is not None:
-            self.processor.backup_audio = self.processor.audio_data.copy()
-        
         # 执行智能校准
-        if self.processor.smart_pitch_correction(mode=selected_mode, anti_ai=anti_ai):
+        parallel = self.parallel_checkbox.isChecked()
+        mode_names = ['智能模式', '激进模式', '温和模式', '自适应模式']
+        anti_ai_text = "已启用" if anti_ai else "已禁用"
+        
+        def on_success():
             self.update_visualization(show_comparison=True)
-            mode_names = ['智能模式', '激进模式', '温和模式', '自适应模式']
-            anti_ai_text = "已启用" if anti_ai else "已禁用"
             QMessageBox.information(self, "成功", f"智能音准校准已完成！\n模式: {mode_names[mode_idx]}\n反AI痕迹: {anti_ai_text}")
-        else:
-            QMessageBox.critical(self, "错误", "智能音准校准失败！")
+        
+        self.jobs.submit(
+            "智能音准校准",
+            'smart_pitch_correction',
+            {'mode': selected_mode, 'anti_ai': anti_ai, 'parallel': parallel},
+            on_success=on_success,
+            on_failure=lambda message: QMessageBox.critical(self, "错误", "智能音准校准失败！")
+        )
 
 
 class EQWidget(QWidget):
@@ -413,6 +236,9 @@ class EQWidget(QWidget):
     def __init__(self, processor):
         super().__init__()
         self.processor = processor
+        self.jobs = None  # 后台任务队列，会在主窗口中初始化
+        self.spectrum_bridge = None  # 后台频谱分析结果转回界面线程（首次分析时创建）
+        self._spectrum_request = 0
         self.init_ui()
         
     def init_ui(self):
@@ -460,11 +286,24 @@ class EQWidget(QWidget):
         self.eq_anti_ai_checkbox.setChecked(True)  # 默认启用
         eq_anti_ai_layout.addWidget(self.eq_anti_ai_checkbox)
         
+        # 线性相位选项（母带处理时避免相位失真）
+        self.eq_linear_phase_checkbox = QCheckBox("线性相位")
+        self.eq_linear_phase_checkbox.setToolTip("使用线性相位FFT卷积均衡，不改变相位关系，适合母带处理；"
+                                                 "智能EQ在线性相位下只应用模式的预设曲线，不做反AI痕迹处理")
+        # 线性相位只应用预设曲线，勾选时反AI痕迹选项不可用
+        self.eq_linear_phase_checkbox.toggled.connect(
+            lambda checked: self.eq_anti_ai_checkbox.setEnabled(not checked))
+        eq_anti_ai_layout.addWidget(self.eq_linear_phase_checkbox)
+        
         # 对比显示控制
         eq_comparison_layout = QHBoxLayout()
         self.eq_show_comparison_checkbox = QCheckBox("显示前后对比")
         self.eq_show_comparison_checkbox.stateChanged.connect(self.toggle_eq_comparison_display)
         eq_comparison_layout.addWidget(self.eq_show_comparison_checkbox)
+        self.eq_spectrogram_checkbox = QCheckBox("显示频谱图")
+        self.eq_spectrogram_checkbox.stateChanged.connect(
+            lambda state: self.update_spectrum(show_comparison=self.eq_show_comparison_checkbox.isChecked()))
+        eq_comparison_layout.addWidget(self.eq_spectrogram_checkbox)
         
         # EQ模式选择
         mode_layout = QHBoxLayout()
@@ -485,21 +324,62 @@ class EQWidget(QWidget):
         self.setLayout(layout)
     
     def update_spectrum(self, show_comparison=False):
-        """更新频谱可视化"""
-        if self.processor.audio_data is not None:
-            if show_comparison and self.processor.backup_audio is not None:
-                # 显示对比图
-                self.spectrum_canvas.plot_comparison(
-                    self.processor.backup_audio[:min(len(self.processor.backup_audio), 8192)],
-                    self.processor.audio_data[:min(len(self.processor.audio_data), 8192)],
-                    sample_rate=self.processor.sample_rate,
-                    plot_type="spectrum"
-                )
+        """更新频谱可视化（整段音频的长时平均频谱或频谱图）
+        
+        分析在后台线程中进行并按音频版本缓存，已缓存时立即绘制
+        """
+        audio = self.processor.audio_data
+        if audio is None:
+            return
+        sample_rate = self.processor.sample_rate
+        service = spectrum_service()
+        if self.spectrum_bridge is None:
+            self.spectrum_bridge = callback_bridge(self)
+        self._spectrum_request += 1
+        request = self._spectrum_request
+        
+        def still_current():
+            return request == self._spectrum_request
+        
+        if self.eq_spectrogram_checkbox.isChecked():
+            def on_spectrogram(result):
+                if still_current() and result is not None:
+                    self.spectrum_canvas.plot_spectrogram(*result)
+            service.request_spectrogram(audio, sample_rate, self.spectrum_bridge.wrap(on_spectrogram),
+                                        columns=max(int(self.spectrum_canvas.canvas.width()), 200))
+            return
+        
+        sources = [audio]
+        if show_comparison and self.processor.backup_audio is not None:
+            sources.insert(0, self.processor.backup_audio)
+        results = [service.cached_welch(source, sample_rate) for source in sources]
+        
+        def draw():
+            if len(results) == 2:
+                self.spectrum_canvas.plot_spectrum_comparison(results[0], results[1])
             else:
-                # 计算频谱
-                spectrum = np.abs(np.fft.fft(self.processor.audio_data[:8192]))  # 取前8192个点
-                frequencies = np.fft.fftfreq(len(self.processor.audio_data[:8192]), 1/self.processor.sample_rate)
-                self.spectrum_canvas.plot_spectrum(frequencies[:len(frequencies)//2], spectrum[:len(spectrum)//2])
+                self.spectrum_canvas.plot_spectrum(*results[0])
+        
+        if all(result is not None for result in results):
+            draw()
+            return
+        
+        def on_welch(index, result):
+            if not still_current() or result is None:
+                return
+            results[index] = result
+            if all(r is not None for r in results):
+                draw()
+        
+        for index, source in enumerate(sources):
+            if results[index] is None:
+                service.request_welch(source, sample_rate,
+                                      self.spectrum_bridge.wrap(lambda result, index=index: on_welch(index, result)))
+    
+    def prefetch_spectrum(self):
+        """后台预先分析当前版本的长时平均频谱和频谱图分块"""
+        if self.processor.audio_data is not None:
+            spectrum_service().prefetch(self.processor.audio_data, self.processor.sample_rate)
     
     def apply_eq(self):
         """应用EQ调节"""
@@ -508,13 +388,14 @@ class EQWidget(QWidget):
             gain = control['slider'].value() / 10.0  # 假设滑块范围映射到-12到12dB
             bands.append(gain)
         
-        # 保存当前处理后的音频作为备份，以便对比
-        if self.processor.audio_data is not None:
-            self.processor.backup_audio = self.processor.audio_data.copy()
-        
-        if self.processor.equalize(bands):
-            self.update_spectrum(show_comparison=True)
-            QMessageBox.information(self, "成功", "EQ调节已应用！")
+        self.jobs.submit(
+            "EQ调节",
+            'equalize',
+            {'bands': bands, 'linear_phase': self.eq_linear_phase_checkbox.isChecked()},
+            on_success=lambda: (self.update_spectrum(show_comparison=True),
+                                QMessageBox.information(self, "成功", "EQ调节已应用！")),
+            on_failure=lambda message: QMessageBox.critical(self, "错误", "EQ调节失败！")
+        )
     
     def toggle_eq_comparison_display(self, state):
         """切换EQ对比显示"""
@@ -533,21 +414,25 @@ class EQWidget(QWidget):
         modes = ['smart', 'vocal', 'instrumental', 'mix', 'flat', 'bright', 'warm']
         selected_mode = modes[mode_idx]
         
-        # 获取反AI痕迹选项
-        anti_ai = self.eq_anti_ai_checkbox.isChecked()
-        
-        # 保存当前处理后的音频作为备份，以便对比
-        if self.processor.audio_data is not None:
-            self.processor.backup_audio = self.processor.audio_data.copy()
+        # 获取反AI痕迹选项（线性相位时不可用）
+        linear_phase = self.eq_linear_phase_checkbox.isChecked()
+        anti_ai = self.eq_anti_ai_checkbox.isChecked() and not linear_phase
         
         # 执行智能EQ
-        if self.processor.smart_equalize(mode=selected_mode, anti_ai=anti_ai):
+        mode_names = ['智能模式', '人声模式', '乐器模式', '混音模式', '平坦模式', '明亮模式', '温暖模式']
+        anti_ai_text = "已启用" if anti_ai else ("不适用（线性相位）" if linear_phase else "已禁用")
+        
+        def on_success():
             self.update_spectrum(show_comparison=True)
-            mode_names = ['智能模式', '人声模式', '乐器模式', '混音模式', '平坦模式', '明亮模式', '温暖模式']
-            anti_ai_text = "已启用" if anti_ai else "已禁用"
             QMessageBox.information(self, "成功", f"智能EQ已完成！\n模式: {mode_names[mode_idx]}\n反AI痕迹: {anti_ai_text}")
-        else:
-            QMessageBox.critical(self, "错误", "智能EQ失败！")
+        
+        self.jobs.submit(
+            "智能EQ",
+            'smart_equalize',
+            {'mode': selected_mode, 'anti_ai': anti_ai, 'linear_phase': linear_phase},
+            on_success=on_success,
+            on_failure=lambda message: QMessageBox.critical(self, "错误", "智能EQ失败！")
+        )
 
 
 class RecordingEngineeringWidget(QWidget):
@@ -556,20 +441,53 @@ class RecordingEngineeringWidget(QWidget):
     def __init__(self, processor):
         super().__init__()
         self.processor = processor
-        self.recording_session = None
+        self._recording_session = None
+        self._session_failed = False
+        self._mixdown = None  # 混音引擎（缓存各音轨转换到会话采样率的结果）
+        self._track_store = None
+        self._recorder = None  # 录音直写磁盘
         self.init_ui()
+    
+    @property
+    def recording_session(self):
+        """录音会话在第一次使用时才创建，避免拖慢程序启动"""
+        if self._recording_session is None and not self._session_failed:
+            try:
+                from src.audio_processing.recording import RecordingSession
+                self._recording_session = RecordingSession(sample_rate=self.processor.sample_rate if self.processor.sample_rate else 44100)
+                
+                # 初始化时添加一个默认音轨
+                self._recording_session.multi_track_editor.add_track()
+            except Exception as e:
+                print(f"录音会话初始化失败: {e}")
+                self._session_failed = True
+        return self._recording_session
+    
+    @property
+    def track_store(self):
+        """音轨音频保存在会话目录的磁盘文件中，按需映射到内存"""
+        if self._track_store is None:
+            from src.audio_processing.track_store import TrackStore
+            self._track_store = TrackStore()
+        return self._track_store
+    
+    def mixdown_engine(self):
+        """会话采样率下的混音引擎"""
+        from src.audio_processing.mixdown import MixdownEngine
+        sample_rate = getattr(self.recording_session, 'sample_rate', None) or self.processor.sample_rate or 44100
+        if self._mixdown is None or self._mixdown.sample_rate != sample_rate:
+            self._mixdown = MixdownEngine(sample_rate)
+        return self._mixdown
+    
+    def showEvent(self, event):
+        """首次切换到录音工程标签页时初始化会话并显示音轨列表"""
+        super().showEvent(event)
+        if self._recording_session is None and not self._session_failed:
+            self.update_tracks_list()
         
     def init_ui(self):
         layout = QVBoxLayout()
         
-        # 初始化录音会话
-        from src.audio_processing.recording import RecordingSession
-        from src.audio_processing.audio_to_midi import AudioToMidiConverter
-        self.recording_session = RecordingSession(sample_rate=self.processor.sample_rate if self.processor.sample_rate else 44100)
-        
-        # 初始化时添加一个默认音轨
-        self.recording_session.multi_track_editor.add_track()
-        
         # 录音控制
         recording_layout = QHBoxLayout()
         self.record_btn = QPushButton("开始录音")
@@ -601,24 +519,24 @@ class RecordingEngineeringWidget(QWidget):
         self.tracks_list.setSelectionMode(QAbstractItemView.SingleSelection)  # 单选模式
         layout.addWidget(self.tracks_list)
         
-        # 初始化音轨列表显示
-        self.update_tracks_list()
-        
         # 混音控制
         mix_layout = QHBoxLayout()
         self.mix_btn = QPushButton("混音")
         self.export_btn = QPushButton("导出项目")
         self.midi_btn = QPushButton("转换为MIDI")
+        self.midi_all_btn = QPushButton("全部音轨导出MIDI")
         self.staff_btn = QPushButton("生成五线谱")
         
         self.mix_btn.clicked.connect(self.mix_tracks)
         self.export_btn.clicked.connect(self.export_project)
         self.midi_btn.clicked.connect(self.convert_to_midi)
+        self.midi_all_btn.clicked.connect(self.export_all_midi)
         self.staff_btn.clicked.connect(self.generate_staff)
         
         mix_layout.addWidget(self.mix_btn)
         mix_layout.addWidget(self.export_btn)
         mix_layout.addWidget(self.midi_btn)
+        mix_layout.addWidget(self.midi_all_btn)
         mix_layout.addWidget(self.staff_btn)
         
         layout.addLayout(mix_layout)
@@ -626,26 +544,45 @@ class RecordingEngineeringWidget(QWidget):
         self.setLayout(layout)
     
     def start_recording(self):
-        """开始录音"""
-        if self.recording_session:
-            self.recording_session.recorder.start_recording()
-            QMessageBox.information(self, "提示", "开始录音...")
+        """开始录音：声卡输入经环形缓冲直接写入会话目录的WAV文件"""
+        if not self.recording_session:
+            return
+        if not SOUNDDEVICE_AVAILABLE:
+            QMessageBox.warning(self, "警告", "sounddevice库未安装，无法录音！")
+            return
+        from src.audio_processing.disk_recorder import DiskRecorder
+        sample_rate = getattr(self.recording_session, 'sample_rate', None) or self.processor.sample_rate or 44100
+        if self._recorder is None or self._recorder.sample_rate != sample_rate:
+            self._recorder = DiskRecorder(sample_rate, channels=1, directory=self.track_store.session_dir)
+        try:
+            self._recorder.start()
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"无法开始录音: {str(e)}")
+            return
+        QMessageBox.information(self, "提示", "开始录音...")
     
     def stop_recording(self):
-        """停止录音"""
-        if self.recording_session:
-            recorded_audio = self.recording_session.recorder.stop_recording()
-            if len(recorded_audio) > 0:
+        """停止录音，音轨直接引用录音文件"""
+        if self.recording_session and self._recorder is not None and self._recorder.recording:
+            path = self._recorder.stop()
+            if self._recorder.frames_written > 0:
+                recorded_audio, sample_rate = self.track_store.reference_file(path)
                 # 添加到当前选中的音轨或新建音轨
                 current_track_idx = self.tracks_list.currentRow()
-                if current_track_idx >= 0:
-                    self.recording_session.multi_track_editor.tracks[current_track_idx].audio_data = recorded_audio
-                else:
+                if current_track_idx < 0:
                     # 添加新音轨
-                    track_idx = self.recording_session.multi_track_editor.add_track()
-                    self.recording_session.multi_track_editor.tracks[track_idx].audio_data = recorded_audio
+                    current_track_idx = self.recording_session.multi_track_editor.add_track()
+                track = self.recording_session.multi_track_editor.tracks[current_track_idx]
+                track.audio_data = recorded_audio
+                track.sample_rate = sample_rate
+                track.source_path = path
                 self.update_tracks_list()
-                QMessageBox.information(self, "成功", "录音完成并添加到音轨！")
+                message = "录音完成并添加到音轨！"
+                xruns = self._recorder.xruns()
+                if xruns:
+                    details = "\n".join(f"{seconds:.2f}秒: {reason}" for seconds, reason in xruns[:10])
+                    message += f"\n检测到 {self._recorder.xrun_count} 次xrun（录音可能有断点）:\n{details}"
+                QMessageBox.information(self, "成功", message)
     
     def play_session(self):
         """播放会话"""
@@ -676,8 +613,13 @@ class RecordingEngineeringWidget(QWidget):
             return
             
         try:
-            # 加载音频文件
-            audio_data, sample_rate = librosa.load(filepath, sr=None)
+            # 从文件名提取音轨名称
+            import os
+            filename = os.path.basename(filepath)
+            name_without_ext = os.path.splitext(filename)[0]
+            
+            # 按块解码到会话目录的磁盘文件，音轨只持有只读内存映射
+            audio_data, sample_rate = self.track_store.import_file(filepath, name_without_ext)
             
             # 创建新音轨
             track_idx = self.recording_session.multi_track_editor.add_track()
@@ -687,10 +629,6 @@ class RecordingEngineeringWidget(QWidget):
             track.audio_data = audio_data
             track.sample_rate = sample_rate
             
-            # 从文件名提取音轨名称
-            import os
-            filename = os.path.basename(filepath)
-            name_without_ext = os.path.splitext(filename)[0]
             track.name = f"{name_without_ext}"[:20]  # 限制名称长度
             
             # 更新界面
@@ -712,16 +650,18 @@ class RecordingEngineeringWidget(QWidget):
                 self.tracks_list.addItem(f"音轨 {i+1}: {track.name} ({'静音' if track.muted else '正常'})")
     
     def mix_tracks(self):
-        """混音"""
+        """混音：各音轨按音量、声像、静音/独奏按块累加为立体声，结果写入会话目录的磁盘文件"""
         if self.recording_session:
-            mixed_audio = self.recording_session.multi_track_editor.mix_down()
-            if len(mixed_audio) > 0:
-                # 更新处理器的音频数据
-                if len(mixed_audio.shape) > 1:
-                    # 立体声转单声道用于后续处理
-                    self.processor.audio_data = np.mean(mixed_audio, axis=1)
-                else:
-                    self.processor.audio_data = mixed_audio
+            engine = self.mixdown_engine()
+            tracks = self.recording_session.multi_track_editor.tracks
+            length = engine.output_length(tracks)
+            if length > 0:
+                output = self.track_store.allocate(length, 2, 'mixdown')
+                engine.mix(tracks, out=output)
+                mixed_audio = self.track_store.finish(output)
+                # 更新处理器的音频数据（保留立体声）
+                self.processor.sample_rate = engine.sample_rate
+                self.processor.audio_data = mixed_audio
                 QMessageBox.information(self, "成功", f"混音完成！输出长度: {len(mixed_audio)} 样本")
             
     def export_project(self):
@@ -735,10 +675,12 @@ class RecordingEngineeringWidget(QWidget):
             )
             
             if filepath:
-                if self.recording_session.multi_track_editor.export_project(filepath):
+                try:
+                    # 逐块混音并写入文件，不在内存中生成整段混音
+                    self.mixdown_engine().mix_to_file(self.recording_session.multi_track_editor.tracks, filepath)
                     QMessageBox.information(self, "成功", "项目已导出！")
-                else:
-                    QMessageBox.critical(self, "错误", "导出失败！")
+                except Exception as e:
+                    QMessageBox.critical(self, "错误", f"导出失败: {str(e)}")
 
     def convert_to_midi(self):
         """将音轨转换为MIDI文件"""
@@ -760,6 +702,7 @@ class RecordingEngineeringWidget(QWidget):
                     if midi_filepath:
                         try:
                             # 创建MIDI转换器
+                            from src.audio_processing.audio_to_midi import AudioToMidiConverter
                             converter = AudioToMidiConverter(sample_rate=track.sample_rate)
                             
                             # 执行转换
@@ -782,6 +725,52 @@ class RecordingEngineeringWidget(QWidget):
         else:
             QMessageBox.warning(self, "警告", "没有可用的音轨数据！")
 
+    def export_all_midi(self):
+        """把所有音轨转写到一个多轨MIDI文件（各音轨在后台进程中并行分析）"""
+        if not self.recording_session or not any(
+                track.audio_data is not None and len(track.audio_data) > 0
+                for track in self.recording_session.multi_track_editor.tracks):
+            QMessageBox.warning(self, "警告", "没有可用的音轨数据！")
+            return
+        midi_filepath, _ = QFileDialog.getSaveFileName(
+            self,
+            "保存多轨MIDI文件",
+            "",
+            "MIDI文件 (*.mid);;所有文件 (*.*)"
+        )
+        if not midi_filepath:
+            return
+        
+        from src.audio_processing.audio_to_midi import export_tracks_to_midi
+        tracks = list(self.recording_session.multi_track_editor.tracks)
+        bridge = callback_bridge(self)
+        self.midi_all_btn.setEnabled(False)
+        self.midi_all_btn.setText("正在分析音轨...")
+        
+        def on_progress(counts):
+            self.midi_all_btn.setText(f"正在分析音轨 {counts[0]}/{counts[1]}")
+        
+        def on_done(result):
+            self.midi_all_btn.setEnabled(True)
+            self.midi_all_btn.setText("全部音轨导出MIDI")
+            bridge.deleteLater()
+            if isinstance(result, Exception):
+                QMessageBox.critical(self, "错误", f"MIDI导出过程中出现错误: {str(result)}")
+                return
+            summary = "\n".join(f"{name}: {count} 个音符" for name, count in result)
+            QMessageBox.information(self, "成功", f"已导出 {len(result)} 个音轨的MIDI文件！\n保存至: {midi_filepath}\n{summary}")
+        
+        progress = bridge.wrap(on_progress)
+        done = bridge.wrap(on_done)
+        
+        def work():
+            try:
+                done(export_tracks_to_midi(tracks, midi_filepath, progress=lambda *counts: progress(counts)))
+            except Exception as e:
+                done(e)
+        
+        threading.Thread(target=work, name='midi-export', daemon=True).start()
+
     def generate_staff(self):
         """生成五线谱图片"""
         if self.recording_session and self.recording_session.multi_track_editor.tracks:
@@ -824,7 +813,9 @@ class RecordingEngineeringWidget(QWidget):
                             )
                             
                             if success:
-                                QMessageBox.information(self, "成功", f"音频已成功转换为五线谱图片！\n保存至: {staff_filepath}\n格式: {format_type.upper()}")
+                                pages = generator.last_paths
+                                location = staff_filepath if len(pages) <= 1 else f"{pages[0]} 等 {len(pages)} 页"
+                                QMessageBox.information(self, "成功", f"音频已成功转换为五线谱图片！\n保存至: {location}\n格式: {format_type.upper()}")
                             else:
                                 QMessageBox.critical(self, "错误", "五线谱图片生成失败！")
                         except Exception as e:
@@ -843,6 +834,7 @@ class MasteringWidget(QWidget):
     def __init__(self, processor):
         super().__init__()
         self.processor = processor
+        self.jobs = None  # 后台任务队列，会在主窗口中初始化
         self.init_ui()
         
     def init_ui(self):
@@ -897,6 +889,10 @@ class MasteringWidget(QWidget):
         self.preset_combo = QComboBox()
         self.preset_combo.addItems(["平衡", "响亮", "动态"])
         preset_layout.addWidget(self.preset_combo)
+        preset_layout.addWidget(QLabel("多频段压缩:"))
+        self.multiband_combo = QComboBox()
+        self.multiband_combo.addItems(["关闭", "3段", "4段", "5段"])
+        preset_layout.addWidget(self.multiband_combo)
         
         layout.addLayout(preset_layout)
         
@@ -948,71 +944,50 @@ class MasteringWidget(QWidget):
     
     def apply_mastering(self):
         """应用母带处理"""
-        try:
-            # 导入母带处理模块
-            from src.effects.mastering import MasteringProcessor, Compressor, Limiter, StereoEnhancer
-            
-            # 保存当前处理后的音频作为备份，以便对比
-            if self.processor.audio_data is not None:
-                self.processor.backup_audio = self.processor.audio_data.copy()
-            
-            # 创建母带处理器
-            mastering_proc = MasteringProcessor(sample_rate=self.processor.sample_rate)
-            
-            # 获取参数值
-            threshold = self.compressor_threshold.value()
-            ceiling = self.limiter_ceiling.value()
-            stereo_width = self.stereo_width.value() / 100.0  # 转换为比例
-            
-            # 设置参数
-            mastering_proc.chain.compressor = Compressor(
-                threshold_db=threshold,
-                sample_rate=self.processor.sample_rate
-            )
-            mastering_proc.chain.limiter = Limiter(
-                threshold_db=ceiling,
+        if self.processor.audio_data is None:
+            QMessageBox.warning(self, "警告", "没有音频数据可供处理！")
+            return
+        
+        # 获取参数值
+        threshold = self.compressor_threshold.value()
+        ceiling = self.limiter_ceiling.value()
+        stereo_width = self.stereo_width.value() / 100.0  # 转换为比例
+        
+        # 获取预设选择
+        preset_idx = self.preset_combo.currentIndex()
+        presets = ['balanced', 'loud', 'dynamic']
+        selected_preset = presets[preset_idx]
+        multiband_bands = [0, 3, 4, 5][self.multiband_combo.currentIndex()]
+        
+        def on_success():
+            # 更新预览
+            self.mastering_preview.plot_comparison(
+                self.processor.backup_audio,
+                self.processor.audio_data,
                 sample_rate=self.processor.sample_rate,
-                high_freq_protection=False  # 暂时关闭避免新问题
+                plot_type="waveform"
+            )
+            QMessageBox.information(
+                self, 
+                "成功", 
+                f"母带处理已完成！\n参数: 阈值={threshold}dB, 限制={ceiling}dB, 立体声宽度={stereo_width:.1f}x"
+                + (f", 多频段压缩={multiband_bands}段" if multiband_bands else "")
             )
-            mastering_proc.chain.stereo_enhancer = StereoEnhancer(width_factor=stereo_width)
-            
-            # 获取预设选择
-            preset_idx = self.preset_combo.currentIndex()
-            presets = ['balanced', 'loud', 'dynamic']
-            selected_preset = presets[preset_idx]
-            
-            # 应用母带处理
-            if self.processor.audio_data is not None:
-                processed_audio = mastering_proc.process_audio(
-                    self.processor.audio_data, 
-                    preset=selected_preset
-                )
-                
-                # 防止处理累积误差，确保数值稳定
-                processed_audio = np.clip(processed_audio, -1.0, 1.0)
-                
-                self.processor.audio_data = processed_audio
-                
-                # 更新预览
-                self.mastering_preview.plot_comparison(
-                    self.processor.backup_audio[:min(len(self.processor.backup_audio), 10000)],
-                    self.processor.audio_data[:min(len(self.processor.audio_data), 10000)],
-                    sample_rate=self.processor.sample_rate,
-                    plot_type="waveform"
-                )
-                
-                QMessageBox.information(
-                    self, 
-                    "成功", 
-                    f"母带处理已完成！\n参数: 阈值={threshold}dB, 限制={ceiling}dB, 立体声宽度={stereo_width:.1f}x"
-                )
-            else:
-                QMessageBox.warning(self, "警告", "没有音频数据可供处理！")
         
-        except ImportError:
-            QMessageBox.critical(self, "错误", "母带处理模块不可用，请检查依赖！")
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"母带处理失败: {str(e)}")
+        def on_failure(message):
+            if message.startswith(('ImportError', 'ModuleNotFoundError')):
+                QMessageBox.critical(self, "错误", "母带处理模块不可用，请检查依赖！")
+            else:
+                QMessageBox.critical(self, "错误", f"母带处理失败: {message}")
+        
+        self.jobs.submit(
+            "母带处理",
+            'master',
+            {'threshold_db': threshold, 'ceiling_db': ceiling, 'stereo_width': stereo_width,
+             'preset': selected_preset, 'multiband_bands': multiband_bands},
+            on_success=on_success,
+            on_failure=on_failure
+        )
     
     def toggle_master_comparison_display(self, state):
         """切换母带对比显示"""
@@ -1020,23 +995,15 @@ class MasteringWidget(QWidget):
             if state == Qt.Checked:
                 # 显示对比图
                 self.mastering_preview.plot_comparison(
-                    self.processor.backup_audio[:min(len(self.processor.backup_audio), 10000)],
-                    self.processor.audio_data[:min(len(self.processor.audio_data), 10000)],
+                    self.processor.backup_audio,
+                    self.processor.audio_data,
                     sample_rate=self.processor.sample_rate,
                     plot_type="waveform"
                 )
             else:
                 # 显示处理后的音频
-                time_axis = np.linspace(0, len(self.processor.audio_data)/self.processor.sample_rate, 
-                                      num=min(len(self.processor.audio_data), 10000))
-                audio_slice = self.processor.audio_data[:min(len(self.processor.audio_data), 10000)]
-                self.mastering_preview.figure.clear()
-                ax = self.mastering_preview.figure.add_subplot(111)
-                ax.plot(time_axis, audio_slice)
-                ax.set_title("音频波形预览")
-                ax.set_xlabel("时间 (秒)")
-                ax.set_ylabel("幅度")
-                self.mastering_preview.canvas.draw()
+                self.mastering_preview.plot_waveform(
+                    self.processor.audio_data, self.processor.sample_rate, title="音频波形预览")
     
     def apply_smart_mastering(self):
         """应用智能母带处理"""
@@ -1045,24 +1012,29 @@ class MasteringWidget(QWidget):
         modes = ['smart', 'loud', 'dynamic', 'radio', 'streaming', 'vinyl']
         selected_mode = modes[mode_idx]
         
-        # 保存当前处理后的音频作为备份，以便对比
-        if self.processor.audio_data is not None:
-            self.processor.backup_audio = self.processor.audio_data.copy()
+        mode_names = ['智能模式', '响亮模式', '动态模式', '广播模式', '流媒体模式', '黑胶模式']
         
-        # 执行智能母带处理
-        if self.processor.smart_master(mode=selected_mode):
+        def on_success():
             # 更新预览
             self.mastering_preview.plot_comparison(
-                self.processor.backup_audio[:min(len(self.processor.backup_audio), 10000)],
-                self.processor.audio_data[:min(len(self.processor.audio_data), 10000)],
+                self.processor.backup_audio,
+                self.processor.audio_data,
                 sample_rate=self.processor.sample_rate,
                 plot_type="waveform"
             )
-            
-            mode_names = ['智能模式', '响亮模式', '动态模式', '广播模式', '流媒体模式', '黑胶模式']
-            QMessageBox.information(self, "成功", f"智能母带处理已完成！\n使用模式: {mode_names[mode_idx]}")
-        else:
-            QMessageBox.critical(self, "错误", "智能母带处理失败！")
+            from src.audio_processing.loudness import MASTER_LOUDNESS_TARGETS
+            target_lufs, ceiling_db = MASTER_LOUDNESS_TARGETS[selected_mode]
+            QMessageBox.information(self, "成功", f"智能母带处理已完成！\n使用模式: {mode_names[mode_idx]}\n"
+                                                f"目标响度: {target_lufs:g} LUFS, 真峰值上限: {ceiling_db:g} dBTP")
+        
+        # 执行智能母带处理
+        self.jobs.submit(
+            "智能母带处理",
+            'smart_master',
+            {'mode': selected_mode},
+            on_success=on_success,
+            on_failure=lambda message: QMessageBox.critical(self, "错误", "智能母带处理失败！")
+        )
 
 
 class MatplotlibWidget(QWidget):
@@ -1071,122 +1043,152 @@ class MatplotlibWidget(QWidget):
     def __init__(self):
         super().__init__()
         
-        self.figure = Figure(figsize=(10, 6))
-        self.canvas = FigureCanvas(self.figure)
+        # 图表在第一次绘图时才创建，避免启动时加载matplotlib
+        self._figure = None
+        self._canvas = None
+        self._renderer = None
         
         layout = QVBoxLayout()
-        layout.addWidget(self.canvas)
         self.setLayout(layout)
     
-    def plot_waveform(self, audio_data):
-        """绘制波形图"""
-        self.figure.clear()
-        ax = self.figure.add_subplot(111)
-        ax.plot(audio_data)
-        ax.set_title("音频波形")
-        ax.set_xlabel("采样点")
-        ax.set_ylabel("幅度")
-        self.canvas.draw()
-    
-    def plot_spectrum(self, frequencies, spectrum):
-        """绘制频谱图"""
-        self.figure.clear()
-        ax = self.figure.add_subplot(111)
-        ax.plot(frequencies, spectrum)
-        ax.set_title("音频频谱")
-        ax.set_xlabel("频率 (Hz)")
-        ax.set_ylabel("幅度")
-        ax.set_xlim([0, 5000])  # 只显示到5kHz
-        self.canvas.draw()
+    def _create_canvas(self):
+        """创建matplotlib图表和画布"""
+        Figure, FigureCanvas = load_matplotlib_backend()
+        self._figure = Figure(figsize=(10, 6))
+        self._canvas = FigureCanvas(self._figure)
+        self.layout().addWidget(self._canvas)
+    
+    @property
+    def figure(self):
+        if self._figure is None:
+            self._create_canvas()
+        return self._figure
+    
+    @property
+    def canvas(self):
+        if self._canvas is None:
+            self._create_canvas()
+        return self._canvas
+    
+    @property
+    def renderer(self):
+        """增量渲染器：布局不变时沿用坐标轴和图形对象，只替换数据"""
+        if self._renderer is None:
+            from src.ui.plot_renderer import PlotRenderer
+            self._renderer = PlotRenderer(self.figure, self.canvas)
+        return self._renderer
+    
+    def clear_figure(self):
+        """清空图表及其波形包络"""
+        self.renderer.reset()
+    
+    def set_playhead(self, seconds):
+        """移动时间轴图表上的播放头（None时隐藏）"""
+        if self._renderer is not None:
+            self._renderer.set_playhead(seconds)
+    
+    @staticmethod
+    def _build_axes(titles, xlabel, ylabel, legends=None, log_x=False):
+        """返回创建上下排列、横轴联动的一组坐标轴的函数（布局变化时由渲染器调用）"""
+        def build(figure):
+            from matplotlib.patches import Patch
+            axes = []
+            for i, title in enumerate(titles):
+                ax = figure.add_subplot(len(titles), 1, i + 1, sharex=axes[0] if axes else None)
+                if log_x:
+                    ax.set_xscale('log')
+                ax.set_title(title)
+                ax.set_xlabel(xlabel)
+                ax.set_ylabel(ylabel)
+                ax.grid(True, which='both', alpha=0.3)
+                if legends and legends[i]:
+                    ax.legend(handles=[Patch(color=color, label=label) for label, color in legends[i]])
+                axes.append(ax)
+            return axes
+        return build
+    
+    def plot_waveform(self, audio_data, sample_rate=None, title="音频波形"):
+        """绘制整段波形图（给定采样率时横轴为秒）"""
+        xlabel = "时间 (秒)" if sample_rate else "采样点"
+        ax, = self.renderer.layout(('waveform', xlabel), self._build_axes([title], xlabel, "幅度"), time_axes=True)
+        ax.set_title(title)
+        self.renderer.waveform(0, audio_data, sample_rate)
+        self.renderer.draw()
+    
+    def _set_spectrum(self, index, frequencies, spectrum_db, name='main', **style):
+        """在对数频率轴上显示dB频谱（20Hz到奈奎斯特频率），沿用已有曲线"""
+        self.renderer.line(index, frequencies[1:], spectrum_db[1:], name=name, **style)
+        ax = self.renderer.axes[index]
+        ax.set_xlim([20, max(frequencies[-1], 21)])
+        ax.relim()
+        ax.autoscale_view(scalex=False)
+    
+    def plot_spectrum(self, frequencies, spectrum_db, title="音频频谱（整段平均）"):
+        """绘制频谱图（输入为dB）"""
+        ax, = self.renderer.layout(('spectrum',), self._build_axes([title], "频率 (Hz)", "幅度 (dB)", log_x=True))
+        ax.set_title(title)
+        self._set_spectrum(0, frequencies, spectrum_db, color='C0')
+        self.renderer.draw()
+    
+    def plot_spectrum_comparison(self, original, processed):
+        """绘制两个 (频率, dB) 频谱的上下对比图"""
+        self.renderer.layout(('spectrum_pair',), self._build_axes(
+            ["原始音频频谱", "处理后音频频谱"], "频率 (Hz)", "幅度 (dB)",
+            legends=[[("原始音频", 'blue')], [("处理后音频", 'red')]], log_x=True))
+        self._set_spectrum(0, *original, color='blue')
+        self._set_spectrum(1, *processed, color='red')
+        self.renderer.draw()
+    
+    def plot_spectrogram(self, times, frequencies, image):
+        """绘制频谱图（时间-频率-dB），显示最高值以下80dB的范围"""
+        ax, = self.renderer.layout(('spectrogram',), self._build_axes(["频谱图"], "时间 (秒)", "频率 (Hz)"),
+                                   time_axes=True)
+        end = times[-1] + (times[1] - times[0] if len(times) > 1 else 0)
+        top = float(image.max()) if image.size else 0.0
+        artist = self.renderer.image(0, image, [times[0], end, frequencies[0], frequencies[-1]], (top - 80, top),
+                                     origin='lower', aspect='auto', cmap='magma', interpolation='nearest')
+        if artist.colorbar is None:
+            self.figure.colorbar(artist, ax=ax, label="dB")
+        ax.set_xlim(times[0], end)
+        ax.set_ylim(frequencies[0], frequencies[-1])
+        self.renderer.draw()
     
     def plot_comparison(self, original_audio, processed_audio, sample_rate=22050, plot_type="waveform"):
         """绘制原始音频和处理后音频的对比图"""
-        self.figure.clear()
-        
         if plot_type == "waveform":
-            # 绘制波形对比
-            ax1 = self.figure.add_subplot(211)
-            time_axis = np.linspace(0, len(original_audio)/sample_rate, num=len(original_audio))
-            ax1.plot(time_axis, original_audio, label="原始音频", color='blue')
-            ax1.set_title("原始音频波形")
-            ax1.set_xlabel("时间 (秒)")
-            ax1.set_ylabel("幅度")
-            ax1.legend()
-            ax1.grid(True)
-            
-            ax2 = self.figure.add_subplot(212)
-            time_axis = np.linspace(0, len(processed_audio)/sample_rate, num=len(processed_audio))
-            ax2.plot(time_axis, processed_audio, label="处理后音频", color='red')
-            ax2.set_title("处理后音频波形")
-            ax2.set_xlabel("时间 (秒)")
-            ax2.set_ylabel("幅度")
-            ax2.legend()
-            ax2.grid(True)
+            # 整段波形对比，两图横轴联动缩放
+            self.renderer.layout(('waveform_pair',), self._build_axes(
+                ["原始音频波形", "处理后音频波形"], "时间 (秒)", "幅度",
+                legends=[[("原始音频", 'blue')], [("处理后音频", 'red')]]), time_axes=True)
+            self.renderer.waveform(0, original_audio, sample_rate, color='blue')
+            self.renderer.waveform(1, processed_audio, sample_rate, color='red')
+            self.renderer.draw()
             
         elif plot_type == "spectrum":
-            # 计算频谱
-            original_spectrum = np.abs(np.fft.fft(original_audio[:8192]))
-            processed_spectrum = np.abs(np.fft.fft(processed_audio[:8192]))
-            freqs = np.fft.fftfreq(len(original_audio[:8192]), 1/sample_rate)
-            
-            ax1 = self.figure.add_subplot(211)
-            ax1.plot(freqs[:len(freqs)//2], 20*np.log10(original_spectrum[:len(original_spectrum)//2]+1e-10), 
-                   label="原始音频", color='blue')
-            ax1.set_title("原始音频频谱")
-            ax1.set_xlabel("频率 (Hz)")
-            ax1.set_ylabel("幅度 (dB)")
-            ax1.set_xlim([0, 5000])
-            ax1.legend()
-            ax1.grid(True)
-            
-            ax2 = self.figure.add_subplot(212)
-            ax2.plot(freqs[:len(freqs)//2], 20*np.log10(processed_spectrum[:len(processed_spectrum)//2]+1e-10), 
-                   label="处理后音频", color='red')
-            ax2.set_title("处理后音频频谱")
-            ax2.set_xlabel("频率 (Hz)")
-            ax2.set_ylabel("幅度 (dB)")
-            ax2.set_xlim([0, 5000])
-            ax2.legend()
-            ax2.grid(True)
-        
-        self.figure.tight_layout()
-        self.canvas.draw()
+            # 整段音频的长时平均频谱（按版本缓存）
+            self.plot_spectrum_comparison(spectrum_service().welch(original_audio, sample_rate),
+                                          spectrum_service().welch(processed_audio, sample_rate))
     
     def plot_overlay(self, original_audio, processed_audio, sample_rate=22050, plot_type="waveform"):
         """绘制原始音频和处理后音频的叠加图"""
-        self.figure.clear()
-        ax = self.figure.add_subplot(111)
-        
+        legend = [[("原始音频", 'blue'), ("处理后音频", 'red')]]
         if plot_type == "waveform":
-            # 绘制波形叠加
-            time_axis_orig = np.linspace(0, len(original_audio)/sample_rate, num=len(original_audio))
-            time_axis_proc = np.linspace(0, len(processed_audio)/sample_rate, num=len(processed_audio))
-            
-            ax.plot(time_axis_orig, original_audio, label="原始音频", alpha=0.7, color='blue')
-            ax.plot(time_axis_proc, processed_audio, label="处理后音频", alpha=0.7, color='red')
-            ax.set_title("音频波形对比（叠加）")
-            ax.set_xlabel("时间 (秒)")
-            ax.set_ylabel("幅度")
+            # 整段波形包络叠加
+            self.renderer.layout(('waveform_overlay',), self._build_axes(
+                ["音频波形对比（叠加）"], "时间 (秒)", "幅度", legends=legend), time_axes=True)
+            self.renderer.waveform(0, original_audio, sample_rate, name='original', color='blue')
+            self.renderer.waveform(0, processed_audio, sample_rate, name='processed', color='red')
         
         elif plot_type == "spectrum":
-            # 计算频谱并绘制叠加
-            original_spectrum = np.abs(np.fft.fft(original_audio[:8192]))
-            processed_spectrum = np.abs(np.fft.fft(processed_audio[:8192]))
-            freqs = np.fft.fftfreq(len(original_audio[:8192]), 1/sample_rate)
-            
-            ax.plot(freqs[:len(freqs)//2], 20*np.log10(original_spectrum[:len(original_spectrum)//2]+1e-10), 
-                   label="原始音频", alpha=0.7, color='blue')
-            ax.plot(freqs[:len(freqs)//2], 20*np.log10(processed_spectrum[:len(processed_spectrum)//2]+1e-10), 
-                   label="处理后音频", alpha=0.7, color='red')
-            ax.set_title("音频频谱对比（叠加）")
-            ax.set_xlabel("频率 (Hz)")
-            ax.set_ylabel("幅度 (dB)")
-            ax.set_xlim([0, 5000])
-        
-        ax.legend()
-        ax.grid(True)
-        self.figure.tight_layout()
-        self.canvas.draw()
+            # 整段音频的长时平均频谱叠加（按版本缓存）
+            self.renderer.layout(('spectrum_overlay',), self._build_axes(
+                ["音频频谱对比（叠加）"], "频率 (Hz)", "幅度 (dB)", legends=legend, log_x=True))
+            self._set_spectrum(0, *spectrum_service().welch(original_audio, sample_rate), name='original',
+                               alpha=0.7, color='blue')
+            self._set_spectrum(0, *spectrum_service().welch(processed_audio, sample_rate), name='processed',
+                               alpha=0.7, color='red')
+        
+        self.renderer.draw()
 
 
 class MainWindow(QMainWindow):
@@ -1195,11 +1197,15 @@ class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.processor = AudioProcessor()
+        # 处理操作在后台进程中排队执行，界面线程不做DSP运算
+        from src.ui.jobs import ProcessingJobQueue
+        self.jobs = ProcessingJobQueue(self.processor, self)
         self.player = None
         self.current_playback_mode = "processed"  # 默认播放处理后音频
         self.compare_mode = None
         self.init_ui()
-        self.init_player()
+        # 播放器（sounddevice/PortAudio）在窗口显示后再初始化
+        QTimer.singleShot(0, self.init_player)
         
     def init_ui(self):
         self.setWindowTitle("AI音乐后期工程师 - 音乐修音软件")
@@ -1237,13 +1243,32 @@ class MainWindow(QMainWindow):
         self.compare_action.triggered.connect(self.toggle_global_comparison)
         view_menu.addAction(self.compare_action)
         
+        compare_version_action = QAction('选择对比版本...', self)
+        compare_version_action.triggered.connect(self.select_compare_version)
+        view_menu.addAction(compare_version_action)
+        
         # 工具菜单
         tools_menu = menubar.addMenu('工具')
         
+        undo_action = QAction('撤销', self)
+        undo_action.setShortcut('Ctrl+Z')
+        undo_action.triggered.connect(self.undo_audio)
+        tools_menu.addAction(undo_action)
+        
+        redo_action = QAction('重做', self)
+        redo_action.setShortcut('Ctrl+Y')
+        redo_action.triggered.connect(self.redo_audio)
+        tools_menu.addAction(redo_action)
+        
         reset_action = QAction('重置音频', self)
         reset_action.triggered.connect(self.reset_audio)
         tools_menu.addAction(reset_action)
         
+        tools_menu.addSeparator()
+        self.calibrate_action = QAction('声卡延迟校准...', self)
+        self.calibrate_action.triggered.connect(self.calibrate_audio)
+        tools_menu.addAction(self.calibrate_action)
+        
         # 创建选项卡
         self.tabs = QTabWidget()
         self.pitch_tab = PitchCorrectionWidget(self.processor)
@@ -1256,6 +1281,9 @@ class MainWindow(QMainWindow):
         self.tabs.addTab(self.recording_tab, "录音工程")
         self.tabs.addTab(self.mastering_tab, "母带制作")
         
+        for tab in (self.pitch_tab, self.eq_tab, self.mastering_tab):
+            tab.jobs = self.jobs
+        
         main_layout.addWidget(self.tabs)
         
         # 状态栏
@@ -1263,6 +1291,21 @@ class MainWindow(QMainWindow):
         self.setStatusBar(self.status_bar)
         self.status_bar.showMessage("就绪")
         
+        # 后台任务进度和取消按钮（空闲时隐藏）
+        self.job_progress_bar = QProgressBar()
+        self.job_progress_bar.setMaximumWidth(200)
+        self.job_progress_bar.setVisible(False)
+        self.status_bar.addPermanentWidget(self.job_progress_bar)
+        self.cancel_job_btn = QPushButton("取消")
+        self.cancel_job_btn.setVisible(False)
+        self.cancel_job_btn.clicked.connect(self.jobs.cancel)
+        self.status_bar.addPermanentWidget(self.cancel_job_btn)
+        self.jobs.job_started.connect(self.on_job_started)
+        self.jobs.job_progress.connect(self.on_job_progress)
+        self.jobs.job_finished.connect(self.on_job_finished)
+        self.jobs.job_cancelled.connect(self.on_job_cancelled)
+        self.jobs.idle.connect(self.on_jobs_idle)
+        
         # 初始化控件引用
         self.init_controls()
         
@@ -1328,6 +1371,10 @@ class MainWindow(QMainWindow):
         self.total_time_label = QLabel("00:00")
         time_layout.addWidget(self.current_time_label)
         time_layout.addStretch()
+        # 播放时的实时响度（EBU R128）
+        self.loudness_label = QLabel("")
+        time_layout.addWidget(self.loudness_label)
+        time_layout.addStretch()
         time_layout.addWidget(self.total_time_label)
         
         # 组装播放控制界面
@@ -1349,8 +1396,9 @@ class MainWindow(QMainWindow):
         """初始化音频播放器"""
         if SOUNDDEVICE_AVAILABLE:
             try:
-                from src.audio_processing.player import AudioPlayer
-                self.player = AudioPlayer(sample_rate=44100)
+                from src.ui.playback import ABPlayer
+                # 音源采样率随加载的音频更新；声卡输出流按设备默认采样率打开，必要时在回调中重采样
+                self.player = ABPlayer(sample_rate=44100, parent=self)
                 
                 # 连接播放器信号
                 self.player.playback_started.connect(self.on_playback_started)
@@ -1359,6 +1407,7 @@ class MainWindow(QMainWindow):
                 self.player.playback_finished.connect(self.on_playback_finished)
                 self.player.position_changed.connect(self.on_position_changed)
                 self.player.duration_changed.connect(self.on_duration_changed)
+                self.player.loudness_changed.connect(self.on_loudness_changed)
                 
                 print("音频播放器初始化成功")
             except Exception as e:
@@ -1375,6 +1424,8 @@ class MainWindow(QMainWindow):
         self.pitch_slider.setRange(-120, 120)  # -12到12半音，乘以10
         self.pitch_slider.setValue(0)
         self.pitch_slider.valueChanged.connect(self.on_pitch_changed)
+        self.pitch_slider.sliderReleased.connect(self.pitch_tab.preview_pitch_correction)
+        self.pitch_tab.pitch_control = self.pitch_slider
     
     # 播放控制方法
     def play_audio(self):
@@ -1386,8 +1437,8 @@ class MainWindow(QMainWindow):
         # 检查是否有处理痕迹
         has_processing = not np.array_equal(self.processor.audio_data, self.processor.original_audio)
         
-        # 加载当前音频数据
-        if self.player.load_audio(self.processor.audio_data, self.processor.sample_rate):
+        # 处理后和原始音频同时交给播放器，对比时无需重新加载
+        if self.sync_player():
             self.player.play()
             
             # 显示处理状态
@@ -1397,6 +1448,15 @@ class MainWindow(QMainWindow):
             else:
                 self.status_bar.showMessage("播放原始音频")
     
+    def sync_player(self, restart=False):
+        """把当前版本和原始音频交给播放器（只读视图，不复制）；默认保留播放位置"""
+        if not self.player or self.processor.audio_data is None:
+            return False
+        if restart:
+            self.player.stop()
+        return self.player.set_sources(self.processor.audio_data, self.processor.original_audio,
+                                       self.processor.sample_rate)
+    
     def pause_audio(self):
         """暂停音频"""
         if self.player:
@@ -1418,23 +1478,19 @@ class MainWindow(QMainWindow):
         if not self.player or self.processor.audio_data is None or self.processor.original_audio is None:
             return
             
-        # 切换播放源
+        # 切换播放源：在当前播放位置交叉淡化，不重新加载、不重新开始
         if hasattr(self, 'compare_mode') and self.compare_mode == "processed":
             # 切换到原始音频
-            self.player.load_audio(self.processor.original_audio, self.processor.sample_rate)
+            self.player.switch_to(1)
             self.compare_mode = "original"
             self.compare_btn.setText("播放处理后")
             self.status_bar.showMessage("播放原始音频 - 点击对比播放切换回处理后")
         else:
             # 切换到处理后音频
-            self.player.load_audio(self.processor.audio_data, self.processor.sample_rate)
+            self.player.switch_to(0)
             self.compare_mode = "processed"
             self.compare_btn.setText("播放原始")
             self.status_bar.showMessage("播放处理后音频 - 点击对比播放切换回原始")
-            
-        # 重新开始播放
-        if self.player.is_playing_state() or self.player.is_paused_state():
-            self.player.play()
     
     def on_playback_mode_changed(self, index):
         """播放模式改变事件"""
@@ -1445,11 +1501,11 @@ class MainWindow(QMainWindow):
         self.current_playback_mode = modes[index]
         
         if index == 0:  # 处理后音频
-            self.player.load_audio(self.processor.audio_data, self.processor.sample_rate)
+            self.player.switch_to(0)
             self.status_bar.showMessage("已切换到处理后音频")
         elif index == 1:  # 原始音频
             if self.processor.original_audio is not None:
-                self.player.load_audio(self.processor.original_audio, self.processor.sample_rate)
+                self.player.switch_to(1)
                 self.status_bar.showMessage("已切换到原始音频")
         elif index == 2:  # A/B对比
             self.status_bar.showMessage("A/B对比模式: 自动切换处理前后音频")
@@ -1518,6 +1574,8 @@ class MainWindow(QMainWindow):
         if hasattr(self, 'compare_mode'):
             delattr(self, 'compare_mode')
             self.compare_btn.setText("对比播放")
+            if self.player:
+                self.player.switch_to(0)
         
         self.status_bar.showMessage("就绪")
     
@@ -1538,6 +1596,18 @@ class MainWindow(QMainWindow):
             # 更新时间显示
             current_seconds = self.player.get_position_seconds()
             self.current_time_label.setText(self.format_time(current_seconds))
+            
+            # 波形图上的播放头（只重绘播放头本身）
+            self.pitch_tab.canvas.set_playhead(current_seconds)
+            self.mastering_tab.mastering_preview.set_playhead(current_seconds)
+    
+    def on_loudness_changed(self, loudness):
+        """实时响度表：瞬时、短期、整体响度和真峰值"""
+        def text(value):
+            return f"{value:.1f}" if np.isfinite(value) else "--"
+        self.loudness_label.setText(
+            f"M {text(loudness['momentary'])}  S {text(loudness['short_term'])}  "
+            f"I {text(loudness['integrated'])} LUFS  TP {text(loudness['true_peak_db'])} dBTP")
     
     def on_duration_changed(self, duration):
         """音频长度改变信号处理"""
@@ -1599,28 +1669,23 @@ class MainWindow(QMainWindow):
         )
         
         if filepath:
+            # 排队中的处理针对的是旧音频，加载新文件前全部取消
+            self.jobs.cancel()
             if self.processor.load_audio(filepath):
                 self.status_bar.showMessage(f"已加载: {filepath}")
                 
                 # 更新可视化
                 self.pitch_tab.update_visualization()
                 self.eq_tab.update_spectrum()
+                self.eq_tab.prefetch_spectrum()
                 # 母带制作预览也可以显示波形
                 if self.processor.audio_data is not None:
-                    time_axis = np.linspace(0, len(self.processor.audio_data)/self.processor.sample_rate, 
-                                          num=min(len(self.processor.audio_data), 10000))
-                    audio_slice = self.processor.audio_data[:min(len(self.processor.audio_data), 10000)]
-                    self.mastering_tab.mastering_preview.figure.clear()
-                    ax = self.mastering_tab.mastering_preview.figure.add_subplot(111)
-                    ax.plot(time_axis, audio_slice)
-                    ax.set_title("音频波形预览")
-                    ax.set_xlabel("时间 (秒)")
-                    ax.set_ylabel("幅度")
-                    self.mastering_tab.mastering_preview.canvas.draw()
+                    self.mastering_tab.mastering_preview.plot_waveform(
+                        self.processor.audio_data, self.processor.sample_rate, title="音频波形预览")
                 
                 # 更新播放器
                 if self.player:
-                    self.player.load_audio(self.processor.audio_data, self.processor.sample_rate)
+                    self.sync_player(restart=True)
                     self.status_bar.showMessage(f"已加载: {filepath} | 可播放")
                 
                 QMessageBox.information(self, "成功", "音频文件已加载！")
@@ -1645,31 +1710,145 @@ class MainWindow(QMainWindow):
     
     def reset_audio(self):
         """重置音频"""
-        if self.processor.original_audio is not None:
-            self.processor.audio_data = self.processor.original_audio.copy()
-            self.processor.backup_audio = self.processor.original_audio.copy()
+        if self.processor.reset_to_original():
             self.status_bar.showMessage("音频已重置！")
-            
-            # 更新可视化
-            self.pitch_tab.update_visualization()
-            self.eq_tab.update_spectrum()
-            # 母带制作预览也可以显示波形
-            if self.processor.audio_data is not None:
-                time_axis = np.linspace(0, len(self.processor.audio_data)/self.processor.sample_rate, 
-                                          num=min(len(self.processor.audio_data), 10000))
-                audio_slice = self.processor.audio_data[:min(len(self.processor.audio_data), 10000)]
-                self.mastering_tab.mastering_preview.figure.clear()
-                ax = self.mastering_tab.mastering_preview.figure.add_subplot(111)
-                ax.plot(time_axis, audio_slice)
-                ax.set_title("音频波形预览")
-                ax.set_xlabel("时间 (秒)")
-                ax.set_ylabel("幅度")
-                self.mastering_tab.mastering_preview.canvas.draw()
-            
+            self.refresh_views()
             QMessageBox.information(self, "成功", "音频已重置！")
         else:
             QMessageBox.warning(self, "警告", "没有加载任何音频文件！")
     
+    def calibrate_audio(self):
+        """扫描回调帧数和延迟设置，保存适合本机的声卡设置档案（在后台线程中进行）"""
+        from src.audio_processing import latency_calibration
+        loopback = not SOUNDDEVICE_AVAILABLE
+        message = "将依次尝试不同的回调帧数和延迟设置，约需" + ("15秒" if loopback else "30秒")
+        message += "（未安装sounddevice，使用模拟回环测量）。" if loopback else "，期间会播放短促的脉冲声。"
+        if QMessageBox.question(self, "声卡延迟校准", message + "\n是否开始？") != QMessageBox.Yes:
+            return
+        if self.player and self.player.is_playing_state():
+            self.player.pause()
+        self.calibrate_action.setEnabled(False)
+        self.status_bar.showMessage("正在校准声卡延迟...")
+        bridge = callback_bridge(self)
+        
+        def on_progress(fraction, result):
+            self.status_bar.showMessage(f"正在校准声卡延迟... {fraction * 100:.0f}%  {latency_calibration.format_result(result)}")
+        
+        def on_done(result):
+            self.calibrate_action.setEnabled(True)
+            bridge.deleteLater()
+            if isinstance(result, Exception):
+                self.status_bar.showMessage("声卡延迟校准失败")
+                QMessageBox.critical(self, "错误", f"声卡延迟校准失败: {str(result)}")
+                return
+            latency_calibration.save_profile(result)
+            self.status_bar.showMessage(f"声卡设置: {result['block_size']}帧, 往返延迟 {result['round_trip_ms']:.1f}ms")
+            QMessageBox.information(self, "校准完成", latency_calibration.format_profile(result) + "\n\n新设置在重新启动程序后生效。")
+        
+        progress = bridge.wrap(lambda args: on_progress(*args))
+        done = bridge.wrap(on_done)
+        
+        def work():
+            try:
+                done(latency_calibration.calibrate(loopback or None, progress=lambda *args: progress(args)))
+            except Exception as e:
+                done(e)
+        
+        threading.Thread(target=work, name='latency-calibration', daemon=True).start()
+    
+    def undo_audio(self):
+        """撤销上一步处理"""
+        if self.processor.undo():
+            self.status_bar.showMessage(f"已撤销，当前版本: {self.processor.history.current_index}")
+            self.refresh_views()
+        else:
+            self.status_bar.showMessage("没有可撤销的操作")
+    
+    def redo_audio(self):
+        """重做下一步处理"""
+        if self.processor.redo():
+            self.status_bar.showMessage(f"已重做，当前版本: {self.processor.history.current_index}")
+            self.refresh_views()
+        else:
+            self.status_bar.showMessage("没有可重做的操作")
+    
+    def select_compare_version(self):
+        """选择A/B对比所用的历史版本"""
+        if len(self.processor.history) == 0:
+            QMessageBox.warning(self, "警告", "没有加载任何音频文件！")
+            return
+        
+        last_version = len(self.processor.history) - 1
+        current = self.processor.compare_version
+        index, ok = QInputDialog.getInt(
+            self,
+            "选择对比版本",
+            f"对比版本 (0=原始音频, -1=上一版本, 最新为{last_version}):",
+            -1 if current is None else current,
+            -1,
+            last_version
+        )
+        if ok:
+            self.processor.set_compare_version(None if index < 0 else index)
+            self.refresh_views()
+    
+    def refresh_views(self):
+        """音频版本变化后刷新可视化和播放器"""
+        if self.processor.audio_data is None:
+            return
+        
+        # 更新可视化
+        self.pitch_tab.update_visualization(show_comparison=self.pitch_tab.show_comparison_checkbox.isChecked())
+        self.eq_tab.update_spectrum(show_comparison=self.eq_tab.eq_show_comparison_checkbox.isChecked())
+        # 母带制作预览也可以显示波形
+        self.mastering_tab.mastering_preview.plot_waveform(
+            self.processor.audio_data, self.processor.sample_rate, title="音频波形预览")
+        
+        # 更新播放器
+        if self.player:
+            self.sync_player()
+    
+    def on_job_started(self, label, pending):
+        """后台任务开始：显示忙碌进度条和取消按钮"""
+        self.job_progress_bar.setRange(0, 0)  # 处理方法报告进度前显示为忙碌状态
+        self.job_progress_bar.setVisible(True)
+        self.cancel_job_btn.setVisible(True)
+        queued = f"（队列中还有 {pending} 项）" if pending else ""
+        self.status_bar.showMessage(f"正在处理: {label}{queued}")
+    
+    def on_job_progress(self, fraction):
+        """后台任务进度更新"""
+        self.job_progress_bar.setRange(0, 100)
+        self.job_progress_bar.setValue(int(fraction * 100))
+    
+    def on_job_finished(self, label, ok, message):
+        """后台任务完成：结果已提交到处理器，更新播放器"""
+        if ok:
+            self.status_bar.showMessage(f"{label}已完成")
+            self.eq_tab.prefetch_spectrum()
+            if self.player:
+                self.sync_player()
+        else:
+            self.status_bar.showMessage(f"{label}失败: {message}" if label else message)
+    
+    def on_job_cancelled(self, label):
+        """后台任务被取消"""
+        self.status_bar.showMessage(f"已取消: {label}")
+    
+    def on_jobs_idle(self):
+        """任务队列为空：隐藏进度条和取消按钮"""
+        self.job_progress_bar.setVisible(False)
+        self.cancel_job_btn.setVisible(False)
+    
+    def closeEvent(self, event):
+        """关闭窗口时结束后台处理进程"""
+        self.jobs.shutdown()
+        if self.player:
+            self.player.close()
+        if self.recording_tab._recorder is not None:
+            self.recording_tab._recorder.stop()  # 写完缓冲中的录音数据
+        super().closeEvent(event)
+    
     def toggle_global_comparison(self, state):
         """切换全局对比显示"""
         self.pitch_tab.show_comparison_checkbox.setChecked(state)
@@ -1677,7 +1856,45 @@ class MainWindow(QMainWindow):
         self.mastering_tab.master_show_comparison_checkbox.setChecked(state)
 
 
+def profile_startup():
+    """打印启动耗时分析：各模块导入耗时、窗口创建和首次绘制耗时、首次绘图的延迟加载耗时"""
+    import os
+    import time
+    from src.ui.startup_profile import measure_import_times, format_import_report
+    
+    ranked, total = measure_import_times('main', cwd=os.path.dirname(os.path.abspath(__file__)))
+    print(format_import_report(ranked, total))
+    
+    start = time.perf_counter()
+    app = QApplication(sys.argv)
+    app_time = time.perf_counter()
+    window = MainWindow()
+    window_time = time.perf_counter()
+    window.show()
+    app.processEvents()
+    shown_time = time.perf_counter()
+    
+    # 首次绘图才会加载matplotlib，单独统计这部分延迟加载的耗时
+    window.pitch_tab.canvas.canvas
+    canvas_time = time.perf_counter()
+    
+    print("=== 窗口启动耗时 ===")
+    print(f"  创建QApplication             {(app_time - start) * 1000:8.1f} ms")
+    print(f"  创建主窗口                    {(window_time - app_time) * 1000:8.1f} ms")
+    print(f"  显示并完成首次绘制            {(shown_time - window_time) * 1000:8.1f} ms")
+    print(f"  首次绘图加载matplotlib（延迟） {(canvas_time - shown_time) * 1000:8.1f} ms")
+    window.close()
+
+
 def main():
+    if '--profile-startup' in sys.argv:
+        profile_startup()
+        return
+    if '--calibrate-audio' in sys.argv:
+        from src.audio_processing.latency_calibration import main as calibrate_audio
+        calibrate_audio(sys.argv[1:])
+        return
+    
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
@@ -0,0 +1,3 @@
+"""
+AI音乐后期工程师 - 源代码包
+"""
@@ -0,0 +1,3 @@
+"""
+音频处理模块
+"""
@@ -0,0 +1,219 @@
+"""
+AI音乐后期工程师 - 音高分析缓存
+以音频内容哈希为键缓存F0曲线、浊音判定和起音点，内存中保留最近使用的结果，
+并写入磁盘供之后的会话复用。音准修正、MIDI转换、五线谱和扒谱对同一段音频
+只需分析一次
+"""
+
+import os
+import hashlib
+import tempfile
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+from src.settings import config_path
+
+
+# 默认分析参数：C2 ~ C7 覆盖人声和常见旋律乐器
+DEFAULT_FMIN = 65.41
+DEFAULT_FMAX = 2093.0
+DEFAULT_FRAME_LENGTH = 2048
+DEFAULT_HOP_LENGTH = 512
+
+
+class AnalysisCache:
+    """两级（内存 + 磁盘）音高分析缓存"""
+
+    def __init__(self, max_memory_entries=32, cache_dir=None, disk_budget_mb=512):
+        self.max_memory_entries = max_memory_entries
+        self.cache_dir = cache_dir if cache_dir is not None else config_path('analysis_cache')
+        self.disk_budget = int(disk_budget_mb * 1024 * 1024)
+        self._memory = OrderedDict()
+        self._hash_memo = {}  # id(只读数组) -> (弱引用, 内容哈希)，避免重复计算哈希
+
+    def content_hash(self, audio):
+        """计算音频内容哈希；只读数组（如版本历史中的快照）的哈希会被记住"""
+        memo = self._hash_memo.get(id(audio))
+        if memo is not None and memo[0]() is audio:
+            return memo[1]
+
+        data = np.ascontiguousarray(audio, dtype=np.float32)
+        digest = hashlib.blake2b(data.view(np.uint8), digest_size=20)
+        digest.update(str(data.shape).encode())
+        content = digest.hexdigest()
+
+        if isinstance(audio, np.ndarray) and not audio.flags.writeable:
+            try:
+                self._hash_memo[id(audio)] = (weakref.ref(audio), content)
+            except TypeError:
+                pass
+            if len(self._hash_memo) > 4 * self.max_memory_entries:
+                self._hash_memo = {k: v for k, v in self._hash_memo.items() if v[0]() is not None}
+        return content
+
+    def get_f0(self, audio, sample_rate, fmin=DEFAULT_FMIN, fmax=DEFAULT_FMAX,
+               frame_length=DEFAULT_FRAME_LENGTH, hop_length=DEFAULT_HOP_LENGTH):
+        """F0曲线与浊音判定：返回包含 f0、voiced_flag、voiced_prob、times 的字典"""
+        key = self._key('f0', audio, sample_rate, fmin, fmax, frame_length, hop_length)
+        result = self._lookup(key)
+        if result is None:
+            import librosa
+            f0, voiced_flag, voiced_prob = librosa.pyin(
+                np.asarray(audio, dtype=np.float32),
+                fmin=fmin,
+                fmax=fmax,
+                sr=sample_rate,
+                frame_length=frame_length,
+                hop_length=hop_length
+            )
+            result = {
+                'f0': f0,
+                'voiced_flag': voiced_flag,
+                'voiced_prob': voiced_prob,
+                'times': librosa.times_like(f0, sr=sample_rate, hop_length=hop_length),
+            }
+            self._store(key, result)
+        return result
+
+    def get_onsets(self, audio, sample_rate, hop_length=DEFAULT_HOP_LENGTH):
+        """起音检测：返回包含 onset_envelope、onset_frames、onset_times 的字典"""
+        key = self._key('onsets', audio, sample_rate, hop_length)
+        result = self._lookup(key)
+        if result is None:
+            import librosa
+            samples = np.asarray(audio, dtype=np.float32)
+            envelope = librosa.onset.onset_strength(y=samples, sr=sample_rate, hop_length=hop_length)
+            frames = librosa.onset.onset_detect(onset_envelope=envelope, sr=sample_rate, hop_length=hop_length)
+            result = {
+                'onset_envelope': envelope,
+                'onset_frames': frames,
+                'onset_times': librosa.frames_to_time(frames, sr=sample_rate, hop_length=hop_length),
+            }
+            self._store(key, result)
+        return result
+
+    def get_harmony(self, audio, sample_rate, hop_length=DEFAULT_HOP_LENGTH, bins_per_octave=36, n_octaves=7):
+        """一次常数Q变换（从C1起）同时得到色度、起音强度和起音点：
+        返回包含 chroma、onset_envelope、onset_frames、energy 的字典"""
+        key = self._key('harmony', audio, sample_rate, hop_length, bins_per_octave, n_octaves)
+        result = self._lookup(key)
+        if result is None:
+            import librosa
+            samples = np.asarray(audio, dtype=np.float32)
+            fmin = librosa.note_to_hz('C1')
+            cqt = np.abs(librosa.cqt(samples, sr=sample_rate, hop_length=hop_length, fmin=fmin,
+                                     n_bins=bins_per_octave * n_octaves, bins_per_octave=bins_per_octave))
+            chroma = librosa.feature.chroma_cqt(C=cqt, sr=sample_rate, hop_length=hop_length, fmin=fmin,
+                                                bins_per_octave=bins_per_octave)
+            envelope = librosa.onset.onset_strength(S=librosa.amplitude_to_db(cqt, ref=np.max), sr=sample_rate,
+                                                    hop_length=hop_length)
+            frames = librosa.onset.onset_detect(onset_envelope=envelope, sr=sample_rate, hop_length=hop_length)
+            result = {
+                'chroma': chroma.astype(np.float32),
+                'onset_envelope': envelope,
+                'onset_frames': frames,
+                'energy': cqt.sum(axis=0).astype(np.float32),
+            }
+            self._store(key, result)
+        return result
+
+    def get_pitch_analysis(self, audio, sample_rate, **params):
+        """一次取得F0、浊音和起音点（各部分分别缓存）"""
+        hop_length = params.get('hop_length', DEFAULT_HOP_LENGTH)
+        analysis = dict(self.get_f0(audio, sample_rate, **params))
+        analysis.update(self.get_onsets(audio, sample_rate, hop_length=hop_length))
+        analysis['hop_length'] = hop_length
+        analysis['sample_rate'] = sample_rate
+        return analysis
+
+    def clear_memory(self):
+        """清空内存缓存（磁盘缓存保留）"""
+        self._memory.clear()
+        self._hash_memo.clear()
+
+    def _key(self, kind, audio, sample_rate, *params):
+        param_text = '_'.join(f"{p:g}" if isinstance(p, float) else str(p) for p in params)
+        return f"{kind}_{self.content_hash(audio)}_{int(sample_rate)}_{param_text}"
+
+    def _lookup(self, key):
+        """先查内存，再查磁盘；磁盘命中会提升到内存"""
+        result = self._memory.get(key)
+        if result is not None:
+            self._memory.move_to_end(key)
+            return result
+
+        path = os.path.join(self.cache_dir, key + '.npz')
+        if os.path.exists(path):
+            try:
+                with np.load(path) as data:
+                    result = {name: data[name] for name in data.files}
+                os.utime(path)  # 更新访问时间，供磁盘淘汰使用
+            except Exception as e:
+                # 损坏的缓存文件（截断、格式错误等）视为未命中并删除，之后重新分析写入
+                print(f"分析缓存文件损坏，已删除: {os.path.basename(path)} ({type(e).__name__})")
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                return None
+            self._remember(key, result)
+            return result
+        return None
+
+    def _store(self, key, result):
+        self._remember(key, result)
+        if not self.cache_dir or self.disk_budget <= 0:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # 先写入同一目录下的临时文件再原子替换，读取方不会看到写了一半的文件
+            fd, temp_path = tempfile.mkstemp(prefix=key, suffix='.tmp', dir=self.cache_dir)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    np.savez(f, **result)
+                os.replace(temp_path, os.path.join(self.cache_dir, key + '.npz'))
+            except BaseException:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+                raise
+            self._trim_disk()
+        except OSError as e:
+            print(f"写入分析缓存失败: {e}")
+
+    def _remember(self, key, result):
+        self._memory[key] = result
+        if len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _trim_disk(self):
+        """磁盘缓存超出预算时删除最久未使用的文件"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.npz'):
+                path = os.path.join(self.cache_dir, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.disk_budget:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+_shared_cache = None
+
+
+def shared_analysis_cache():
+    """进程内共享的分析缓存"""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = AnalysisCache()
+    return _shared_cache
@@ -0,0 +1,227 @@
+"""
+AI音乐后期工程师 - 音频转MIDI
+F0、浊音判定和起音点取自分析缓存（同一段音频只分析一次），音符边界用数组运算按游程切分：
+量化后的音高发生变化或出现起音点处即为边界，不逐帧循环。
+多个音轨在进程池中并行分析，写入同一个多轨MIDI文件（mido）
+"""
+
+import os
+import mmap
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+
+DEFAULT_TEMPO = 120.0
+DEFAULT_TICKS_PER_BEAT = 480
+DEFAULT_MIN_NOTE = 0.06  # 最短音符（秒），更短的游程视为滑音或检测抖动
+DEFAULT_SMOOTH_FRAMES = 5  # 量化音高的中值滤波长度（帧），抑制颤音在半音边界上的来回跳动
+ONSET_TOLERANCE = 0.1  # 距音高边界不足此时长（秒）的起音点属于同一次起音（起音检测通常比音高晚几帧）
+DRUM_CHANNEL = 9
+
+NOTE_DTYPE = np.dtype([('start', np.float64), ('end', np.float64), ('pitch', np.int16), ('velocity', np.int16)])
+
+
+def to_mono(audio, block_size=1 << 16):
+    """单声道float32；多声道按块取平均（磁盘音轨不会整段读入后再复制）"""
+    audio = np.asarray(audio)
+    if audio.ndim == 1:
+        return audio.astype(np.float32, copy=False)
+    from src.audio_processing.track_store import iter_blocks
+    mono = np.empty(len(audio), dtype=np.float32)
+    for start, block in iter_blocks(audio, block_size):
+        np.mean(block, axis=1, out=mono[start:start + len(block)])
+    return mono
+
+
+def segment_notes(f0, voiced_flag, onset_frames, sample_rate, hop_length, energy_db=None,
+                  min_duration=DEFAULT_MIN_NOTE, smooth_frames=DEFAULT_SMOOTH_FRAMES):
+    """按游程切分音符，返回 NOTE_DTYPE 结构化数组（开始/结束秒、MIDI音高、力度）
+
+    energy_db 为逐帧能量（dB，相对最大值），用于计算力度；缺省时力度统一为80
+    """
+    f0 = np.asarray(f0, dtype=np.float64)
+    n = len(f0)
+    if n == 0:
+        return np.zeros(0, dtype=NOTE_DTYPE)
+    voiced = np.asarray(voiced_flag, dtype=bool) & np.isfinite(f0) & (f0 > 0)
+    midi = np.full(n, -1, dtype=np.int16)
+    midi[voiced] = np.rint(69 + 12 * np.log2(f0[voiced] / 440.0))
+    if smooth_frames > 1:
+        from scipy.ndimage import median_filter
+        midi = median_filter(midi, size=smooth_frames, mode='nearest')
+
+    # 边界：量化音高变化处，以及同一音高上的起音点（重复音）；
+    # 靠近音高边界的起音点属于同一次起音，不再切分
+    boundary = np.empty(n, dtype=bool)
+    boundary[0] = True
+    np.not_equal(midi[1:], midi[:-1], out=boundary[1:])
+    min_frames = max(1, int(round(min_duration * sample_rate / hop_length)))
+    tolerance = max(min_frames, int(round(ONSET_TOLERANCE * sample_rate / hop_length)))
+    pitch_edges = np.append(np.flatnonzero(boundary), n)
+    onsets = np.asarray(onset_frames, dtype=np.int64)
+    onsets = onsets[(onsets > 0) & (onsets < n)]
+    following = np.searchsorted(pitch_edges, onsets, side='right')
+    apart = ((onsets - pitch_edges[following - 1] >= tolerance)
+             & (pitch_edges[np.minimum(following, len(pitch_edges) - 1)] - onsets >= tolerance))
+    boundary[onsets[apart]] = True
+
+    starts = np.flatnonzero(boundary)
+    ends = np.append(starts[1:], n)
+    keep = (midi[starts] >= 0) & (ends - starts >= min_frames)
+
+    notes = np.zeros(int(keep.sum()), dtype=NOTE_DTYPE)
+    frame_time = hop_length / sample_rate
+    notes['start'] = starts[keep] * frame_time
+    notes['end'] = ends[keep] * frame_time
+    notes['pitch'] = np.clip(midi[starts[keep]], 0, 127)
+    if energy_db is None:
+        notes['velocity'] = 80
+    else:
+        # 各游程的平均能量映射到力度：-60dB -> 20，0dB -> 127
+        energy = np.full(n, -60.0)
+        count = min(n, len(energy_db))
+        energy[:count] = np.maximum(energy_db[:count], -60.0)
+        mean_db = np.add.reduceat(energy, starts)[keep] / (ends - starts)[keep]
+        notes['velocity'] = np.clip(np.rint(127 + mean_db * (107 / 60.0)), 1, 127)
+    return notes
+
+
+def analyze_notes(audio, sample_rate, min_duration=DEFAULT_MIN_NOTE, smooth_frames=DEFAULT_SMOOTH_FRAMES,
+                  cache=None):
+    """分析音频中的音符（F0/起音点取自分析缓存）"""
+    from src.audio_processing.analysis_cache import shared_analysis_cache
+    from src.audio_processing.parallel_pitch import frame_energy_db
+    mono = to_mono(audio)
+    if len(mono) == 0:
+        return np.zeros(0, dtype=NOTE_DTYPE)
+    analysis = (cache or shared_analysis_cache()).get_pitch_analysis(mono, sample_rate)
+    hop_length = int(analysis['hop_length'])
+    # pyin的帧以 帧号*hop 为中心，能量帧向前错开半帧对齐
+    energy = frame_energy_db(np.concatenate([np.zeros(hop_length // 2, dtype=np.float32), mono]), hop_length)
+    return segment_notes(analysis['f0'], analysis['voiced_flag'], analysis['onset_frames'], sample_rate,
+                         hop_length, energy, min_duration, smooth_frames)
+
+
+def notes_to_track(notes, name, channel=0, program=0, tempo=DEFAULT_TEMPO, ticks_per_beat=DEFAULT_TICKS_PER_BEAT):
+    """音符数组转换为 mido.MidiTrack（事件按时间排序，同一时刻先关后开）"""
+    import mido
+    track = mido.MidiTrack()
+    track.append(mido.MetaMessage('track_name', name=name, time=0))
+    track.append(mido.Message('program_change', channel=channel, program=program, time=0))
+
+    ticks_per_second = ticks_per_beat * tempo / 60.0
+    on = np.rint(notes['start'] * ticks_per_second).astype(np.int64)
+    off = np.maximum(np.rint(notes['end'] * ticks_per_second).astype(np.int64), on + 1)
+    ticks = np.concatenate([on, off])
+    is_on = np.concatenate([np.ones(len(on), dtype=np.int8), np.zeros(len(off), dtype=np.int8)])
+    pitches = np.concatenate([notes['pitch'], notes['pitch']])
+    velocities = np.concatenate([notes['velocity'], np.zeros(len(off), dtype=np.int16)])
+    order = np.lexsort((is_on, ticks))
+    deltas = np.diff(ticks[order], prepend=0)
+
+    for delta, kind, pitch, velocity in zip(deltas.tolist(), is_on[order].tolist(),
+                                            pitches[order].tolist(), velocities[order].tolist()):
+        message = 'note_on' if kind else 'note_off'
+        track.append(mido.Message(message, channel=channel, note=pitch, velocity=velocity, time=delta))
+    track.append(mido.MetaMessage('end_of_track', time=0))
+    return track
+
+
+def build_midi_file(named_notes, tempo=DEFAULT_TEMPO, ticks_per_beat=DEFAULT_TICKS_PER_BEAT):
+    """[(音轨名称, 音符数组)] 生成多轨MIDI（type 1，第一轨为速度轨，各音轨依次使用不同通道，跳过打击乐通道）"""
+    import mido
+    midi = mido.MidiFile(type=1, ticks_per_beat=ticks_per_beat)
+    conductor = mido.MidiTrack()
+    conductor.append(mido.MetaMessage('set_tempo', tempo=mido.bpm2tempo(tempo), time=0))
+    conductor.append(mido.MetaMessage('end_of_track', time=0))
+    midi.tracks.append(conductor)
+    channels = [c for c in range(16) if c != DRUM_CHANNEL]
+    for index, (name, notes) in enumerate(named_notes):
+        midi.tracks.append(notes_to_track(notes, name, channels[index % len(channels)],
+                                          tempo=tempo, ticks_per_beat=ticks_per_beat))
+    return midi
+
+
+def _source(audio):
+    """发送给分析进程的音频：完整映射的磁盘音轨只传文件路径，由子进程自行映射；
+    映射的切片或其它视图（base 不是映射本身）与文件内容不一致，按普通数组传递"""
+    filename = getattr(audio, 'filename', None)
+    if isinstance(audio, np.memmap) and isinstance(audio.base, mmap.mmap) and filename:
+        return ('file', filename)
+    return np.asarray(audio)
+
+
+def _open_source(source):
+    if isinstance(source, tuple):
+        path = source[1]
+        if path.endswith('.npy'):
+            return np.load(path, mmap_mode='r')
+        from src.audio_processing.track_store import map_wav
+        return map_wav(path)
+    return source
+
+
+def _analyze_source(source, sample_rate, min_duration, smooth_frames):
+    """分析进程入口（模块级函数，可被pickle）"""
+    return analyze_notes(_open_source(source), sample_rate, min_duration, smooth_frames)
+
+
+def export_tracks_to_midi(tracks, filepath, workers=None, tempo=DEFAULT_TEMPO, min_duration=DEFAULT_MIN_NOTE,
+                          smooth_frames=DEFAULT_SMOOTH_FRAMES, progress=None):
+    """把所有有音频的音轨转写为一个多轨MIDI文件，各音轨在进程池中并行分析；
+    返回 [(音轨名称, 音符数)]，progress(已完成数, 总数) 在每个音轨分析完成后调用"""
+    jobs = [(getattr(track, 'name', None) or f"音轨{i + 1}", track.audio_data,
+             getattr(track, 'sample_rate', None) or 44100)
+            for i, track in enumerate(tracks)
+            if getattr(track, 'audio_data', None) is not None and len(track.audio_data) > 0]
+    if not jobs:
+        raise ValueError("没有包含音频的音轨")
+
+    results = [None] * len(jobs)
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        for index, (_, audio, sample_rate) in enumerate(jobs):
+            results[index] = analyze_notes(audio, sample_rate, min_duration, smooth_frames)
+            if progress is not None:
+                progress(index + 1, len(jobs))
+    else:
+        # 使用spawn启动子进程：界面进程中已有Qt和工作线程，fork不安全
+        spawn = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=spawn) as pool:
+            futures = {pool.submit(_analyze_source, _source(audio), sample_rate, min_duration, smooth_frames): index
+                       for index, (_, audio, sample_rate) in enumerate(jobs)}
+            for done, future in enumerate(as_completed(futures), 1):
+                results[futures[future]] = future.result()
+                if progress is not None:
+                    progress(done, len(jobs))
+
+    named_notes = [(name, notes) for (name, _, _), notes in zip(jobs, results)]
+    build_midi_file(named_notes, tempo).save(filepath)
+    return [(name, len(notes)) for name, notes in named_notes]
+
+
+class AudioToMidiConverter:
+    """单个音轨的音频转MIDI"""
+
+    def __init__(self, sample_rate=44100, tempo=DEFAULT_TEMPO, min_note_duration=DEFAULT_MIN_NOTE,
+                 ticks_per_beat=DEFAULT_TICKS_PER_BEAT):
+        self.sample_rate = sample_rate
+        self.tempo = tempo
+        self.min_note_duration = min_note_duration
+        self.ticks_per_beat = ticks_per_beat
+
+    def audio_to_notes(self, audio):
+        """音符结构化数组（开始/结束秒、MIDI音高、力度）"""
+        return analyze_notes(audio, self.sample_rate, self.min_note_duration)
+
+    def convert_audio_to_midi(self, audio, filepath, track_name="Track"):
+        """转换并保存为MIDI文件，成功返回True"""
+        try:
+            notes = self.audio_to_notes(audio)
+            build_midi_file([(track_name, notes)], self.tempo, self.ticks_per_beat).save(filepath)
+            return True
+        except Exception as e:
+            print(f"MIDI转换失败: {e}")
+            return False
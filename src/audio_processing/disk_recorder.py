@@ -0,0 +1,177 @@
+"""
+AI音乐后期工程师 - 录音直写磁盘
+声卡输入回调只把采样复制到预分配的环形缓冲（单生产者/单消费者，只用两个递增计数器同步，
+不加锁、不分配内存），写盘线程把缓冲中的数据按块写入WAV/FLAC文件。
+录音时长不受内存限制；输入溢出或缓冲写满（写盘跟不上）时记录为xrun
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+from src.audio_processing.latency_calibration import stream_settings
+
+
+RING_SECONDS = 10.0  # 环形缓冲能容纳的时长
+WRITER_INTERVAL = 0.02  # 写盘线程无数据时的等待间隔（秒）
+MAX_XRUNS = 1024  # 预分配的xrun记录条数
+
+XRUN_REASONS = {1: "输入溢出", 2: "缓冲已满，丢弃采样"}
+
+FILE_SUBTYPES = {'WAV': 'FLOAT', 'FLAC': 'PCM_24'}
+
+
+class DiskRecorder:
+    """把声卡输入经环形缓冲直接写入音频文件的录音器"""
+
+    def __init__(self, sample_rate=44100, channels=1, directory=None, file_format='WAV',
+                 ring_seconds=RING_SECONDS, device=None, block_size=None, latency=None):
+        self.sample_rate = int(sample_rate)
+        self.channels = int(channels)
+        self.directory = directory
+        self.file_format = file_format.upper()
+        self.device = device
+        if block_size is None:
+            # 未指定时使用延迟校准档案中的回调帧数和延迟设置（0 表示由声卡决定）
+            block_size, latency = stream_settings(0)
+        self.block_size = block_size
+        self.latency = latency
+        self._ring = np.zeros((max(int(ring_seconds * self.sample_rate), 1024), self.channels), dtype=np.float32)
+        self._xrun_frames = np.zeros(MAX_XRUNS, dtype=np.int64)
+        self._xrun_kinds = np.zeros(MAX_XRUNS, dtype=np.int8)
+        self._reset_counters()
+        self._stream = None
+        self._writer = None
+        self._file = None
+        self.path = None
+
+    def _reset_counters(self):
+        self._written = 0  # 回调写入的总帧数（只由回调修改）
+        self._read = 0  # 写盘线程取走的总帧数（只由写盘线程修改）
+        self._captured = 0  # 录到的总帧数（含丢弃部分），用于记录xrun位置
+        self._xrun_count = 0
+        self._running = False
+
+    @property
+    def recording(self):
+        return self._running
+
+    @property
+    def frames_written(self):
+        """已写入文件的帧数"""
+        return self._read
+
+    # ---- 声卡回调（生产者） ----
+
+    def _mark_xrun(self, kind):
+        index = self._xrun_count
+        if index < MAX_XRUNS:
+            self._xrun_frames[index] = self._captured
+            self._xrun_kinds[index] = kind
+        self._xrun_count = index + 1
+
+    def callback(self, indata, frames, time_info, status):
+        """sounddevice输入回调：复制到环形缓冲，不加锁、不分配内存"""
+        if status and getattr(status, 'input_overflow', False):
+            self._mark_xrun(1)
+        capacity = len(self._ring)
+        written = self._written
+        free = capacity - (written - self._read)
+        count = min(frames, free)
+        if count < frames:
+            self._mark_xrun(2)
+        if count > 0:
+            start = written % capacity
+            first = min(count, capacity - start)
+            self._ring[start:start + first] = indata[:first]
+            if count > first:
+                self._ring[:count - first] = indata[first:count]
+            self._written = written + count  # 数据写完后再发布计数
+        self._captured += frames
+
+    # ---- 写盘线程（消费者） ----
+
+    def _drain(self):
+        """把缓冲中已写入的数据写入文件，返回写入的帧数"""
+        capacity = len(self._ring)
+        available = self._written - self._read
+        total = 0
+        while available > 0:
+            start = self._read % capacity
+            count = min(available, capacity - start)
+            self._file.write(self._ring[start:start + count])
+            self._read += count
+            available -= count
+            total += count
+        return total
+
+    def _writer_loop(self):
+        while self._running:
+            if not self._drain():
+                time.sleep(WRITER_INTERVAL)
+        self._drain()
+
+    # ---- 控制 ----
+
+    def _new_path(self):
+        directory = self.directory or os.getcwd()
+        os.makedirs(directory, exist_ok=True)
+        stamp = time.strftime('%Y%m%d_%H%M%S')
+        extension = '.flac' if self.file_format == 'FLAC' else '.wav'
+        path = os.path.join(directory, f"take_{stamp}{extension}")
+        index = 1
+        while os.path.exists(path):
+            index += 1
+            path = os.path.join(directory, f"take_{stamp}_{index}{extension}")
+        return path
+
+    def start(self, path=None, open_stream=True):
+        """开始录音；open_stream 为 False 时不打开声卡，由调用方驱动 callback()"""
+        import soundfile as sf
+        if self._running:
+            return self.path
+        self._reset_counters()
+        self.path = path or self._new_path()
+        self._file = sf.SoundFile(self.path, 'w', samplerate=self.sample_rate, channels=self.channels,
+                                  format=self.file_format, subtype=FILE_SUBTYPES.get(self.file_format))
+        self._running = True
+        self._writer = threading.Thread(target=self._writer_loop, name='DiskRecorderWriter', daemon=True)
+        self._writer.start()
+        if open_stream:
+            try:
+                import sounddevice as sd
+                self._stream = sd.InputStream(samplerate=self.sample_rate, channels=self.channels, dtype='float32',
+                                              blocksize=self.block_size, latency=self.latency,
+                                              device=self.device, callback=self.callback)
+                self._stream.start()
+            except Exception:
+                self.stop()
+                raise
+        return self.path
+
+    def stop(self):
+        """停止录音，写完缓冲中剩余的数据并关闭文件，返回文件路径"""
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+        if not self._running:
+            return self.path
+        self._running = False
+        self._writer.join()
+        self._writer = None
+        self._file.close()
+        self._file = None
+        return self.path
+
+    def xruns(self):
+        """检测到的xrun列表 [(时间秒, 原因)]"""
+        count = min(self._xrun_count, MAX_XRUNS)
+        return [(float(self._xrun_frames[i]) / self.sample_rate, XRUN_REASONS[int(self._xrun_kinds[i])])
+                for i in range(count)]
+
+    @property
+    def xrun_count(self):
+        return self._xrun_count
@@ -0,0 +1,208 @@
+"""
+AI音乐后期工程师 - 音频版本历史
+每个版本是只读快照，通过引用共享而不复制；超出内存预算时按最近最少使用（LRU）
+原则将旧版本转存到内存映射临时文件，支持多级撤销/重做和任意版本对比。
+快照必须确实不可修改：调用方转交所有权的数组直接设为只读，其他数组（可能仍被调用方修改）
+只有在自身和全部底层数组都只读时才共享，否则复制一份
+"""
+
+import os
+import shutil
+import tempfile
+import weakref
+from itertools import count
+
+import numpy as np
+
+from src.audio_processing.track_store import is_mapped
+
+
+def _is_frozen(array):
+    """数组本身及其全部底层数组都只读（无法通过任何引用修改）"""
+    while isinstance(array, np.ndarray):
+        if array.flags.writeable:
+            return False
+        array = array.base
+    return True
+
+
+class _Snapshot:
+    """单个版本快照"""
+
+    __slots__ = ('array', 'spill_path', 'nbytes', 'last_access')
+
+    def __init__(self, array, access_tick):
+        self.array = array
+        self.spill_path = None
+        self.nbytes = array.nbytes
+        self.last_access = access_tick
+
+    @property
+    def resident(self):
+        """快照数据是否常驻内存（内存映射或已丢弃的不计入）"""
+        return self.array is not None and self.spill_path is None and not is_mapped(self.array)
+
+
+class AudioHistory:
+    """带内存预算的写时复制音频版本历史"""
+
+    def __init__(self, memory_budget_mb=512, spill_to_disk=True, spill_dir=None):
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.spill_to_disk = spill_to_disk
+        self._spill_root = spill_dir
+        self._spill_dir = None
+        self._finalizer = None
+        self._versions = []
+        self._current = -1
+        self._tick = count()
+
+    def __len__(self):
+        return len(self._versions)
+
+    @property
+    def current_index(self):
+        """当前版本序号，无版本时为-1"""
+        return self._current
+
+    def can_undo(self):
+        return self._current > 0
+
+    def can_redo(self):
+        return 0 <= self._current < len(self._versions) - 1
+
+    def reset(self, audio, owned=False):
+        """清空历史并以给定音频作为第0个版本"""
+        self.clear()
+        return self.push(audio, owned)
+
+    def push(self, audio, owned=False):
+        """提交新版本，丢弃当前版本之后的重做分支。
+        owned=True 表示调用方转交所有权（之后不再修改该数组）：不复制，直接设为只读；
+        否则只共享已经完全只读的数组，其余复制一份，调用方的数组保持原样"""
+        audio = np.asarray(audio)
+        if owned:
+            audio.setflags(write=False)
+        elif not _is_frozen(audio):
+            audio = audio.copy()
+            audio.setflags(write=False)
+
+        for snapshot in self._versions[self._current + 1:]:
+            self._discard(snapshot)
+        del self._versions[self._current + 1:]
+
+        self._versions.append(_Snapshot(audio, next(self._tick)))
+        self._current = len(self._versions) - 1
+        self._enforce_budget()
+        return self._current
+
+    def get(self, index):
+        """获取指定版本的音频（只读），版本已被丢弃时返回None"""
+        if index < 0 or index >= len(self._versions):
+            return None
+        snapshot = self._versions[index]
+        snapshot.last_access = next(self._tick)
+        return snapshot.array
+
+    def current(self):
+        """获取当前版本的音频"""
+        if self._current < 0:
+            return None
+        return self.get(self._current)
+
+    def checkout(self, index):
+        """切换到指定版本（不产生新版本），返回该版本音频"""
+        if self.get(index) is None:
+            return None
+        self._current = index
+        return self.current()
+
+    def undo(self):
+        """撤销到上一个可用版本"""
+        for index in range(self._current - 1, -1, -1):
+            if self._versions[index].array is not None:
+                return self.checkout(index)
+        return None
+
+    def redo(self):
+        """重做到下一个可用版本"""
+        for index in range(self._current + 1, len(self._versions)):
+            if self._versions[index].array is not None:
+                return self.checkout(index)
+        return None
+
+    def resident_bytes(self):
+        """常驻内存的快照总字节数（同一数组被多个版本共享时只计一次）"""
+        seen = {}
+        for snapshot in self._versions:
+            if snapshot.resident:
+                seen[id(snapshot.array)] = snapshot.nbytes
+        return sum(seen.values())
+
+    def clear(self):
+        """清空全部版本并删除临时文件"""
+        for snapshot in self._versions:
+            self._discard(snapshot)
+        self._versions = []
+        self._current = -1
+        if self._finalizer is not None:
+            self._finalizer()
+            self._finalizer = None
+            self._spill_dir = None
+
+    def _enforce_budget(self):
+        """超出内存预算时按LRU顺序转存或丢弃旧版本（当前版本始终保留；
+        不转存到磁盘时原始版本也始终保留，只丢弃中间版本）"""
+        if self.resident_bytes() <= self.memory_budget:
+            return
+
+        candidates = sorted(
+            (i for i, s in enumerate(self._versions) if s.resident and i != self._current),
+            key=lambda i: self._versions[i].last_access
+        )
+        kept = {id(self._versions[self._current].array)}
+        if not self.spill_to_disk:
+            kept.add(id(self._versions[0].array))
+        for index in candidates:
+            snapshot = self._versions[index]
+            if id(snapshot.array) in kept:
+                continue
+            if self.spill_to_disk:
+                self._spill(snapshot)
+            else:
+                snapshot.array = None
+            if self.resident_bytes() <= self.memory_budget:
+                break
+
+    def _spill(self, snapshot):
+        """将快照写入临时文件，并以只读内存映射替换内存中的数组"""
+        array = snapshot.array
+        # 共享同一数组的其他版本一起指向同一个映射文件
+        shared = [s for s in self._versions if s.array is array and s.spill_path is None]
+
+        path = os.path.join(self._ensure_spill_dir(), f"version_{next(self._tick)}.npy")
+        mapped = np.lib.format.open_memmap(path, mode='w+', dtype=array.dtype, shape=array.shape)
+        mapped[...] = array
+        mapped.flush()
+        del mapped
+
+        readonly = np.load(path, mmap_mode='r')
+        for s in shared:
+            s.array = readonly
+            s.spill_path = path
+
+    def _discard(self, snapshot):
+        """丢弃快照；若映射文件不再被其他版本引用则删除"""
+        path = snapshot.spill_path
+        snapshot.array = None
+        snapshot.spill_path = None
+        if path and not any(s.spill_path == path for s in self._versions if s is not snapshot):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _ensure_spill_dir(self):
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix='ai_music_history_', dir=self._spill_root)
+            self._finalizer = weakref.finalize(self, shutil.rmtree, self._spill_dir, True)
+        return self._spill_dir
@@ -0,0 +1,272 @@
+"""
+AI音乐后期工程师 - 声卡延迟与缓冲大小校准
+在当前声卡（或没有声卡时的模拟回环）上逐一尝试不同的回调帧数和延迟设置，
+每次回调执行与实际录放相同的工作（播放引擎混合并重采样输出、录音器把输入写入环形缓冲），
+测量回调CPU耗时、xrun次数和往返延迟，选出不出现xrun且有足够余量的最小延迟组合，
+保存为配置目录下的档案，播放引擎和录音器启动时读取
+用法: python main.py --calibrate-audio [--loopback] [--duration 秒]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from src.settings import config_path
+
+
+PROFILE_FILE = 'audio_profile.json'
+BLOCK_SIZES = (64, 128, 256, 512, 1024, 2048)
+LATENCIES = ('low', 'high')
+LOOPBACK_BUFFERS = {'low': 2, 'high': 4}  # 模拟回环中各延迟设置排队的缓冲数
+LOAD_LIMIT = 0.5  # 回调耗时（99分位）占回调周期的上限，留出余量给界面和垃圾回收
+SOURCE_RATE = 44100  # 模拟播放的音源采样率（与声卡不同时每次回调需要重采样）
+LOOPBACK = 'loopback'
+
+
+# ---- 档案 ----
+
+def load_profile():
+    """读取校准档案，不存在或无法解析时返回 None"""
+    try:
+        with open(config_path(PROFILE_FILE), encoding='utf-8') as f:
+            profile = json.load(f)
+        int(profile['block_size'])
+        return profile
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def save_profile(profile):
+    """保存校准档案，返回文件路径"""
+    path = config_path(PROFILE_FILE)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(profile, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def current_device_name(kind='output'):
+    """当前默认声卡设备名称，无法查询时返回 None"""
+    try:
+        import sounddevice as sd
+        return sd.query_devices(None, kind)['name']
+    except Exception:
+        return None
+
+
+def stream_settings(default_block_size=512):
+    """声卡流的 (回调帧数, 延迟设置)：有适用于当前设备的校准档案时取档案中的值，否则为默认值"""
+    profile = load_profile()
+    if profile is not None:
+        device = profile.get('device')
+        if device == LOOPBACK or device is None or device == current_device_name():
+            return int(profile['block_size']), profile.get('latency')
+    return default_block_size, None
+
+
+# ---- 测量 ----
+
+class _Workload:
+    """一次回调的实际工作：播放引擎混合、重采样输出，录音器把输入写入环形缓冲"""
+
+    def __init__(self, sample_rate, block_size, latency, duration, directory):
+        from src.audio_processing.disk_recorder import DiskRecorder
+        from src.audio_processing.playback_engine import PlaybackEngine
+        self.engine = PlaybackEngine(SOURCE_RATE, 2, block_size=block_size, latency=latency)
+        source = np.zeros((int((duration + 1.0) * SOURCE_RATE), 2), dtype=np.float32)
+        source.flags.writeable = False
+        self.engine.set_sources(source, source, keep_position=False)
+        self.engine.set_output_rate(sample_rate)
+        self.engine.playing = True
+        self.recorder = DiskRecorder(sample_rate, 1, directory=directory, block_size=block_size, latency=latency)
+        self.recorder.start(open_stream=False)
+        time.sleep(0.05)  # 等待供数线程填满环形缓冲
+
+    def __call__(self, indata, outdata):
+        self.engine.fill(outdata)
+        self.recorder.callback(indata, len(indata), None, None)
+
+    def close(self):
+        self.engine.close()
+        self.recorder.stop()
+
+
+def _summary(block_size, latency, sample_rate, cpu, xruns, round_trip, measured):
+    period = block_size / sample_rate
+    p99 = float(np.percentile(cpu, 99)) if len(cpu) else 0.0
+    return {
+        'block_size': block_size,
+        'latency': latency,
+        'cpu_mean_ms': float(np.mean(cpu)) * 1000 if len(cpu) else 0.0,
+        'cpu_p99_ms': p99 * 1000,
+        'load': p99 / period,
+        'xruns': int(xruns),
+        'round_trip_ms': round_trip * 1000,
+        'round_trip_measured': measured,
+    }
+
+
+def measure_loopback(block_size, latency, sample_rate=48000, duration=1.0, directory=None):
+    """模拟回环：按回调周期实时调度工作负载，完成时刻晚于排队缓冲能容忍的时刻即记为xrun；
+    往返延迟按输入、输出各排队的缓冲数估算"""
+    period = block_size / sample_rate
+    slack = (LOOPBACK_BUFFERS.get(latency, 2) - 1) * period
+    count = max(int(duration / period), 1)
+    cpu = np.zeros(count)
+    indata = (np.random.default_rng(0).standard_normal((block_size, 1)) * 0.01).astype(np.float32)
+    outdata = np.zeros((block_size, 2), dtype=np.float32)
+    workload = _Workload(sample_rate, block_size, latency, duration, directory)
+    xruns = 0
+    try:
+        deadline = time.perf_counter()
+        for i in range(count):
+            deadline += period
+            start = time.perf_counter()
+            workload(indata, outdata)
+            finish = time.perf_counter()
+            cpu[i] = finish - start
+            if finish > deadline + slack:
+                xruns += 1
+                deadline = finish  # 声卡重新同步
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    finally:
+        workload.close()
+    round_trip = 2 * LOOPBACK_BUFFERS.get(latency, 2) * block_size / sample_rate
+    return _summary(block_size, latency, sample_rate, cpu, xruns, round_trip, False)
+
+
+def measure_device(block_size, latency, sample_rate=None, duration=2.0, directory=None, device=None):
+    """在声卡上打开全双工流测量；输出端在开始后0.5秒发出一个脉冲，
+    输入端检测到脉冲时按实际间隔计算往返延迟（需要回环线或麦克风能收到扬声器声音），
+    检测不到时使用声卡报告的输入+输出延迟"""
+    import sounddevice as sd
+    if sample_rate is None:
+        sample_rate = int(sd.query_devices(device, 'output')['default_samplerate'])
+    period = block_size / sample_rate
+    cpu = np.zeros(int(duration / period) + 64)
+    captured = np.zeros(int(duration * sample_rate) + block_size * 8, dtype=np.float32)
+    click_at = int(0.5 * sample_rate)
+    state = {'calls': 0, 'frames': 0, 'xruns': 0}
+    workload = _Workload(sample_rate, block_size, latency, duration, directory)
+
+    def callback(indata, outdata, frames, time_info, status):
+        start = time.perf_counter()
+        if status:
+            state['xruns'] += 1
+        workload(indata, outdata)
+        position = state['frames']
+        if position <= click_at < position + frames:
+            outdata[click_at - position] = 0.5
+        end = min(position + frames, len(captured))
+        captured[position:end] = indata[:end - position, 0]
+        state['frames'] = position + frames
+        calls = state['calls']
+        if calls < len(cpu):
+            cpu[calls] = time.perf_counter() - start
+        state['calls'] = calls + 1
+
+    try:
+        with sd.Stream(samplerate=sample_rate, blocksize=block_size, latency=latency, device=device,
+                       channels=(1, 2), dtype='float32', callback=callback) as stream:
+            time.sleep(duration)
+            reported = float(sum(stream.latency))
+    finally:
+        workload.close()
+
+    recorded = captured[click_at:state['frames']]
+    noise = np.median(np.abs(captured[:click_at])) if click_at else 0.0
+    hits = np.flatnonzero(np.abs(recorded) > max(noise * 20, 0.02))
+    measured = len(hits) > 0
+    round_trip = hits[0] / sample_rate if measured else reported
+    return _summary(block_size, latency, sample_rate, cpu[:min(state['calls'], len(cpu))],
+                    state['xruns'], round_trip, measured)
+
+
+def choose(results):
+    """选择往返延迟最小的稳定组合：同一延迟设置下本组合及所有更大的回调帧数都没有xrun且负载在上限内
+    （单次测量有偶然性，只看单个组合容易选到不稳定的小缓冲）；都不满足时取xrun最少、负载最低的"""
+    def ok(result):
+        return result['xruns'] == 0 and result['load'] < LOAD_LIMIT
+
+    stable = [r for r in results
+              if all(ok(other) for other in results
+                     if other['latency'] == r['latency'] and other['block_size'] >= r['block_size'])]
+    if stable:
+        return min(stable, key=lambda r: (r['round_trip_ms'], r['block_size']))
+    return min(results, key=lambda r: (r['xruns'], r['load'], -r['block_size']))
+
+
+def calibrate(loopback=None, duration=None, block_sizes=BLOCK_SIZES, latencies=LATENCIES, progress=None):
+    """扫描回调帧数和延迟设置，返回校准档案（不保存）；
+    loopback 为 None 时有声卡就用声卡，否则使用模拟回环"""
+    device = None if loopback else current_device_name()
+    if device is None:
+        loopback = True
+    duration = duration or (1.0 if loopback else 2.0)
+    sample_rate = 48000
+    if not loopback:
+        import sounddevice as sd
+        sample_rate = int(sd.query_devices(None, 'output')['default_samplerate'])
+
+    combos = [(block, latency) for latency in latencies for block in block_sizes]
+    results = []
+    with tempfile.TemporaryDirectory(prefix='ai_music_calibration_') as directory:
+        for index, (block, latency) in enumerate(combos):
+            if loopback:
+                result = measure_loopback(block, latency, sample_rate, duration, directory)
+            else:
+                result = measure_device(block, latency, sample_rate, duration, directory)
+            results.append(result)
+            if progress is not None:
+                progress((index + 1) / len(combos), result)
+
+    best = choose(results)
+    return {
+        'device': LOOPBACK if loopback else device,
+        'sample_rate': sample_rate,
+        'block_size': best['block_size'],
+        'latency': best['latency'],
+        'round_trip_ms': best['round_trip_ms'],
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'results': results,
+    }
+
+
+def format_result(result):
+    measured = '' if result['round_trip_measured'] else '（估算）'
+    return (f"{result['block_size']:5d}帧 {result['latency']:>4} | CPU 平均 {result['cpu_mean_ms']:6.3f}ms "
+            f"99% {result['cpu_p99_ms']:6.3f}ms 负载 {result['load'] * 100:5.1f}% | xrun {result['xruns']:3d} | "
+            f"往返延迟 {result['round_trip_ms']:6.1f}ms{measured}")
+
+
+def format_profile(profile):
+    """校准结果的文字报告"""
+    lines = [f"设备: {profile['device']}  采样率: {profile['sample_rate']}Hz"]
+    lines += [format_result(result) for result in profile['results']]
+    lines.append(f"选用: {profile['block_size']}帧, 延迟设置 {profile['latency']}, "
+                 f"往返延迟 {profile['round_trip_ms']:.1f}ms")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """命令行校准：扫描、打印报告并保存档案"""
+    argv = sys.argv[1:] if argv is None else argv
+    duration = None
+    if '--duration' in argv:
+        duration = float(argv[argv.index('--duration') + 1])
+    loopback = True if '--loopback' in argv else None
+    print("=== 声卡延迟校准 ===")
+    profile = calibrate(loopback, duration, progress=lambda fraction, result: print(format_result(result)))
+    path = save_profile(profile)
+    print(format_profile(profile).splitlines()[-1])
+    print(f"档案已保存: {os.path.abspath(path)}")
+    return profile
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""
+AI音乐后期工程师 - 响度测量（EBU R128 / ITU-R BS.1770）
+分块流式计算：K加权滤波器状态在块之间延续，每100ms子块只保存一个能量值，
+瞬时（400ms）、短期（3s）、整体响度（带绝对/相对门限）和响度范围都由子块能量用数组运算得到；
+真峰值按4倍过采样（输入的滑动窗口与多相滤波器的全部相位做一次矩阵乘法，窗口历史在块之间延续，
+限制器的真峰值检测也使用同一个检测器）。
+母带处理用一次测量加一次增益即可达到目标响度，播放时的实时响度表也使用同一个测量器
+"""
+
+import numpy as np
+from scipy.signal import sosfilt
+
+
+ABSOLUTE_GATE = -70.0  # LUFS
+RELATIVE_GATE = -10.0  # LU，整体响度
+LRA_RELATIVE_GATE = -20.0  # LU，响度范围
+SUB_BLOCK = 0.1  # 秒；门限块（400ms，重叠75%）和短期块（3s）都由子块组成
+MOMENTARY_BLOCKS = 4
+SHORT_TERM_BLOCKS = 30
+TRUE_PEAK_TAPS = 12  # 过采样滤波器每相位长度（BS.1770 参考滤波器为4相位×12阶）
+DEFAULT_BLOCK_SIZE = 1 << 16
+
+DEFAULT_TARGET_LUFS = -14.0
+DEFAULT_CEILING_DB = -1.0  # dBTP
+# 各母带模式的目标响度（LUFS）和真峰值上限（dBTP）
+MASTER_LOUDNESS_TARGETS = {
+    'smart': (-14.0, -1.0),
+    'loud': (-9.0, -0.3),
+    'dynamic': (-18.0, -1.0),
+    'radio': (-23.0, -1.0),  # EBU R128 广播
+    'streaming': (-14.0, -1.0),
+    'vinyl': (-16.0, -2.0),
+}
+
+
+def k_weighting_sos(sample_rate):
+    """K加权滤波器（高频搁架 + RLB高通）的二阶节系数，按采样率由模拟原型双线性变换得到"""
+    f0, gain_db, q = 1681.974450955533, 3.999843853973347, 0.7071752369554196
+    k = np.tan(np.pi * f0 / sample_rate)
+    vh = 10.0 ** (gain_db / 20.0)
+    vb = vh ** 0.4996667741545416
+    a0 = 1.0 + k / q + k * k
+    shelf = [(vh + vb * k / q + k * k) / a0, 2.0 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0,
+             1.0, 2.0 * (k * k - 1.0) / a0, (1.0 - k / q + k * k) / a0]
+
+    f0, q = 38.13547087602444, 0.5003270373238773
+    k = np.tan(np.pi * f0 / sample_rate)
+    a0 = 1.0 + k / q + k * k
+    highpass = [1.0, -2.0, 1.0, 1.0, 2.0 * (k * k - 1.0) / a0, (1.0 - k / q + k * k) / a0]
+    return np.array([shelf, highpass])
+
+
+def channel_weights(channels):
+    """各声道权重：5.0/5.1环绕声道为1.41，LFE不计入"""
+    if channels == 5:
+        return np.array([1.0, 1.0, 1.0, 1.41, 1.41])
+    if channels == 6:
+        return np.array([1.0, 1.0, 1.0, 0.0, 1.41, 1.41])
+    return np.ones(channels)
+
+
+def oversampling_factor(sample_rate):
+    """真峰值过采样倍数：使过采样后的采样率不低于176.4kHz"""
+    return 4 if sample_rate < 96000 else 2 if sample_rate < 192000 else 1
+
+
+def energy_to_lufs(energy):
+    with np.errstate(divide='ignore'):
+        return -0.691 + 10.0 * np.log10(energy)
+
+
+def _window_energy(sub_blocks, size):
+    """每个子块起点的 size 个子块平均能量（滑动窗口，累加和相减）"""
+    if len(sub_blocks) < size:
+        return np.zeros(0)
+    total = np.concatenate([[0.0], np.cumsum(sub_blocks)])
+    return (total[size:] - total[:-size]) / size
+
+
+def gated_loudness(block_energy, relative_gate=RELATIVE_GATE):
+    """绝对门限和相对门限后的平均响度（LUFS），没有块通过门限时为 -inf"""
+    loud = block_energy[energy_to_lufs(block_energy) > ABSOLUTE_GATE]
+    if len(loud) == 0:
+        return float('-inf')
+    threshold = energy_to_lufs(np.mean(loud)) + relative_gate
+    gated = loud[energy_to_lufs(loud) > threshold]
+    return float(energy_to_lufs(np.mean(gated))) if len(gated) else float('-inf')
+
+
+class TruePeakDetector:
+    """流式过采样峰值包络
+
+    第k帧的值为以输入第k帧结束的滤波窗口产生的各过采样相位的最大绝对值（各声道取最大）。
+    包络相对输入有滤波器群延迟：输入第p帧附近的采样间峰值最迟出现在第 p+delay 帧
+    """
+
+    def __init__(self, sample_rate, channels=2):
+        self.channels = channels
+        self.oversampling = oversampling_factor(sample_rate)
+        self.delay = TRUE_PEAK_TAPS // 2 + 1 if self.oversampling > 1 else 0
+        if self.oversampling > 1:
+            from src.audio_processing.resampler import polyphase_filter
+            # (相位, 抽头)：抽头按输入时间顺序排列，乘以滑动窗口得到各相位的过采样输出
+            self._phases = np.ascontiguousarray(polyphase_filter(self.oversampling, 1, TRUE_PEAK_TAPS)[:, ::-1])
+        self.reset()
+
+    def reset(self):
+        self._history = np.zeros((TRUE_PEAK_TAPS - 1, self.channels), dtype=np.float32)
+
+    def process(self, block):
+        """block (帧, 声道) -> 逐帧峰值包络 (帧,)"""
+        if self.oversampling <= 1:
+            return np.abs(block).max(axis=1)
+        extended = np.concatenate([self._history, block.astype(np.float32, copy=False)])
+        envelope = np.zeros(len(block), dtype=np.float32)
+        for channel in range(self.channels):
+            windows = np.lib.stride_tricks.sliding_window_view(extended[:, channel], TRUE_PEAK_TAPS)
+            upsampled = self._phases @ windows.T  # (相位, 帧)：沿第一维取最大值比沿短的第二维快得多
+            np.abs(upsampled, out=upsampled)
+            np.maximum(envelope, upsampled.max(axis=0), out=envelope)
+        self._history = extended[-(TRUE_PEAK_TAPS - 1):].copy()
+        return envelope
+
+
+class LoudnessMeter:
+    """流式响度测量器"""
+
+    def __init__(self, sample_rate, channels=2, true_peak=True):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sos = k_weighting_sos(sample_rate)
+        self.weights = channel_weights(channels)
+        self.step = int(round(SUB_BLOCK * sample_rate))
+        self._detector = TruePeakDetector(sample_rate, channels) if true_peak else None
+        self.reset()
+
+    def reset(self):
+        """清空全部状态（播放跳转后调用）"""
+        self._zi = np.zeros((len(self.sos), 2, self.channels))
+        if self._detector is not None:
+            self._detector.reset()
+        self._blocks = []  # 已完成的100ms子块能量（按块追加的数组）
+        self._sub_blocks = None
+        self._partial = 0.0
+        self._partial_frames = 0
+        self.frames = 0
+        self.sample_peak = 0.0
+        self.true_peak = 0.0
+
+    def process(self, block):
+        """送入一块音频 (帧, 声道) 或单声道一维数组"""
+        block = np.asarray(block)
+        if block.ndim == 1:
+            block = block[:, None]
+        if len(block) == 0:
+            return
+        block = block[:, :self.channels]
+        self.frames += len(block)
+
+        filtered, self._zi = sosfilt(self.sos, block.astype(np.float64), axis=0, zi=self._zi)
+        power = np.square(filtered) @ self.weights
+
+        # 补齐上一块剩下的子块，其余整子块一次求和
+        fill = min(self.step - self._partial_frames, len(power))
+        self._partial += float(power[:fill].sum())
+        self._partial_frames += fill
+        completed = []
+        if self._partial_frames == self.step:
+            completed.append(self._partial / self.step)
+            self._partial, self._partial_frames = 0.0, 0
+            rest = power[fill:]
+            whole = len(rest) // self.step * self.step
+            completed.extend(rest[:whole].reshape(-1, self.step).mean(axis=1))
+            self._partial = float(rest[whole:].sum())
+            self._partial_frames = len(rest) - whole
+        if completed:
+            self._blocks.append(np.asarray(completed))
+            self._sub_blocks = None
+
+        self.sample_peak = max(self.sample_peak, float(block.max()), -float(block.min()))
+        if self._detector is not None:
+            self.true_peak = max(self.true_peak, float(self._detector.process(block).max()))
+        self.true_peak = max(self.true_peak, self.sample_peak)
+
+    @property
+    def sub_blocks(self):
+        """全部已完成子块的能量"""
+        if self._sub_blocks is None:
+            self._sub_blocks = np.concatenate(self._blocks) if self._blocks else np.zeros(0)
+            self._blocks = [self._sub_blocks] if len(self._sub_blocks) else []
+        return self._sub_blocks
+
+    def _latest(self, count):
+        sub_blocks = self.sub_blocks
+        if len(sub_blocks) < count:
+            return float('-inf')
+        return float(energy_to_lufs(np.mean(sub_blocks[-count:])))
+
+    @property
+    def momentary(self):
+        """最近400ms的响度（LUFS）"""
+        return self._latest(MOMENTARY_BLOCKS)
+
+    @property
+    def short_term(self):
+        """最近3秒的响度（LUFS）"""
+        return self._latest(SHORT_TERM_BLOCKS)
+
+    @property
+    def integrated(self):
+        """整体响度（LUFS）：400ms块每100ms一个，经绝对门限和相对门限"""
+        return gated_loudness(_window_energy(self.sub_blocks, MOMENTARY_BLOCKS))
+
+    @property
+    def loudness_range(self):
+        """响度范围（LU）：门限后短期响度分布的10%~95%分位"""
+        energy = _window_energy(self.sub_blocks, SHORT_TERM_BLOCKS)
+        loud = energy[energy_to_lufs(energy) > ABSOLUTE_GATE]
+        if len(loud) == 0:
+            return 0.0
+        levels = energy_to_lufs(loud)
+        levels = levels[levels > energy_to_lufs(np.mean(loud)) + LRA_RELATIVE_GATE]
+        if len(levels) == 0:
+            return 0.0
+        low, high = np.percentile(levels, [10, 95])
+        return float(high - low)
+
+    @property
+    def max_momentary(self):
+        return float(energy_to_lufs(_window_energy(self.sub_blocks, MOMENTARY_BLOCKS).max(initial=0.0)))
+
+    @property
+    def max_short_term(self):
+        return float(energy_to_lufs(_window_energy(self.sub_blocks, SHORT_TERM_BLOCKS).max(initial=0.0)))
+
+    @property
+    def true_peak_db(self):
+        with np.errstate(divide='ignore'):
+            return float(20.0 * np.log10(self.true_peak))
+
+    @property
+    def sample_peak_db(self):
+        with np.errstate(divide='ignore'):
+            return float(20.0 * np.log10(self.sample_peak))
+
+    def result(self):
+        """测量结果字典"""
+        return {
+            'integrated': self.integrated,
+            'loudness_range': self.loudness_range,
+            'true_peak_db': self.true_peak_db,
+            'sample_peak_db': self.sample_peak_db,
+            'max_momentary': self.max_momentary,
+            'max_short_term': self.max_short_term,
+            'duration': self.frames / self.sample_rate,
+        }
+
+
+def measure(audio, sample_rate, block_size=DEFAULT_BLOCK_SIZE, true_peak=True):
+    """测量整段音频（磁盘音轨按块读取并释放页面），返回 LoudnessMeter.result()"""
+    from src.audio_processing.track_store import iter_blocks
+    if not isinstance(audio, np.ndarray):
+        audio = np.asarray(audio)
+    meter = LoudnessMeter(sample_rate, 1 if audio.ndim == 1 else audio.shape[1], true_peak)
+    for _, block in iter_blocks(audio, block_size):
+        meter.process(block)
+    return meter.result()
+
+
+def measure_file(filepath, block_size=DEFAULT_BLOCK_SIZE, true_peak=True):
+    """流式测量音频文件"""
+    import soundfile as sf
+    with sf.SoundFile(filepath) as f:
+        meter = LoudnessMeter(f.samplerate, f.channels, true_peak)
+        for block in f.blocks(block_size, dtype='float32', always_2d=True):
+            meter.process(block)
+    return meter.result()
+
+
+def loudness_gain_db(measurement, target_lufs=DEFAULT_TARGET_LUFS, ceiling_db=DEFAULT_CEILING_DB):
+    """达到目标响度所需的增益（dB），不超过真峰值上限允许的增益；无法测量响度（静音）时为0"""
+    if not np.isfinite(measurement['integrated']):
+        return 0.0
+    gain = target_lufs - measurement['integrated']
+    if ceiling_db is not None and np.isfinite(measurement['true_peak_db']):
+        gain = min(gain, ceiling_db - measurement['true_peak_db'])
+    return float(gain)
+
+
+def normalize_loudness(audio, sample_rate, target_lufs=DEFAULT_TARGET_LUFS, ceiling_db=DEFAULT_CEILING_DB):
+    """一次测量加一次增益：返回 (处理后音频, 处理前测量结果, 增益dB)；
+    响度与真峰值都随增益线性变化，处理后的值即测量值加增益，无需再测一次"""
+    measurement = measure(audio, sample_rate)
+    gain_db = loudness_gain_db(measurement, target_lufs, ceiling_db)
+    output = np.multiply(audio, np.float32(10.0 ** (gain_db / 20.0)), dtype=np.float32)
+    return output, measurement, gain_db
+
+
+def format_measurement(measurement):
+    """测量结果的单行文字"""
+    return (f"整体响度 {measurement['integrated']:.1f} LUFS, 响度范围 {measurement['loudness_range']:.1f} LU, "
+            f"真峰值 {measurement['true_peak_db']:.1f} dBTP")
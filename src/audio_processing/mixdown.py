@@ -0,0 +1,143 @@
+"""
+AI音乐后期工程师 - 多轨混音引擎
+各音轨先统一到会话采样率（结果按音频缓存，同一音频只转换一次），
+再按块累加到预先分配的float32立体声输出中；音量、声像、静音、独奏逐块应用，
+不为每个音轨生成补齐长度或转为立体声的临时副本。
+磁盘音轨（内存映射）按块读取并在用完后释放页面，采样率转换结果同样流式写到磁盘
+"""
+
+import weakref
+
+import numpy as np
+
+from src.audio_processing.track_store import release_pages, resample_file
+
+
+MIX_BLOCK = 1 << 16  # 每块的帧数
+
+
+def pan_gains(pan):
+    """等功率声像：pan 为 -1（左）到 1（右），返回 (左增益, 右增益)"""
+    angle = (np.clip(pan, -1.0, 1.0) + 1.0) * np.pi / 4
+    return float(np.cos(angle) * np.sqrt(2.0)), float(np.sin(angle) * np.sqrt(2.0))
+
+
+def track_gains(track, soloed=False):
+    """音轨的 (左增益, 右增益)；静音、或有独奏音轨而本轨未独奏时为 None
+
+    音量取 track.volume（线性），声像取 track.pan，缺省时为1和居中
+    """
+    if getattr(track, 'muted', False) or (soloed and not getattr(track, 'solo', False)):
+        return None
+    volume = float(getattr(track, 'volume', 1.0))
+    left, right = pan_gains(float(getattr(track, 'pan', 0.0)))
+    return volume * left, volume * right
+
+
+class MixdownEngine:
+    """按块混音到预分配的立体声缓冲"""
+
+    def __init__(self, sample_rate, block_size=MIX_BLOCK):
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self._aligned = {}  # id(音频) -> (弱引用, 原采样率, 转换结果)
+        self._scratch = np.zeros((block_size, 2), dtype=np.float32)
+
+    def aligned_audio(self, track):
+        """音轨在会话采样率下的音频；采样率相同时直接返回原数组，不复制"""
+        audio = getattr(track, 'audio_data', None)
+        if audio is None or len(audio) == 0:
+            return None
+        rate = getattr(track, 'sample_rate', None) or self.sample_rate
+        if rate == self.sample_rate:
+            return audio
+
+        entry = self._aligned.get(id(audio))
+        if entry is not None and entry[0]() is audio and entry[1] == rate:
+            return entry[2]
+        if isinstance(audio, np.memmap) and audio.filename:
+            converted = resample_file(audio, rate, self.sample_rate, self.block_size)
+        else:
+            from scipy.signal import resample_poly
+            from src.audio_processing.resampler import rate_ratio
+            up, down = rate_ratio(rate, self.sample_rate)
+            converted = resample_poly(np.asarray(audio, dtype=np.float32), up, down, axis=0).astype(np.float32)
+            converted.flags.writeable = False
+        try:
+            self._aligned[id(audio)] = (weakref.ref(audio), rate, converted)
+        except TypeError:
+            pass  # 不支持弱引用的数组类型不缓存
+        self._prune()
+        return converted
+
+    def _prune(self):
+        self._aligned = {key: entry for key, entry in self._aligned.items() if entry[0]() is not None}
+
+    def _sources(self, tracks):
+        soloed = any(getattr(track, 'solo', False) for track in tracks)
+        sources = []
+        for track in tracks:
+            gains = track_gains(track, soloed)
+            audio = self.aligned_audio(track) if gains is not None else None
+            if audio is not None:
+                sources.append((audio, gains))
+        return sources
+
+    def output_length(self, tracks):
+        """混音结果的帧数（会话采样率）"""
+        return max((len(audio) for audio, _ in self._sources(tracks)), default=0)
+
+    def _mix_block(self, sources, start, block):
+        """把各音轨 [start, start+len(block)) 区间累加到 block"""
+        scratch = self._scratch
+        end = start + len(block)
+        block.fill(0.0)
+        for audio, (left, right) in sources:
+            if start >= len(audio):
+                continue
+            segment = audio[start:min(end, len(audio))]
+            n = len(segment)
+            if segment.ndim == 1:
+                np.multiply(segment, left, out=scratch[:n, 0])
+                np.multiply(segment, right, out=scratch[:n, 1])
+            elif segment.shape[1] == 1:
+                np.multiply(segment[:, 0], left, out=scratch[:n, 0])
+                np.multiply(segment[:, 0], right, out=scratch[:n, 1])
+            else:
+                # 多声道音轨取前两个声道，声像作为左右平衡
+                np.multiply(segment[:, 0], left, out=scratch[:n, 0])
+                np.multiply(segment[:, 1], right, out=scratch[:n, 1])
+            block[:n] += scratch[:n]
+            release_pages(audio, start, start + n)
+
+    def mix(self, tracks, out=None, progress=None):
+        """混音为 (帧, 2) float32 立体声；out 长度足够时直接写入 out（不重新分配，可以是磁盘上的内存映射）"""
+        sources = self._sources(tracks)
+        length = max((len(audio) for audio, _ in sources), default=0)
+        if out is None or len(out) < length:
+            out = np.zeros((length, 2), dtype=np.float32)
+        else:
+            out = out[:length]
+
+        for start in range(0, length, self.block_size):
+            end = min(start + self.block_size, length)
+            self._mix_block(sources, start, out[start:end])
+            release_pages(out, start, end)
+            if progress is not None:
+                progress(end / length)
+        return out
+
+    def mix_to_file(self, tracks, filepath, subtype=None, progress=None):
+        """逐块混音并直接写入音频文件，不在内存中保留整段混音结果"""
+        import soundfile as sf
+        sources = self._sources(tracks)
+        length = max((len(audio) for audio, _ in sources), default=0)
+        block = np.empty((self.block_size, 2), dtype=np.float32)
+        with sf.SoundFile(filepath, 'w', samplerate=int(self.sample_rate), channels=2, subtype=subtype) as f:
+            for start in range(0, length, self.block_size):
+                end = min(start + self.block_size, length)
+                self._mix_block(sources, start, block[:end - start])
+                f.write(block[:end - start])
+                if progress is not None:
+                    progress(end / length)
+        return length
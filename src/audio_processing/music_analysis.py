@@ -0,0 +1,158 @@
+"""
+AI音乐后期工程师 - 扒谱用的单次音乐分析
+旋律、和弦、调性和速度共用同一次分析：一次常数Q变换同时得到色度、起音点和逐帧能量，
+F0取自分析缓存（与音准修正、MIDI转换、五线谱共用），两者都按音频内容缓存。
+和弦识别把平滑后的逐帧色度与全部和弦模板做一次矩阵乘法打分，再按游程合并为和弦段，不逐帧循环
+"""
+
+import numpy as np
+
+
+NOTE_NAMES = ('C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B')
+# 和弦性质 -> 相对根音的音程；同分时排在前面的优先（三和弦优先于七和弦）
+CHORD_QUALITIES = (
+    ('', (0, 4, 7)),
+    ('m', (0, 3, 7)),
+    ('7', (0, 4, 7, 10)),
+    ('maj7', (0, 4, 7, 11)),
+    ('m7', (0, 3, 7, 10)),
+    ('dim', (0, 3, 6)),
+    ('sus4', (0, 5, 7)),
+)
+NO_CHORD = 'N'
+DEFAULT_CHORD_WINDOW = 1.0  # 色度平滑窗（秒），分解和弦在窗内叠加成完整和弦
+DEFAULT_MIN_CHORD = 0.5  # 最短和弦段（秒），更短的段并入前一段
+CHORD_THRESHOLD = 0.65  # 色度与模板的最低余弦相似度，低于此值视为无和弦（单个音约0.6）
+ROOT_EMPHASIS = 0.1  # 模板中根音的额外权重：构成音相同时根音更强的和弦得分更高
+QUALITY_PRIOR = 0.005  # 每往后一种和弦性质扣减的得分，简单和弦优先
+SILENCE_DB = -40.0  # 相对最响帧低于此能量视为静音
+
+# Krumhansl-Kessler 调性轮廓
+MAJOR_PROFILE = np.array([6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88])
+MINOR_PROFILE = np.array([6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17])
+
+CHORD_DTYPE = np.dtype([('start', np.float64), ('end', np.float64), ('chord', np.int16), ('score', np.float32)])
+
+
+def _chord_templates():
+    """全部和弦模板（按行单位化）、对应的和弦名和各模板的先验扣分"""
+    names, rows, prior = [], [], []
+    for rank, (quality, intervals) in enumerate(CHORD_QUALITIES):
+        base = np.zeros(12)
+        base[list(intervals)] = 1.0
+        base[0] += ROOT_EMPHASIS
+        for root in range(12):
+            names.append(NOTE_NAMES[root] + quality)
+            rows.append(np.roll(base, root))
+            prior.append(-QUALITY_PRIOR * rank)
+    templates = np.array(rows)
+    templates /= np.linalg.norm(templates, axis=1, keepdims=True)
+    return tuple(names), templates.astype(np.float32), np.array(prior, dtype=np.float32)
+
+
+def _key_profiles():
+    """24个调的轮廓（按行标准化），前12个为大调"""
+    rows = [np.roll(profile, tonic) for profile in (MAJOR_PROFILE, MINOR_PROFILE) for tonic in range(12)]
+    profiles = np.array(rows)
+    profiles -= profiles.mean(axis=1, keepdims=True)
+    profiles /= np.linalg.norm(profiles, axis=1, keepdims=True)
+    return profiles
+
+
+CHORD_NAMES, CHORD_TEMPLATES, CHORD_PRIOR = _chord_templates()
+KEY_PROFILES = _key_profiles()
+
+
+def analyze_music(audio, sample_rate, cache=None, melody=True):
+    """单次分析：色度、起音点、逐帧能量，以及（melody=True时）F0和浊音判定，全部取自分析缓存"""
+    from src.audio_processing.analysis_cache import DEFAULT_HOP_LENGTH, shared_analysis_cache
+    from src.audio_processing.audio_to_midi import to_mono
+    mono = to_mono(audio)
+    cache = cache or shared_analysis_cache()
+    analysis = dict(cache.get_harmony(mono, sample_rate, hop_length=DEFAULT_HOP_LENGTH))
+    if melody:
+        analysis.update(cache.get_f0(mono, sample_rate, hop_length=DEFAULT_HOP_LENGTH))
+    energy = analysis['energy']
+    peak = float(energy.max()) if len(energy) else 0.0
+    analysis['energy_db'] = 20 * np.log10(np.maximum(energy, 1e-10) / max(peak, 1e-10))
+    analysis['hop_length'] = DEFAULT_HOP_LENGTH
+    analysis['sample_rate'] = sample_rate
+    analysis['duration'] = len(mono) / sample_rate
+    return analysis
+
+
+def melody_notes(analysis, min_duration=None):
+    """旋律音符（NOTE_DTYPE），起音点和力度用常数Q变换得到的起音点和能量"""
+    from src.audio_processing.audio_to_midi import DEFAULT_MIN_NOTE, segment_notes
+    return segment_notes(analysis['f0'], analysis['voiced_flag'], analysis['onset_frames'],
+                         analysis['sample_rate'], analysis['hop_length'], analysis['energy_db'],
+                         min_duration or DEFAULT_MIN_NOTE)
+
+
+def _runs(labels):
+    """标签序列的游程：(开始帧, 结束帧, 标签)"""
+    starts = np.flatnonzero(np.concatenate([[True], labels[1:] != labels[:-1]]))
+    ends = np.append(starts[1:], len(labels))
+    return starts, ends, labels[starts]
+
+
+def chord_segments(analysis, window=DEFAULT_CHORD_WINDOW, min_duration=DEFAULT_MIN_CHORD,
+                   threshold=CHORD_THRESHOLD):
+    """和弦段（CHORD_DTYPE，chord 为 CHORD_NAMES 的下标），无和弦和静音段不返回"""
+    from scipy.ndimage import uniform_filter1d
+    chroma = np.asarray(analysis['chroma'], dtype=np.float32)
+    frame_count = chroma.shape[1]
+    if frame_count == 0:
+        return np.zeros(0, dtype=CHORD_DTYPE)
+    frame_time = analysis['hop_length'] / analysis['sample_rate']
+
+    size = max(1, int(round(window / frame_time)))
+    smoothed = uniform_filter1d(chroma, size, axis=1, mode='nearest')
+    smoothed /= np.maximum(np.linalg.norm(smoothed, axis=0), 1e-9)
+    scores = CHORD_TEMPLATES @ smoothed  # (模板数, 帧数)：一次矩阵乘法给所有帧、所有和弦打分
+    scores += CHORD_PRIOR[:, None]
+    labels = scores.argmax(axis=0)
+    best = scores[labels, np.arange(frame_count)]
+    energy_db = analysis['energy_db'][:frame_count]
+    labels[(best < threshold) | (energy_db < SILENCE_DB)] = -1
+
+    # 过短的段并入前一段，再合并相邻的同名段
+    starts, ends, run_labels = _runs(labels)
+    min_frames = max(1, int(round(min_duration / frame_time)))
+    owner = np.where(ends - starts < min_frames, 0, np.arange(len(starts)))
+    run_labels = run_labels[np.maximum.accumulate(owner)]
+    labels = np.repeat(run_labels, ends - starts)
+    starts, ends, run_labels = _runs(labels)
+
+    mean_score = np.add.reduceat(best, starts) / (ends - starts)
+    keep = run_labels >= 0
+    segments = np.zeros(int(keep.sum()), dtype=CHORD_DTYPE)
+    segments['start'] = starts[keep] * frame_time
+    segments['end'] = ends[keep] * frame_time
+    segments['chord'] = run_labels[keep]
+    segments['score'] = mean_score[keep]
+    return segments
+
+
+def estimate_key(analysis):
+    """调性：平均色度与24个调轮廓的相关系数（一次矩阵乘法），返回 (主音, '大调'/'小调', 相关系数)"""
+    mean = np.asarray(analysis['chroma'], dtype=np.float64).mean(axis=1)
+    mean -= mean.mean()
+    norm = np.linalg.norm(mean)
+    if norm == 0:
+        return NOTE_NAMES[0], '大调', 0.0
+    correlation = KEY_PROFILES @ (mean / norm)
+    best = int(correlation.argmax())
+    return NOTE_NAMES[best % 12], '大调' if best < 12 else '小调', float(correlation[best])
+
+
+def estimate_tempo(analysis, default=120.0):
+    """由起音强度估计速度（BPM），检测不到节拍时返回 default"""
+    import librosa
+    envelope = analysis['onset_envelope']
+    if len(envelope) == 0 or not np.any(envelope > 0):
+        return default
+    tempo, _ = librosa.beat.beat_track(onset_envelope=envelope, sr=analysis['sample_rate'],
+                                       hop_length=analysis['hop_length'])
+    tempo = float(np.atleast_1d(tempo)[0])
+    return tempo if tempo > 0 else default
@@ -0,0 +1,133 @@
+"""
+AI音乐后期工程师 - 分段并行音准修正
+在低能量间隙（换气、句间停顿）处切分乐句，各段带上下文在进程池中分别修正，
+再以等功率交叉淡化拼接。切分点位于静音处，对逐样本确定的算法，交叉淡化区间外的
+输出与整段串行处理一致；对合成相位取决于处理起点的算法（如WORLD），
+与串行结果的幅度谱误差应低于 -30 dB（见 benchmarks/bench_parallel_pitch.py）
+"""
+
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+DEFAULT_TARGET_SEGMENT = 10.0  # 秒
+DEFAULT_MIN_SEGMENT = 4.0
+DEFAULT_MAX_SEGMENT = 30.0
+DEFAULT_CONTEXT = 0.5  # 各段两侧额外送入的上下文（秒），修正结果中会被裁掉
+DEFAULT_CROSSFADE = 0.02
+
+
+def frame_energy_db(audio, hop_length=512):
+    """逐帧RMS能量（dB，相对最大帧；多声道取各声道平均功率）"""
+    power = audio ** 2 if audio.ndim == 1 else np.mean(audio ** 2, axis=1)
+    n_frames = int(np.ceil(len(power) / hop_length))
+    padded = np.zeros(n_frames * hop_length, dtype=np.float32)
+    padded[:len(power)] = power
+    rms = np.sqrt(np.mean(padded.reshape(n_frames, hop_length), axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10) / max(np.max(rms), 1e-10))
+
+
+def find_phrase_boundaries(audio, sample_rate, target_segment=DEFAULT_TARGET_SEGMENT,
+                           min_segment=DEFAULT_MIN_SEGMENT, max_segment=DEFAULT_MAX_SEGMENT,
+                           min_gap=0.1, threshold_db=-40.0, hop_length=512):
+    """在低能量间隙中点处选切分点（采样位置），段长尽量接近目标时长；
+    超过最大段长仍找不到间隙时，退而取窗口内能量最低的帧"""
+    energy = frame_energy_db(audio, hop_length)
+    silent = np.concatenate([[False], energy < threshold_db, [False]])
+    edges = np.flatnonzero(np.diff(silent.astype(np.int8)))
+    starts, ends = edges[::2], edges[1::2]
+    gap_frames = max(1, int(min_gap * sample_rate / hop_length))
+    long_gaps = (ends - starts) >= gap_frames
+    candidates = ((starts[long_gaps] + ends[long_gaps]) // 2) * hop_length
+
+    total = len(audio)
+    min_len, target_len, max_len = (int(s * sample_rate) for s in (min_segment, target_segment, max_segment))
+    splits = []
+    last = 0
+    while total - last > max(max_len, target_len + min_len):
+        window = candidates[(candidates >= last + min_len) & (candidates <= last + max_len)]
+        if len(window):
+            split = int(window[np.argmin(np.abs(window - (last + target_len)))])
+        else:
+            lo, hi = (last + min_len) // hop_length, (last + max_len) // hop_length
+            split = int((lo + np.argmin(energy[lo:hi])) * hop_length)
+        splits.append(split)
+        last = split
+
+    # 剩余部分较长时再按间隙切一次
+    if total - last > target_len + min_len:
+        window = candidates[(candidates >= last + min_len) & (candidates <= total - min_len)]
+        if len(window):
+            splits.append(int(window[np.argmin(np.abs(window - (last + target_len)))]))
+    return splits
+
+
+def equal_power_fades(length):
+    """等功率淡入/淡出曲线（平方和为1）"""
+    phase = (np.arange(length) + 0.5) / length * (np.pi / 2)
+    return np.sin(phase), np.cos(phase)
+
+
+def stitch_segments(pieces, bounds, total, crossfade):
+    """拼接各段修正结果：pieces[i] 从 bounds[i] - crossfade//2 开始，内部边界做等功率交叉淡化"""
+    first = pieces[0]
+    output = np.zeros((total,) + first.shape[1:], dtype=np.float32)
+    half = crossfade // 2
+    fade_in, fade_out = equal_power_fades(2 * half) if half else (np.zeros(0), np.zeros(0))
+    shape = (-1,) + (1,) * (first.ndim - 1)
+    for i, piece in enumerate(pieces):
+        start = max(bounds[i] - half, 0)
+        piece = piece[:total - start].astype(np.float32, copy=True)
+        if i > 0 and half:
+            piece[:2 * half] *= fade_in.reshape(shape)
+        if i < len(pieces) - 1 and half:
+            piece[-2 * half:] *= fade_out.reshape(shape)
+        output[start:start + len(piece)] += piece
+    return output
+
+
+def parallel_pitch_correction(audio, sample_rate, correct, workers=None, context=DEFAULT_CONTEXT,
+                              crossfade=DEFAULT_CROSSFADE, progress=None, **split_options):
+    """分段并行执行 correct(audio, sample_rate)（须可被pickle，如模块级函数或其partial）；
+    progress(0~1) 按完成的分段数报告进度"""
+    splits = find_phrase_boundaries(audio, sample_rate, **split_options)
+    workers = workers or os.cpu_count() or 1
+    if not splits or workers <= 1:
+        return correct(audio, sample_rate)
+
+    total = len(audio)
+    bounds = [0] + splits + [total]
+    pad = int(context * sample_rate)
+    half = int(crossfade * sample_rate) // 2
+    tasks = []
+    for seg_start, seg_end in zip(bounds[:-1], bounds[1:]):
+        ctx_start = max(seg_start - pad, 0)
+        ctx_end = min(seg_end + pad, total)
+        tasks.append((ctx_start, seg_start, seg_end, ctx_end))
+
+    # 使用spawn启动子进程：界面进程中已有Qt和工作线程，fork不安全
+    spawn = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=spawn) as pool:
+        futures = [pool.submit(correct, audio[ctx_start:ctx_end], sample_rate)
+                   for ctx_start, _, _, ctx_end in tasks]
+        results = []
+        for future in futures:
+            results.append(future.result())
+            if progress is not None:
+                progress(len(results) / len(futures))
+
+    pieces = []
+    for (ctx_start, seg_start, seg_end, ctx_end), result in zip(tasks, results):
+        result = np.asarray(result)
+        keep_start = max(seg_start - half, 0) - ctx_start
+        keep_end = min(seg_end + half, total) - ctx_start
+        piece = result[keep_start:keep_end]
+        if len(piece) < keep_end - keep_start:
+            # 修正结果比输入短时补零，保证拼接位置不漂移
+            padding = np.zeros((keep_end - keep_start - len(piece),) + piece.shape[1:], dtype=piece.dtype)
+            piece = np.concatenate([piece, padding])
+        pieces.append(piece)
+    return stitch_segments(pieces, bounds, total, 2 * half)
@@ -0,0 +1,204 @@
+"""
+AI音乐后期工程师 - 波形峰值金字塔
+逐级保存每块采样的最小值、最大值和平方和，按屏幕像素数查询任意时间范围的波形包络，
+查询耗时只与像素数有关、与采样数无关。同一版本只构建一次；同长度的新版本
+与上一版本比较后只重建发生变化的区间
+"""
+
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+
+BASE_BLOCK = 64  # 第0级每块的采样数
+LEVEL_FACTOR = 4  # 每升一级块大小扩大的倍数
+COMPARE_CHUNK = 1 << 16  # 查找变化区间时每次比较的采样数
+
+
+def _minmax_frames(audio):
+    """逐采样的 (最小值, 最大值, 平方)，多声道时跨声道合并"""
+    if audio.ndim == 1:
+        samples = audio.astype(np.float32, copy=False)
+        return samples, samples, np.square(samples)
+    return (audio.min(axis=1).astype(np.float32), audio.max(axis=1).astype(np.float32),
+            np.mean(np.square(audio, dtype=np.float32), axis=1))
+
+
+def _column_edges(count, pixels):
+    """把 count 个采样（或块）均匀分成不超过 pixels 列，返回各列的起始下标"""
+    return np.unique(np.linspace(0, count, min(pixels, count), endpoint=False).astype(np.int64))
+
+
+class PeakPyramid:
+    """多分辨率最小/最大/RMS金字塔"""
+
+    def __init__(self, audio, base_block=BASE_BLOCK, factor=LEVEL_FACTOR, build=True):
+        # 只保存音频的弱引用，缓存的金字塔不会阻止版本历史把旧版本转存到磁盘
+        self._audio_ref = weakref.ref(audio)
+        self.shape = audio.shape
+        self.length = len(audio)
+        self.base_block = base_block
+        self.factor = factor
+        self.levels = []  # [(mins, maxs, sumsq), ...]，第k级块大小为 base_block * factor**k
+        if build:
+            self._build_levels(audio, 0, self.length)
+
+    @property
+    def audio(self):
+        """对应的音频数组（已被释放时为None）"""
+        return self._audio_ref()
+
+    def block_size(self, level):
+        return self.base_block * self.factor ** level
+
+    def _level0(self, audio, start, end):
+        """计算采样区间 [start, end) 对应的第0级块（start需块对齐）"""
+        mins, maxs, squares = _minmax_frames(audio[start:end])
+        n_blocks = int(np.ceil(len(mins) / self.base_block))
+        pad = n_blocks * self.base_block - len(mins)
+        if pad:
+            # 末尾不足一块时用块内最后一个值填充，不影响最小/最大值
+            mins = np.concatenate([mins, np.full(pad, mins[-1], dtype=np.float32)])
+            maxs = np.concatenate([maxs, np.full(pad, maxs[-1], dtype=np.float32)])
+            squares = np.concatenate([squares, np.zeros(pad, dtype=squares.dtype)])
+        shape = (n_blocks, self.base_block)
+        # 平方和按float64累加，避免长块内的精度损失
+        return (mins.reshape(shape).min(axis=1), maxs.reshape(shape).max(axis=1),
+                squares.reshape(shape).sum(axis=1, dtype=np.float64))
+
+    @staticmethod
+    def _reduce(level, start, end, factor):
+        """由下一级的块区间 [start, end) 计算上一级（start需按factor对齐）"""
+        mins, maxs, sumsq = (array[start:end] for array in level)
+        n_blocks = int(np.ceil(len(mins) / factor))
+        pad = n_blocks * factor - len(mins)
+        if pad:
+            mins = np.concatenate([mins, np.full(pad, mins[-1], dtype=mins.dtype)])
+            maxs = np.concatenate([maxs, np.full(pad, maxs[-1], dtype=maxs.dtype)])
+            sumsq = np.concatenate([sumsq, np.zeros(pad)])
+        shape = (n_blocks, factor)
+        return mins.reshape(shape).min(axis=1), maxs.reshape(shape).max(axis=1), sumsq.reshape(shape).sum(axis=1)
+
+    def _build_levels(self, audio, start, end):
+        """重建采样区间 [start, end) 涉及的各级块；已有的级别原地更新"""
+        if self.length == 0:
+            self.levels = []
+            return
+        lo = start // self.base_block
+        hi = int(np.ceil(end / self.base_block))
+        update = self._level0(audio, lo * self.base_block, min(hi * self.base_block, self.length))
+        level = 0
+        while True:
+            if level < len(self.levels):
+                for array, values in zip(self.levels[level], update):
+                    array[lo:lo + len(values)] = values
+            else:
+                self.levels.append(tuple(np.array(values) for values in update))
+            if len(self.levels[level][0]) <= 1:
+                del self.levels[level + 1:]
+                break
+            lo, hi = lo // self.factor, int(np.ceil((lo + len(update[0])) / self.factor))
+            update = self._reduce(self.levels[level], lo * self.factor,
+                                  min(hi * self.factor, len(self.levels[level][0])), self.factor)
+            level += 1
+
+    def derive(self, audio):
+        """为同长度的新版本构建金字塔：只重建与本版本不同的区间"""
+        previous = self.audio
+        if previous is None or audio.shape != self.shape:
+            return PeakPyramid(audio, self.base_block, self.factor)
+        start, end = changed_range(previous, audio)
+        pyramid = PeakPyramid(audio, self.base_block, self.factor, build=False)
+        if start >= end:
+            pyramid.levels = self.levels  # 内容相同，共享全部级别
+            return pyramid
+        pyramid.levels = [tuple(array.copy() for array in level) for level in self.levels]
+        pyramid._build_levels(audio, start, end)
+        return pyramid
+
+    def query(self, start, end, pixels):
+        """查询采样区间 [start, end) 在给定像素宽度下的包络
+
+        返回 (各列起始采样位置, 最小值, 最大值, RMS)，列数不超过 pixels
+        """
+        start = max(0, int(start))
+        end = min(self.length, int(np.ceil(end)))
+        pixels = max(1, int(pixels))
+        if end <= start:
+            empty = np.zeros(0, dtype=np.float32)
+            return np.zeros(0, dtype=np.int64), empty, empty, empty
+
+        samples_per_pixel = (end - start) / pixels
+        audio = self.audio
+        if samples_per_pixel < self.base_block and audio is not None:
+            # 放大到单块以内时直接读取采样（区间不超过 pixels * base_block）
+            mins, maxs, squares = _minmax_frames(audio[start:end])
+            edges = _column_edges(end - start, pixels)
+            counts = np.diff(np.append(edges, end - start))
+            return (edges + start, np.minimum.reduceat(mins, edges), np.maximum.reduceat(maxs, edges),
+                    np.sqrt(np.add.reduceat(squares, edges) / counts).astype(np.float32))
+
+        # 选择每像素至少包含一块的最细级别
+        level = min(len(self.levels) - 1,
+                    max(0, int(np.floor(np.log(samples_per_pixel / self.base_block) / np.log(self.factor)))))
+        block = self.block_size(level)
+        mins, maxs, sumsq = self.levels[level]
+        first, last = start // block, min(len(mins), int(np.ceil(end / block)))
+        edges = _column_edges(last - first, pixels)
+        positions = (edges + first) * block
+        counts = np.diff(np.append(positions, min(last * block, self.length)))  # 末块可能不满
+        return (positions,
+                np.minimum.reduceat(mins[first:last], edges),
+                np.maximum.reduceat(maxs[first:last], edges),
+                np.sqrt(np.add.reduceat(sumsq[first:last], edges) / counts).astype(np.float32))
+
+
+def changed_range(old, new, chunk=COMPARE_CHUNK):
+    """从两端向中间逐块比较，返回发生变化的采样区间 [start, end)；未变化时 start >= end"""
+    length = len(new)
+    start = 0
+    while start < length and np.array_equal(old[start:start + chunk], new[start:start + chunk]):
+        start += chunk
+    if start >= length:
+        return length, length
+    end = length
+    while end > start and np.array_equal(old[max(end - chunk, start):end], new[max(end - chunk, start):end]):
+        end -= chunk
+    return start, max(end, start + 1)
+
+
+class PeakPyramidCache:
+    """按音频数组缓存金字塔；只缓存只读数组（版本历史中的快照内容不会再变化）"""
+
+    def __init__(self, max_entries=8):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # id(数组) -> (弱引用, 金字塔)
+
+    def get(self, audio):
+        audio = np.asarray(audio)
+        entry = self._entries.get(id(audio))
+        if entry is not None and entry[0]() is audio:
+            self._entries.move_to_end(id(audio))
+            return entry[1]
+
+        # 与最近缓存的同形状版本比较，只重建变化区间
+        previous = next((p for ref, p in reversed(self._entries.values())
+                         if ref() is not None and p.shape == audio.shape), None)
+        pyramid = previous.derive(audio) if previous is not None else PeakPyramid(audio)
+        if not audio.flags.writeable:
+            self._entries[id(audio)] = (weakref.ref(audio), pyramid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return pyramid
+
+
+_shared_cache = None
+
+
+def pyramid_for(audio):
+    """获取音频的峰值金字塔（进程内共享缓存）"""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = PeakPyramidCache()
+    return _shared_cache.get(audio)
@@ -0,0 +1,315 @@
+"""
+AI音乐后期工程师 - 环形缓冲播放引擎
+同时持有处理后和原始两个音频（只读视图，不复制），供数线程把两路相同位置的采样
+写入预分配的环形缓冲，声卡回调从缓冲中读取并按当前A/B选择混合输出。
+切换A/B时在下一次回调的当前采样位置开始线性交叉淡化，淡化在一个回调周期内完成，
+播放位置不变、不重新分配内存。声卡输出流按设备的默认采样率打开，缓冲中保存音频原采样率的
+采样，与设备采样率不同时在回调中用流式多相重采样转换。
+音源可以是磁盘音轨的内存映射，读入缓冲后即释放对应页面。
+本模块不依赖Qt，可以脱离声卡直接调用 fill() 渲染
+"""
+
+import threading
+
+import numpy as np
+
+from src.audio_processing.latency_calibration import stream_settings
+from src.audio_processing.resampler import StreamingResampler, preferred_output_rate
+from src.audio_processing.track_store import release_pages
+
+
+DEFAULT_BLOCK_SIZE = 512
+RING_FRAMES = 1 << 15  # 环形缓冲长度（帧，44.1kHz时约0.74秒）
+FEED_CHUNK = 4096  # 供数线程每次写入的帧数
+CROSSFADE_MS = 10.0  # A/B切换的交叉淡化时长（超过一个回调周期时按回调长度截断）
+
+
+def readonly_view(audio):
+    """音频的只读视图（不复制；原数组本身的可写属性不变）"""
+    audio = np.asarray(audio, dtype=np.float32)
+    if audio.flags.writeable:
+        audio = audio.view()
+        audio.flags.writeable = False
+    return audio
+
+
+class PlaybackEngine:
+    """A/B双源环形缓冲播放引擎"""
+
+    def __init__(self, sample_rate=44100, channels=2, block_size=None,
+                 ring_frames=RING_FRAMES, crossfade_ms=CROSSFADE_MS, output_rate=None, latency=None):
+        if block_size is None:
+            # 未指定时使用延迟校准档案中的回调帧数和延迟设置
+            block_size, latency = stream_settings(DEFAULT_BLOCK_SIZE)
+        self.sample_rate = sample_rate  # 音源采样率
+        self.output_rate = output_rate or sample_rate  # 声卡输出采样率，打开输出流时按设备更新
+        self.device = None
+        self.channels = channels
+        self.block_size = block_size
+        self.latency = latency
+        self.crossfade_ms = crossfade_ms
+        self.volume = 1.0
+        self.sources = [None, None]  # [处理后, 原始]
+        self.length = 0
+
+        # 环形缓冲 (音源, 帧, 声道)：每路音源的采样连续存放，回调中的运算都是连续数组之间的逐元素运算
+        self.capacity = max(int(ring_frames), 4 * block_size)
+        self._ring = np.zeros((2, self.capacity, channels), dtype=np.float32)
+        self._allocate_scratch(2 * block_size)
+        self._resampler = None
+
+        # 读写计数只增不减，位置 = _base + 计数；_generation 在跳转时递增，使进行中的读写作废
+        self._base = 0
+        self._read = 0
+        self._write = 0
+        self._generation = 0
+        self._feed_done = False
+        self._lock = threading.Lock()  # 只保护计数的快照和提交，复制采样时不持有
+
+        self._active = 0  # 目标音源：0=处理后, 1=原始
+        self._mix = 0.0  # 当前原始音频所占比例（0~1）
+        self.playing = False
+        self.finished = False
+        self.underruns = 0
+
+        self._wake = threading.Event()
+        self._stop_feeder = False
+        self._feeder = threading.Thread(target=self._feed_loop, name='playback-feeder', daemon=True)
+        self._feeder.start()
+        self._stream = None
+
+    def _allocate_scratch(self, frames):
+        self._scratch = np.zeros((frames, self.channels), dtype=np.float32)
+        self._input = np.zeros((frames, self.channels), dtype=np.float32)  # 重采样前的混合结果
+        # 混合比例按声道展开成与音频相同的形状：带广播或跨步的逐元素运算会让NumPy分配迭代缓冲
+        self._weights = np.zeros((frames, self.channels), dtype=np.float32)
+        self._steps = np.repeat(np.arange(1, frames + 1, dtype=np.float32)[:, None], self.channels, axis=1)
+        self._scratch_frames = frames
+
+    # ---- 音源与位置 ----
+
+    def set_sources(self, processed, original=None, keep_position=True, sample_rate=None):
+        """设置两路音源（只读视图）；默认保留当前位置，从该位置重新填充缓冲"""
+        if sample_rate and sample_rate != self.sample_rate:
+            position = self.position * sample_rate // self.sample_rate
+            self.sample_rate = sample_rate
+            with self._lock:
+                self._base, self._read, self._write = position, 0, 0
+        self.sources = [readonly_view(processed) if processed is not None else None,
+                        readonly_view(original) if original is not None else None]
+        self.length = max(len(s) for s in self.sources if s is not None) if any(
+            s is not None for s in self.sources) else 0
+        self.seek(min(self.position, self.length) if keep_position else 0)
+
+    @property
+    def position(self):
+        """当前输出到的帧位置"""
+        return self._base + self._read
+
+    def seek(self, frame):
+        """跳转到指定帧：丢弃缓冲内容，由供数线程从新位置重新填充"""
+        with self._lock:
+            self._generation += 1
+            self._base = int(max(0, min(frame, self.length)))
+            self._read = self._write = 0
+            self._feed_done = False
+            self.finished = False
+            self._resampler = self._make_resampler()
+        self._wake.set()
+
+    def _make_resampler(self):
+        """音源与声卡采样率不同时的流式重采样器（滤波器按比例缓存）"""
+        if self.output_rate == self.sample_rate:
+            return None
+        return StreamingResampler(self.sample_rate, self.output_rate, self.channels, max_frames=2 * self.block_size)
+
+    def set_output_rate(self, rate):
+        """设置声卡输出采样率，从当前位置重新开始转换"""
+        self.output_rate = int(rate)
+        self.seek(self.position)
+
+    # ---- A/B ----
+
+    @property
+    def active_source(self):
+        return self._active
+
+    def switch_to(self, index):
+        """选择输出的音源（0=处理后, 1=原始），下一次回调开始交叉淡化"""
+        self._active = 1 if index else 0
+
+    def toggle(self):
+        self.switch_to(1 - self._active)
+        return self._active
+
+    # ---- 供数线程 ----
+
+    def _feed_loop(self):
+        while not self._stop_feeder:
+            self._wake.wait(self.block_size / self.sample_rate)
+            self._wake.clear()
+            while not self._stop_feeder and self._feed_once():
+                pass
+
+    def _feed_once(self):
+        """写入一段采样；缓冲已满或音源已结束时返回False"""
+        with self._lock:
+            generation, base, write, read = self._generation, self._base, self._write, self._read
+            if self._feed_done:
+                return False
+        start = base + write
+        frames = min(FEED_CHUNK, read + self.capacity - write, self.length - start)
+        if self.length - start <= 0:
+            with self._lock:
+                if generation == self._generation:
+                    self._feed_done = True
+            return False
+        if frames <= 0:
+            return False
+
+        offset = write % self.capacity
+        first = min(frames, self.capacity - offset)
+        self._copy_sources(start, offset, first)
+        if frames > first:
+            self._copy_sources(start + first, 0, frames - first)
+        with self._lock:
+            if generation != self._generation:
+                return True  # 写入期间发生了跳转，丢弃本次写入
+            self._write = write + frames
+        return True
+
+    def _copy_sources(self, start, offset, frames):
+        """把两路音源 [start, start+frames) 写入缓冲的 [offset, offset+frames)"""
+        for index, source in enumerate(self.sources):
+            target = self._ring[index, offset:offset + frames]
+            if source is None:
+                source = self.sources[0]
+            available = max(0, min(frames, len(source) - start))
+            if available:
+                block = source[start:start + available]
+                if block.ndim == 1:
+                    target[:available] = block[:, None]
+                elif block.shape[1] >= self.channels:
+                    target[:available] = block[:, :self.channels]
+                else:
+                    target[:available, :block.shape[1]] = block
+                    target[:available, block.shape[1]:] = block[:, -1:]
+                release_pages(source, start, start + available)  # 磁盘音轨读入缓冲后释放页面
+            target[available:] = 0.0
+
+    # ---- 输出 ----
+
+    def fill(self, out):
+        """声卡回调：向 out (帧, 声道) 写入下一段输出
+
+        只使用预分配的缓冲，不分配内存；只有回调帧数超过预期（2倍块大小）时才扩容一次
+        """
+        if not self.playing:
+            out.fill(0.0)
+            return
+
+        with self._lock:
+            generation, read, write, feed_done = self._generation, self._read, self._write, self._feed_done
+            resampler = self._resampler
+        # 需要重采样时先把音源采样率的数据混合到临时缓冲，再转换到 out
+        frames = resampler.input_frames(len(out)) if resampler is not None else len(out)
+        if frames > self._scratch_frames:
+            self._allocate_scratch(frames)  # 只在声卡回调长度超过预期时发生
+        target = out if resampler is None else self._input[:frames]
+
+        n = min(frames, write - read)
+        offset = read % self.capacity
+        first = min(n, self.capacity - offset)
+        if n > 0:
+            weights = self._target_weights(n)
+            self._mix_into(target[:first], self._ring[:, offset:offset + first], weights[:first],
+                           self._scratch[:first])
+            if n > first:
+                self._mix_into(target[first:n], self._ring[:, :n - first], weights[first:], self._scratch[first:n])
+            self._mix = float(weights[-1, 0])  # 回调中途切换时以本次实际的目标为准
+        if n < frames:
+            target[n:] = 0.0
+        if resampler is not None:
+            resampler.process(target, out)
+
+        with self._lock:
+            if generation == self._generation:
+                self._read = read + n
+                if n < frames:
+                    if feed_done and self._read >= self._write:
+                        self.finished = True
+                    else:
+                        self.underruns += 1
+        self._wake.set()
+
+    def _target_weights(self, frames):
+        """本次回调中原始音频的逐帧比例 (帧, 声道)：从当前比例线性过渡到目标"""
+        weights = self._weights[:frames]
+        target = float(self._active)
+        if self._mix == target:
+            weights.fill(target)
+            return weights
+        fade = max(1, min(frames, int(self.crossfade_ms * self.sample_rate / 1000)))
+        np.multiply(self._steps[:fade], (target - self._mix) / fade, out=weights[:fade])
+        weights[:fade] += self._mix
+        weights[fade:] = target
+        return weights
+
+    def _mix_into(self, out, ring, weights, scratch):
+        """按逐帧比例混合缓冲中的两路音源，乘以音量后写入 out"""
+        processed, original = ring
+        if weights[0, 0] == weights[-1, 0] and weights[0, 0] in (0.0, 1.0):
+            np.multiply(original if weights[0, 0] else processed, self.volume, out=out)
+            return
+        np.subtract(original, processed, out=scratch)
+        scratch *= weights
+        scratch += processed
+        np.multiply(scratch, self.volume, out=out)
+
+    # ---- 声卡 ----
+
+    def open_stream(self):
+        """按设备的默认采样率打开声卡输出流（需要sounddevice）"""
+        import sounddevice as sd
+        self.close_stream()
+        self.set_output_rate(preferred_output_rate(self.device, fallback=self.sample_rate))
+
+        def callback(outdata, frames, time_info, status):
+            self.fill(outdata)
+
+        self._stream = sd.OutputStream(samplerate=self.output_rate, device=self.device, channels=self.channels,
+                                       dtype='float32', blocksize=self.block_size, latency=self.latency,
+                                       callback=callback)
+        return self._stream
+
+    def start(self):
+        """开始或继续播放"""
+        if self.finished or self.position >= self.length:
+            self.seek(0)
+        self.playing = True
+        if self._stream is None:
+            self.open_stream()
+        if not self._stream.active:
+            self._stream.start()
+
+    def pause(self):
+        self.playing = False
+        if self._stream is not None and self._stream.active:
+            self._stream.stop()
+
+    def stop(self):
+        self.pause()
+        self.seek(0)
+
+    def close_stream(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def close(self):
+        """关闭声卡输出流并结束供数线程"""
+        self.playing = False
+        self.close_stream()
+        self._stop_feeder = True
+        self._wake.set()
+        self._feeder.join(1.0)
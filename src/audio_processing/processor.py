@@ -0,0 +1,429 @@
+"""
+AI音乐后期工程师 - 音频处理器
+不依赖任何GUI组件，可供图形界面和批处理命令行共同使用
+"""
+
+import numpy as np
+
+from src.audio_processing.history import AudioHistory
+
+
+# 智能EQ各模式的九段增益预设
+SMART_EQ_PRESETS = {
+    'smart': [0, 0, 0.2, 0.5, 0.8, 0.6, 0.3, 0.1, 0],  # 智能模式
+    'vocal': [0, -0.3, 0, 0.5, 1.0, 1.2, 0.8, 0.3, -0.2],  # 人声模式
+    'instrumental': [0.2, 0.1, 0, 0.3, 0.5, 0.8, 1.0, 0.6, 0.2],  # 乐器模式
+    'mix': [0, 0, 0.1, 0.3, 0.5, 0.4, 0.2, 0.1, 0],  # 混音模式
+    'flat': [0, 0, 0, 0, 0, 0, 0, 0, 0],  # 平坦模式
+    'bright': [0, 0, 0, 0.2, 0.5, 1.0, 1.2, 0.8, 0.3],  # 明亮模式
+    'warm': [0.5, 0.3, 0.1, 0, -0.2, -0.1, 0, 0, -0.3]  # 温暖模式
+}
+
+# 反AI痕迹音准修正各模式参数: (修正强度, 表现力保留强度)
+ANTI_AI_TUNE_PARAMS = {
+    'aggressive': (0.9, 0.3),
+    'gentle': (0.5, 0.6),
+    'adaptive': (0.7, 0.5),
+    'smart': (0.7, 0.4)
+}
+
+PREVIEW_MARGIN_SECONDS = 0.5  # 片段预览时两侧多分析的时长，片段边缘的F0估计不受截断影响
+
+
+def smart_tune(audio, sample_rate, mode='smart', anti_ai=True):
+    """一键音准校准的核心处理（模块级函数，可在子进程中对单个分段调用）"""
+    if anti_ai:
+        # 使用反AI痕迹音准修正
+        from src.audio_processing.anti_ai_processing import AntiAIPitchCorrector
+        strength, expression_intensity = ANTI_AI_TUNE_PARAMS.get(mode, ANTI_AI_TUNE_PARAMS['smart'])
+        processed_audio = AntiAIPitchCorrector().anti_ai_auto_tune(
+            audio,
+            sample_rate,
+            strength=strength,
+            preserve_expression=True,
+            expression_intensity=expression_intensity
+        )
+    else:
+        # 使用传统增强版音准修正
+        from src.audio_processing.enhanced_pitch_correction import EnhancedPitchCorrector
+        processed_audio = EnhancedPitchCorrector().one_click_tune(audio, sample_rate, mode=mode)
+    
+    # 防止处理累积误差，确保数值稳定
+    return np.clip(processed_audio, -1.0, 1.0)
+
+
+class AudioProcessor:
+    """音频处理器"""
+    
+    def __init__(self, history_budget_mb=512, spill_to_disk=True):
+        self.sample_rate = None
+        # 版本历史：每次处理结果作为只读快照保存，撤销/重做/对比均不复制数据
+        self.history = AudioHistory(memory_budget_mb=history_budget_mb, spill_to_disk=spill_to_disk)
+        self.compare_version = None  # 指定对比版本，None表示与上一版本对比
+
+    @property
+    def audio_data(self):
+        """当前版本的音频（只读）"""
+        return self.history.current()
+
+    @audio_data.setter
+    def audio_data(self, value):
+        """赋值即提交一个新版本（不修改所赋的数组，必要时复制）"""
+        if value is None:
+            self.history.clear()
+        else:
+            self.history.push(value)
+
+    def commit(self, audio, owned=False):
+        """提交处理结果作为新版本；owned=True 表示调用方不再使用该数组，不复制直接设为只读"""
+        self.history.push(audio, owned)
+
+    @property
+    def original_audio(self):
+        """最初加载的音频（第0个版本）"""
+        return self.history.get(0)
+
+    @property
+    def backup_audio(self):
+        """用于对比的音频：指定的对比版本，或当前版本之前最近的仍保留的版本（原始版本始终保留）"""
+        if self.compare_version is not None and self.compare_version < len(self.history):
+            audio = self.history.get(self.compare_version)
+            if audio is not None:
+                return audio
+        for index in range(self.history.current_index - 1, 0, -1):
+            audio = self.history.get(index)
+            if audio is not None:
+                return audio
+        return self.history.get(0)
+
+    def undo(self):
+        """撤销一步"""
+        return self.history.undo() is not None
+
+    def redo(self):
+        """重做一步"""
+        return self.history.redo() is not None
+
+    def reset_to_original(self):
+        """恢复原始音频（作为新版本提交，可撤销）"""
+        if self.original_audio is None:
+            return False
+        self.audio_data = self.original_audio
+        return True
+
+    def set_compare_version(self, index):
+        """设置A/B对比所用的版本，None表示与上一版本对比"""
+        self.compare_version = index
+
+    def load_audio(self, filepath):
+        """加载音频文件"""
+        try:
+            import librosa
+            audio_data, self.sample_rate = librosa.load(filepath, sr=None)
+            self.history.reset(audio_data, owned=True)
+            self.compare_version = None
+            return True
+        except Exception as e:
+            print(f"加载音频文件失败: {e}")
+            return False
+    
+    def save_audio(self, filepath):
+        """保存音频文件"""
+        try:
+            if self.audio_data is not None:
+                import soundfile as sf
+                sf.write(filepath, self.audio_data, self.sample_rate)
+                return True
+        except Exception as e:
+            print(f"保存音频文件失败: {e}")
+        return False
+
+    def process_file_streaming(self, input_path, output_path, bands=None, master_mode=None,
+                               block_size=None, linear_phase=False, progress=None, target_lufs=None):
+        """流式处理长录音：分块读取、均衡/母带处理后直接写出，不加载整个文件
+        （target_lufs 不为None时再按目标响度调整增益，需多读一遍文件）"""
+        try:
+            from src.audio_processing.streaming import StreamingProcessor, DEFAULT_BLOCK_SIZE
+            streamer = StreamingProcessor(block_size=block_size or DEFAULT_BLOCK_SIZE)
+            return streamer.process_file(
+                input_path,
+                output_path,
+                bands=bands,
+                master_mode=master_mode,
+                linear_phase=linear_phase,
+                progress=progress,
+                target_lufs=target_lufs
+            )
+        except Exception as e:
+            print(f"流式处理失败: {e}")
+            return False
+    
+    def pitch_analysis(self, audio=None):
+        """当前音频的F0、浊音与起音分析（经共享缓存，同一内容只分析一次）"""
+        audio = self.audio_data if audio is None else audio
+        if audio is None:
+            return None
+        from src.audio_processing.analysis_cache import shared_analysis_cache
+        mono = audio if audio.ndim == 1 else np.mean(audio, axis=1)
+        return shared_analysis_cache().get_pitch_analysis(mono, self.sample_rate)
+
+    def equalize(self, bands, linear_phase=False, progress=None):
+        """EQ调节 - 均衡器（linear_phase=True时使用线性相位FFT卷积，适合母带）；progress(0~1) 报告进度"""
+        if self.audio_data is None or len(bands) == 0:
+            return False
+            
+        try:
+            if linear_phase:
+                from src.effects.linear_phase_eq import shared_linear_phase_eq
+                processed_audio = shared_linear_phase_eq().apply(self.audio_data, self.sample_rate, bands,
+                                                                 progress=progress)
+            else:
+                # 使用带系数缓存的滤波器组引擎：所有频段一次级联处理
+                from src.effects.filter_bank import shared_filter_bank
+                processed_audio = shared_filter_bank().apply(self.audio_data, self.sample_rate, bands,
+                                                             progress=progress)
+            
+            # 防止处理累积误差，确保数值稳定
+            processed_audio = np.clip(processed_audio, -1.0, 1.0, out=processed_audio)
+            
+            self.commit(processed_audio, owned=True)
+            
+            return True
+        except ImportError:
+            print("均衡器模块不可用")
+            return False
+        except Exception as e:
+            print(f"EQ调节失败: {e}")
+            return False
+
+    def smart_equalize(self, mode='smart', anti_ai=True, linear_phase=False, progress=None):
+        """智能一键EQ（可选反AI痕迹；linear_phase=True时以线性相位方式只应用模式预设曲线，
+        不能与反AI痕迹处理同时使用）；progress 只在线性相位方式下报告进度"""
+        if self.audio_data is None:
+            return False
+        
+        if linear_phase:
+            if anti_ai:
+                print("线性相位EQ只应用模式的预设曲线，不能同时进行反AI痕迹处理（请关闭反AI选项）")
+                return False
+            bands = SMART_EQ_PRESETS.get(mode, SMART_EQ_PRESETS['smart'])
+            return self.equalize(bands, linear_phase=True, progress=progress)
+        
+        try:
+            if anti_ai:
+                # 使用反AI痕迹均衡器
+                from src.audio_processing.anti_ai_processing import AntiAIEqualizer
+                eq = AntiAIEqualizer(sample_rate=self.sample_rate)
+                
+                # 根据模式选择预设
+                bands = SMART_EQ_PRESETS.get(mode, SMART_EQ_PRESETS['smart'])
+                self.commit(eq.anti_ai_equalize(
+                    self.audio_data, 
+                    bands, 
+                    preserve_natural=True
+                ), owned=True)
+            else:
+                # 使用传统增强版均衡器
+                from src.effects.enhanced_equalizer import EnhancedEqualizer
+                eq = EnhancedEqualizer(sample_rate=self.sample_rate)
+                processed_audio = eq.one_click_eq(self.audio_data, mode=mode)
+                
+                # 防止处理累积误差，确保数值稳定
+                processed_audio = np.clip(processed_audio, -1.0, 1.0)
+                
+                self.commit(processed_audio, owned=True)
+            return True
+        except ImportError:
+            print("均衡器模块不可用，使用基础EQ")
+            # 降级到基础EQ
+            return self.equalize([0]*9, progress=progress)  # 应用平坦EQ
+        except Exception as e:
+            print(f"智能EQ失败: {e}")
+            return False
+
+    def pitch_correction(self, semitones=0, strength=1.0, progress=None):
+        """音准调校 - 变调功能；progress(0~1) 在WORLD音高引擎合成时报告进度"""
+        if self.audio_data is None:
+            return False
+            
+        try:
+            # 优先使用WORLD音高引擎：分解结果按内容缓存，重复调整只需重新合成
+            from src.audio_processing.world_pitch_engine import shared_world_pitch_engine
+            self.commit(shared_world_pitch_engine().render(
+                self.audio_data,
+                self.sample_rate,
+                semitones=semitones,
+                strength=strength,
+                progress=progress
+            ), owned=True)
+            return True
+        except ImportError:
+            pass
+        except Exception as e:
+            print(f"WORLD音高引擎处理失败，改用备用方案: {e}")
+
+        try:
+            # 导入音准修正模块
+            from src.audio_processing.pitch_correction import PitchCorrector
+            corrector = PitchCorrector()
+            
+            # 使用更高级的音准修正方法
+            self.commit(corrector.auto_tune(
+                self.audio_data,
+                self.sample_rate,
+                strength=strength,
+                pitch_shift_semitones=semitones
+            ), owned=True)
+            return True
+        except ImportError:
+            # 如果音准修正模块不可用，使用降级方案
+            try:
+                import librosa
+                self.commit(librosa.effects.pitch_shift(
+                    y=self.audio_data,
+                    sr=self.sample_rate,
+                    n_steps=semitones
+                ), owned=True)
+                return True
+            except Exception as e:
+                print(f"音准调校失败: {e}")
+                return False
+        except Exception as e:
+            print(f"音准调校失败: {e}")
+            return False
+    
+    def preview_pitch(self, semitones=0, strength=1.0, start=0.0, duration=None):
+        """音准调整预览：返回合成结果而不写入版本历史；start/duration（秒）可只渲染一段，
+        此时只分析该片段（两侧各留一点余量），不必等整段音频的WORLD分解"""
+        audio = self.audio_data
+        if audio is None:
+            return None
+        try:
+            from src.audio_processing.world_pitch_engine import shared_world_pitch_engine
+            if duration is not None:
+                margin = int(PREVIEW_MARGIN_SECONDS * self.sample_rate)
+                first = int(round(start * self.sample_rate))
+                lo = max(0, first - margin)
+                audio = audio[lo:first + int(round(duration * self.sample_rate)) + margin]
+                start = (first - lo) / self.sample_rate
+            return shared_world_pitch_engine().render(
+                audio,
+                self.sample_rate,
+                semitones=semitones,
+                strength=strength,
+                start=start,
+                duration=duration
+            )
+        except Exception as e:
+            print(f"音准预览失败: {e}")
+            return None
+
+    def smart_pitch_correction(self, mode='smart', anti_ai=True, parallel=False, workers=None, progress=None):
+        """智能一键音准校准（可选反AI痕迹）；parallel=True时在静音处分段、多进程并行处理，
+        progress(0~1) 按完成的分段数报告进度"""
+        if self.audio_data is None:
+            return False
+        
+        try:
+            if parallel:
+                from functools import partial
+                from src.audio_processing.parallel_pitch import parallel_pitch_correction
+                processed_audio = parallel_pitch_correction(
+                    self.audio_data,
+                    self.sample_rate,
+                    partial(smart_tune, mode=mode, anti_ai=anti_ai),
+                    workers=workers,
+                    progress=progress
+                )
+                # 交叉淡化后再限幅一次
+                processed_audio = np.clip(processed_audio, -1.0, 1.0)
+            else:
+                processed_audio = smart_tune(self.audio_data, self.sample_rate, mode=mode, anti_ai=anti_ai)
+            
+            self.commit(processed_audio, owned=True)
+            return True
+        except ImportError:
+            print("音准修正模块不可用，使用基础校准")
+            # 降级到基础校准
+            return self.pitch_correction(strength=0.5, progress=progress)
+        except Exception as e:
+            print(f"智能音准校准失败: {e}")
+            return False
+
+    def master(self, threshold_db=-20, ceiling_db=-1, stereo_width=1.0, preset='balanced', multiband_bands=0,
+               progress=None):
+        """按压缩阈值、限制器上限和立体声宽度进行母带处理；multiband_bands 为3~5时使用多频段压缩；
+        progress(0~1) 报告进度"""
+        if self.audio_data is None:
+            return False
+        
+        # 导入母带处理模块（不可用时抛出ImportError，由调用方提示）
+        from src.effects.mastering import MasteringProcessor, Compressor, Limiter, StereoEnhancer
+        
+        # 创建母带处理器并设置参数
+        mastering_proc = MasteringProcessor(sample_rate=self.sample_rate)
+        mastering_proc.chain.compressor = Compressor(
+            threshold_db=threshold_db,
+            sample_rate=self.sample_rate
+        )
+        mastering_proc.chain.limiter = Limiter(
+            threshold_db=ceiling_db,
+            sample_rate=self.sample_rate,
+            high_freq_protection=False  # 暂时关闭避免新问题
+        )
+        mastering_proc.chain.stereo_enhancer = StereoEnhancer(width_factor=stereo_width)
+        if multiband_bands:
+            mastering_proc.enable_multiband(multiband_bands, threshold_db=threshold_db)
+        
+        processed_audio = mastering_proc.process_audio(self.audio_data, preset=preset, progress=progress)
+        
+        # 防止处理累积误差，确保数值稳定
+        self.commit(np.clip(processed_audio, -1.0, 1.0), owned=True)
+        return True
+
+    def smart_master(self, mode='smart', progress=None):
+        """智能母带处理（整个操作只提交一个版本）；增强版母带处理已按模式的目标响度加增益并限制峰值，
+        结果直接提交，不再调整一次增益。模块不可用时降级为按模式目标响度的基础母带处理；progress(0~1) 报告进度"""
+        if self.audio_data is None:
+            return False
+        
+        try:
+            # 导入增强版母带处理模块
+            from src.effects.enhanced_mastering import EnhancedMasteringProcessor
+        except ImportError:
+            print("增强版母带处理模块不可用，使用基础处理")
+            # 降级到基础母带处理
+            from src.audio_processing.loudness import (DEFAULT_CEILING_DB, DEFAULT_TARGET_LUFS,
+                                                       MASTER_LOUDNESS_TARGETS)
+            target_lufs, ceiling_db = MASTER_LOUDNESS_TARGETS.get(mode, (DEFAULT_TARGET_LUFS, DEFAULT_CEILING_DB))
+            return self.apply_basic_mastering(target_lufs, ceiling_db)
+        
+        try:
+            mastering_proc = EnhancedMasteringProcessor(sample_rate=self.sample_rate)
+            # 应用智能母带处理
+            self.commit(mastering_proc.one_click_master(self.audio_data, mode=mode, progress=progress), owned=True)
+            return True
+        except Exception as e:
+            print(f"智能母带处理失败: {e}")
+            return False
+    
+    def apply_basic_mastering(self, target_lufs=None, ceiling_db=None):
+        """基础母带处理（也是智能母带的降级方案）：测量一次EBU R128响度，再乘一次增益达到目标响度，
+        增益不超过真峰值上限允许的范围（默认 -14 LUFS、-1 dBTP）"""
+        if self.audio_data is None:
+            return False
+        
+        self.commit(self._normalize_loudness(self.audio_data, target_lufs, ceiling_db), owned=True)
+        return True
+
+    def _normalize_loudness(self, audio, target_lufs=None, ceiling_db=None):
+        """返回按目标响度调整增益后的新数组（不提交版本）"""
+        from src.audio_processing.loudness import (DEFAULT_CEILING_DB, DEFAULT_TARGET_LUFS, format_measurement,
+                                                   normalize_loudness)
+        target_lufs = DEFAULT_TARGET_LUFS if target_lufs is None else target_lufs
+        ceiling_db = DEFAULT_CEILING_DB if ceiling_db is None else ceiling_db
+        output, measurement, gain_db = normalize_loudness(audio, self.sample_rate, target_lufs, ceiling_db)
+        print(f"处理前{format_measurement(measurement)}；增益 {gain_db:+.1f}dB")
+        if measurement['integrated'] + gain_db < target_lufs - 0.5:
+            print(f"受真峰值上限 {ceiling_db:g}dBTP 限制，响度只能达到 {measurement['integrated'] + gain_db:.1f} LUFS")
+        return output
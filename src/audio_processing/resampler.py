@@ -0,0 +1,171 @@
+"""
+AI音乐后期工程师 - 流式多相重采样
+按有理数比例 up/down 转换采样率，逐块处理并在块之间保留滤波器状态，
+可以在声卡回调中按输出帧数逐次调用。多相滤波器按比例缓存，同一比例只设计一次
+"""
+
+from fractions import Fraction
+from functools import lru_cache
+
+import numpy as np
+
+
+TAPS_PER_PHASE = 64  # 每个相位的滤波器长度（即输入采样的卷积长度）
+MAX_FRAMES = 4096  # 预分配的单次输出帧数，超过时扩容一次
+KAISER_BETA = 8.0  # 约80dB阻带衰减
+CUTOFF_RATIO = 0.9  # 截止频率相对较低奈奎斯特频率的比例，过渡带落在奈奎斯特频率以内
+
+
+def rate_ratio(input_rate, output_rate, max_denominator=1000):
+    """输出/输入采样率的最简分数 (up, down)"""
+    ratio = Fraction(int(round(output_rate)), int(round(input_rate))).limit_denominator(max_denominator)
+    return ratio.numerator, ratio.denominator
+
+
+@lru_cache(maxsize=16)
+def polyphase_filter(up, down, taps_per_phase=TAPS_PER_PHASE):
+    """Kaiser窗低通滤波器按相位拆分，返回 (up, taps_per_phase)，[p, k] = h[p + k*up]
+
+    滤波器长度取奇数（末尾补一个0凑满 up*taps_per_phase），群延迟是整数个上采样后的采样
+    """
+    from scipy.signal import firwin
+    h = firwin(up * taps_per_phase - 1, CUTOFF_RATIO / max(up, down), window=('kaiser', KAISER_BETA)) * up
+    h = np.append(h, 0.0)
+    bank = h.reshape(taps_per_phase, up).T.astype(np.float32)
+    bank.flags.writeable = False
+    return bank
+
+
+@lru_cache(maxsize=16)
+def _reversed_bank(up, down, taps_per_phase=TAPS_PER_PHASE):
+    """按输入时间顺序排列的滤波器组 (up, taps_per_phase, 1)，[p, m] = h[p + (taps-1-m)*up]"""
+    bank = np.ascontiguousarray(polyphase_filter(up, down, taps_per_phase)[:, ::-1])[:, :, None]
+    bank.flags.writeable = False
+    return bank
+
+
+def clear_filter_cache():
+    """清空已缓存的滤波器设计"""
+    polyphase_filter.cache_clear()
+    _reversed_bank.cache_clear()
+
+
+class StreamingResampler:
+    """流式多相重采样器
+
+    第 n 个输出对应上采样后的位置 t = n*down，取输入 x[t//up - k] 与相位 t%up 的滤波器卷积。
+    每次 process() 前用 input_frames(输出帧数) 查询需要的输入帧数。
+    历史+输入、下标、窗口和输出的临时缓冲按 max_frames 个输出预分配，
+    传入 out 时 process() 不分配内存，可以在声卡回调中调用
+    """
+
+    def __init__(self, input_rate, output_rate, channels=1, taps_per_phase=TAPS_PER_PHASE, max_frames=MAX_FRAMES):
+        self.input_rate = input_rate
+        self.output_rate = output_rate
+        self.channels = channels
+        self.up, self.down = rate_ratio(input_rate, output_rate)
+        self.taps = taps_per_phase
+        self.bank = polyphase_filter(self.up, self.down, taps_per_phase)
+        self._bank = _reversed_bank(self.up, self.down, taps_per_phase)
+        self._allocate(max_frames)
+        self.reset()
+
+    def _allocate(self, frames):
+        """按单次最多 frames 个输出分配临时缓冲"""
+        self.max_frames = frames
+        inputs = (frames * self.down) // self.up + 2  # 偏移量在一个上采样周期内，最多多需要1帧输入
+        # 两个 (taps + 输入, 声道) 缓冲交替使用：本次的末尾 taps 帧复制到另一个缓冲的开头作为历史，避免重叠复制
+        self._buffers = [np.zeros((self.taps + inputs, self.channels), dtype=np.float32) for _ in range(2)]
+        self._steps = np.arange(frames, dtype=np.int64) * self.down
+        self._positions = np.empty(frames, dtype=np.int64)
+        self._phases = np.empty(frames, dtype=np.int64)
+        self._starts = np.empty(frames, dtype=np.int64)
+        self._windows = np.empty((self.taps, frames, self.channels), dtype=np.float32)  # [m, n] = 第n个输出窗口的第m帧
+        self._kernels = np.empty((frames, self.taps, 1), dtype=np.float32)
+        self._result = np.empty((frames, self.channels, 1), dtype=np.float32)
+
+    @property
+    def passthrough(self):
+        return self.up == self.down
+
+    @property
+    def group_delay(self):
+        """滤波器群延迟（上采样后的采样数，整数）"""
+        return (self.up * self.taps - 2) // 2
+
+    @property
+    def latency(self):
+        """滤波器群延迟（输入帧）"""
+        return self.group_delay / self.up
+
+    def reset(self, offset=0):
+        """清空滤波器状态（跳转播放位置后调用）；offset 为第一个输出在上采样后的位置"""
+        for buffer in self._buffers:
+            buffer[:self.taps] = 0.0
+        self._current = 0  # 历史保存在 _buffers[_current] 的前 taps 帧
+        self._offset = int(offset)  # 下一个输出在上采样后的位置，相对于下一块输入的起点
+
+    def input_frames(self, output_frames):
+        """产生 output_frames 个输出需要的输入帧数"""
+        if self.passthrough:
+            return output_frames
+        last = self._offset + (output_frames - 1) * self.down
+        return max(0, last // self.up + 1)
+
+    def process(self, block, out=None):
+        """输入 block (input_frames(输出帧数), 声道)，返回 (输出帧数, 声道)"""
+        block = np.asarray(block, dtype=np.float32)
+        if block.ndim == 1:
+            block = block[:, None]
+        if self.passthrough:
+            if out is None:
+                return block.copy()
+            out[:] = block
+            return out
+
+        frames = self._output_frames(len(block)) if out is None else len(out)
+        if frames > self.max_frames or self.taps + len(block) > len(self._buffers[0]):
+            self._grow(max(frames, self.max_frames), len(block))  # 只在回调长度超过预期时发生
+        positions = np.add(self._steps[:frames], self._offset, out=self._positions[:frames])
+        phases = np.remainder(positions, self.up, out=self._phases[:frames])
+        # 输入下标可能为-1（上一块的最后一帧），历史缓冲保留 taps 帧；
+        # 第 n 个输出使用的输入窗口从 extended 的第 positions//up + 1 帧开始
+        starts = np.floor_divide(positions, self.up, out=self._starts[:frames])
+        starts += 1
+        extended = self._buffers[self._current][:self.taps + len(block)]
+        extended[self.taps:] = block
+        # 逐个抽头从连续的 extended 中按行取出各输出窗口的第 m 帧（带广播的下标运算会分配迭代缓冲）
+        windows = self._windows[:, :frames]
+        for m, row in enumerate(windows):
+            extended[m:].take(starts, 0, row, 'clip')  # 位置参数：每次回调调用 taps 次，关键字解析的开销不可忽略
+        kernels = np.take(self._bank, phases, axis=0, out=self._kernels[:frames], mode='clip')
+        result = np.matmul(windows.transpose(1, 2, 0), kernels, out=self._result[:frames])[:, :, 0]
+        if out is None:
+            out = result.copy()
+        else:
+            out[:] = result
+
+        self._current = 1 - self._current
+        self._buffers[self._current][:self.taps] = extended[len(block):]
+        self._offset += frames * self.down - len(block) * self.up
+        return out
+
+    def _grow(self, frames, input_frames):
+        """扩大临时缓冲，保留历史"""
+        history = self._buffers[self._current][:self.taps].copy()
+        self._allocate(max(frames, (input_frames * self.up) // self.down + 1))
+        self._current = 0
+        self._buffers[0][:self.taps] = history
+
+    def _output_frames(self, input_frames):
+        """给定输入帧数时可以产生的输出帧数"""
+        return max(0, (input_frames * self.up - 1 - self._offset) // self.down + 1)
+
+
+def preferred_output_rate(device=None, fallback=44100):
+    """声卡输出设备的默认采样率（无法查询时返回 fallback）"""
+    try:
+        import sounddevice as sd
+        return int(sd.query_devices(device, 'output')['default_samplerate'])
+    except Exception:
+        return fallback
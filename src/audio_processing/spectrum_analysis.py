@@ -0,0 +1,225 @@
+"""
+AI音乐后期工程师 - 频谱分析服务
+整段音频的Welch平均长时频谱和分块STFT频谱图，在后台线程中计算，
+结果按音频版本缓存：切换对比显示、反复刷新都不会重新计算。
+STFT按固定帧数分块，完整分块放在有限大小的LRU中，每块另存一份按时间最大值
+降采样的概览，整段显示只需概览
+"""
+
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+WELCH_SEGMENT = 8192
+STFT_FFT = 2048
+STFT_HOP = 512
+TILE_FRAMES = 256  # 每个STFT分块的帧数
+OVERVIEW_POOL = 32  # 概览中每列合并的帧数
+MAX_FULL_TILES = 64  # 内存中保留的完整分块数（每块约1MB）
+
+
+def _mono(audio):
+    audio = np.asarray(audio, dtype=np.float32)
+    return audio if audio.ndim == 1 else audio.mean(axis=1)
+
+
+def welch_spectrum(audio, sample_rate, nperseg=WELCH_SEGMENT):
+    """Welch平均功率谱（Hann窗，50%重叠），返回 (频率, dB)"""
+    from scipy.signal import welch
+    mono = _mono(audio)
+    freqs, psd = welch(mono, fs=sample_rate, nperseg=min(nperseg, len(mono)), average='mean')
+    return freqs, (10 * np.log10(psd + 1e-20)).astype(np.float32)
+
+
+class SpectrumAnalysis:
+    """一个音频版本的分析结果"""
+
+    def __init__(self, audio, sample_rate):
+        self._audio_ref = weakref.ref(audio)
+        self.sample_rate = sample_rate
+        self.length = len(audio)
+        self.n_frames = int(np.ceil(self.length / STFT_HOP)) + 1
+        self.n_tiles = int(np.ceil(self.n_frames / TILE_FRAMES))
+        self.frequencies = np.fft.rfftfreq(STFT_FFT, 1.0 / sample_rate)
+        self.welch = None  # (频率, dB)
+        self.overviews = {}  # 分块序号 -> 概览 (频点数, 列数)
+        self.full_tiles = OrderedDict()  # 分块序号 -> 完整频谱 (频点数, 帧数)
+        self.lock = threading.Lock()
+
+    @property
+    def audio(self):
+        return self._audio_ref()
+
+    @property
+    def complete(self):
+        return self.welch is not None and len(self.overviews) == self.n_tiles
+
+    def compute_welch(self, audio):
+        if self.welch is None:
+            self.welch = welch_spectrum(audio, self.sample_rate)
+        return self.welch
+
+    def tile(self, index, audio=None):
+        """完整分块（dB，float32），不在内存中时重新计算"""
+        with self.lock:
+            tile = self.full_tiles.get(index)
+            if tile is not None:
+                self.full_tiles.move_to_end(index)
+                return tile
+        audio = audio if audio is not None else self.audio
+        if audio is None:
+            return None
+        tile = self._compute_tile(audio, index)
+        with self.lock:
+            self.full_tiles[index] = tile
+            while len(self.full_tiles) > MAX_FULL_TILES:
+                self.full_tiles.popitem(last=False)
+            if index not in self.overviews:
+                self.overviews[index] = self._pool(tile, OVERVIEW_POOL)
+        return tile
+
+    def _compute_tile(self, audio, index):
+        """计算第 index 块（帧以 hop 为间隔居中，两端补零）；只对该块覆盖的采样混合为单声道"""
+        first = index * TILE_FRAMES
+        frames = min(TILE_FRAMES, self.n_frames - first)
+        start = first * STFT_HOP - STFT_FFT // 2
+        end = start + (frames - 1) * STFT_HOP + STFT_FFT
+        segment = np.zeros(end - start, dtype=np.float32)
+        lo, hi = max(start, 0), min(end, len(audio))
+        if hi > lo:
+            segment[lo - start:hi - start] = _mono(audio[lo:hi])
+        from scipy.signal import get_window
+        window = get_window('hann', STFT_FFT).astype(np.float32)  # 周期Hann窗，满足重叠相加条件
+        windows = np.lib.stride_tricks.sliding_window_view(segment, STFT_FFT)[::STFT_HOP][:frames]
+        spectrum = np.abs(np.fft.rfft(windows * window, axis=1))
+        return (20 * np.log10(spectrum + 1e-10)).T.astype(np.float32)
+
+    @staticmethod
+    def _pool(tile, size):
+        """沿时间方向按最大值合并，保留短促的瞬态"""
+        n_cols = int(np.ceil(tile.shape[1] / size))
+        padded = np.full((tile.shape[0], n_cols * size), -200.0, dtype=np.float32)
+        padded[:, :tile.shape[1]] = tile
+        return padded.reshape(tile.shape[0], n_cols, size).max(axis=2)
+
+    def spectrogram(self, start=0, end=None, columns=1000):
+        """采样区间 [start, end) 的频谱图，返回 (各列起始时间, 频率, dB矩阵 (频点数, 列数))
+
+        每列覆盖的帧数不少于概览合并数时只使用概览，否则读取（必要时计算）完整分块
+        """
+        end = self.length if end is None else min(end, self.length)
+        first_frame = max(0, start // STFT_HOP)
+        last_frame = min(self.n_frames, int(np.ceil(end / STFT_HOP)) + 1)
+        columns = max(1, int(columns))
+        frames_per_column = max(1, (last_frame - first_frame) // columns)
+        audio = self.audio
+
+        if frames_per_column >= OVERVIEW_POOL:
+            first_tile, last_tile = first_frame // TILE_FRAMES, (last_frame - 1) // TILE_FRAMES
+            for index in range(first_tile, last_tile + 1):
+                if index not in self.overviews:
+                    self.tile(index, audio)
+            data = np.concatenate([self.overviews[i] for i in range(first_tile, last_tile + 1)], axis=1)
+            unit = OVERVIEW_POOL
+            offset = first_tile * TILE_FRAMES
+            lo, hi = (first_frame - offset) // unit, int(np.ceil((last_frame - offset) / unit))
+            data = data[:, lo:hi]
+        else:
+            first_tile, last_tile = first_frame // TILE_FRAMES, (last_frame - 1) // TILE_FRAMES
+            tiles = [self.tile(i, audio) for i in range(first_tile, last_tile + 1)]
+            if any(t is None for t in tiles):
+                return None
+            offset = first_tile * TILE_FRAMES
+            data = np.concatenate(tiles, axis=1)[:, first_frame - offset:last_frame - offset]
+            unit, lo = 1, first_frame - offset
+
+        pool = int(np.ceil(data.shape[1] / columns))
+        image = self._pool(data, pool) if pool > 1 else data
+        times = (offset + (lo + np.arange(image.shape[1]) * pool) * unit) * STFT_HOP / self.sample_rate
+        return times, self.frequencies, image
+
+
+class SpectrumAnalysisService:
+    """按音频版本缓存的频谱分析；request_* 方法在后台线程中计算并通过回调返回结果
+
+    显示请求和预取分别使用两个后台线程，预取全部分块时不会推迟界面需要的结果
+    """
+
+    def __init__(self, max_entries=8):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # id(只读数组) -> (弱引用, SpectrumAnalysis)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='spectrum')
+        self._prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='spectrum-prefetch')
+
+    def analysis(self, audio, sample_rate):
+        """获取（或新建）音频的分析结果对象；可写数组不缓存"""
+        audio = np.asarray(audio)
+        with self._lock:
+            entry = self._entries.get(id(audio))
+            if entry is not None and entry[0]() is audio and entry[1].sample_rate == sample_rate:
+                self._entries.move_to_end(id(audio))
+                return entry[1]
+            analysis = SpectrumAnalysis(audio, sample_rate)
+            if not audio.flags.writeable:
+                self._entries[id(audio)] = (weakref.ref(audio), analysis)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return analysis
+
+    def welch(self, audio, sample_rate):
+        """同步获取长时平均频谱（有缓存时立即返回）"""
+        return self.analysis(audio, sample_rate).compute_welch(audio)
+
+    def cached_welch(self, audio, sample_rate):
+        """已缓存时返回长时平均频谱，否则返回None"""
+        return self.analysis(audio, sample_rate).welch
+
+    def request_welch(self, audio, sample_rate, callback):
+        """后台计算长时平均频谱，完成后以 callback((频率, dB)) 返回（在后台线程中调用）"""
+        analysis = self.analysis(audio, sample_rate)
+        return self._executor.submit(self._run, callback, analysis.compute_welch, audio)
+
+    def request_spectrogram(self, audio, sample_rate, callback, start=0, end=None, columns=1000):
+        """后台计算频谱图，完成后以 callback((时间, 频率, dB矩阵)) 返回"""
+        analysis = self.analysis(audio, sample_rate)
+        return self._executor.submit(self._run, callback, lambda a: analysis.spectrogram(start, end, columns), audio)
+
+    def prefetch(self, audio, sample_rate):
+        """后台预先计算长时平均频谱和全部STFT分块概览"""
+        analysis = self.analysis(audio, sample_rate)
+        if analysis.complete:
+            return None
+
+        def compute(audio):
+            for index in range(analysis.n_tiles):
+                if index not in analysis.overviews:
+                    analysis.tile(index, audio)
+        if analysis.welch is None:
+            self._executor.submit(analysis.compute_welch, audio)
+        return self._prefetch_executor.submit(compute, audio)
+
+    @staticmethod
+    def _run(callback, func, audio):
+        try:
+            result = func(audio)
+        except Exception as e:
+            print(f"频谱分析失败: {e}")
+            result = None
+        callback(result)
+        return result
+
+
+_shared_service = None
+
+
+def spectrum_service():
+    """进程内共享的频谱分析服务"""
+    global _shared_service
+    if _shared_service is None:
+        _shared_service = SpectrumAnalysisService()
+    return _shared_service
@@ -0,0 +1,377 @@
+"""
+AI音乐后期工程师 - 五线谱图片生成
+音符（取自音频转MIDI的分析结果）量化到十六分音符网格后，先做排版：按4/4拍分小节，
+每行若干小节、每页若干行，算出每个符号在页面上的坐标（数组运算）；再逐页渲染，
+页数较多时各页在进程池中并行渲染。
+SVG由文本直接写出：符头、升号、符尾和谱号在 <defs> 中定义一次（预先计算的符号表），
+各音符用 <use> 引用；PNG每页只用少量matplotlib集合对象（线段集合、椭圆集合）绘制，
+不为每个音符创建图形对象
+"""
+
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+
+# 页面排版（像素，SVG中为用户单位）
+PAGE_WIDTH = 800
+PAGE_HEIGHT = 1130
+MARGIN = 50
+HEADER = 110  # 第一行谱表上方留给标题和页码的高度
+STAFF_SPACE = 8.0  # 谱线间距
+SYSTEM_SPACING = 118.0  # 相邻两行谱表的间距
+CLEF_WIDTH = 60.0
+MEASURES_PER_SYSTEM = 4
+SYSTEMS_PER_PAGE = 8
+GRID = 4  # 每拍的量化格数（十六分音符）
+BEATS_PER_MEASURE = 4
+PARALLEL_MIN_PAGES = 4  # 页数达到此值时才使用进程池（进程启动本身需要时间）
+PNG_DPI = 150
+
+# 音级 -> (音名序号 C=0..B=6, 是否升号)
+PITCH_SPELLING = np.array([(0, 0), (0, 1), (1, 0), (1, 1), (2, 0), (3, 0),
+                           (3, 1), (4, 0), (4, 1), (5, 0), (5, 1), (6, 0)], dtype=np.int64)
+CLEF_BOTTOM_LINE = {'treble': 4 * 7 + 2, 'bass': 2 * 7 + 4}  # 第一线的音：E4、G2（按 八度*7+音名 计）
+
+# 时值种类：全、二分、四分、八分、十六分音符
+WHOLE, HALF, QUARTER, EIGHTH, SIXTEENTH = range(5)
+KIND_MIN_LENGTH = np.array([16, 8, 4, 2, 1])  # 各时值的最短格数
+
+
+def _clef_outlines():
+    """谱号轮廓（以谱线间距为单位，原点在第一线左端，y向上）"""
+    theta = np.linspace(0, 2.6 * np.pi, 60)
+    radius = 0.2 + 0.75 * theta / theta[-1]
+    spiral = np.column_stack([1.0 + radius * np.cos(-theta + np.pi), 1.0 + radius * np.sin(-theta + np.pi)])
+    treble = np.vstack([
+        spiral[::-1],
+        [[1.55, 2.3], [1.7, 3.6], [1.55, 4.9], [1.15, 5.6], [0.85, 5.1], [0.85, 4.2],
+         [1.25, 1.0], [1.45, -1.2], [1.3, -1.8], [0.95, -1.9], [0.75, -1.6]],
+    ])
+    angle = np.linspace(np.pi, -0.6 * np.pi, 30)
+    bass_curve = np.column_stack([0.95 + 0.9 * np.cos(angle), 3.0 + 0.8 * np.sin(angle)])
+    bass_curve[-8:, 0] -= np.linspace(0, 0.4, 8)
+    bass_curve[-8:, 1] -= np.linspace(0, 1.2, 8)
+    return {
+        'treble': [treble],
+        'bass': [bass_curve, np.array([[2.35, 3.45], [2.45, 3.55]]), np.array([[2.35, 2.45], [2.45, 2.55]])],
+    }
+
+
+def _symbol_polylines():
+    """升号、符尾和谱号的折线（像素，原点为符号的定位点，y向下）"""
+    s = STAFF_SPACE
+    symbols = {
+        'sharp': [np.array([[-2, -7], [-2, 7]]), np.array([[2, -8], [2, 6]]),
+                  np.array([[-4.5, -1.5], [4.5, -3.5]]), np.array([[-4.5, 3.5], [4.5, 1.5]])],
+        'flag_up': [np.array([[0, 0], [2.5, 4], [6.5, 8.5], [5.5, 14]])],
+        'flag_down': [np.array([[0, 0], [2.5, -4], [6.5, -8.5], [5.5, -14]])],
+    }
+    for name, lines in _clef_outlines().items():
+        symbols[name] = [np.column_stack([line[:, 0] * s, -line[:, 1] * s]) for line in lines]
+    return {name: [line.astype(np.float64) for line in lines] for name, lines in symbols.items()}
+
+
+SYMBOL_POLYLINES = _symbol_polylines()
+
+
+def _svg_path(lines):
+    return " ".join("M" + " L".join(f"{x:.2f},{y:.2f}" for x, y in line) for line in lines)
+
+
+# SVG符号表：每个符号的 <g> 定义只写一次，音符处用 <use> 引用
+SVG_SYMBOLS = {
+    'head': '<ellipse rx="5.2" ry="3.7" transform="rotate(-20)"/>',
+    'head_open': '<ellipse rx="4.6" ry="3.1" transform="rotate(-20)" fill="none" stroke="black" stroke-width="1.5"/>',
+}
+SVG_SYMBOLS.update({
+    name: f'<path d="{_svg_path(lines)}" fill="none" stroke="black" stroke-width="{2.0 if name in ("treble", "bass") else 1.3}" '
+          f'stroke-linecap="round" stroke-linejoin="round"/>'
+    for name, lines in SYMBOL_POLYLINES.items()
+})
+
+
+# ---- 排版 ----
+
+def quantize(notes, tempo, grid=GRID):
+    """音符开始位置和长度量化到网格（格）"""
+    scale = tempo / 60.0 * grid
+    start = np.rint(notes['start'] * scale).astype(np.int64)
+    end = np.maximum(np.rint(notes['end'] * scale).astype(np.int64), start + 1)
+    return start, end - start
+
+
+def choose_clef(pitches):
+    return 'bass' if len(pitches) and np.median(pitches) < 60 else 'treble'
+
+
+def staff_steps(pitches, clef):
+    """音高在谱表上的位置（第一线为0，每个音名一级）和是否需要升号"""
+    pitches = np.asarray(pitches, dtype=np.int64)
+    letter, sharp = PITCH_SPELLING[pitches % 12].T
+    diatonic = (pitches // 12 - 1) * 7 + letter
+    return diatonic - CLEF_BOTTOM_LINE[clef], sharp.astype(bool)
+
+
+def _place(cells, measure_width):
+    """网格位置 -> (小节号, 所在行号, 横坐标)"""
+    cells_per_measure = GRID * BEATS_PER_MEASURE
+    measure = cells // cells_per_measure
+    x = (MARGIN + CLEF_WIDTH + (measure % MEASURES_PER_SYSTEM) * measure_width
+         + (cells % cells_per_measure + 0.8) / (cells_per_measure + 1) * measure_width)
+    return measure, measure // MEASURES_PER_SYSTEM, x
+
+
+def layout(notes, tempo=120.0, title='', chords=None):
+    """排版：返回各页的排版数据（可被pickle，供渲染进程使用）；
+    chords 为 [(开始秒, 和弦名)]，标在谱表上方"""
+    notes = notes[np.argsort(notes['start'], kind='stable')]
+    start, length = quantize(notes, tempo)
+    pitches = np.asarray(notes['pitch'], dtype=np.int64)
+    clef = choose_clef(pitches)
+    steps, sharps = staff_steps(pitches, clef)
+
+    cells_per_measure = GRID * BEATS_PER_MEASURE
+    measure_width = (PAGE_WIDTH - 2 * MARGIN - CLEF_WIDTH) / MEASURES_PER_SYSTEM
+    measure, system, x = _place(start, measure_width)
+    kind = np.searchsorted(-KIND_MIN_LENGTH, -np.minimum(length, cells_per_measure), side='left')
+    bottom = HEADER + (system % SYSTEMS_PER_PAGE) * SYSTEM_SPACING + 4 * STAFF_SPACE
+    y = bottom - steps * STAFF_SPACE / 2
+
+    chords = sorted(chords or [], key=lambda chord: chord[0])
+    chord_cells = np.rint(np.array([t for t, _ in chords], dtype=np.float64) * tempo / 60.0 * GRID).astype(np.int64)
+    chord_measure, chord_system, chord_x = _place(chord_cells, measure_width)
+    chord_y = HEADER + (chord_system % SYSTEMS_PER_PAGE) * SYSTEM_SPACING - 3 * STAFF_SPACE
+
+    last_measure = max(int(measure.max()) if len(measure) else 0,
+                       int(chord_measure.max()) if len(chord_measure) else 0)
+    total_measures = last_measure + 1
+    measures_per_page = MEASURES_PER_SYSTEM * SYSTEMS_PER_PAGE
+    page_count = -(-total_measures // measures_per_page)
+
+    page_numbers = np.arange(page_count + 1)
+    bounds = np.searchsorted(measure // measures_per_page, page_numbers, side='left')
+    chord_bounds = np.searchsorted(chord_measure // measures_per_page, page_numbers, side='left')
+    pages = []
+    for number in range(page_count):
+        index = slice(bounds[number], bounds[number + 1])
+        chord_index = slice(chord_bounds[number], chord_bounds[number + 1])
+        first_measure = number * measures_per_page
+        systems = min(SYSTEMS_PER_PAGE, -(-(total_measures - first_measure) // MEASURES_PER_SYSTEM))
+        pages.append({
+            'number': number + 1,
+            'page_count': page_count,
+            'title': title,
+            'clef': clef,
+            'systems': systems,
+            'first_measure': first_measure,
+            'measure_width': measure_width,
+            'x': x[index], 'y': y[index], 'step': steps[index], 'kind': kind[index], 'sharp': sharps[index],
+            'chords': [(float(cx), float(cy), name)
+                       for cx, cy, (_, name) in zip(chord_x[chord_index], chord_y[chord_index], chords[chord_index])],
+        })
+    return pages
+
+
+def page_primitives(page):
+    """一页的绘制元素：线段 (N,2,2)、符头 (x, y, 是否实心)、符号引用 [(名称, x, y)]、文字"""
+    s = STAFF_SPACE
+    left, right = MARGIN, PAGE_WIDTH - MARGIN
+    measure_width = page['measure_width']
+    systems = np.arange(page['systems'])
+    tops = HEADER + systems * SYSTEM_SPACING
+    segments = []
+
+    # 谱线和小节线
+    line_y = (tops[:, None] + np.arange(5)[None, :] * s).ravel()
+    segments.append(np.stack([np.column_stack([np.full_like(line_y, left), line_y]),
+                              np.column_stack([np.full_like(line_y, right), line_y])], axis=1))
+    bar_x = left + CLEF_WIDTH + np.arange(1, MEASURES_PER_SYSTEM + 1) * measure_width
+    bar_x = np.concatenate([[left], bar_x])
+    bx, by = np.meshgrid(bar_x, tops)
+    segments.append(np.stack([np.column_stack([bx.ravel(), by.ravel()]),
+                              np.column_stack([bx.ravel(), by.ravel() + 4 * s])], axis=1))
+
+    x, y, step, kind = page['x'], page['y'], page['step'], page['kind']
+    bottom = y + step * s / 2
+    # 加线：第一线以下和第五线以上
+    below = np.maximum(-step, 0) // 2
+    above = np.maximum(step - 8, 0) // 2
+    for count, direction in ((below, 1), (above, -1)):
+        owners = np.repeat(np.arange(len(x)), count)
+        if len(owners):
+            order = np.arange(len(owners)) - np.repeat(np.cumsum(count) - count, count) + 1
+            base = bottom[owners] if direction == 1 else bottom[owners] - 4 * s
+            ly = base + direction * order * s
+            lx = x[owners]
+            segments.append(np.stack([np.column_stack([lx - 7.5, ly]), np.column_stack([lx + 7.5, ly])], axis=1))
+
+    # 符干：第三线以下向上，否则向下
+    stemmed = kind != WHOLE
+    up = step < 4
+    stem_x = np.where(up, x + 4.6, x - 4.6)[stemmed]
+    stem_y0 = y[stemmed]
+    stem_y1 = np.where(up, y - 3.5 * s, y + 3.5 * s)[stemmed]
+    segments.append(np.stack([np.column_stack([stem_x, stem_y0]), np.column_stack([stem_x, stem_y1])], axis=1))
+
+    glyphs = []
+    for flag_kind, flags in ((EIGHTH, 1), (SIXTEENTH, 2)):
+        mask = kind == flag_kind
+        for i in range(flags):
+            offset = i * 6.0
+            fx = np.where(up, x + 4.6, x - 4.6)[mask]
+            fy = np.where(up, y - 3.5 * s + offset, y + 3.5 * s - offset)[mask]
+            glyphs += [('flag_up' if u else 'flag_down', px, py) for px, py, u in zip(fx.tolist(), fy.tolist(), up[mask].tolist())]
+    sharp = page['sharp']
+    glyphs += [('sharp', px, py) for px, py in zip((x[sharp] - 13).tolist(), y[sharp].tolist())]
+    glyphs += [(page['clef'], left + 6.0, float(top + 4 * s)) for top in tops]
+
+    texts = [(PAGE_WIDTH / 2, 55, page['title'], 20, 'middle'),
+             (PAGE_WIDTH - MARGIN, PAGE_HEIGHT - 30, f"{page['number']} / {page['page_count']}", 11, 'end')]
+    texts += [(left, float(top - 10), str(page['first_measure'] + i * MEASURES_PER_SYSTEM + 1), 9, 'start')
+              for i, top in enumerate(tops)]
+    texts += [(cx, cy, name, 12, 'start') for cx, cy, name in page.get('chords', ())]
+    if page['number'] == 1:
+        texts += [(left + CLEF_WIDTH - 20, float(tops[0] + 2 * s - 1), '4', 15, 'middle'),
+                  (left + CLEF_WIDTH - 20, float(tops[0] + 4 * s - 1), '4', 15, 'middle')]
+
+    heads = (x, y, kind >= QUARTER)
+    return np.concatenate(segments) if segments else np.zeros((0, 2, 2)), heads, glyphs, texts
+
+
+# ---- 渲染 ----
+
+def render_svg(page, filepath):
+    """直接写出一页SVG"""
+    segments, (hx, hy, filled), glyphs, texts = page_primitives(page)
+    used = {name for name, _, _ in glyphs} | {'head', 'head_open'}
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+             f'width="{PAGE_WIDTH}" height="{PAGE_HEIGHT}" viewBox="0 0 {PAGE_WIDTH} {PAGE_HEIGHT}">',
+             f'<rect width="{PAGE_WIDTH}" height="{PAGE_HEIGHT}" fill="white"/>',
+             '<defs>']
+    parts += [f'<g id="{name}">{SVG_SYMBOLS[name]}</g>' for name in sorted(used)]
+    parts.append('</defs>')
+
+    flat = segments.reshape(-1, 4).round(2).tolist()
+    parts.append('<path fill="none" stroke="black" stroke-width="1" d="'
+                 + "".join(f"M{x0} {y0}L{x1} {y1}" for x0, y0, x1, y1 in flat) + '"/>')
+    parts += [f'<use xlink:href="#{"head" if f else "head_open"}" x="{x:.2f}" y="{y:.2f}"/>'
+              for x, y, f in zip(hx.tolist(), hy.tolist(), filled.tolist())]
+    parts += [f'<use xlink:href="#{name}" x="{x:.2f}" y="{y:.2f}"/>' for name, x, y in glyphs]
+    parts += [f'<text x="{x:.1f}" y="{y:.1f}" font-size="{size}" text-anchor="{anchor}" '
+              f'font-family="sans-serif" dominant-baseline="middle">{escape(text)}</text>'
+              for x, y, text, size, anchor in texts]
+    parts.append('</svg>')
+    with open(filepath, 'w', encoding='utf-8') as f:
+        f.write("\n".join(parts))
+    return filepath
+
+
+def _glyph_segments(glyphs):
+    """符号表中的折线按引用位置平移后拆成线段"""
+    by_name = {}
+    for name, x, y in glyphs:
+        by_name.setdefault(name, []).append((x, y))
+    segments = []
+    for name, positions in by_name.items():
+        offsets = np.asarray(positions)[:, None, None, :]
+        for line in SYMBOL_POLYLINES[name]:
+            pairs = np.stack([line[:-1], line[1:]], axis=1)[None]  # (1, 段数, 2, 2)
+            segments.append((pairs + offsets).reshape(-1, 2, 2))
+    return segments
+
+
+def render_png(page, filepath, dpi=PNG_DPI):
+    """用少量集合对象绘制一页PNG（不经过pyplot）"""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.collections import EllipseCollection, LineCollection
+    from matplotlib.figure import Figure
+    try:
+        from src.ui.fonts import configure_matplotlib_fonts
+        configure_matplotlib_fonts()
+    except Exception:
+        pass
+
+    segments, (hx, hy, filled), glyphs, texts = page_primitives(page)
+    figure = Figure(figsize=(PAGE_WIDTH / 100, PAGE_HEIGHT / 100), dpi=100, facecolor='white')
+    FigureCanvasAgg(figure)
+    ax = figure.add_axes([0, 0, 1, 1])
+    ax.set_xlim(0, PAGE_WIDTH)
+    ax.set_ylim(PAGE_HEIGHT, 0)
+    ax.set_axis_off()
+    ax.add_collection(LineCollection(segments, colors='black', linewidths=0.8))
+    glyph_lines = _glyph_segments(glyphs)
+    if glyph_lines:
+        ax.add_collection(LineCollection(np.concatenate(glyph_lines), colors='black', linewidths=1.0,
+                                         capstyle='round'))
+    if len(hx):
+        offsets = np.column_stack([hx, hy])
+        ax.add_collection(EllipseCollection(np.full(len(hx), 10.4), np.full(len(hx), 7.4), np.full(len(hx), 20.0),
+                                            units='xy', offsets=offsets, offset_transform=ax.transData,
+                                            facecolors=np.where(filled[:, None], [[0, 0, 0, 1]], [[1, 1, 1, 1]]),
+                                            edgecolors='black', linewidths=1.2))
+    for x, y, text, size, anchor in texts:
+        ax.text(x, y, text, fontsize=size * 0.75, ha={'middle': 'center', 'start': 'left', 'end': 'right'}[anchor],
+                va='center')
+    figure.savefig(filepath, dpi=dpi, facecolor='white')
+    return filepath
+
+
+RENDERERS = {'svg': render_svg, 'png': render_png}
+
+
+def _render_pages(jobs, format):
+    """渲染进程入口：渲染一组页面"""
+    renderer = RENDERERS[format]
+    return [renderer(page, path) for page, path in jobs]
+
+
+def page_paths(filepath, page_count):
+    """单页时就是原路径，多页时在文件名后加页码"""
+    if page_count <= 1:
+        return [filepath]
+    stem, extension = os.path.splitext(filepath)
+    return [f"{stem}_p{number:03d}{extension}" for number in range(1, page_count + 1)]
+
+
+def render_pages(pages, filepath, format='png', workers=None):
+    """渲染全部页面，返回文件路径列表；页数较多时按进程数分组并行渲染"""
+    jobs = list(zip(pages, page_paths(filepath, len(pages))))
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1 or len(jobs) < PARALLEL_MIN_PAGES:
+        return _render_pages(jobs, format)
+    chunks = [jobs[i::workers] for i in range(workers)]
+    # 使用spawn启动子进程：界面进程中已有Qt和工作线程，fork不安全
+    spawn = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=spawn) as pool:
+        rendered = list(pool.map(_render_pages, chunks, [format] * len(chunks)))
+    return sorted(path for paths in rendered for path in paths)
+
+
+class StaffImageGenerator:
+    """把音轨的旋律转写为分页的五线谱图片"""
+
+    def __init__(self, sample_rate=44100, tempo=120.0, workers=None):
+        self.sample_rate = sample_rate
+        self.tempo = tempo
+        self.workers = workers
+        self.last_paths = []
+
+    def generate_pages(self, audio, filepath, track_name="Track", format='png'):
+        """分析、排版并渲染，返回各页文件路径"""
+        from src.audio_processing.audio_to_midi import analyze_notes
+        notes = analyze_notes(audio, self.sample_rate)
+        pages = layout(notes, self.tempo, track_name)
+        self.last_paths = render_pages(pages, filepath, format.lower(), self.workers)
+        return self.last_paths
+
+    def generate_staff_image(self, audio, filepath, track_name="Track", format='png'):
+        """生成五线谱图片，成功返回True（多页时文件名后加页码，路径见 last_paths）"""
+        try:
+            return bool(self.generate_pages(audio, filepath, track_name, format))
+        except Exception as e:
+            print(f"五线谱生成失败: {e}")
+            return False
@@ -0,0 +1,176 @@
+"""
+AI音乐后期工程师 - 分块流式处理
+按固定大小的块读取、处理并直接写出音频，滤波器和包络状态在块之间延续，
+内存占用与文件长度无关，适合长时间现场录音
+"""
+
+import numpy as np
+import soundfile as sf
+from scipy.signal import sosfilt
+
+from src.effects.filter_bank import shared_filter_bank
+from src.effects.dynamics import Compressor, LookaheadLimiter
+from src.effects.linear_phase_eq import shared_linear_phase_eq
+
+
+# 流式母带各模式参数（压缩阈值dB、压缩比、补偿增益dB、输出上限dB）
+STREAMING_MASTER_PRESETS = {
+    'smart': {'threshold_db': -18.0, 'ratio': 2.5, 'makeup_db': 3.0, 'ceiling_db': -1.0},
+    'loud': {'threshold_db': -20.0, 'ratio': 4.0, 'makeup_db': 6.0, 'ceiling_db': -0.3},
+    'dynamic': {'threshold_db': -14.0, 'ratio': 1.8, 'makeup_db': 1.5, 'ceiling_db': -1.0},
+    'radio': {'threshold_db': -22.0, 'ratio': 4.5, 'makeup_db': 6.0, 'ceiling_db': -0.5},
+    'streaming': {'threshold_db': -18.0, 'ratio': 2.5, 'makeup_db': 3.0, 'ceiling_db': -1.0},
+    'vinyl': {'threshold_db': -16.0, 'ratio': 2.0, 'makeup_db': 2.0, 'ceiling_db': -2.0},
+}
+
+DEFAULT_BLOCK_SIZE = 65536
+
+
+class StreamingEqualizer:
+    """带状态的分块均衡器"""
+
+    def __init__(self, sample_rate, gains, q=1.0):
+        self.sos = shared_filter_bank().get_sos(sample_rate, gains, q=q)
+        self._zi = None
+
+    def process_block(self, block):
+        """处理一个块，block形状为 (帧数, 声道数)；与整段处理（FilterBankEqualizer.apply）一样
+        从零状态开始、以float64滤波，两种方式的结果一致"""
+        if self._zi is None:
+            self._zi = np.zeros((len(self.sos), 2, block.shape[1]))
+        out, self._zi = sosfilt(self.sos, block.astype(np.float64), axis=0, zi=self._zi)
+        return out.astype(block.dtype, copy=False)
+
+
+class StreamingMastering:
+    """分块母带处理：压缩 + 预读真峰值限制（输出与输入对齐，结尾由 flush 输出）"""
+
+    def __init__(self, sample_rate, mode='smart', channels=2):
+        params = STREAMING_MASTER_PRESETS.get(mode, STREAMING_MASTER_PRESETS['smart'])
+        self.compressor = Compressor(
+            threshold_db=params['threshold_db'],
+            ratio=params['ratio'],
+            makeup_db=params['makeup_db'],
+            sample_rate=sample_rate
+        )
+        self.limiter = LookaheadLimiter(params['ceiling_db'], sample_rate, true_peak=True, channels=channels)
+        self._skip = self.limiter.latency
+
+    def process_block(self, block):
+        block = self.limiter.process_block(self.compressor.process_block(block))
+        if self._skip:
+            dropped = min(self._skip, len(block))
+            block = block[dropped:]
+            self._skip -= dropped
+        return block
+
+    def flush(self):
+        """输出限制器延迟线中剩余的样本"""
+        block = self.limiter.flush()
+        block = block[self._skip:]
+        self._skip = 0
+        return block
+
+
+class StreamingGain:
+    """固定增益（dB）"""
+
+    def __init__(self, gain_db):
+        self.gain_db = gain_db
+        self._gain = np.float32(10.0 ** (gain_db / 20.0))
+
+    def process_block(self, block):
+        block *= self._gain
+        return block
+
+
+class StreamingProcessor:
+    """流式处理器：读取 → 各处理阶段 → 写出，全程只保留一个块在内存中"""
+
+    def __init__(self, block_size=DEFAULT_BLOCK_SIZE):
+        self.block_size = block_size
+
+    def build_stages(self, sample_rate, bands=None, master_mode=None, linear_phase=False, channels=1):
+        """根据参数构建处理阶段列表"""
+        stages = []
+        if bands is not None and any(g != 0 for g in bands):
+            if linear_phase:
+                stages.append(shared_linear_phase_eq().create_stream(sample_rate, bands, channels))
+            else:
+                stages.append(StreamingEqualizer(sample_rate, bands))
+        if master_mode is not None:
+            stages.append(StreamingMastering(sample_rate, mode=master_mode, channels=channels))
+        return stages
+
+    @staticmethod
+    def run_stages(stages, block, start=0):
+        """将一个块依次送入各处理阶段；带延迟的阶段可能暂时不输出"""
+        for stage in stages[start:]:
+            if len(block) == 0:
+                break
+            block = stage.process_block(block)
+        return block
+
+    def run_file(self, infile, stages, sink, progress=None):
+        """从头读取已打开的输入文件，各块经处理阶段后交给 sink(块)；返回读取的帧数"""
+        infile.seek(0)
+        buffer = np.zeros((self.block_size, infile.channels), dtype=np.float32)
+        done = 0
+        while True:
+            frames = infile.read(self.block_size, dtype='float32', always_2d=True, out=buffer)
+            n = len(frames)
+            if n == 0:
+                break
+            block = self.run_stages(stages, buffer[:n])
+            if len(block):
+                sink(block)
+            done += n
+            if progress is not None:
+                progress(done)
+
+        # 输出带延迟阶段（如线性相位EQ）中剩余的样本
+        for index, stage in enumerate(stages):
+            if hasattr(stage, 'flush'):
+                block = self.run_stages(stages, stage.flush(), start=index + 1)
+                if len(block):
+                    sink(block)
+        return done
+
+    def process_file(self, input_path, output_path, bands=None, master_mode=None, linear_phase=False,
+                     progress=None, target_lufs=None, ceiling_db=None):
+        """流式处理整个文件，progress(已处理帧数, 总帧数) 可用于报告进度。
+        指定 target_lufs 时分两遍：第一遍只测量处理后的响度（EBU R128），第二遍处理并乘以
+        达到目标响度的增益（不超过真峰值上限允许的增益），与整段处理的基础母带一致"""
+        from src.audio_processing.loudness import DEFAULT_CEILING_DB, LoudnessMeter, loudness_gain_db
+        with sf.SoundFile(input_path, 'r') as infile:
+            sample_rate = infile.samplerate
+            channels = infile.channels
+            total_frames = infile.frames
+            passes = 1 if target_lufs is None else 2
+
+            def build():
+                return self.build_stages(sample_rate, bands=bands, master_mode=master_mode,
+                                         linear_phase=linear_phase, channels=channels)
+
+            def report(offset):
+                if progress is None:
+                    return None
+                return lambda done: progress(offset + done, total_frames * passes)
+
+            stages = build()
+            if target_lufs is not None:
+                meter = LoudnessMeter(sample_rate, channels)
+                self.run_file(infile, stages, meter.process, report(0))
+                ceiling_db = DEFAULT_CEILING_DB if ceiling_db is None else ceiling_db
+                stages = build() + [StreamingGain(loudness_gain_db(meter.result(), target_lufs, ceiling_db))]
+
+            # 尽量沿用输入文件的采样格式
+            subtype = infile.subtype
+            extension = output_path.rsplit('.', 1)[-1].upper()
+            if not sf.check_format(extension, subtype):
+                subtype = None
+
+            with sf.SoundFile(output_path, 'w', samplerate=sample_rate, channels=channels,
+                              subtype=subtype) as outfile:
+                self.run_file(infile, stages, outfile.write, report(total_frames * (passes - 1)))
+        return True
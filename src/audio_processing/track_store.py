@@ -0,0 +1,214 @@
+"""
+AI音乐后期工程师 - 磁盘音轨存储
+音轨音频以float32 .npy内存映射文件保存在会话目录中，读取时只有访问到的页面调入内存；
+导入、混音、导出和播放按块读写，处理完的区间主动释放页面，常驻内存只包含正在使用的部分
+"""
+
+import itertools
+import mmap
+import os
+import re
+import shutil
+import tempfile
+import weakref
+
+import numpy as np
+
+from src.settings import config_path
+
+
+STORE_BLOCK = 1 << 16  # 按块读写的帧数
+
+
+def _mapping(array):
+    """数组所在的文件映射 (mmap对象, 映射起始地址)；不是内存映射数组（或其视图）时返回 None"""
+    while isinstance(array, np.ndarray):
+        if isinstance(array, np.memmap) and isinstance(array.base, mmap.mmap):
+            address = array.__array_interface__['data'][0]
+            return array.base, address - array.offset % mmap.ALLOCATIONGRANULARITY
+        array = array.base
+    return None
+
+
+def is_mapped(array):
+    """数组数据是否来自文件映射（不占用常驻内存预算）"""
+    return _mapping(array) is not None
+
+
+def release_pages(array, start, end):
+    """释放内存映射数组（或其视图）中帧区间 [start, end) 所占的页面；普通数组时不做任何事"""
+    if end <= start or not hasattr(mmap, 'MADV_DONTNEED'):
+        return
+    mapping = _mapping(array)
+    if mapping is None or array.strides[0] <= 0:
+        return
+    mm, origin = mapping
+    address = array.__array_interface__['data'][0] - origin
+    begin = address + start * array.strides[0]
+    finish = address + min(end, len(array)) * array.strides[0]
+    # 只释放完全落在区间内的整页，避免影响相邻区间
+    begin = -(-begin // mmap.PAGESIZE) * mmap.PAGESIZE
+    finish = min(finish // mmap.PAGESIZE * mmap.PAGESIZE, len(mm))
+    if finish > begin:
+        try:
+            mm.madvise(mmap.MADV_DONTNEED, begin, finish - begin)
+        except (OSError, ValueError):
+            pass
+
+
+def iter_blocks(array, block_size=STORE_BLOCK, release=True):
+    """按块迭代 (起始帧, 块)；release为True时每块用完后释放其页面"""
+    for start in range(0, len(array), block_size):
+        end = min(start + block_size, len(array))
+        yield start, array[start:end]
+        if release:
+            release_pages(array, start, end)
+
+
+def map_wav(path):
+    """把32位浮点WAV文件的数据区直接映射为只读数组 (帧, 声道)；其他格式返回 None"""
+    import soundfile as sf
+    info = sf.info(path)
+    if info.format != 'WAV' or info.subtype != 'FLOAT':
+        return None
+    with open(path, 'rb') as f:
+        if f.read(4) != b'RIFF' or f.read(8)[4:] != b'WAVE':
+            return None
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                return None
+            size = int.from_bytes(chunk[4:], 'little')
+            if chunk[:4] == b'data':
+                offset = f.tell()
+                break
+            f.seek(size + (size & 1), os.SEEK_CUR)
+    if info.frames == 0:
+        return np.zeros((0, info.channels), dtype=np.float32)
+    return np.memmap(path, dtype='<f4', mode='r', offset=offset, shape=(info.frames, info.channels))
+
+
+def resample_file(source, source_rate, target_rate, block_size=STORE_BLOCK):
+    """音轨文件转换到目标采样率（按块流式转换，结果保存在源文件旁，源文件未更新时直接复用）"""
+    from src.audio_processing.resampler import StreamingResampler
+    stem = os.path.splitext(source.filename)[0]
+    path = f"{stem}.{int(target_rate)}hz.npy"
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(source.filename):
+        return np.load(path, mmap_mode='r')
+
+    channels = 1 if source.ndim == 1 else source.shape[1]
+    resampler = StreamingResampler(source_rate, target_rate, channels)
+    frames = int(np.ceil(len(source) * target_rate / source_rate))
+    # 补偿滤波器群延迟：整数部分丢弃开头的输出帧，余数作为第一个输出的起始相位
+    delay = resampler.group_delay // resampler.down
+    resampler.reset(resampler.group_delay % resampler.down)
+    target = np.lib.format.open_memmap(path + '.tmp', mode='w+', dtype=np.float32, shape=(frames, channels))
+    written = skipped = 0
+    tail = np.zeros((resampler.taps * 2, channels), dtype=np.float32)  # 补零冲出滤波器中剩余的输出
+    for _, block in itertools.chain(iter_blocks(source, block_size), [(len(source), tail)]):
+        out = resampler.process(block)
+        drop = min(delay - skipped, len(out))
+        skipped += drop
+        out = out[drop:drop + frames - written]
+        target[written:written + len(out)] = out
+        release_pages(target, written, written + len(out))
+        written += len(out)
+    target.flush()
+    del target
+    os.replace(path + '.tmp', path)
+    return np.load(path, mmap_mode='r')
+
+
+class TrackStore:
+    """会话目录中的音轨文件（float32，形状为 (帧, 声道)）"""
+
+    def __init__(self, session_dir=None, block_size=STORE_BLOCK):
+        self.block_size = block_size
+        self._counter = itertools.count(1)
+        self._finalizer = None
+        if session_dir is None:
+            # 未指定会话目录时使用临时目录，会话结束后删除
+            root = config_path('sessions')
+            os.makedirs(root, exist_ok=True)
+            session_dir = tempfile.mkdtemp(prefix='session_', dir=root)
+            self._finalizer = weakref.finalize(self, shutil.rmtree, session_dir, True)
+        os.makedirs(session_dir, exist_ok=True)
+        self.session_dir = session_dir
+
+    def _new_path(self, name):
+        slug = re.sub(r'[^\w\-]+', '_', name or 'track').strip('_')[:40] or 'track'
+        while True:
+            path = os.path.join(self.session_dir, f"{slug}_{next(self._counter)}.npy")
+            if not os.path.exists(path):
+                return path
+
+    def allocate(self, frames, channels, name='track'):
+        """新建可写的音轨文件，返回可写内存映射（写完后用 open() 重新以只读方式打开）"""
+        return np.lib.format.open_memmap(self._new_path(name), mode='w+', dtype=np.float32,
+                                         shape=(int(frames), int(channels)))
+
+    @staticmethod
+    def open(path):
+        """以只读内存映射打开音轨文件"""
+        return np.load(path, mmap_mode='r')
+
+    def write(self, audio, name='track'):
+        """把内存中的音频按块写入会话目录，返回只读内存映射"""
+        audio = np.asarray(audio)
+        channels = 1 if audio.ndim == 1 else audio.shape[1]
+        target = self.allocate(len(audio), channels, name)
+        for start, block in iter_blocks(audio, self.block_size, release=False):
+            target[start:start + len(block)] = block.reshape(len(block), channels)
+            release_pages(target, start, start + len(block))
+        return self.finish(target)
+
+    def import_file(self, filepath, name=None):
+        """按块解码音频文件写入会话目录，不在内存中保留整段音频；返回 (只读内存映射, 采样率)"""
+        import soundfile as sf
+        name = name or os.path.splitext(os.path.basename(filepath))[0]
+        try:
+            info = sf.info(filepath)
+        except RuntimeError:
+            # soundfile不支持的格式（如部分mp3/m4a）退回librosa整段解码
+            import librosa
+            audio, sample_rate = librosa.load(filepath, sr=None, mono=False)
+            return self.write(audio.T if audio.ndim > 1 else audio, name), sample_rate
+
+        target = self.allocate(info.frames, info.channels, name)
+        position = 0
+        for block in sf.blocks(filepath, blocksize=self.block_size, dtype='float32', always_2d=True):
+            # 文件头中的帧数不准确时：多出的帧丢弃，不足的部分补零
+            count = min(len(block), len(target) - position)
+            target[position:position + count] = block[:count]
+            release_pages(target, position, position + count)
+            position += count
+            if position >= len(target):
+                break
+        if position < len(target):
+            target[position:] = 0.0
+        return self.finish(target), info.samplerate
+
+    def reference_file(self, filepath, name=None):
+        """音轨直接引用已有的音频文件（如录音文件）：浮点WAV原地映射，其他格式导入会话目录；返回 (只读数组, 采样率)"""
+        import soundfile as sf
+        mapped = map_wav(filepath)
+        if mapped is not None:
+            return mapped, sf.info(filepath).samplerate
+        return self.import_file(filepath, name)
+
+    @classmethod
+    def finish(cls, target):
+        """写完 allocate() 返回的可写映射后，以只读方式重新打开"""
+        target.flush()
+        path = target.filename
+        del target
+        return cls.open(path)
+
+    def remove(self, array):
+        """删除音轨文件（数组仍被引用时文件内容在映射关闭前保持有效）"""
+        path = getattr(array, 'filename', None)
+        if path and os.path.dirname(os.path.abspath(path)) == os.path.abspath(self.session_dir):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
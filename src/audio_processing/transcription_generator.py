@@ -0,0 +1,99 @@
+"""
+AI音乐后期工程师 - 扒谱生成
+旋律音符、和弦、调性和速度都取自同一次音乐分析（见 music_analysis，结果按音频内容缓存），
+检测旋律、检测和弦、生成文字谱和五线谱图片对同一段音频不重复分析
+"""
+
+from src.audio_processing.music_analysis import (CHORD_NAMES, analyze_music, chord_segments, estimate_key,
+                                                 estimate_tempo, melody_notes)
+
+
+def _note_info(note):
+    """音符结构化数组的一项 -> 扒谱音符字典"""
+    pitch = int(note['pitch'])
+    name = "C C#D D#E F F#G G#A A#B "[pitch % 12 * 2:pitch % 12 * 2 + 2].strip()
+    return {
+        'note_name': name[0],
+        'accidental': name[1:],
+        'octave': pitch // 12 - 1,
+        'midi': pitch,
+        'frequency': 440.0 * 2 ** ((pitch - 69) / 12),
+        'time': float(note['start']),
+        'duration': float(note['end'] - note['start']),
+        'velocity': int(note['velocity']),
+    }
+
+
+class TranscriptionGenerator:
+    """扒谱：旋律、和弦、调性和速度，输出文字谱或带和弦标记的五线谱图片"""
+
+    def __init__(self, sample_rate=44100, tempo=None, workers=None, cache=None):
+        self.sample_rate = sample_rate
+        self.tempo = tempo  # None 时使用估计的速度
+        self.workers = workers
+        self.cache = cache
+        self.last_paths = []
+
+    def analyze(self, audio):
+        """单次分析（按音频内容缓存）"""
+        return analyze_music(audio, self.sample_rate, self.cache)
+
+    def detect_melody(self, audio):
+        """旋律音符列表：音名、升降号、八度、开始时间和时长（秒）等"""
+        return [_note_info(note) for note in melody_notes(self.analyze(audio))]
+
+    def detect_chords(self, audio):
+        """和弦列表：和弦名、开始时间和时长（秒）、模板匹配得分"""
+        return [{'chord': CHORD_NAMES[segment['chord']],
+                 'time': float(segment['start']),
+                 'duration': float(segment['end'] - segment['start']),
+                 'score': float(segment['score'])}
+                for segment in chord_segments(self.analyze(audio))]
+
+    def transcribe(self, audio):
+        """完整扒谱结果：调性、速度、和弦和旋律"""
+        analysis = self.analyze(audio)
+        tonic, mode, _ = estimate_key(analysis)
+        notes = melody_notes(analysis)
+        chords = chord_segments(analysis)
+        return {
+            'duration': analysis['duration'],
+            'key': f"{tonic} {mode}",
+            'tempo': self.tempo or estimate_tempo(analysis),
+            'notes': notes,
+            'melody': [_note_info(note) for note in notes],
+            'chords': [(float(segment['start']), CHORD_NAMES[segment['chord']]) for segment in chords],
+        }
+
+    def generate_transcription(self, audio, filepath, track_name="Track"):
+        """生成文字扒谱，成功返回True"""
+        try:
+            result = self.transcribe(audio)
+            lines = [f"扒谱: {track_name}",
+                     f"时长: {result['duration']:.2f}秒  调性: {result['key']}  速度: {result['tempo']:.0f} BPM",
+                     "",
+                     f"和弦 ({len(result['chords'])}):"]
+            lines += [f"  {time:8.2f}s  {chord}" for time, chord in result['chords']]
+            lines += ["", f"旋律 ({len(result['melody'])}):", "  序号      时间      时长  音名"]
+            lines += [f"  {i:4d}  {note['time']:7.2f}s  {note['duration']:6.2f}s  "
+                      f"{note['note_name']}{note['accidental']}{note['octave']}"
+                      for i, note in enumerate(result['melody'], 1)]
+            with open(filepath, 'w', encoding='utf-8') as f:
+                f.write("\n".join(lines) + "\n")
+            return True
+        except Exception as e:
+            print(f"扒谱生成失败: {e}")
+            return False
+
+    def generate_transcription_image(self, audio, filepath, track_name="Track", format='png'):
+        """生成带和弦标记的五线谱图片，成功返回True（多页时文件名后加页码，路径见 last_paths）"""
+        from src.audio_processing.staff_image_generator import layout, render_pages
+        try:
+            result = self.transcribe(audio)
+            title = f"{track_name}  ({result['key']}, {result['tempo']:.0f} BPM)"
+            pages = layout(result['notes'], result['tempo'], title, result['chords'])
+            self.last_paths = render_pages(pages, filepath, format.lower(), self.workers)
+            return bool(self.last_paths)
+        except Exception as e:
+            print(f"扒谱图像生成失败: {e}")
+            return False
@@ -0,0 +1,56 @@
+"""
+AI音乐后期工程师 - 后台处理进程
+在独立进程中执行AudioProcessor的处理方法，通过管道接收音频和参数、返回处理结果；
+界面进程取消任务时直接结束该进程，不依赖处理代码配合
+"""
+
+import inspect
+import multiprocessing
+
+from src.audio_processing.processor import AudioProcessor
+
+
+def worker_main(conn):
+    """处理进程主循环：收到 None 时退出
+
+    请求: (方法名, 音频, 采样率, 参数字典)
+    回复: ('progress', 0~1) 若干次，最后为 ('done', 是否成功, 结果音频) 或 ('error', 错误信息)
+    """
+    # 进程内只保留输入和结果两个版本，不需要溢出到磁盘
+    processor = AudioProcessor(history_budget_mb=4096, spill_to_disk=False)
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+
+        method_name, audio, sample_rate, kwargs = request
+        try:
+            processor.sample_rate = sample_rate
+            processor.history.reset(audio, owned=True)
+            method = getattr(processor, method_name)
+            if 'progress' in inspect.signature(method).parameters:
+                kwargs = dict(kwargs, progress=lambda fraction: conn.send(('progress', float(fraction))))
+            ok = method(**kwargs)
+            result = processor.audio_data if ok and processor.history.current_index > 0 else None
+            conn.send(('done', bool(ok), result))
+        except Exception as e:
+            conn.send(('error', f"{type(e).__name__}: {e}"))
+        finally:
+            processor.history.clear()
+
+
+def start_worker():
+    """启动处理进程，返回 (进程, 界面端管道)
+
+    使用spawn方式启动（界面进程中已有Qt和工作线程）；进程不设为守护进程，
+    以便并行音准修正等操作可以再创建子进程，退出时由调用方负责结束
+    """
+    context = multiprocessing.get_context('spawn')
+    parent_conn, child_conn = context.Pipe()
+    process = context.Process(target=worker_main, args=(child_conn,), name='audio-worker')
+    process.start()
+    child_conn.close()
+    return process, parent_conn
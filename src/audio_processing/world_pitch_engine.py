@@ -0,0 +1,215 @@
+"""
+AI音乐后期工程师 - WORLD音高引擎
+对当前音频只做一次WORLD分解（F0、频谱包络、非周期成分），
+改变移调半音数或修正强度时只重新映射F0并合成；合成按帧区间切分后
+在线程池中并行执行（pyworld合成时释放GIL），区间之间按相关系数修正的等功率交叉淡化拼接
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from fractions import Fraction
+
+import numpy as np
+
+
+DEFAULT_FRAME_PERIOD = 5.0  # 毫秒
+SEGMENT_FRAMES = 2000  # 每个并行合成区间的帧数（5ms帧约10秒）
+SEGMENT_PADDING = 40  # 区间两侧额外合成的帧数，用于交叉淡化和消除边界瞬态
+CROSSFADE_FRAMES = 16
+
+
+class WorldDecomposition:
+    """一段单声道音频的WORLD分解结果"""
+
+    def __init__(self, f0, sp, ap, sample_rate, frame_period, length):
+        self.f0 = f0
+        self.sp = sp  # 频谱包络以float32保存，合成时再转换为float64
+        self.ap = ap
+        self.sample_rate = sample_rate
+        self.frame_period = frame_period
+        self.length = length
+
+    @property
+    def samples_per_frame(self):
+        return self.sample_rate * self.frame_period / 1000.0
+
+    @property
+    def num_frames(self):
+        return len(self.f0)
+
+
+def map_f0(f0, semitones=0.0, strength=1.0):
+    """F0映射：整体移调后按强度向最近的半音靠拢（0为不修正，1为完全量化），无声帧保持为0"""
+    mapped = np.zeros_like(f0)
+    voiced = f0 > 0
+    if not np.any(voiced):
+        return mapped
+    midi = 69.0 + 12.0 * np.log2(f0[voiced] / 440.0) + semitones
+    if strength:
+        midi += strength * (np.round(midi) - midi)
+    mapped[voiced] = 440.0 * 2.0 ** ((midi - 69.0) / 12.0)
+    return mapped
+
+
+class WorldPitchEngine:
+    """分析一次、多次合成的音高引擎，按音频内容缓存分解结果"""
+
+    def __init__(self, frame_period=DEFAULT_FRAME_PERIOD, max_workers=None, cache_size=2):
+        self.frame_period = frame_period
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._executor = None
+        self._lock = threading.Lock()  # 多个预览线程同时请求同一音频时只分析一次
+
+    def analyze(self, audio, sample_rate):
+        """返回音频的WORLD分解（多声道时逐声道分解），同一内容只分析一次"""
+        from src.audio_processing.analysis_cache import shared_analysis_cache
+        key = (shared_analysis_cache().content_hash(audio), int(sample_rate), self.frame_period)
+        with self._lock:
+            decomposition = self._cache.get(key)
+            if decomposition is not None:
+                self._cache.move_to_end(key)
+                return decomposition
+
+            audio = np.asarray(audio)
+            channels = [audio] if audio.ndim == 1 else [audio[:, c] for c in range(audio.shape[1])]
+            decomposition = list(self._pool().map(lambda ch: self._analyze_channel(ch, sample_rate), channels))
+            self._cache[key] = decomposition
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return decomposition
+
+    def _analyze_channel(self, channel, sample_rate):
+        import pyworld as pw
+        x = np.ascontiguousarray(channel, dtype=np.float64)
+        f0, t = pw.dio(x, sample_rate, frame_period=self.frame_period)
+        f0 = pw.stonemask(x, f0, t, sample_rate)
+        sp = pw.cheaptrick(x, f0, t, sample_rate).astype(np.float32)
+        ap = pw.d4c(x, f0, t, sample_rate).astype(np.float32)
+        return WorldDecomposition(f0, sp, ap, sample_rate, self.frame_period, len(x))
+
+    def render(self, audio, sample_rate, semitones=0.0, strength=1.0, start=0.0, duration=None, progress=None):
+        """按给定移调和修正强度合成；start/duration（秒）指定只渲染其中一段，用于快速预览。
+        progress(0~1) 在分解完成（记为一半）和每个区间合成后调用"""
+        decomposition = self.analyze(audio, sample_rate)
+        if progress is not None:
+            progress(0.5)
+        outputs = []
+        for index, d in enumerate(decomposition):
+            channel_progress = None if progress is None else (
+                lambda done, index=index: progress(0.5 + 0.5 * (index + done) / len(decomposition)))
+            outputs.append(self._render_channel(d, semitones, strength, start, duration, channel_progress))
+        output = outputs[0] if len(outputs) == 1 else np.stack(outputs, axis=1)
+        return output.astype(np.float32)
+
+    def _render_channel(self, decomposition, semitones, strength, start, duration, progress=None):
+        spf = decomposition.samples_per_frame
+        first_sample = int(round(start * decomposition.sample_rate))
+        last_sample = decomposition.length if duration is None else \
+            min(decomposition.length, first_sample + int(round(duration * decomposition.sample_rate)))
+        # 区间边界取在整数采样位置上的帧，保证各区间拼接时采样对齐
+        align = Fraction(spf).limit_denominator(1000).denominator
+        first_frame = int(first_sample // spf) // align * align
+        last_frame = min(decomposition.num_frames, int(np.ceil(last_sample / spf)) + 1)
+
+        f0 = map_f0(decomposition.f0, semitones, strength)
+        output = np.zeros(int(np.ceil((last_frame - first_frame) * spf)) + 1, dtype=np.float64)
+
+        step = max(align, SEGMENT_FRAMES // align * align)
+        bounds = self._segment_bounds(decomposition.f0, first_frame, last_frame, step, align)
+        segments = list(zip(bounds[:-1], bounds[1:]))
+
+        half = int(round(CROSSFADE_FRAMES * spf / 2))
+
+        def synthesize(segment):
+            return self._synthesize_segment(decomposition, f0, segment, first_frame, last_frame, half)
+
+        pieces = []
+        for piece in self._pool().map(synthesize, segments):
+            pieces.append(piece)
+            if progress is not None:
+                progress(len(pieces) / len(segments))
+        # 相邻区间重叠 2*half 个采样（前一段末尾、后一段开头），按两段在重叠处的相关程度交叉淡化
+        for (_, tail), (_, head) in zip(pieces[:-1], pieces[1:]):
+            n = min(2 * half, len(tail), len(head))
+            fade_out, fade_in = _crossfade_gains(tail[len(tail) - n:], head[:n])
+            tail[len(tail) - n:] *= fade_out
+            head[:n] *= fade_in
+
+        for offset, samples in pieces:
+            end = min(len(output), offset + len(samples))
+            if offset < 0:
+                samples = samples[-offset:]
+                offset = 0
+            output[offset:end] += samples[:end - offset]
+
+        start_offset = first_sample - int(round(first_frame * spf))
+        return output[start_offset:start_offset + (last_sample - first_sample)]
+
+    @staticmethod
+    def _segment_bounds(f0, first_frame, last_frame, step, align):
+        """合成区间边界：名义上每 step 帧一段，尽量移到附近的无声帧上，
+        避免在乐句中间拼接两段脉冲相位不同的合成结果"""
+        unvoiced = np.flatnonzero(f0[first_frame:last_frame] == 0) + first_frame
+        unvoiced = unvoiced[(unvoiced - first_frame) % align == 0]
+        bounds = [first_frame]
+        for nominal in range(first_frame + step, last_frame, step):
+            nearby = unvoiced[np.abs(unvoiced - nominal) <= step // 2]
+            bound = int(nearby[np.argmin(np.abs(nearby - nominal))]) if len(nearby) else nominal
+            if bound - bounds[-1] > 2 * SEGMENT_PADDING and last_frame - bound > 2 * SEGMENT_PADDING:
+                bounds.append(bound)
+        return bounds + [last_frame]
+
+    def _synthesize_segment(self, decomposition, f0, segment, first_frame, last_frame, half):
+        """合成一个帧区间（两侧带额外帧），返回 (相对渲染起点的采样偏移, 采样)；
+        内部边界两侧各多保留 half 个采样，留给 _render_channel 交叉淡化"""
+        import pyworld as pw
+        spf = decomposition.samples_per_frame
+        a, b = segment
+        lo = max(a - SEGMENT_PADDING, first_frame)
+        hi = min(b + SEGMENT_PADDING, last_frame)
+        samples = pw.synthesize(
+            np.ascontiguousarray(f0[lo:hi]),
+            np.ascontiguousarray(decomposition.sp[lo:hi], dtype=np.float64),
+            np.ascontiguousarray(decomposition.ap[lo:hi], dtype=np.float64),
+            decomposition.sample_rate,
+            frame_period=decomposition.frame_period
+        )
+
+        seg_start = int(round((a - lo) * spf))
+        seg_end = int(round((b - lo) * spf))
+        keep_start = seg_start - half if a > first_frame else 0
+        keep_end = seg_end + half if b < last_frame else len(samples)
+        return int(round((lo - first_frame) * spf)) + keep_start, samples[keep_start:keep_end]
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+
+def _crossfade_gains(tail, head):
+    """重叠部分的 (淡出, 淡入) 增益：正弦/余弦等功率曲线再按两段的相关系数 r 归一化。
+    各区间分别合成，脉冲相位可能完全无关（r≈0，功率和为1），也可能恰好对齐（r≈1，幅度和为1），
+    按 r 修正后两种情况接缝处的电平都不凹陷、不凸起"""
+    n = len(tail)
+    fade_in = np.sin(0.5 * np.pi * (np.arange(n) + 0.5) / n)
+    fade_out = fade_in[::-1]
+    energy = np.sqrt(np.dot(tail, tail) * np.dot(head, head))
+    r = float(np.clip(np.dot(tail, head) / energy, 0.0, 1.0)) if energy > 0 else 0.0
+    norm = 1.0 / np.sqrt(1.0 + 2.0 * r * fade_in * fade_out)
+    return fade_out * norm, fade_in * norm
+
+
+_shared_engine = None
+
+
+def shared_world_pitch_engine():
+    """进程内共享的WORLD音高引擎（共享分解缓存）"""
+    global _shared_engine
+    if _shared_engine is None:
+        _shared_engine = WorldPitchEngine()
+    return _shared_engine
@@ -0,0 +1,342 @@
+"""
+AI音乐后期工程师 - 无界面批处理命令行
+将一组音频文件按处理链（例如 智能音准 → 智能EQ → 智能母带）分发到多进程并行处理。
+本模块及其工作进程不会导入PyQt5，可在无显示器的渲染服务器上运行。
+
+用法示例:
+    ai-music-batch ./vocals -o ./out -c "pitch:smart,eq:vocal,master:streaming" -j 8
+    ai-music-batch manifest.txt -o ./out -c "shift:2,geq:0/1/2/1/0"
+"""
+
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from src.audio_processing.processor import AudioProcessor, SMART_EQ_PRESETS
+
+
+# 支持的音频文件扩展名（与图形界面的加载对话框一致）
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.flac', '.m4a', '.ogg', '.aiff')
+
+# 处理步骤名称 -> 对应的AudioProcessor方法
+CHAIN_STEPS = {
+    'pitch': 'smart_pitch_correction',   # pitch[:smart|aggressive|gentle|adaptive]
+    'eq': 'smart_equalize',              # eq[:smart|vocal|instrumental|mix|flat|bright|warm]
+    'master': 'smart_master',            # master[:smart|loud|dynamic|radio|streaming|vinyl]
+    'shift': 'pitch_correction',         # shift:半音数
+    'geq': 'equalize',                   # geq:增益1/增益2/...（dB）
+    'basic_master': 'apply_basic_mastering',  # basic_master[:目标响度LUFS]
+}
+
+
+def parse_chain(spec):
+    """解析处理链描述，返回 [(步骤名, 参数字符串), ...]"""
+    steps = []
+    normalized = spec.replace('→', ',').replace('>', ',')
+    for item in normalized.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, arg = item.partition(':')
+        name = name.strip().lower()
+        if name not in CHAIN_STEPS:
+            raise ValueError(f"未知的处理步骤: {name}（可用: {', '.join(CHAIN_STEPS)}）")
+        steps.append((name, arg.strip()))
+    if not steps:
+        raise ValueError("处理链为空")
+    return steps
+
+
+def apply_step(processor, name, arg, anti_ai=True, linear_phase=False):
+    """在处理器上执行单个处理步骤"""
+    if name == 'pitch':
+        return processor.smart_pitch_correction(mode=arg or 'smart', anti_ai=anti_ai)
+    if name == 'eq':
+        return processor.smart_equalize(mode=arg or 'smart', anti_ai=anti_ai, linear_phase=linear_phase)
+    if name == 'master':
+        return processor.smart_master(mode=arg or 'smart')
+    if name == 'shift':
+        return processor.pitch_correction(semitones=float(arg or 0))
+    if name == 'geq':
+        bands = [float(g) for g in arg.split('/') if g.strip()]
+        return processor.equalize(bands, linear_phase=linear_phase)
+    if name == 'basic_master':
+        return processor.apply_basic_mastering(target_lufs=float(arg) if arg else None)
+    raise ValueError(f"未知的处理步骤: {name}")
+
+
+def apply_chain(processor, chain, anti_ai=True, linear_phase=False):
+    """按顺序执行处理链，任一步骤失败即停止并返回失败的步骤名"""
+    for name, arg in chain:
+        if not apply_step(processor, name, arg, anti_ai=anti_ai, linear_phase=linear_phase):
+            return name
+    return None
+
+
+# 流式处理的阶段顺序固定为 均衡 → 母带 → 响度增益，处理链中的步骤须按此顺序且各阶段至多一个
+STREAMING_STAGES = {'eq': 0, 'geq': 0, 'master': 1, 'basic_master': 2}
+
+# 流式处理中与整段处理实现不同的步骤（运行前提示）
+STREAMING_NOTES = {
+    'eq': "eq 步骤按模式的预设曲线分块均衡，不做反AI痕迹处理和自适应调整",
+    'master': "master 步骤使用流式母带预设（压缩 + 真峰值限制），不是整段处理的多频段智能母带",
+}
+
+
+def streaming_params(chain):
+    """将处理链转换为流式处理参数 (bands, master_mode, target_lufs)；
+    流式处理无法按原样重现的处理链（不支持的步骤、顺序不同、重复的阶段）抛出ValueError"""
+    from src.audio_processing.loudness import DEFAULT_TARGET_LUFS
+    bands = None
+    master_mode = None
+    target_lufs = None
+    previous = None
+    for name, arg in chain:
+        if name not in STREAMING_STAGES:
+            raise ValueError(f"流式模式不支持处理步骤: {name}（仅支持 eq、geq、master、basic_master）")
+        if previous is not None and STREAMING_STAGES[name] <= STREAMING_STAGES[previous]:
+            raise ValueError(f"流式模式的处理链须按 均衡(eq/geq) → master → basic_master 的顺序，"
+                             f"且每类步骤至多一个: {previous} 之后不能是 {name}")
+        previous = name
+        if name == 'geq':
+            bands = [float(g) for g in arg.split('/') if g.strip()]
+        elif name == 'eq':
+            bands = SMART_EQ_PRESETS.get(arg or 'smart', SMART_EQ_PRESETS['smart'])
+        elif name == 'master':
+            master_mode = arg or 'smart'
+        elif name == 'basic_master':
+            target_lufs = float(arg) if arg else DEFAULT_TARGET_LUFS
+    return bands, master_mode, target_lufs
+
+
+def collect_inputs(source):
+    """从目录或清单文件收集待处理的音频文件路径"""
+    if os.path.isdir(source):
+        paths = []
+        for root, _, files in os.walk(source):
+            for filename in files:
+                if filename.lower().endswith(AUDIO_EXTENSIONS):
+                    paths.append(os.path.join(root, filename))
+        return sorted(paths)
+
+    # 清单文件：每行一个路径，#开头为注释，相对路径以清单所在目录为基准
+    base_dir = os.path.dirname(os.path.abspath(source))
+    paths = []
+    with open(source, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if not os.path.isabs(line):
+                line = os.path.join(base_dir, line)
+            paths.append(line)
+    return paths
+
+
+def input_root(source):
+    """输出目录结构的基准：输入目录本身，或清单文件所在目录"""
+    return source if os.path.isdir(source) else os.path.dirname(os.path.abspath(source))
+
+
+def output_path_for(input_path, output_dir, suffix, extension, root=None):
+    """根据输入文件名生成输出路径；输入位于 root 之下时，在输出目录中保留其相对子目录"""
+    stem = os.path.splitext(os.path.basename(input_path))[0]
+    subdir = ''
+    if root is not None:
+        try:
+            relative = os.path.relpath(os.path.dirname(os.path.abspath(input_path)), os.path.abspath(root))
+        except ValueError:  # Windows下位于不同盘符
+            relative = os.curdir
+        if relative != os.curdir and relative.split(os.sep)[0] != os.pardir:
+            subdir = relative
+    return os.path.join(output_dir, subdir, f"{stem}{suffix}.{extension}")
+
+
+def plan_outputs(inputs, output_dir, suffix, extension, root=None):
+    """为每个输入生成输出路径；两个输入会写到同一个输出文件时抛出ValueError，避免互相覆盖"""
+    outputs = []
+    owners = {}
+    for path in inputs:
+        output_path = output_path_for(path, output_dir, suffix, extension, root)
+        key = os.path.normcase(os.path.abspath(output_path))
+        if key in owners:
+            raise ValueError(f"输出文件重名: {owners[key]} 和 {path} 都会写入 {output_path}")
+        owners[key] = path
+        outputs.append(output_path)
+    return outputs
+
+
+def process_file(input_path, output_path, chain, anti_ai=True, stream=False, linear_phase=False):
+    """工作进程入口：加载、执行处理链并保存单个文件，返回统计结果"""
+    result = {
+        'input': input_path,
+        'output': output_path,
+        'ok': False,
+        'duration': 0.0,
+        'wall_time': 0.0,
+        'rtf': 0.0,
+        'error': None,
+    }
+    start = time.perf_counter()
+    try:
+        processor = AudioProcessor()
+        if stream:
+            # 流式模式：分块处理，不将整个文件读入内存
+            import soundfile as sf
+            result['duration'] = sf.info(input_path).duration
+            bands, master_mode, target_lufs = streaming_params(chain)
+            if not processor.process_file_streaming(input_path, output_path, bands=bands, master_mode=master_mode,
+                                                    linear_phase=linear_phase, target_lufs=target_lufs):
+                result['error'] = "流式处理失败"
+                return result
+            result['ok'] = True
+            return result
+
+        if not processor.load_audio(input_path):
+            result['error'] = "加载失败"
+            return result
+        result['duration'] = len(processor.audio_data) / processor.sample_rate
+
+        failed_step = apply_chain(processor, chain, anti_ai=anti_ai, linear_phase=linear_phase)
+        if failed_step is not None:
+            result['error'] = f"步骤 {failed_step} 处理失败"
+            return result
+
+        if not processor.save_audio(output_path):
+            result['error'] = "保存失败"
+            return result
+        result['ok'] = True
+    except Exception as e:
+        result['error'] = str(e)
+    finally:
+        result['wall_time'] = time.perf_counter() - start
+        if result['duration'] > 0:
+            result['rtf'] = result['wall_time'] / result['duration']
+    return result
+
+
+def run_batch(inputs, output_dir, chain, jobs=None, anti_ai=True, suffix='_processed', extension='wav',
+              stream=False, linear_phase=False, report=print, root=None):
+    """将文件分发到进程池并行处理，返回按完成顺序排列的结果列表；
+    root 为输入的基准目录，其下子目录中的文件输出到输出目录中对应的子目录"""
+    outputs = plan_outputs(inputs, output_dir, suffix, extension, root)
+    for directory in sorted({os.path.dirname(path) for path in outputs} | {output_dir}):
+        os.makedirs(directory, exist_ok=True)
+    jobs = jobs or os.cpu_count() or 1
+    results = []
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            pool.submit(
+                process_file,
+                path,
+                output_path,
+                chain,
+                anti_ai,
+                stream,
+                linear_phase
+            ): path
+            for path, output_path in zip(inputs, outputs)
+        }
+        for index, future in enumerate(as_completed(futures), start=1):
+            result = future.result()
+            results.append(result)
+            name = os.path.basename(result['input'])
+            if result['ok']:
+                report(f"[{index}/{len(inputs)}] ✓ {name}: 时长 {result['duration']:.1f}秒, "
+                       f"耗时 {result['wall_time']:.2f}秒, 实时因子 {result['rtf']:.3f}")
+            else:
+                report(f"[{index}/{len(inputs)}] ✗ {name}: {result['error']} "
+                       f"(耗时 {result['wall_time']:.2f}秒)")
+    return results
+
+
+def summarize(results, wall_time, report=print):
+    """输出批处理汇总信息"""
+    succeeded = [r for r in results if r['ok']]
+    total_audio = sum(r['duration'] for r in succeeded)
+    total_cpu = sum(r['wall_time'] for r in results)
+    report("\n=== 批处理汇总 ===")
+    report(f"成功: {len(succeeded)}/{len(results)}")
+    report(f"音频总时长: {total_audio:.1f}秒")
+    report(f"总耗时: {wall_time:.1f}秒 (各文件耗时之和 {total_cpu:.1f}秒)")
+    if total_audio > 0:
+        report(f"整体实时因子: {wall_time / total_audio:.3f} (处理速度为实时的 {total_audio / max(wall_time, 1e-9):.1f} 倍)")
+
+
+def build_parser():
+    """构建命令行参数解析器"""
+    parser = argparse.ArgumentParser(
+        prog='ai-music-batch',
+        description="AI音乐后期工程师 - 无界面批处理"
+    )
+    parser.add_argument('source', help="输入目录或清单文件（每行一个音频路径）")
+    parser.add_argument('-o', '--output-dir', required=True, help="输出目录")
+    parser.add_argument('-c', '--chain', default='pitch:smart,eq:smart,master:smart',
+                        help="处理链，例如 \"pitch:smart,eq:vocal,master:streaming\"")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="并行进程数（默认等于CPU核心数）")
+    parser.add_argument('--no-anti-ai', action='store_true', help="禁用反AI痕迹处理")
+    parser.add_argument('--suffix', default='_processed', help="输出文件名后缀")
+    parser.add_argument('--format', default='wav', choices=['wav', 'flac'], help="输出文件格式")
+    parser.add_argument('--stream', action='store_true',
+                        help="流式分块处理长录音（仅支持按 eq/geq → master → basic_master 顺序的处理链），"
+                             "内存占用不随文件长度增长")
+    parser.add_argument('--linear-phase', action='store_true',
+                        help="eq/geq 步骤使用线性相位均衡（母带处理）；eq 步骤须同时指定 --no-anti-ai")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        chain = parse_chain(args.chain)
+        if args.stream:
+            streaming_params(chain)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.linear_phase and not args.no_anti_ai and not args.stream and any(name == 'eq' for name, _ in chain):
+        parser.error("线性相位的 eq 步骤只应用模式的预设曲线，不能同时进行反AI痕迹处理，请加 --no-anti-ai")
+    if args.stream:
+        for name in dict(chain):
+            if name in STREAMING_NOTES:
+                print(f"注意: {STREAMING_NOTES[name]}")
+
+    if not os.path.exists(args.source):
+        parser.error(f"输入不存在: {args.source}")
+    inputs = collect_inputs(args.source)
+    if not inputs:
+        print("没有找到需要处理的音频文件")
+        return 1
+
+    root = input_root(args.source)
+    try:
+        plan_outputs(inputs, args.output_dir, args.suffix, args.format, root)
+    except ValueError as e:
+        parser.error(str(e))
+
+    chain_text = ' → '.join(f"{name}:{arg}" if arg else name for name, arg in chain)
+    print(f"共 {len(inputs)} 个文件，处理链: {chain_text}，并行进程数: {args.jobs or os.cpu_count()}")
+
+    start = time.perf_counter()
+    results = run_batch(
+        inputs,
+        args.output_dir,
+        chain,
+        jobs=args.jobs,
+        anti_ai=not args.no_anti_ai,
+        suffix=args.suffix,
+        extension=args.format,
+        stream=args.stream,
+        linear_phase=args.linear_phase,
+        root=root
+    )
+    summarize(results, time.perf_counter() - start)
+    return 0 if all(r['ok'] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
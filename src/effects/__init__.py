@@ -0,0 +1,3 @@
+"""
+音效处理模块
+"""
@@ -0,0 +1,247 @@
+"""
+AI音乐后期工程师 - 分块动态处理
+压缩器和限制器的包络状态在块之间延续，整段处理和流式母带处理使用同一套代码。
+压缩器的RMS检测和启动平滑都是一阶IIR滤波器（lfilter，带状态）；释放在启动平滑之前，
+增益衰减量从实际达到的峰值按释放时间常数指数回落（遇到更大的值立即跟上），
+取对数后是一次前缀最大值运算，不需要逐采样循环。
+限制器的预读峰值检测用 van Herk/Gil-Werman 分块滑动最大值（O(n)，与预读长度无关），
+再用等长的滑动平均把增益变化展开成斜坡，保证任何采样（可选真峰值）都不超过上限
+"""
+
+import numpy as np
+from scipy.signal import lfilter, lfilter_zi
+
+
+DECAY_SPAN = 500.0  # decaying_max 每段的最大衰减量（自然对数单位）
+
+
+def sliding_max(x, window):
+    """滑动窗口最大值 y[i] = max(x[i:i+window])，长度 len(x)-window+1
+
+    van Herk/Gil-Werman：按窗口长度分块，块内前缀最大值和后缀最大值各一次累积，
+    任一窗口至多跨两个块，取前一块的后缀最大值与后一块的前缀最大值中较大者
+    """
+    x = np.asarray(x)
+    n = len(x)
+    if window <= 1:
+        return x.copy()
+    if n < window:
+        return np.zeros(0, dtype=x.dtype)
+    count = -(-n // window) * window
+    padded = np.full(count, -np.inf, dtype=np.result_type(x.dtype, np.float32))
+    padded[:n] = x
+    blocks = padded.reshape(-1, window)
+    prefix = np.maximum.accumulate(blocks, axis=1).ravel()
+    suffix = np.maximum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+    length = n - window + 1
+    return np.maximum(suffix[:length], prefix[window - 1:window - 1 + length])
+
+
+def decaying_max(x, coeff, initial=0.0):
+    """带指数衰减的峰值保持 y[i] = max(x[i], coeff * y[i-1])，y[-1] = initial（x 非负，0 <= coeff < 1）
+
+    展开为 y[i] = max_k x[k]·coeff^(i-k)，取对数后是前缀最大值：
+    log y[i] = i·log(coeff) + max_k (log x[k] - k·log(coeff))。
+    按衰减量分段计算，指数项不超过 DECAY_SPAN，保证浮点精度
+    """
+    x = np.asarray(x, dtype=np.float64)
+    out = np.empty(len(x))
+    if coeff <= 0.0:
+        np.maximum(x, 0.0, out=out)
+        return out
+    step = -np.log(coeff)
+    chunk = max(1, int(DECAY_SPAN / step))
+    previous = float(initial)
+    for start in range(0, len(x), chunk):
+        part = x[start:start + chunk]
+        k = np.arange(len(part) + 1) * step
+        with np.errstate(divide='ignore'):
+            logs = np.log(np.concatenate([[previous], part]))
+        held = np.exp(np.maximum.accumulate(logs + k) - k)[1:]
+        out[start:start + len(part)] = held
+        previous = held[-1]
+    return out
+
+
+def _one_pole(time_ms, sample_rate):
+    """一阶平滑滤波器系数 (b, a)"""
+    coeff = np.exp(-1.0 / max(time_ms * 1e-3 * sample_rate, 1e-9))
+    return np.array([1.0 - coeff]), np.array([1.0, -coeff])
+
+
+class Compressor:
+    """启动/释放压缩器（RMS检测，软拐点），逐块调用 process_block 时状态在块之间延续"""
+
+    def __init__(self, threshold_db=-18.0, ratio=2.5, attack_ms=10.0, release_ms=120.0, knee_db=6.0,
+                 makeup_db=0.0, sample_rate=44100, rms_ms=10.0):
+        self.threshold_db = threshold_db
+        self.ratio = ratio
+        self.attack_ms = attack_ms
+        self.release_ms = release_ms
+        self.knee_db = knee_db
+        self.makeup_db = makeup_db
+        self.sample_rate = sample_rate
+        self.rms_ms = rms_ms
+        self.reset()
+
+    def reset(self):
+        """清除包络状态"""
+        self._rms_zi = None
+        self._attack_zi = None
+        self._held = 0.0  # 上一采样保持的增益衰减量（dB）
+
+    @property
+    def latency(self):
+        return 0
+
+    def gain_reduction(self, level_db):
+        """静态增益曲线：各采样的增益衰减量（dB，非负），拐点内按二次曲线过渡"""
+        slope = 1.0 - 1.0 / self.ratio
+        over = level_db - self.threshold_db
+        half = self.knee_db / 2.0
+        if half <= 0:
+            return np.maximum(over, 0.0) * slope
+        knee = np.square(np.clip(over + half, 0.0, self.knee_db)) * (slope / (2.0 * self.knee_db))
+        return np.where(over > half, over * slope, knee)
+
+    def process_block(self, block):
+        """处理一个块，block形状为 (帧数, 声道数)，原地写回并返回"""
+        if len(block) == 0:
+            return block
+        power = np.mean(np.square(block, dtype=np.float64), axis=1)
+        rms_b, rms_a = _one_pole(self.rms_ms, self.sample_rate)
+        attack_b, attack_a = _one_pole(self.attack_ms, self.sample_rate)
+        _, release_a = _one_pole(self.release_ms, self.sample_rate)
+        if self._rms_zi is None:
+            self._rms_zi = lfilter_zi(rms_b, rms_a) * power[0]
+            self._attack_zi = np.zeros(1)
+        envelope, self._rms_zi = lfilter(rms_b, rms_a, power, zi=self._rms_zi)
+        reduction = self.gain_reduction(10.0 * np.log10(envelope + 1e-12))
+
+        # 衰减量下降时从保持的峰值按释放时间回落，上升时由启动滤波器平滑
+        held = decaying_max(reduction, -release_a[1], self._held)
+        self._held = float(held[-1])
+        smoothed, self._attack_zi = lfilter(attack_b, attack_a, held, zi=self._attack_zi)
+
+        gain = 10.0 ** ((self.makeup_db - smoothed) / 20.0)
+        block *= gain[:, np.newaxis].astype(block.dtype)
+        return block
+
+    def process(self, audio):
+        """处理整段音频（返回新数组）"""
+        return _process_whole(self, audio)
+
+
+class LookaheadLimiter:
+    """预读峰值限制器
+
+    输出比输入延迟 latency 帧。增益 = 预读窗口内峰值所需增益的最小值（滑动最大值），
+    再做与预读等长的滑动平均（斜坡启动，峰值到达时增益已降到位），
+    最后与一阶释放滤波后的增益取较小者（缓慢恢复）
+    """
+
+    def __init__(self, threshold_db=-1.0, sample_rate=44100, lookahead_ms=5.0, release_ms=60.0, true_peak=False,
+                 channels=2):
+        self.threshold_db = threshold_db
+        self.sample_rate = sample_rate
+        self.release_ms = release_ms
+        self.true_peak = true_peak
+        self.channels = channels
+        self.lookahead = max(1, int(round(lookahead_ms * 1e-3 * sample_rate)))
+        self.reset()
+
+    @property
+    def ceiling(self):
+        return 10.0 ** (self.threshold_db / 20.0)
+
+    @property
+    def latency(self):
+        return self._window - 1
+
+    def reset(self):
+        """清除状态（输出重新从延迟开始）"""
+        self._detector = None
+        if self.true_peak:
+            from src.audio_processing.loudness import TruePeakDetector
+            self._detector = TruePeakDetector(self.sample_rate, self.channels)
+        # 真峰值包络相对输入延迟，检测窗口相应加长
+        self._window = self.lookahead + (self._detector.delay if self._detector is not None else 0)
+        self._peaks = np.zeros(self._window - 1)
+        self._gains = np.ones(self.lookahead - 1)
+        self._audio = None
+        self._release_b, self._release_a = _one_pole(self.release_ms, self.sample_rate)
+        self._release_zi = lfilter_zi(self._release_b, self._release_a)
+
+    def _envelope(self, block):
+        if self._detector is not None:
+            if block.shape[1] != self._detector.channels:
+                from src.audio_processing.loudness import TruePeakDetector
+                self._detector = TruePeakDetector(self.sample_rate, block.shape[1])
+            return np.maximum(self._detector.process(block), np.abs(block).max(axis=1))
+        return np.abs(block).max(axis=1)
+
+    def process_block(self, block):
+        """处理一个块 (帧数, 声道数)，返回同样帧数的输出（延迟 latency 帧）"""
+        if len(block) == 0:
+            return block
+        if self._audio is None or self._audio.shape[1] != block.shape[1]:
+            self._audio = np.zeros((self.latency, block.shape[1]), dtype=block.dtype)
+        n = len(block)
+
+        peaks = np.concatenate([self._peaks, self._envelope(block)])
+        held = sliding_max(peaks, self._window)
+        self._peaks = peaks[n:]
+        needed = np.minimum(1.0, self.ceiling / np.maximum(held, 1e-10))
+
+        gains = np.concatenate([self._gains, needed])
+        total = np.concatenate([[0.0], np.cumsum(gains)])
+        ramp = (total[self.lookahead:] - total[:-self.lookahead]) / self.lookahead
+        self._gains = gains[n:]
+
+        released, self._release_zi = lfilter(self._release_b, self._release_a, ramp, zi=self._release_zi)
+        np.minimum(ramp, released, out=ramp)
+
+        delayed = np.concatenate([self._audio, block])
+        self._audio = delayed[n:].copy()
+        out = delayed[:n] * ramp[:, np.newaxis].astype(block.dtype)
+        np.clip(out, -self.ceiling, self.ceiling, out=out)
+        return out
+
+    def flush(self):
+        """输出延迟线中剩余的 latency 帧"""
+        channels = self._audio.shape[1] if self._audio is not None else self.channels
+        dtype = self._audio.dtype if self._audio is not None else np.float32
+        return self.process_block(np.zeros((self.latency, channels), dtype=dtype))
+
+    def process(self, audio):
+        """处理整段音频（返回与输入对齐的新数组）"""
+        return _process_whole(self, audio)
+
+
+def _process_whole(stage, audio, block_size=1 << 16, progress=None):
+    """按块处理整段音频，去掉阶段的延迟使输出与输入对齐；progress(0~1) 在每块处理后调用"""
+    from src.audio_processing.track_store import iter_blocks
+    mono = np.ndim(audio) == 1
+    audio = np.asarray(audio, dtype=np.float32)
+    source = audio[:, np.newaxis] if mono else audio
+    out = np.empty(source.shape, dtype=np.float32)
+    skip = stage.latency
+    written = 0
+
+    def emit(block):
+        nonlocal skip, written
+        drop = min(skip, len(block))
+        skip -= drop
+        block = block[drop:drop + len(out) - written]
+        out[written:written + len(block)] = block
+        written += len(block)
+
+    stage.reset()
+    for start, block in iter_blocks(source, block_size, release=False):
+        emit(stage.process_block(np.array(block, dtype=np.float32)))
+        if progress is not None:
+            progress((start + len(block)) / len(source))
+    if hasattr(stage, 'flush'):
+        emit(stage.flush())
+    return out[:, 0] if mono else out
+
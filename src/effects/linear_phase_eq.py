@@ -0,0 +1,187 @@
+"""
+AI音乐后期工程师 - 线性相位均衡器
+根据频段增益生成线性相位FIR（幅频响应与IIR滤波器组一致），
+用均匀分块的FFT卷积（重叠相加）处理；各增益设置的分块频谱被缓存，
+同一套卷积器既可整段处理，也可带状态逐块流式处理
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+from scipy import fft as sp_fft
+from scipy.signal import sosfreqz
+
+from src.effects.filter_bank import shared_filter_bank, time_axis
+
+
+def default_num_taps(sample_rate):
+    """FIR长度：约 1/6 秒，取 2^k - 1 保证奇数长度（整数延迟）"""
+    return int(2 ** np.ceil(np.log2(sample_rate / 6.0))) - 1
+
+
+def default_block_size(num_taps):
+    """分块大小：约为FIR长度的1/4，分块数保持在4块左右"""
+    return int(min(max(2 ** np.round(np.log2((num_taps + 1) / 4.0)), 256), 8192))
+
+
+def design_linear_phase_fir(sample_rate, gains, q=1.0, num_taps=None):
+    """设计线性相位FIR：取IIR滤波器组的幅频响应，零相位反变换后加窗"""
+    num_taps = num_taps or default_num_taps(sample_rate)
+    n_fft = num_taps + 1
+    sos = shared_filter_bank().get_sos(sample_rate, gains, q=q)
+    freqs = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+    _, response = sosfreqz(sos, worN=freqs, fs=sample_rate)
+
+    impulse = np.fft.irfft(np.abs(response), n=n_fft)
+    impulse = np.roll(impulse, num_taps // 2)[:num_taps]
+    return impulse * np.blackman(num_taps)
+
+
+class PartitionedConvolver:
+    """均匀分块FFT卷积器（重叠相加），块间状态保留，可处理任意长度的输入"""
+
+    def __init__(self, partitions, block_size, channels):
+        self.partitions = partitions  # (分块数, block_size + 1) 的卷积核频谱
+        self.block_size = block_size
+        self.channels = channels
+        n_parts = partitions.shape[0]
+        self._history = np.zeros((n_parts - 1, block_size + 1, channels), dtype=np.complex64)
+        self._tail = np.zeros((block_size, channels), dtype=np.float32)
+        self._pending = np.zeros((0, channels), dtype=np.float32)
+
+    @staticmethod
+    def kernel_partitions(kernel, block_size):
+        """将卷积核切分为等长分块并计算各块频谱"""
+        n_parts = int(np.ceil(len(kernel) / block_size))
+        padded = np.zeros(n_parts * block_size)
+        padded[:len(kernel)] = kernel
+        return sp_fft.rfft(padded.reshape(n_parts, block_size), n=2 * block_size, axis=1).astype(np.complex64)
+
+    def process(self, x):
+        """输入 (帧数, 声道数)，返回已完成卷积的输出（长度为块大小的整数倍）"""
+        x = np.asarray(x, dtype=np.float32)
+        data = np.concatenate([self._pending, x]) if len(self._pending) else x
+        block = self.block_size
+        n_blocks = len(data) // block
+        self._pending = data[n_blocks * block:].copy()
+        if n_blocks == 0:
+            return np.zeros((0, self.channels), dtype=np.float32)
+
+        # 一次FFT处理本次所有输入块，并与此前的输入频谱一起做频域延迟线相乘累加
+        spectra = sp_fft.rfft(data[:n_blocks * block].reshape(n_blocks, block, self.channels),
+                              n=2 * block, axis=1, workers=-1)
+        n_parts = self.partitions.shape[0]
+        delay_line = np.concatenate([self._history, spectra]) if n_parts > 1 else spectra
+        accumulated = np.zeros_like(spectra)
+        for p in range(n_parts):
+            start = n_parts - 1 - p
+            accumulated += self.partitions[p][np.newaxis, :, np.newaxis] * delay_line[start:start + n_blocks]
+        if n_parts > 1:
+            self._history = delay_line[-(n_parts - 1):]
+
+        frames = sp_fft.irfft(accumulated, n=2 * block, axis=1, workers=-1)
+        output = frames[:, :block].copy()
+        output[0] += self._tail
+        output[1:] += frames[:-1, block:]
+        self._tail = frames[-1, block:].copy()
+        return output.reshape(n_blocks * block, self.channels)
+
+
+class LinearPhaseEqualizer:
+    """线性相位均衡引擎，按 (采样率, 增益, Q, FIR长度, 块大小) 缓存卷积核分块频谱"""
+
+    def __init__(self, cache_size=16):
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+    def get_kernel(self, sample_rate, gains, q=1.0, num_taps=None, block_size=None):
+        """返回 (分块频谱, FIR长度, 块大小)"""
+        num_taps = num_taps or default_num_taps(sample_rate)
+        block_size = block_size or default_block_size(num_taps)
+        key = (int(sample_rate), tuple(round(float(g), 4) for g in gains), float(q), num_taps, block_size)
+        entry = self._cache.get(key)
+        if entry is not None:
+            self._cache.move_to_end(key)
+            return entry
+
+        kernel = design_linear_phase_fir(sample_rate, gains, q=q, num_taps=num_taps)
+        entry = (PartitionedConvolver.kernel_partitions(kernel, block_size), num_taps, block_size)
+        self._cache[key] = entry
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return entry
+
+    def create_stream(self, sample_rate, gains, channels, q=1.0, num_taps=None, block_size=None):
+        """创建流式处理器（已做延迟补偿）"""
+        partitions, num_taps, block_size = self.get_kernel(sample_rate, gains, q, num_taps, block_size)
+        return LinearPhaseStream(PartitionedConvolver(partitions, block_size, channels), num_taps // 2)
+
+    def apply(self, audio, sample_rate, gains, q=1.0, progress=None):
+        """整段处理，输出与输入等长且时间对齐；progress(0~1) 在每段处理后调用"""
+        audio = np.asarray(audio, dtype=np.float32)
+        if not any(g != 0 for g in gains):
+            return audio.copy()
+
+        axis = time_axis(audio)
+        frames = audio if audio.ndim == 2 and axis == 0 else (audio[:, np.newaxis] if audio.ndim == 1 else audio.T)
+        # 整段处理不受实时延迟限制，使用单个分块（块大小不小于FIR长度）以减少频域乘加次数
+        num_taps = default_num_taps(sample_rate)
+        stream = self.create_stream(sample_rate, gains, frames.shape[1], q=q, block_size=num_taps + 1)
+
+        # 以较大的分段送入，单次FFT批量处理多个块，同时限制中间频谱的内存占用
+        chunk = stream.convolver.block_size * 64
+        pieces = []
+        for i in range(0, len(frames), chunk):
+            pieces.append(stream.process_block(frames[i:i + chunk]))
+            if progress is not None:
+                progress(min(i + chunk, len(frames)) / len(frames))
+        pieces.append(stream.flush())
+        output = np.concatenate(pieces).astype(np.float32)
+
+        if audio.ndim == 1:
+            return output[:, 0]
+        return output if axis == 0 else output.T
+
+
+class LinearPhaseStream:
+    """流式线性相位处理：丢弃开头的FIR群延迟，结束时补齐剩余输出，使输出与输入对齐"""
+
+    def __init__(self, convolver, latency):
+        self.convolver = convolver
+        self.latency = latency
+        self._skip = latency
+        self._frames_in = 0
+        self._frames_out = 0
+
+    def process_block(self, block):
+        self._frames_in += len(block)
+        output = self.convolver.process(block)
+        if self._skip:
+            dropped = min(self._skip, len(output))
+            output = output[dropped:]
+            self._skip -= dropped
+        self._frames_out += len(output)
+        return output.astype(np.float32, copy=False)
+
+    def flush(self):
+        """输入结束后输出剩余样本（总输出长度等于总输入长度）"""
+        remaining = self._frames_in - self._frames_out
+        if remaining <= 0:
+            return np.zeros((0, self.convolver.channels), dtype=np.float32)
+        padding = np.zeros((remaining + self._skip + self.convolver.block_size, self.convolver.channels),
+                           dtype=np.float32)
+        output = self.convolver.process(padding)[self._skip:self._skip + remaining]
+        self._skip = 0
+        self._frames_out += len(output)
+        return output.astype(np.float32, copy=False)
+
+
+_shared_linear_phase = None
+
+
+def shared_linear_phase_eq():
+    """进程内共享的线性相位均衡引擎（共享卷积核缓存）"""
+    global _shared_linear_phase
+    if _shared_linear_phase is None:
+        _shared_linear_phase = LinearPhaseEqualizer()
+    return _shared_linear_phase
@@ -0,0 +1,116 @@
+"""
+AI音乐后期工程师 - 母带处理链
+（可选）多频段压缩 → 压缩 → 立体声宽度 → 预读限制器，各阶段按块处理（状态在块之间延续），
+整段处理时内存只多占用一个块，限制器的延迟在输出时扣除
+"""
+
+import numpy as np
+
+from src.effects.dynamics import Compressor, LookaheadLimiter
+from src.effects.multiband import MultibandCompressor
+
+
+# 各预设的压缩器参数（阈值由界面设置，不随预设改变）
+MASTERING_PRESETS = {
+    'balanced': {'ratio': 2.5, 'attack_ms': 10.0, 'release_ms': 120.0, 'knee_db': 6.0, 'makeup_db': 2.0},
+    'loud': {'ratio': 4.0, 'attack_ms': 5.0, 'release_ms': 80.0, 'knee_db': 4.0, 'makeup_db': 4.0},
+    'dynamic': {'ratio': 1.8, 'attack_ms': 20.0, 'release_ms': 200.0, 'knee_db': 8.0, 'makeup_db': 1.0},
+}
+DEFAULT_BLOCK_SIZE = 1 << 16
+
+
+class Limiter(LookaheadLimiter):
+    """母带限制器；high_freq_protection 打开时按4倍过采样的真峰值检测，
+    高频内容在采样之间形成的峰值同样不超过上限"""
+
+    def __init__(self, threshold_db=-1.0, sample_rate=44100, high_freq_protection=False, lookahead_ms=5.0,
+                 release_ms=60.0):
+        super().__init__(threshold_db, sample_rate, lookahead_ms, release_ms, true_peak=high_freq_protection)
+        self.high_freq_protection = high_freq_protection
+
+
+class StereoEnhancer:
+    """中/侧声道立体声宽度调整（1.0为原样）"""
+
+    def __init__(self, width_factor=1.0):
+        self.width_factor = width_factor
+
+    @property
+    def latency(self):
+        return 0
+
+    def reset(self):
+        pass
+
+    def process_block(self, block):
+        """原地调整 (帧数, 2) 的块，其他声道数原样返回"""
+        if block.ndim != 2 or block.shape[1] != 2 or self.width_factor == 1.0:
+            return block
+        mid = (block[:, 0] + block[:, 1]) * 0.5
+        side = (block[:, 0] - block[:, 1]) * (0.5 * self.width_factor)
+        np.add(mid, side, out=block[:, 0])
+        np.subtract(mid, side, out=block[:, 1])
+        return block
+
+
+class MasteringChain:
+    """母带处理阶段（可单独替换）"""
+
+    def __init__(self, sample_rate=44100):
+        self.multiband = None  # MultibandCompressor
+        self.compressor = Compressor(sample_rate=sample_rate)
+        self.stereo_enhancer = StereoEnhancer()
+        self.limiter = Limiter(sample_rate=sample_rate)
+
+    @property
+    def stages(self):
+        return [stage for stage in (self.multiband, self.compressor, self.stereo_enhancer, self.limiter)
+                if stage is not None]
+
+    def reset(self):
+        for stage in self.stages:
+            stage.reset()
+
+    def process_block(self, block):
+        for stage in self.stages:
+            block = stage.process_block(block)
+        return block
+
+    def flush(self):
+        """输出限制器延迟线中剩余的采样"""
+        return self.limiter.flush() if self.limiter is not None else np.zeros((0, 1), dtype=np.float32)
+
+    @property
+    def latency(self):
+        return sum(stage.latency for stage in self.stages)
+
+
+class MasteringProcessor:
+    """母带处理器"""
+
+    def __init__(self, sample_rate=44100, block_size=DEFAULT_BLOCK_SIZE):
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.chain = MasteringChain(sample_rate)
+
+    def enable_multiband(self, n_bands=3, threshold_db=-18.0, workers=None):
+        """用 n_bands 段多频段压缩代替单段压缩器"""
+        self.chain.multiband = MultibandCompressor(self.sample_rate, n_bands, threshold_db=threshold_db,
+                                                   workers=workers)
+        self.chain.compressor = None
+        return self.chain.multiband
+
+    def apply_preset(self, preset):
+        """按预设设置压缩器（或多频段压缩的各频段）的压缩比、启动/释放时间、拐点和补偿增益"""
+        params = MASTERING_PRESETS.get(preset, MASTERING_PRESETS['balanced'])
+        if self.chain.multiband is not None:
+            self.chain.multiband.configure(**params)
+        if self.chain.compressor is not None:
+            for name, value in params.items():
+                setattr(self.chain.compressor, name, value)
+
+    def process_audio(self, audio, preset='balanced', progress=None):
+        """整段母带处理，返回与输入等长、对齐的新数组；progress(0~1) 报告进度"""
+        from src.effects.dynamics import _process_whole
+        self.apply_preset(preset)
+        return _process_whole(self.chain, audio, self.block_size, progress)
@@ -0,0 +1,150 @@
+"""
+AI音乐后期工程师 - 多频段压缩
+4阶Linkwitz-Riley分频器把信号分成3~5个频段，各频段独立压缩后相加。
+分频按高通级联进行，每个低频段再经过其上方各分频点的2阶全通节（与该分频点低通+高通之和相同），
+各频段相位一致，不压缩时相加后幅频响应平坦。
+各频段的滤波和压缩在线程池中并行执行（sosfilt/lfilter 和大数组的NumPy运算释放GIL），
+结果写入预先分配的频段缓冲区，再原地累加回输入块；滤波器和包络状态在块之间延续
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy.signal import butter, sosfilt
+
+from src.effects.dynamics import Compressor, _process_whole
+
+
+# 不同频段数量的默认分频点（Hz）
+CROSSOVER_FREQUENCIES = {
+    3: (200.0, 2500.0),
+    4: (120.0, 800.0, 5000.0),
+    5: (90.0, 350.0, 1500.0, 6000.0),
+}
+BAND_TIME_SCALE = (2.0, 0.5)  # 最低/最高频段启动、释放时间相对设定值的倍数（中间按几何级数）
+MAX_BANDS = 5
+
+_shared_executor = None
+
+
+def _band_pool():
+    """进程内共享的频段线程池"""
+    global _shared_executor
+    if _shared_executor is None:
+        _shared_executor = ThreadPoolExecutor(max_workers=min(MAX_BANDS, os.cpu_count() or 1),
+                                              thread_name_prefix='multiband')
+    return _shared_executor
+
+
+def linkwitz_riley_sos(frequency, sample_rate, btype):
+    """4阶Linkwitz-Riley滤波器（两个相同的2阶巴特沃斯串联），btype 为 'lowpass' 或 'highpass'"""
+    sos = butter(2, frequency, btype, fs=sample_rate, output='sos')
+    return np.vstack([sos, sos])
+
+
+def crossover_allpass_sos(frequency, sample_rate):
+    """与该分频点的LR4低通+高通之和相同的2阶全通节"""
+    _, a = butter(2, frequency, fs=sample_rate)
+    return np.array([[a[2], a[1], a[0], a[0], a[1], a[2]]])
+
+
+class MultibandCompressor:
+    """多频段压缩器；bands 为各频段的 Compressor（从低到高，可单独调整参数），
+    workers=1 时在当前线程依次处理各频段"""
+
+    def __init__(self, sample_rate=44100, n_bands=3, crossovers=None, threshold_db=-18.0, ratio=2.5,
+                 attack_ms=10.0, release_ms=120.0, knee_db=6.0, makeup_db=0.0, workers=None):
+        if crossovers is None:
+            if n_bands not in CROSSOVER_FREQUENCIES:
+                raise ValueError(f"不支持的频段数量: {n_bands}（可选 3~5）")
+            crossovers = CROSSOVER_FREQUENCIES[n_bands]
+        self.sample_rate = sample_rate
+        self.crossovers = sorted(f for f in crossovers if f < sample_rate * 0.45)
+        self.workers = workers
+
+        self._time_scales = np.geomspace(BAND_TIME_SCALE[0], BAND_TIME_SCALE[1], self.n_bands)
+        self.bands = [Compressor(sample_rate=sample_rate) for _ in range(self.n_bands)]
+        self.configure(threshold_db=threshold_db, ratio=ratio, attack_ms=attack_ms, release_ms=release_ms,
+                       knee_db=knee_db, makeup_db=makeup_db)
+
+        # 高通级联：第k级输出是第k个分频点以上的信号，也是第k个频段的输入
+        self._highpass = [linkwitz_riley_sos(f, sample_rate, 'highpass') for f in self.crossovers]
+        # 第k个频段（最高频段除外）：低通，再补偿其上方各分频点的相位
+        self._band_sos = [
+            np.vstack([linkwitz_riley_sos(f, sample_rate, 'lowpass')]
+                      + [crossover_allpass_sos(g, sample_rate) for g in self.crossovers[k + 1:]])
+            for k, f in enumerate(self.crossovers)
+        ]
+        self.reset()
+
+    @property
+    def n_bands(self):
+        return len(self.crossovers) + 1
+
+    @property
+    def latency(self):
+        return 0
+
+    def configure(self, **params):
+        """设置全部频段的压缩参数（Compressor 的属性名），启动/释放时间按频段缩放"""
+        for band, scale in zip(self.bands, self._time_scales):
+            for name, value in params.items():
+                setattr(band, name, value * scale if name in ('attack_ms', 'release_ms') else value)
+
+    def reset(self):
+        """清除滤波器和包络状态"""
+        self._channels = None
+        self._buffers = None
+        for band in self.bands:
+            band.reset()
+
+    def _init_state(self, channels):
+        self._channels = channels
+        self._highpass_zi = [np.zeros((len(sos), 2, channels)) for sos in self._highpass]
+        self._band_zi = [np.zeros((len(sos), 2, channels)) for sos in self._band_sos]
+
+    def _process_band(self, index, source):
+        """滤出第 index 个频段并压缩，结果写入该频段的缓冲区"""
+        out = self._buffers[index][:len(source)]
+        if index < len(self._band_sos):
+            filtered, self._band_zi[index] = sosfilt(self._band_sos[index], source, axis=0,
+                                                     zi=self._band_zi[index])
+            out[:] = filtered
+        else:
+            out[:] = source
+        self.bands[index].process_block(out)
+
+    def process_block(self, block):
+        """处理一个块 (帧数, 声道数)，原地写回并返回"""
+        n, channels = block.shape
+        if n == 0:
+            return block
+        if self._channels != channels:
+            self._init_state(channels)
+        if self._buffers is None or self._buffers.shape[1] < n or self._buffers.shape[2] != channels:
+            self._buffers = np.empty((self.n_bands, n, channels))
+
+        # 高通级联逐级依赖，顺序计算；各频段的低通、全通和压缩互不依赖，并行计算
+        sources = [block.astype(np.float64)]
+        for k, sos in enumerate(self._highpass):
+            filtered, self._highpass_zi[k] = sosfilt(sos, sources[-1], axis=0, zi=self._highpass_zi[k])
+            sources.append(filtered)
+
+        workers = self.workers or os.cpu_count() or 1
+        if workers > 1 and self.n_bands > 1:
+            for future in [_band_pool().submit(self._process_band, k, source) for k, source in enumerate(sources)]:
+                future.result()
+        else:
+            for k, source in enumerate(sources):
+                self._process_band(k, source)
+
+        # 按频段顺序累加（结果与线程完成顺序无关）
+        np.copyto(block, self._buffers[0][:n], casting='unsafe')
+        for buffer in self._buffers[1:]:
+            np.add(block, buffer[:n], out=block, casting='unsafe')
+        return block
+
+    def process(self, audio):
+        """处理整段音频（返回新数组）"""
+        return _process_whole(self, audio)
@@ -0,0 +1,18 @@
+"""
+AI音乐后期工程师 - 用户配置目录
+字体选择缓存、音频设备配置等持久化文件统一保存在此目录
+"""
+
+import os
+
+
+def config_dir():
+    """返回用户配置目录（不存在时自动创建）"""
+    path = os.environ.get('AI_MUSIC_TUNER_CONFIG_DIR') or os.path.join(os.path.expanduser('~'), '.ai_music_tuner')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def config_path(filename):
+    """返回配置目录下指定文件的完整路径"""
+    return os.path.join(config_dir(), filename)
@@ -0,0 +1,3 @@
+"""
+界面辅助模块
+"""
@@ -0,0 +1,69 @@
+"""
+AI音乐后期工程师 - 中文字体配置
+首次运行时扫描matplotlib字体列表选出可用的中文字体，结果缓存到用户配置目录，
+之后启动直接读取缓存，不再扫描字体
+"""
+
+import json
+
+from src.settings import config_path
+
+
+# 按优先级排列的候选字体
+CJK_FONT_CANDIDATES = ['SimHei', 'Microsoft YaHei', 'PingFang SC', 'Songti SC', 'Arial Unicode MS',
+                       'Noto Sans CJK SC', 'WenQuanYi Micro Hei']
+FALLBACK_FONT = 'DejaVu Sans'
+FONT_CACHE_FILE = 'font_cache.json'
+
+_configured = False
+
+
+def _load_cached_font(cache_key):
+    try:
+        with open(config_path(FONT_CACHE_FILE), 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if cache.get('key') == cache_key:
+            return cache.get('font')
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _save_cached_font(cache_key, font):
+    try:
+        with open(config_path(FONT_CACHE_FILE), 'w', encoding='utf-8') as f:
+            json.dump({'key': cache_key, 'font': font}, f, ensure_ascii=False)
+    except OSError:
+        pass
+
+
+def resolve_cjk_font():
+    """返回第一个可用的中文字体名称（结果按matplotlib版本缓存），找不到时返回None"""
+    import matplotlib
+    cache_key = f"{matplotlib.__version__}:{','.join(CJK_FONT_CANDIDATES)}"
+    cached = _load_cached_font(cache_key)
+    if cached is not None:
+        return cached or None
+
+    from matplotlib import font_manager
+    available = {font.name for font in font_manager.fontManager.ttflist}
+    chosen = next((name for name in CJK_FONT_CANDIDATES if name in available), '')
+    _save_cached_font(cache_key, chosen)
+    return chosen or None
+
+
+def configure_matplotlib_fonts():
+    """设置matplotlib使用中文字体（只执行一次）"""
+    global _configured
+    if _configured:
+        return
+    _configured = True
+
+    import matplotlib
+    try:
+        font = resolve_cjk_font()
+        families = [font, FALLBACK_FONT] if font else CJK_FONT_CANDIDATES + [FALLBACK_FONT]
+        matplotlib.rcParams['font.sans-serif'] = families
+        matplotlib.rcParams['axes.unicode_minus'] = False  # 正常显示负号
+    except Exception:
+        pass
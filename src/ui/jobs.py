@@ -0,0 +1,210 @@
+"""
+AI音乐后期工程师 - 后台任务队列
+界面中的处理操作排队后依次交给后台处理进程执行，界面线程只负责提交和接收结果；
+取消任务时结束处理进程，在限定时间内返回
+"""
+
+from collections import deque
+
+from PyQt5.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+
+
+CANCEL_JOIN_TIMEOUT = 1.0  # 结束进程后等待退出的时间（秒），超时则强制杀死
+POLL_INTERVAL = 0.05
+
+
+class CallbackBridge(QObject):
+    """把后台线程中的回调转到界面线程执行"""
+
+    delivered = pyqtSignal(object, object)  # 回调, 结果
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.delivered.connect(self._deliver)
+
+    def wrap(self, callback):
+        """返回可在任意线程调用的回调，实际的 callback(结果) 在界面线程中执行"""
+        return lambda result: self.delivered.emit(callback, result)
+
+    @pyqtSlot(object, object)
+    def _deliver(self, callback, result):
+        callback(result)
+
+
+class ProcessingJob:
+    """一项待执行的处理器操作"""
+
+    def __init__(self, label, method, kwargs=None, on_success=None, on_failure=None):
+        self.label = label
+        self.method = method
+        self.kwargs = kwargs or {}
+        self.on_success = on_success
+        self.on_failure = on_failure
+
+
+class JobRunner(QThread):
+    """在工作线程中把一项任务发送给处理进程，并等待进度和结果"""
+
+    progress = pyqtSignal(float)
+    succeeded = pyqtSignal(object)  # 处理结果音频（处理器未产生新版本时为None）
+    failed = pyqtSignal(str)
+
+    def __init__(self, conn, request, parent=None):
+        super().__init__(parent)
+        self.conn = conn
+        self.request = request
+        self.cancelled = False
+
+    def run(self):
+        try:
+            self.conn.send(self.request)
+            while not self.cancelled:
+                if not self.conn.poll(POLL_INTERVAL):
+                    continue
+                message = self.conn.recv()
+                if message[0] == 'progress':
+                    self.progress.emit(message[1])
+                elif message[0] == 'done':
+                    _, ok, result = message
+                    if ok:
+                        self.succeeded.emit(result)
+                    else:
+                        self.failed.emit("处理失败")
+                    return
+                else:
+                    self.failed.emit(message[1])
+                    return
+        except (EOFError, OSError, BrokenPipeError) as e:
+            if not self.cancelled:
+                self.failed.emit(f"处理进程异常退出: {e}")
+
+
+class ProcessingJobQueue(QObject):
+    """处理任务队列：同一时间只执行一项，其余排队；结果在界面线程中提交到处理器"""
+
+    job_started = pyqtSignal(str, int)  # 任务名称, 排队中的任务数
+    job_progress = pyqtSignal(float)
+    job_finished = pyqtSignal(str, bool, str)  # 任务名称, 是否成功, 错误信息
+    job_cancelled = pyqtSignal(str)
+    idle = pyqtSignal()
+
+    def __init__(self, processor, parent=None):
+        super().__init__(parent)
+        self.processor = processor
+        self._pending = deque()
+        self._current = None
+        self._runner = None
+        self._process = None
+        self._conn = None
+
+    @property
+    def busy(self):
+        return self._current is not None
+
+    @property
+    def pending_count(self):
+        return len(self._pending)
+
+    def submit(self, label, method, kwargs=None, on_success=None, on_failure=None):
+        """提交处理任务；有任务正在执行时排队等待"""
+        self._pending.append(ProcessingJob(label, method, kwargs, on_success, on_failure))
+        if not self.busy:
+            self._start_next()
+
+    def cancel(self):
+        """取消当前任务并清空队列：结束处理进程，最多等待 CANCEL_JOIN_TIMEOUT 秒"""
+        self._pending.clear()
+        if self._current is None:
+            return
+        job = self._current
+        self._runner.cancelled = True
+        self._stop_worker()
+        self._finish_current()
+        self.job_cancelled.emit(job.label)
+        self.idle.emit()
+
+    def shutdown(self):
+        """退出程序前结束处理进程"""
+        self._pending.clear()
+        if self._current is not None:
+            self._runner.cancelled = True
+            self._stop_worker()
+            self._finish_current()
+        elif self._process is not None:
+            try:
+                self._conn.send(None)
+            except (OSError, BrokenPipeError):
+                pass
+            self._process.join(CANCEL_JOIN_TIMEOUT)
+            self._stop_worker()
+
+    def _start_next(self):
+        if not self._pending:
+            self.idle.emit()
+            return
+        if self.processor.audio_data is None:
+            self._pending.clear()
+            self.job_finished.emit("", False, "没有音频数据可供处理！")
+            self.idle.emit()
+            return
+
+        job = self._pending.popleft()
+        self._current = job
+        if self._process is None or not self._process.is_alive():
+            from src.audio_processing.worker import start_worker
+            self._process, self._conn = start_worker()
+
+        # 输入在开始执行时才取当前版本，排队的编辑会叠加在前一项的结果上
+        request = (job.method, self.processor.audio_data, self.processor.sample_rate, job.kwargs)
+        self._runner = JobRunner(self._conn, request, self)
+        self._runner.progress.connect(self.job_progress)
+        self._runner.succeeded.connect(self._on_succeeded)
+        self._runner.failed.connect(self._on_failed)
+        self.job_started.emit(job.label, len(self._pending))
+        self._runner.start()
+
+    def _on_succeeded(self, result):
+        job = self._current
+        if job is None or self.sender() is not self._runner:
+            return  # 已取消任务的迟到信号
+        if result is not None:
+            self.processor.commit(result, owned=True)
+        self._finish_current()
+        self.job_finished.emit(job.label, True, "")
+        # 先开始下一项再执行回调，回调中弹出的对话框不会阻塞队列
+        self._start_next()
+        if job.on_success:
+            job.on_success()
+
+    def _on_failed(self, message):
+        job = self._current
+        if job is None or self.sender() is not self._runner:
+            return  # 已取消任务的迟到信号
+        self._finish_current()
+        self.job_finished.emit(job.label, False, message)
+        self._start_next()
+        if job.on_failure:
+            job.on_failure(message)
+
+    def _finish_current(self):
+        self._current = None
+        if self._runner is not None:
+            self._runner.wait()
+            self._runner.deleteLater()
+            self._runner = None
+
+    def _stop_worker(self):
+        """结束处理进程（先terminate，超时后kill），等工作线程退出后再关闭管道"""
+        if self._process is not None:
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join(CANCEL_JOIN_TIMEOUT)
+                if self._process.is_alive():
+                    self._process.kill()
+                    self._process.join()
+            self._process = None
+        if self._runner is not None:
+            self._runner.wait()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,176 @@
+"""
+AI音乐后期工程师 - A/B对比播放器
+PlaybackEngine 的Qt封装：提供与原播放器相同的信号和方法，另外可在处理后/原始音频之间
+无缝切换。声卡按设备默认采样率输出，音频采样率不同时由引擎在回调中重采样。声卡回调中不发出Qt信号，播放位置和结束状态由界面线程定时查询；
+同时把两次查询之间播放过的音频送入响度表（EBU R128），声卡回调不参与测量
+"""
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from src.audio_processing.loudness import LoudnessMeter
+from src.audio_processing.playback_engine import PlaybackEngine
+from src.audio_processing.track_store import release_pages
+
+
+POSITION_INTERVAL_MS = 30  # 查询播放位置的间隔
+METER_MAX_GAP = 1.0  # 两次查询之间前进超过此时长（秒）视为跳转，响度表重新开始
+
+
+class ABPlayer(QObject):
+    """双音源播放器（0=处理后, 1=原始）"""
+
+    playback_started = pyqtSignal()
+    playback_paused = pyqtSignal()
+    playback_stopped = pyqtSignal()
+    playback_finished = pyqtSignal()
+    position_changed = pyqtSignal(int)  # 帧位置
+    duration_changed = pyqtSignal(int)  # 总帧数
+    source_changed = pyqtSignal(int)  # 当前音源
+    loudness_changed = pyqtSignal(object)  # 实时响度 {'momentary', 'short_term', 'integrated', 'true_peak_db'}
+
+    def __init__(self, sample_rate=44100, channels=2, parent=None):
+        super().__init__(parent)
+        self.engine = PlaybackEngine(sample_rate, channels)
+        self.volume = 1.0
+        self._paused = False
+        self.meter = None
+        self._metered = 0  # 已送入响度表的帧位置
+        self._timer = QTimer(self)
+        self._timer.setInterval(POSITION_INTERVAL_MS)
+        self._timer.timeout.connect(self._poll)
+
+    @property
+    def sample_rate(self):
+        return self.engine.sample_rate
+
+    def set_sources(self, processed, original=None, sample_rate=None):
+        """设置两路音源；采样率不变时保留播放位置和播放状态，不重新开始"""
+        previous = self.engine.length
+        self.engine.set_sources(processed, original, sample_rate=sample_rate)
+        if self.engine.length != previous:
+            self.duration_changed.emit(self.engine.length)
+        return True
+
+    def load_audio(self, audio_data, sample_rate=None):
+        """兼容原播放器接口：只更新处理后音源，原始音源保持不变"""
+        if audio_data is None:
+            return False
+        return self.set_sources(audio_data, self.engine.sources[1], sample_rate)
+
+    # ---- A/B ----
+
+    @property
+    def active_source(self):
+        return self.engine.active_source
+
+    def switch_to(self, index):
+        """切换音源：在当前播放位置交叉淡化，不重新开始播放"""
+        self.engine.switch_to(index)
+        self.source_changed.emit(self.engine.active_source)
+
+    def toggle_source(self):
+        self.switch_to(1 - self.engine.active_source)
+        return self.engine.active_source
+
+    # ---- 播放控制 ----
+
+    def play(self):
+        if self.engine.length == 0:
+            return False
+        self.engine.start()
+        self._paused = False
+        self._timer.start()
+        self.playback_started.emit()
+        return True
+
+    def pause(self):
+        if self.engine.playing:
+            self.engine.pause()
+            self._paused = True
+            self._timer.stop()
+            self.playback_paused.emit()
+
+    def stop(self):
+        self.engine.stop()
+        self._paused = False
+        self._timer.stop()
+        self.reset_meter()
+        self.position_changed.emit(0)
+        self.playback_stopped.emit()
+
+    def set_position(self, position):
+        self.engine.seek(position)
+        self.reset_meter()
+        self.position_changed.emit(self.engine.position)
+
+    def set_volume(self, volume):
+        self.volume = max(0.0, min(1.0, volume))
+        self.engine.volume = self.volume
+
+    def _poll(self):
+        self.position_changed.emit(self.engine.position)
+        self._update_meter(self.engine.position)
+        if self.engine.finished:
+            self.engine.pause()
+            self.engine.seek(0)
+            self.reset_meter()
+            self._timer.stop()
+            self._paused = False
+            self.playback_finished.emit()
+
+    # ---- 响度表 ----
+
+    def reset_meter(self):
+        """从当前播放位置重新开始测量"""
+        if self.meter is not None:
+            self.meter.reset()
+        self._metered = self.engine.position
+
+    def _update_meter(self, position):
+        """把上次查询以来播放过的音频（当前音源乘以音量）送入响度表"""
+        source = self.engine.sources[self.engine.active_source]
+        if source is None:
+            source = self.engine.sources[0]
+        if source is None:
+            return
+        channels = 1 if source.ndim == 1 else source.shape[1]
+        if (self.meter is None or self.meter.sample_rate != self.engine.sample_rate
+                or self.meter.channels != channels):
+            self.meter = LoudnessMeter(self.engine.sample_rate, channels)
+            self._metered = position
+        if position < self._metered or position - self._metered > METER_MAX_GAP * self.engine.sample_rate:
+            self.reset_meter()
+        if position > self._metered:
+            self.meter.process(source[self._metered:position] * self.volume)
+            release_pages(source, self._metered, position)
+            self._metered = position
+        self.loudness_changed.emit({
+            'momentary': self.meter.momentary,
+            'short_term': self.meter.short_term,
+            'integrated': self.meter.integrated,
+            'true_peak_db': self.meter.true_peak_db,
+        })
+
+    # ---- 状态查询 ----
+
+    def get_position(self):
+        return self.engine.position
+
+    def get_duration(self):
+        return self.engine.length
+
+    def get_position_seconds(self):
+        return self.engine.position / self.engine.sample_rate
+
+    def get_duration_seconds(self):
+        return self.engine.length / self.engine.sample_rate
+
+    def is_playing_state(self):
+        return self.engine.playing
+
+    def is_paused_state(self):
+        return self._paused
+
+    def close(self):
+        self._timer.stop()
+        self.engine.close()
@@ -0,0 +1,148 @@
+"""
+AI音乐后期工程师 - 图表渲染器
+保留坐标轴和图形对象，更新时只替换数据，不清空图表、不重新排版；
+布局（子图数量和类型）变化时才重建。播放头和鼠标光标竖线用blit绘制，
+只重绘缓存背景上的这几条线
+"""
+
+from src.ui.waveform_view import WaveformView
+
+
+class PlotRenderer:
+    """绑定在一个matplotlib图表和画布上的增量渲染器"""
+
+    def __init__(self, figure, canvas):
+        self.figure = figure
+        self.canvas = canvas
+        self.layout_key = None
+        self.axes = []
+        self._waveforms = {}  # (坐标轴序号, 名称) -> WaveformView
+        self._lines = {}  # (坐标轴序号, 名称) -> Line2D
+        self._images = {}  # 坐标轴序号 -> AxesImage
+        self._overlay_axes = []  # 横轴为时间、显示播放头和光标的坐标轴
+        self._playheads = []
+        self._cursors = []
+        self._background = None
+        self._connections = [
+            canvas.mpl_connect('draw_event', self._on_draw),
+            canvas.mpl_connect('motion_notify_event', self._on_motion),
+        ]
+
+    def layout(self, key, build, time_axes=False):
+        """确保图表为指定布局并返回坐标轴列表
+
+        key 相同时直接返回已有坐标轴；否则清空图表，调用 build(figure) 创建坐标轴并排版一次。
+        time_axes 为 True 时在各坐标轴上添加播放头和光标竖线
+        """
+        if key == self.layout_key:
+            return self.axes
+        self.reset()
+        self.axes = list(build(self.figure))
+        self.layout_key = key
+        if time_axes:
+            self._overlay_axes = self.axes
+            for ax in self.axes:
+                self._playheads.append(ax.axvline(0, color='black', linewidth=1, animated=True, visible=False))
+                self._cursors.append(ax.axvline(0, color='gray', linewidth=0.8, linestyle='--',
+                                                animated=True, visible=False))
+        self.figure.tight_layout()
+        return self.axes
+
+    def reset(self):
+        """清空图表和全部缓存的图形对象"""
+        for view in self._waveforms.values():
+            view.disconnect()
+        self._waveforms.clear()
+        self._lines.clear()
+        self._images.clear()
+        self._overlay_axes, self._playheads, self._cursors = [], [], []
+        self._background = None
+        self.axes = []
+        self.layout_key = None
+        self.figure.clear()
+
+    def waveform(self, index, audio, sample_rate=None, name='main', **style):
+        """在第 index 个坐标轴上显示整段波形包络，已有时只替换音频"""
+        view = self._waveforms.get((index, name))
+        if view is None:
+            view = WaveformView(self.axes[index], audio, sample_rate=sample_rate, **style)
+            self._waveforms[(index, name)] = view
+        else:
+            view.set_audio(audio, sample_rate)
+        return view
+
+    def line(self, index, x, y, name='main', **style):
+        """在第 index 个坐标轴上显示曲线，已有时只替换数据"""
+        artist = self._lines.get((index, name))
+        if artist is None:
+            artist, = self.axes[index].plot(x, y, **style)
+            self._lines[(index, name)] = artist
+        else:
+            artist.set_data(x, y)
+        return artist
+
+    def image(self, index, data, extent, clim, **style):
+        """在第 index 个坐标轴上显示图像（频谱图），已有时只替换数据、范围和色阶"""
+        artist = self._images.get(index)
+        if artist is None:
+            artist = self.axes[index].imshow(data, extent=extent, vmin=clim[0], vmax=clim[1], **style)
+            self._images[index] = artist
+        else:
+            artist.set_data(data)
+            artist.set_extent(extent)
+            artist.set_clim(*clim)
+        return artist
+
+    def draw(self, immediate=False):
+        """重绘图表；默认合并到下一次事件循环（连续多次更新只绘制一次）"""
+        if immediate:
+            self.canvas.draw()
+        else:
+            self.canvas.draw_idle()
+
+    def set_playhead(self, x):
+        """移动播放头（x为横轴坐标，None时隐藏）"""
+        self._move(self._playheads, x)
+
+    def set_cursor(self, x):
+        """移动光标竖线（x为横轴坐标，None时隐藏）"""
+        self._move(self._cursors, x)
+
+    def _move(self, lines, x):
+        if not lines:
+            return
+        for line in lines:
+            line.set_visible(x is not None)
+            if x is not None:
+                line.set_xdata([x, x])
+        self._blit()
+
+    def _blit(self):
+        """恢复缓存的背景后只绘制播放头和光标"""
+        if self._background is None:
+            return
+        self.canvas.restore_region(self._background)
+        self._draw_overlays()
+        self.canvas.blit(self.figure.bbox)
+
+    def _draw_overlays(self):
+        for ax, playhead, cursor in zip(self._overlay_axes, self._playheads, self._cursors):
+            ax.draw_artist(playhead)
+            ax.draw_artist(cursor)
+
+    def _on_draw(self, event):
+        """完整重绘后缓存背景（不含动画图形），再把播放头和光标画回去"""
+        if not self._overlay_axes:
+            self._background = None
+            return
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._draw_overlays()
+
+    def _on_motion(self, event):
+        if self._overlay_axes:
+            self.set_cursor(event.xdata if event.inaxes in self._overlay_axes else None)
+
+    def disconnect(self):
+        for cid in self._connections:
+            self.canvas.mpl_disconnect(cid)
+        self.reset()
@@ -0,0 +1,46 @@
+"""
+AI音乐后期工程师 - 启动耗时分析
+在子进程中以 -X importtime 导入主模块，按顶层包汇总各模块自身的导入耗时
+"""
+
+import os
+import sys
+import subprocess
+
+
+def measure_import_times(module_name='main', cwd=None):
+    """在全新解释器中导入模块，返回 [(顶层包名, 耗时秒), ...] 和总耗时"""
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module_name}'],
+        cwd=cwd or os.getcwd(),
+        capture_output=True,
+        text=True,
+        encoding='utf-8',
+        errors='replace'
+    )
+
+    totals = {}
+    total_us = 0
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        # 累加各模块自身耗时（不含子模块），按顶层包归类，避免重复计算
+        self_us = int(parts[0])
+        package = parts[2].strip().split('.')[0]
+        totals[package] = totals.get(package, 0) + self_us
+        total_us += self_us
+
+    ranked = sorted(((pkg, us / 1e6) for pkg, us in totals.items()), key=lambda item: item[1], reverse=True)
+    return ranked, total_us / 1e6
+
+
+def format_import_report(ranked, total, top=15):
+    """格式化导入耗时报告"""
+    lines = [f"=== 模块导入耗时（总计 {total * 1000:.0f} ms）==="]
+    for package, seconds in ranked[:top]:
+        share = seconds / total * 100 if total > 0 else 0
+        lines.append(f"  {package:<28s} {seconds * 1000:8.1f} ms  {share:5.1f}%")
+    return '\n'.join(lines)
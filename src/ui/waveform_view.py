@@ -0,0 +1,65 @@
+"""
+AI音乐后期工程师 - 整段波形显示
+用峰值金字塔按坐标轴像素宽度绘制整段音频的最小/最大包络和RMS包络；
+缩放、平移时只重新查询可见区间并更新已有图形的顶点，不重新绘制全部采样
+"""
+
+import numpy as np
+
+from src.audio_processing.peak_pyramid import pyramid_for
+
+
+class WaveformView:
+    """绑定在一个matplotlib坐标轴上的波形包络"""
+
+    def __init__(self, ax, audio, sample_rate=None, color='C0', label=None):
+        self.ax = ax
+        self._updating = False
+
+        self.peak_artist = ax.fill_between([0, 0], [0, 0], [0, 0], color=color, alpha=0.6,
+                                           linewidth=0, label=label)
+        self.rms_artist = ax.fill_between([0, 0], [0, 0], [0, 0], color=color, alpha=0.9, linewidth=0)
+        ax.set_ylim(-1.05, 1.05)
+        self.set_audio(audio, sample_rate, keep_view=False)
+        self._callback = ax.callbacks.connect('xlim_changed', lambda _ax: self.update_view())
+
+    def set_audio(self, audio, sample_rate=None, keep_view=True):
+        """替换显示的音频，沿用已有图形；长度和采样率不变时保留当前的缩放范围"""
+        self.audio = audio  # 保持对音频的引用，金字塔只保存弱引用
+        pyramid = pyramid_for(audio)
+        scale = 1.0 / sample_rate if sample_rate else 1.0  # 采样位置 -> 横轴单位
+        same_extent = (keep_view and getattr(self, 'pyramid', None) is not None
+                       and pyramid.length == self.pyramid.length and scale == self.scale)
+        self.pyramid, self.scale = pyramid, scale
+        if not same_extent:
+            self.ax.set_xlim(0, max(pyramid.length, 1) * scale)
+        self.update_view()
+
+    def update_view(self):
+        """按当前可见范围和坐标轴像素宽度重新查询包络"""
+        if self._updating:
+            return
+        self._updating = True
+        try:
+            x0, x1 = self.ax.get_xlim()
+            pixels = max(int(self.ax.bbox.width), 100)
+            starts, mins, maxs, rms = self.pyramid.query(x0 / self.scale, x1 / self.scale, pixels)
+            x = starts * self.scale
+            self.peak_artist.set_verts([_band_vertices(x, mins, maxs)])
+            self.rms_artist.set_verts([_band_vertices(x, np.maximum(-rms, mins), np.minimum(rms, maxs))])
+        finally:
+            self._updating = False
+
+    def disconnect(self):
+        self.ax.callbacks.disconnect(self._callback)
+
+
+def _band_vertices(x, lower, upper):
+    """上下包络围成的多边形顶点（每列画成竖直的一段，保留单采样尖峰）"""
+    if len(x) == 0:
+        return np.zeros((0, 2))
+    xs = np.repeat(x, 2)[1:]
+    xs = np.append(xs, xs[-1] + (x[-1] - x[-2] if len(x) > 1 else 1))
+    top = np.column_stack([xs, np.repeat(upper, 2)])
+    bottom = np.column_stack([xs[::-1], np.repeat(lower, 2)[::-1]])
+    return np.concatenate([top, bottom])
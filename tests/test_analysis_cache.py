@@ -0,0 +1,65 @@
+"""
+分析缓存测试：内容哈希、内存/磁盘往返、损坏文件视为未命中并删除、写入不留临时文件
+"""
+
+import os
+
+import librosa
+import numpy as np
+
+from src.audio_processing.analysis_cache import AnalysisCache
+
+SAMPLE_RATE = 22050
+
+
+def _clicks():
+    audio = np.zeros(SAMPLE_RATE * 2, dtype=np.float32)
+    audio[::SAMPLE_RATE // 4] = 1.0
+    return audio
+
+
+def _cache_files(directory):
+    return sorted(os.listdir(directory))
+
+
+def test_content_hash_depends_on_content_only():
+    cache = AnalysisCache(cache_dir='')
+    audio = _clicks()
+    assert cache.content_hash(audio) == cache.content_hash(audio.copy())
+    changed = audio.copy()
+    changed[1] = 0.5
+    assert cache.content_hash(changed) != cache.content_hash(audio)
+
+
+def test_disk_round_trip(tmp_path, monkeypatch):
+    directory = str(tmp_path)
+    audio = _clicks()
+    first = AnalysisCache(cache_dir=directory).get_onsets(audio, SAMPLE_RATE)
+    files = _cache_files(directory)
+    assert len(files) == 1 and files[0].endswith('.npz')
+
+    # 新的缓存实例从磁盘读取，不再分析
+    def fail(*args, **kwargs):
+        raise AssertionError("不应重新分析")
+    monkeypatch.setattr(librosa.onset, 'onset_strength', fail)
+    second = AnalysisCache(cache_dir=directory).get_onsets(audio, SAMPLE_RATE)
+    assert first.keys() == second.keys()
+    for name in first:
+        np.testing.assert_array_equal(first[name], second[name])
+
+
+def test_corrupt_file_is_a_miss_and_gets_replaced(tmp_path):
+    directory = str(tmp_path)
+    audio = _clicks()
+    expected = AnalysisCache(cache_dir=directory).get_onsets(audio, SAMPLE_RATE)
+    path = os.path.join(directory, _cache_files(directory)[0])
+    with open(path, 'r+b') as f:
+        f.truncate(os.path.getsize(path) // 2)
+
+    cache = AnalysisCache(cache_dir=directory)
+    result = cache.get_onsets(audio, SAMPLE_RATE)
+    np.testing.assert_array_equal(result['onset_frames'], expected['onset_frames'])
+    # 损坏的文件被删除后重新写入了完整的文件
+    assert _cache_files(directory) == [os.path.basename(path)]
+    result = AnalysisCache(cache_dir=directory).get_onsets(audio, SAMPLE_RATE)
+    np.testing.assert_array_equal(result['onset_frames'], expected['onset_frames'])
@@ -0,0 +1,80 @@
+"""
+音频转MIDI测试：用构造的逐帧F0、浊音标记和起音点检查按游程切分音符（音高变化、重复音的起音点、
+靠近音高边界的起音点不切分、过短游程丢弃、中值滤波抑制单帧跳动、能量映射为力度），
+以及发送给分析进程的音频只对完整映射的磁盘音轨传文件路径
+"""
+
+import numpy as np
+import pytest
+
+from src.audio_processing.audio_to_midi import _open_source, _source, segment_notes
+from src.audio_processing.track_store import TrackStore
+
+SAMPLE_RATE = 22050
+HOP = 512
+FRAME = HOP / SAMPLE_RATE
+
+
+def _f0(*runs):
+    """[(MIDI音高或None, 帧数)] 拼成逐帧F0和浊音标记；None 为清音"""
+    f0 = np.concatenate([np.full(frames, np.nan if pitch is None else 440.0 * 2 ** ((pitch - 69) / 12))
+                         for pitch, frames in runs])
+    return f0, np.isfinite(f0)
+
+
+def _segment(f0, voiced, onsets=(), **kwargs):
+    return segment_notes(f0, voiced, list(onsets), SAMPLE_RATE, HOP, **kwargs)
+
+
+def test_pitch_changes_split_notes():
+    f0, voiced = _f0((69, 20), (72, 20), (None, 10), (67, 15))
+    notes = _segment(f0, voiced)
+    assert notes['pitch'].tolist() == [69, 72, 67]
+    np.testing.assert_allclose(notes['start'], np.array([0, 20, 50]) * FRAME)
+    np.testing.assert_allclose(notes['end'], np.array([20, 40, 65]) * FRAME)
+    assert (notes['velocity'] == 80).all()
+
+
+def test_onsets_split_repeated_notes_but_not_near_pitch_edges():
+    f0, voiced = _f0((69, 40), (71, 20))
+    # 第20帧：同一音高上的重复音；第41帧：距音高边界（第40帧）不足容差，属于同一次起音
+    notes = _segment(f0, voiced, onsets=[20, 41])
+    assert notes['pitch'].tolist() == [69, 69, 71]
+    np.testing.assert_allclose(notes['start'], np.array([0, 20, 40]) * FRAME)
+
+
+def test_short_runs_dropped_and_single_frame_jumps_smoothed():
+    f0, voiced = _f0((60, 20), (62, 2), (None, 20), (64, 20))
+    # 2帧的游程短于最短音符，丢弃
+    notes = _segment(f0, voiced, smooth_frames=1)
+    assert notes['pitch'].tolist() == [60, 64]
+    f0[10] = 440.0 * 2 ** ((61 - 69) / 12)  # 单帧跳到相邻半音
+    assert _segment(f0, voiced)['pitch'].tolist() == [60, 64]
+    assert _segment(f0, voiced, smooth_frames=1)['pitch'].tolist() == [60, 60, 64]
+
+
+def test_energy_maps_to_velocity():
+    f0, voiced = _f0((69, 20), (72, 20))
+    energy = np.concatenate([np.zeros(20), np.full(15, -90.0)])  # 比音频短：缺少的帧按 -60dB 计
+    notes = _segment(f0, voiced, energy_db=energy)
+    assert notes['velocity'].tolist() == [127, 20]
+
+
+def test_empty_and_unvoiced_input():
+    assert len(_segment(np.zeros(0), np.zeros(0, dtype=bool))) == 0
+    f0, voiced = _f0((None, 30))
+    assert len(_segment(f0, voiced)) == 0
+
+
+def test_only_whole_mappings_sent_as_paths(tmp_path):
+    audio = np.random.default_rng(0).standard_normal((5000, 2)).astype(np.float32)
+    track = TrackStore(str(tmp_path)).write(audio)
+    assert _source(track) == ('file', track.filename)
+    np.testing.assert_array_equal(_open_source(_source(track)), audio)
+    # 切片、转置和步长视图与文件内容不同，按数组传递
+    for view in (track[1000:3000], track.T, track[::2], track[:, 0]):
+        source = _source(view)
+        assert isinstance(source, np.ndarray) and not isinstance(source, np.memmap)
+        np.testing.assert_array_equal(source, view)
+    plain = _source(audio)
+    assert plain is audio
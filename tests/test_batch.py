@@ -0,0 +1,60 @@
+"""
+批处理命令行测试：处理链解析、输出路径规划（保留子目录、重名检测）和端到端批处理
+"""
+
+import os
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from src.batch import collect_inputs, input_root, output_path_for, parse_chain, plan_outputs, run_batch
+
+SAMPLE_RATE = 22050
+
+
+def _write_tone(path, frequency=440.0, seconds=0.5):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    sf.write(path, (0.3 * np.sin(2 * np.pi * frequency * t)).astype(np.float32), SAMPLE_RATE)
+
+
+def test_parse_chain():
+    assert parse_chain("pitch:smart → eq:vocal, master") == [('pitch', 'smart'), ('eq', 'vocal'), ('master', '')]
+    with pytest.raises(ValueError):
+        parse_chain("reverb:hall")
+    with pytest.raises(ValueError):
+        parse_chain(" , ")
+
+
+def test_output_path_mirrors_subdirectories(tmp_path):
+    root = str(tmp_path / "in")
+    out = str(tmp_path / "out")
+    assert output_path_for(os.path.join(root, "a.wav"), out, "_p", "wav", root) == os.path.join(out, "a_p.wav")
+    assert (output_path_for(os.path.join(root, "sub", "a.wav"), out, "_p", "wav", root)
+            == os.path.join(out, "sub", "a_p.wav"))
+    # 基准目录之外的文件（清单中的绝对路径）直接放在输出目录下
+    assert output_path_for(str(tmp_path / "x" / "b.wav"), out, "_p", "wav", root) == os.path.join(out, "b_p.wav")
+
+
+def test_plan_outputs_rejects_collisions(tmp_path):
+    out = str(tmp_path / "out")
+    inputs = [str(tmp_path / "a" / "song.wav"), str(tmp_path / "b" / "song.flac")]
+    with pytest.raises(ValueError):
+        plan_outputs(inputs, out, "_p", "wav")
+    assert len(set(plan_outputs(inputs, out, "_p", "wav", str(tmp_path)))) == 2
+
+
+def test_run_batch_keeps_same_named_files(tmp_path):
+    source = tmp_path / "in"
+    for relative in ("a.wav", os.path.join("sub", "a.wav"), "b.wav"):
+        _write_tone(str(source / relative))
+    inputs = collect_inputs(str(source))
+    out = str(tmp_path / "out")
+
+    results = run_batch(inputs, out, parse_chain("geq:2/0/0/0/-2"), jobs=1, report=lambda message: None,
+                        root=input_root(str(source)))
+
+    assert len(results) == 3 and all(r['ok'] for r in results)
+    outputs = sorted(os.path.relpath(os.path.join(d, f), out) for d, _, files in os.walk(out) for f in files)
+    assert outputs == sorted(["a_processed.wav", os.path.join("sub", "a_processed.wav"), "b_processed.wav"])
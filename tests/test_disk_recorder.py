@@ -0,0 +1,143 @@
+"""
+录音直写磁盘测试：不打开声卡、直接驱动 callback()，块大小不整除环形缓冲时跨越缓冲末尾的写入、
+写盘线程跟不上导致缓冲写满时丢弃采样并记录为xrun 2、输入溢出记录为xrun 1，
+以及 stop() 时写完缓冲中剩余的数据，文件内容逐采样与输入一致
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.audio_processing.disk_recorder import XRUN_REASONS, DiskRecorder
+
+SAMPLE_RATE = 8000
+RING = 1024  # ring_seconds=0.128 时环形缓冲的帧数
+
+
+def _recorder(tmp_path, channels=2):
+    recorder = DiskRecorder(SAMPLE_RATE, channels, directory=str(tmp_path), ring_seconds=RING / SAMPLE_RATE,
+                            block_size=256)
+    assert len(recorder._ring) == RING
+    return recorder
+
+
+def _input(frames, channels=2, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(-0.9, 0.9, (frames, channels)).astype(np.float32)
+
+
+def _push(recorder, audio, sizes, wait=False):
+    """按声卡回调方式逐块送入（块大小依次取 sizes 循环），返回各块的 (起点, 终点)；
+    wait 为 True 时每块之后等待写盘线程取走数据"""
+    blocks, position, k = [], 0, 0
+    while position < len(audio):
+        end = min(position + sizes[k % len(sizes)], len(audio))
+        recorder.callback(audio[position:end], end - position, None, None)
+        blocks.append((position, end))
+        position, k = end, k + 1
+        if wait:
+            _wait_drained(recorder)
+    return blocks
+
+
+def _read(path):
+    import soundfile as sf
+    data, rate = sf.read(path, dtype='float32', always_2d=True)
+    assert rate == SAMPLE_RATE
+    return data
+
+
+def _wait_drained(recorder, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while recorder.frames_written < recorder._written:
+        assert time.monotonic() < deadline, "写盘线程没有取走缓冲中的数据"
+        time.sleep(0.005)
+
+
+def _gate_writer(recorder, monkeypatch):
+    """让写盘线程在 gate 打开前不取数据（模拟写盘跟不上），返回 gate"""
+    gate = threading.Event()
+    drain = recorder._drain
+
+    def gated_drain():
+        return drain() if gate.is_set() else 0
+
+    monkeypatch.setattr(recorder, '_drain', gated_drain)
+    return gate
+
+
+def test_wrapping_blocks_written_sample_for_sample(tmp_path):
+    recorder = _recorder(tmp_path)
+    path = recorder.start(open_stream=False)
+    audio = _input(20000)
+    # 块大小与缓冲长度互质，写入位置不断跨越缓冲末尾
+    blocks = _push(recorder, audio, [1, 37, 500, 1023, 77, 256], wait=True)
+    assert blocks[-1][1] == len(audio)
+    assert len({start % RING for start, _ in blocks}) > 10
+    assert recorder.stop() == path and not recorder.recording
+    np.testing.assert_array_equal(_read(path), audio)
+    assert recorder.xrun_count == 0 and recorder.xruns() == []
+
+
+def test_stop_drains_remaining_frames(tmp_path, monkeypatch):
+    recorder = _recorder(tmp_path, channels=1)
+    drain = recorder._drain
+    # 录音期间写盘线程不取数据，缓冲中的数据只能由停止后的最后一次写盘写入文件
+    monkeypatch.setattr(recorder, '_drain', lambda: 0 if recorder.recording else drain())
+    path = recorder.start(open_stream=False)
+    audio = _input(1000, channels=1)
+    _push(recorder, audio, [300])
+    assert recorder.frames_written == 0
+    recorder.stop()
+    assert recorder.frames_written == 1000
+    np.testing.assert_array_equal(_read(path), audio)
+
+
+def test_full_buffer_drops_samples_as_xrun(tmp_path, monkeypatch):
+    recorder = _recorder(tmp_path)
+    gate = _gate_writer(recorder, monkeypatch)
+    path = recorder.start(open_stream=False)
+    audio = _input(3000)
+
+    # 写盘线程不取数据：前3块共900帧写入，第4块只写得下124帧，第5块全部丢弃
+    blocks = _push(recorder, audio[:1500], [300])
+    assert recorder._written == RING
+    assert recorder.xruns() == [(900 / SAMPLE_RATE, XRUN_REASONS[2]), (1200 / SAMPLE_RATE, XRUN_REASONS[2])]
+    assert blocks[3] == (900, 1200)
+
+    # 写盘线程恢复后继续录音，跨越缓冲末尾写入
+    gate.set()
+    _wait_drained(recorder)
+    _push(recorder, audio[1500:3000], [600, 900], wait=True)
+    recorder.stop()
+
+    expected = np.concatenate([audio[:RING], audio[1500:3000]])
+    np.testing.assert_array_equal(_read(path), expected)
+    assert recorder.xrun_count == 2
+
+
+def test_input_overflow_recorded(tmp_path):
+    recorder = _recorder(tmp_path)
+    recorder.start(open_stream=False)
+    audio = _input(512)
+    recorder.callback(audio[:256], 256, None, None)
+    recorder.callback(audio[256:], 256, None, SimpleNamespace(input_overflow=True))
+    recorder.stop()
+    # 输入溢出只记录位置，采样照常写入
+    assert recorder.xruns() == [(256 / SAMPLE_RATE, XRUN_REASONS[1])]
+    np.testing.assert_array_equal(_read(recorder.path), audio)
+
+
+@pytest.mark.parametrize("file_format, extension", [("WAV", ".wav"), ("FLAC", ".flac")])
+def test_new_take_paths_do_not_collide(tmp_path, file_format, extension):
+    paths = []
+    for _ in range(2):
+        recorder = DiskRecorder(SAMPLE_RATE, 1, directory=str(tmp_path), file_format=file_format, block_size=256)
+        paths.append(recorder.start(open_stream=False))
+        recorder.callback(_input(100, channels=1), 100, None, None)
+        recorder.stop()
+    assert paths[0] != paths[1] and all(path.endswith(extension) for path in paths)
+    assert len(_read(paths[1])) == 100
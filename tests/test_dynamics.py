@@ -0,0 +1,98 @@
+"""
+动态处理测试：压缩器的释放从实际达到的增益衰减量开始按释放时间回落、结果与块大小无关；
+限制器按块流式处理与整段处理一致，且输出不超过上限
+"""
+
+import numpy as np
+import pytest
+
+from src.effects.dynamics import Compressor, LookaheadLimiter, decaying_max
+from src.effects.mastering import Limiter
+
+SAMPLE_RATE = 44100
+
+
+def _db(x):
+    return 20 * np.log10(x)
+
+
+def _burst(level_db, burst_ms, quiet_db=-40.0, seconds=1.0, at=0.2):
+    """安静的直流信号中间插入一段响的直流，返回 (音频 (帧, 1), 起点, 终点)"""
+    audio = np.full((int(seconds * SAMPLE_RATE), 1), 10 ** (quiet_db / 20), dtype=np.float32)
+    start = int(at * SAMPLE_RATE)
+    end = start + int(burst_ms * 1e-3 * SAMPLE_RATE)
+    audio[start:end] = 10 ** (level_db / 20)
+    return audio, start, end
+
+
+def _music(seconds, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    tones = sum(np.sin(2 * np.pi * f * t) for f in (110.0, 220.0, 3520.0, 9000.0))
+    beat = np.exp(-30.0 * (t % 0.25)) * rng.standard_normal(len(t))
+    return np.stack([0.2 * tones + 0.6 * beat, 0.2 * np.roll(tones, 11) + 0.6 * beat], axis=1).astype(np.float32)
+
+
+def test_decaying_max_matches_recursion():
+    rng = np.random.default_rng(0)
+    x = np.maximum(rng.standard_normal(20000) * 3.0, 0.0)
+    for coeff in (0.0, 0.5, 0.999, np.exp(-1.0 / 8820)):
+        expected = np.empty_like(x)
+        held = 2.0
+        for i, value in enumerate(x):
+            held = max(value, coeff * held)
+            expected[i] = held
+        np.testing.assert_allclose(decaying_max(x, coeff, initial=2.0), expected, rtol=1e-10, atol=1e-12)
+
+
+def test_release_starts_from_peak_reduction():
+    # 硬拐点、无穷大压缩比：衰减量等于超出阈值的部分，30ms的突发使增益降到约 -12dB
+    audio, start, end = _burst(-8.0, 30.0)
+    compressor = Compressor(threshold_db=-20.0, ratio=1e9, knee_db=0.0, attack_ms=5.0, release_ms=200.0,
+                            sample_rate=SAMPLE_RATE)
+    gain = _db(compressor.process(audio)[:, 0] / audio[:, 0])
+
+    assert gain[end - 1] < -11.0
+    # 200ms释放：突发结束30ms后仍在 -12·e^(-30/200) ≈ -10.3dB 附近，而不是已经恢复到 -3dB
+    later = gain[end + int(0.03 * SAMPLE_RATE)]
+    assert -11.0 < later < -9.5
+    assert gain[end + int(0.2 * SAMPLE_RATE)] == pytest.approx(gain[end - 1] * np.exp(-1.0), abs=1.0)
+    assert gain[start - 1] == pytest.approx(0.0, abs=1e-3)
+
+
+def test_attack_reaches_static_curve():
+    audio = np.full((SAMPLE_RATE, 1), 10 ** (-8 / 20), dtype=np.float32)
+    compressor = Compressor(threshold_db=-20.0, ratio=4.0, knee_db=0.0, attack_ms=5.0, release_ms=200.0,
+                            sample_rate=SAMPLE_RATE)
+    gain = _db(compressor.process(audio)[:, 0] / audio[:, 0])
+    assert gain[-1] == pytest.approx(-12.0 * 0.75, abs=0.01)
+
+
+@pytest.mark.parametrize("block_size", [1000, 4801, 1 << 16])
+def test_compressor_independent_of_block_size(block_size):
+    audio = _music(2.0)
+    reference = Compressor(sample_rate=SAMPLE_RATE).process(audio)
+    compressor = Compressor(sample_rate=SAMPLE_RATE)
+    streamed = np.concatenate([compressor.process_block(audio[i:i + block_size].copy())
+                               for i in range(0, len(audio), block_size)])
+    np.testing.assert_allclose(streamed, reference, atol=1e-6)
+
+
+@pytest.mark.parametrize("limiter", [
+    LookaheadLimiter(-1.0, SAMPLE_RATE),
+    Limiter(-1.0, SAMPLE_RATE, high_freq_protection=True),
+], ids=["sample-peak", "true-peak"])
+def test_limiter_stream_matches_whole(limiter):
+    audio = _music(3.0) * np.float32(2.0)
+    whole = limiter.process(audio)
+    assert np.abs(whole).max() <= limiter.ceiling + 1e-6
+
+    limiter.reset()
+    blocks, position, sizes = [], 0, [777, 4096, 1, 20000]
+    while position < len(audio):
+        size = sizes[len(blocks) % len(sizes)]
+        blocks.append(limiter.process_block(audio[position:position + size].copy()))
+        position += size
+    blocks.append(limiter.flush())
+    streamed = np.concatenate(blocks)[limiter.latency:limiter.latency + len(audio)]
+    np.testing.assert_allclose(streamed, whole, atol=1e-6)
@@ -0,0 +1,42 @@
+"""
+滤波器组均衡测试：与float64整段滤波一致（高采样率下的低频段也不损失精度），两种声道排列结果相同
+"""
+
+import numpy as np
+import pytest
+from scipy.signal import sosfilt
+
+from src.effects.filter_bank import FILTER_BLOCK_SIZE, FilterBankEqualizer
+
+GAINS = [6.0, -4.0, 2.0, 3.0, -6.0]
+
+
+def _noise(frames, channels=2, seed=0):
+    return (np.random.default_rng(seed).standard_normal((frames, channels)) * 0.1).astype(np.float32)
+
+
+@pytest.mark.parametrize('sample_rate', [44100, 96000, 192000])
+def test_matches_float64_reference(sample_rate):
+    equalizer = FilterBankEqualizer()
+    audio = _noise(FILTER_BLOCK_SIZE * 2 + 123)
+    reference = sosfilt(equalizer.get_sos(sample_rate, GAINS), audio.astype(np.float64), axis=0)
+    output = equalizer.apply(audio, sample_rate, GAINS)
+    assert output.dtype == np.float32 and output.shape == audio.shape
+    error_db = 20 * np.log10(np.abs(output - reference).max() / np.abs(reference).max())
+    assert error_db < -120
+
+
+def test_channel_layouts_agree():
+    equalizer = FilterBankEqualizer()
+    audio = _noise(5000)
+    frames_first = equalizer.apply(audio, 44100, GAINS)
+    channels_first = equalizer.apply(audio.T.copy(), 44100, GAINS)
+    np.testing.assert_allclose(channels_first.T, frames_first, atol=1e-7)
+    np.testing.assert_allclose(equalizer.apply(audio[:, 0], 44100, GAINS), frames_first[:, 0], atol=1e-7)
+
+
+def test_flat_gains_return_copy():
+    audio = _noise(100)
+    output = FilterBankEqualizer().apply(audio, 44100, [0.0] * 5)
+    np.testing.assert_array_equal(output, audio)
+    assert output is not audio
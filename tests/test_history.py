@@ -0,0 +1,91 @@
+"""
+音频版本历史测试：快照不可修改、撤销/重做、超出预算时转存到磁盘或丢弃中间版本
+"""
+
+import os
+
+import numpy as np
+
+from src.audio_processing.history import AudioHistory
+from src.audio_processing.processor import AudioProcessor
+from src.audio_processing.track_store import is_mapped
+
+
+def _versions(count, frames=1000):
+    return [np.full(frames, float(i), dtype=np.float32) for i in range(count)]
+
+
+def test_push_does_not_modify_callers_array():
+    history = AudioHistory()
+    audio = np.zeros(100, dtype=np.float32)
+    history.push(audio)
+    assert audio.flags.writeable
+    audio[:] = 1.0
+    assert not history.current().any()
+    assert not history.current().flags.writeable
+
+
+def test_readonly_view_of_writable_base_is_copied():
+    history = AudioHistory()
+    base = np.zeros(100, dtype=np.float32)
+    view = base[:]
+    view.setflags(write=False)
+    history.push(view)
+    base[:] = 1.0
+    assert not history.current().any()
+
+
+def test_owned_and_frozen_arrays_are_shared():
+    history = AudioHistory()
+    owned = np.zeros(100, dtype=np.float32)
+    history.push(owned, owned=True)
+    assert history.current() is owned and not owned.flags.writeable
+    # 已完全只读的快照再次提交时不复制
+    history.push(history.get(0))
+    assert history.get(1) is history.get(0)
+
+
+def test_undo_redo_and_branch():
+    history = AudioHistory()
+    for audio in _versions(3):
+        history.push(audio, owned=True)
+    assert history.undo()[0] == 1.0
+    assert history.undo()[0] == 0.0
+    assert history.undo() is None
+    assert history.redo()[0] == 1.0
+    history.push(np.full(1000, 9.0, dtype=np.float32))
+    assert len(history) == 3 and not history.can_redo()
+    assert history.current()[0] == 9.0
+
+
+def test_spill_keeps_every_version(tmp_path):
+    versions = _versions(6)
+    history = AudioHistory(memory_budget_mb=versions[0].nbytes * 2 / 1024 / 1024, spill_dir=str(tmp_path))
+    for audio in versions:
+        history.push(audio)
+    assert history.resident_bytes() <= versions[0].nbytes * 2
+    assert any(is_mapped(history.get(i)) for i in range(len(history)))
+    for index in range(len(history)):
+        np.testing.assert_array_equal(history.get(index), versions[index])
+    history.clear()
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_without_spill_original_is_never_evicted():
+    processor = AudioProcessor(history_budget_mb=2000 * 4 * 2 / 1024 / 1024, spill_to_disk=False)
+    processor.sample_rate = 44100
+    for audio in _versions(5, frames=2000):
+        processor.audio_data = audio
+    assert processor.original_audio is not None and processor.original_audio[0] == 0.0
+    assert processor.backup_audio is not None
+    assert processor.history.get(2) is None
+
+
+def test_smart_master_commits_one_version():
+    processor = AudioProcessor()
+    processor.sample_rate = 44100
+    t = np.arange(44100 * 2) / 44100
+    processor.audio_data = (0.1 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+    assert processor.smart_master('smart')
+    assert len(processor.history) == 2
+    assert processor.undo() and processor.history.current_index == 0
@@ -0,0 +1,133 @@
+"""
+声卡延迟校准测试：用构造的测量结果检查选择规则（同一延迟设置下更大的回调帧数都没有xrun且负载在上限内才算稳定，
+都不稳定时取xrun最少、负载最低的），以及档案的保存、读取和按设备名称匹配
+（档案设备与当前设备不同时退回默认设置）；配置目录使用临时目录
+"""
+
+import numpy as np
+import pytest
+
+from src.audio_processing import latency_calibration
+from src.audio_processing.latency_calibration import (LOAD_LIMIT, LOOPBACK, calibrate, choose, load_profile,
+                                                      save_profile, stream_settings)
+
+
+def _result(block_size, latency='low', xruns=0, load=0.1, round_trip_ms=None):
+    buffers = latency_calibration.LOOPBACK_BUFFERS[latency]
+    if round_trip_ms is None:
+        round_trip_ms = 2 * buffers * block_size / 48000 * 1000
+    return {'block_size': block_size, 'latency': latency, 'cpu_mean_ms': 0.1, 'cpu_p99_ms': 0.2, 'load': load,
+            'xruns': xruns, 'round_trip_ms': round_trip_ms, 'round_trip_measured': False}
+
+
+@pytest.fixture
+def config_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv('AI_MUSIC_TUNER_CONFIG_DIR', str(tmp_path))
+    monkeypatch.setattr(latency_calibration, 'current_device_name', lambda kind='output': 'Card A')
+    return tmp_path
+
+
+def _profile(device, block_size=256, latency='high'):
+    return {'device': device, 'sample_rate': 48000, 'block_size': block_size, 'latency': latency,
+            'round_trip_ms': 21.3, 'created': '2026-01-01 00:00:00', 'results': []}
+
+
+def test_choose_smallest_stable_block():
+    results = [_result(64), _result(128), _result(256), _result(512)]
+    assert choose(results)['block_size'] == 64
+
+
+def test_choose_requires_larger_blocks_xrun_free():
+    # 64帧本次恰好没有xrun，但128帧出现了xrun：64帧不算稳定
+    results = [_result(64), _result(128, xruns=2), _result(256), _result(512)]
+    assert choose(results)['block_size'] == 256
+
+
+def test_choose_requires_load_margin():
+    results = [_result(64, load=0.3), _result(128, load=LOAD_LIMIT + 0.01), _result(256, load=0.2)]
+    assert choose(results)['block_size'] == 256
+
+
+def test_stability_is_judged_per_latency_setting():
+    # low 设置下 512 帧有 xrun，整列都不稳定；high 设置下 128 帧起全部稳定
+    results = [_result(64, 'low'), _result(128, 'low'), _result(256, 'low'), _result(512, 'low', xruns=1),
+               _result(64, 'high', xruns=3), _result(128, 'high'), _result(256, 'high'), _result(512, 'high')]
+    best = choose(results)
+    assert (best['block_size'], best['latency']) == (128, 'high')
+
+
+def test_choose_prefers_lowest_round_trip_then_smaller_block():
+    results = [_result(128, 'low', round_trip_ms=12.0), _result(256, 'low', round_trip_ms=12.0),
+               _result(64, 'high', round_trip_ms=10.0), _result(128, 'high', round_trip_ms=15.0)]
+    best = choose(results)
+    assert (best['block_size'], best['latency']) == (64, 'high')
+    results[2]['round_trip_ms'] = 20.0
+    assert choose(results)['block_size'] == 128 and choose(results)['latency'] == 'low'
+
+
+def test_choose_falls_back_when_nothing_stable():
+    results = [_result(64, xruns=5, load=0.9), _result(128, xruns=1, load=0.7), _result(256, xruns=1, load=0.6),
+               _result(512, xruns=2, load=0.3)]
+    # 都不稳定：xrun最少，其次负载最低
+    assert choose(results)['block_size'] == 256
+    tied = [_result(256, xruns=1, load=0.6), _result(512, xruns=1, load=0.6)]
+    assert choose(tied)['block_size'] == 512
+
+
+def test_stream_settings_defaults_without_profile(config_dir):
+    assert load_profile() is None
+    assert stream_settings(512) == (512, None)
+    assert stream_settings(0) == (0, None)
+
+
+@pytest.mark.parametrize("device, expected", [
+    (LOOPBACK, (256, 'high')),  # 模拟回环的档案适用于任何设备
+    (None, (256, 'high')),
+    ('Card A', (256, 'high')),  # 与当前设备一致
+    ('Card B', (512, None)),  # 换了声卡：退回默认设置
+])
+def test_stream_settings_matches_device(config_dir, device, expected):
+    path = save_profile(_profile(device))
+    assert path.startswith(str(config_dir))
+    assert load_profile()['device'] == device
+    assert stream_settings(512) == expected
+
+
+def test_unreadable_profile_ignored(config_dir):
+    (config_dir / latency_calibration.PROFILE_FILE).write_text('{"device": "Card A"}', encoding='utf-8')
+    assert load_profile() is None
+    (config_dir / latency_calibration.PROFILE_FILE).write_text('not json', encoding='utf-8')
+    assert stream_settings(512) == (512, None)
+
+
+def test_recorder_and_engine_use_profile(config_dir):
+    from src.audio_processing.disk_recorder import DiskRecorder
+    from src.audio_processing.playback_engine import PlaybackEngine
+    save_profile(_profile('Card A', block_size=128, latency='low'))
+    recorder = DiskRecorder(48000, 1, directory=str(config_dir))
+    assert (recorder.block_size, recorder.latency) == (128, 'low')
+    engine = PlaybackEngine(48000, 2)
+    try:
+        assert (engine.block_size, engine.latency) == (128, 'low')
+    finally:
+        engine.close()
+
+
+def test_calibrate_loopback_profile(config_dir, monkeypatch):
+    xruns = {(64, 'low'): 1, (64, 'high'): 0, (128, 'low'): 0, (128, 'high'): 0}
+    measured = []
+
+    def fake_measure(block_size, latency, sample_rate, duration, directory):
+        measured.append((block_size, latency))
+        return _result(block_size, latency, xruns=xruns[block_size, latency])
+
+    monkeypatch.setattr(latency_calibration, 'measure_loopback', fake_measure)
+    reports = []
+    profile = calibrate(loopback=True, block_sizes=(64, 128), latencies=('low', 'high'),
+                        progress=lambda fraction, result: reports.append(fraction))
+    assert measured == [(64, 'low'), (128, 'low'), (64, 'high'), (128, 'high')]
+    assert np.allclose(reports, [0.25, 0.5, 0.75, 1.0])
+    assert profile['device'] == LOOPBACK and profile['sample_rate'] == 48000
+    # low: 64帧有xrun，128帧往返 10.7ms；high: 64帧往返 10.7ms，同延迟时取更小的回调帧数
+    assert (profile['block_size'], profile['latency']) == (64, 'high')
+    assert len(profile['results']) == 4
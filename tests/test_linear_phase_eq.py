@@ -0,0 +1,51 @@
+"""
+线性相位均衡测试：流式处理与整段处理一致（延迟已扣除、长度不变），智能EQ在线性相位下的参数约束
+"""
+
+import numpy as np
+import pytest
+from scipy.signal import fftconvolve
+
+from src.audio_processing.processor import SMART_EQ_PRESETS, AudioProcessor
+from src.effects.linear_phase_eq import LinearPhaseEqualizer, design_linear_phase_fir
+
+SAMPLE_RATE = 44100
+GAINS = [4.0, -3.0, 0.0, 2.0, -5.0]
+
+
+def _noise(frames, channels=2):
+    return (np.random.default_rng(1).standard_normal((frames, channels)) * 0.1).astype(np.float32)
+
+
+def test_whole_file_matches_direct_convolution():
+    audio = _noise(30000)
+    kernel = design_linear_phase_fir(SAMPLE_RATE, GAINS)
+    delay = len(kernel) // 2
+    reference = fftconvolve(audio.astype(np.float64), kernel[:, np.newaxis], axes=0)[delay:delay + len(audio)]
+    output = LinearPhaseEqualizer().apply(audio, SAMPLE_RATE, GAINS)
+    assert output.shape == audio.shape
+    np.testing.assert_allclose(output, reference, atol=1e-5)
+
+
+@pytest.mark.parametrize('block_size', [333, 4096, 50000])
+def test_stream_matches_whole_file(block_size):
+    audio = _noise(40000)
+    equalizer = LinearPhaseEqualizer()
+    whole = equalizer.apply(audio, SAMPLE_RATE, GAINS)
+    stream = equalizer.create_stream(SAMPLE_RATE, GAINS, channels=2)
+    blocks = [stream.process_block(audio[start:start + block_size].copy())
+              for start in range(0, len(audio), block_size)]
+    streamed = np.concatenate([b for b in blocks if len(b)] + [stream.flush()])
+    assert streamed.shape == audio.shape
+    np.testing.assert_allclose(streamed, whole, atol=1e-5)
+
+
+def test_smart_equalize_linear_phase():
+    processor = AudioProcessor()
+    processor.sample_rate = SAMPLE_RATE
+    processor.audio_data = _noise(20000)[:, 0]
+    assert not processor.smart_equalize('vocal', anti_ai=True, linear_phase=True)
+    assert len(processor.history) == 1
+    assert processor.smart_equalize('vocal', anti_ai=False, linear_phase=True)
+    expected = LinearPhaseEqualizer().apply(processor.original_audio, SAMPLE_RATE, SMART_EQ_PRESETS['vocal'])
+    np.testing.assert_allclose(processor.audio_data, np.clip(expected, -1.0, 1.0), atol=1e-6)
@@ -0,0 +1,83 @@
+"""
+响度测量测试：EBU Tech 3341（整体/瞬时/短期响度、真峰值）和 Tech 3342（响度范围）的参考信号，
+以及按块流式测量与块大小无关
+"""
+
+import numpy as np
+import pytest
+
+from src.audio_processing.loudness import LoudnessMeter, loudness_gain_db, measure, normalize_loudness
+
+SAMPLE_RATE = 48000
+
+
+def _sine(level_db, seconds, frequency=1000.0, phase=0.0, sample_rate=SAMPLE_RATE):
+    """双声道正弦，level_db 为峰值电平（dBFS）"""
+    t = np.arange(int(round(seconds * sample_rate))) / sample_rate
+    tone = 10.0 ** (level_db / 20.0) * np.sin(2 * np.pi * frequency * t + phase)
+    return np.repeat(tone[:, None], 2, axis=1).astype(np.float32)
+
+
+def _sequence(*parts):
+    """依次拼接 (电平dBFS, 秒数) 的1kHz正弦"""
+    return np.concatenate([_sine(level, seconds) for level, seconds in parts])
+
+
+@pytest.mark.parametrize("parts", [
+    [(-23.0, 20.0)],  # Tech 3341 第1例
+    [(-36.0, 10.0), (-23.0, 60.0), (-36.0, 10.0)],  # 第3例：相对门限
+    [(-72.0, 10.0), (-36.0, 10.0), (-23.0, 60.0), (-36.0, 10.0), (-72.0, 10.0)],  # 第4例：绝对门限
+    [(-26.0, 20.0), (-20.0, 20.1), (-26.0, 20.0)],  # 第5例
+], ids=["case1", "case3", "case4", "case5"])
+def test_integrated_loudness_reference(parts):
+    assert measure(_sequence(*parts), SAMPLE_RATE)['integrated'] == pytest.approx(-23.0, abs=0.1)
+
+
+def test_integrated_loudness_at_minus_33():
+    assert measure(_sine(-33.0, 20.0), SAMPLE_RATE)['integrated'] == pytest.approx(-33.0, abs=0.1)
+
+
+def test_momentary_and_short_term_of_steady_tone():
+    meter = LoudnessMeter(SAMPLE_RATE, 2, true_peak=False)
+    meter.process(_sine(-23.0, 5.0))
+    assert meter.momentary == pytest.approx(-23.0, abs=0.1)
+    assert meter.short_term == pytest.approx(-23.0, abs=0.1)
+    assert meter.max_momentary == pytest.approx(-23.0, abs=0.1)
+
+
+@pytest.mark.parametrize("parts, expected", [
+    ([(-20.0, 20.0), (-30.0, 20.0)], 10.0),  # Tech 3342 第1例
+    ([(-20.0, 20.0), (-15.0, 20.0)], 5.0),  # 第2例
+    ([(-40.0, 20.0), (-20.0, 20.0)], 20.0),  # 第3例
+    ([(-50.0, 20.0), (-35.0, 20.0), (-20.0, 20.0), (-35.0, 20.0), (-50.0, 20.0)], 15.0),  # 第4例
+], ids=["case1", "case2", "case3", "case4"])
+def test_loudness_range_reference(parts, expected):
+    measurement = measure(_sequence(*parts), SAMPLE_RATE, true_peak=False)
+    assert measurement['loudness_range'] == pytest.approx(expected, abs=1.0)
+
+
+def test_true_peak_between_samples():
+    # fs/4 正弦相位偏移45°：采样值只有峰值的 0.707（-3dB），真峰值为 0dBTP
+    tone = _sine(0.0, 1.0, frequency=SAMPLE_RATE / 4, phase=np.pi / 4)
+    measurement = measure(tone, SAMPLE_RATE)
+    assert measurement['sample_peak_db'] == pytest.approx(-3.01, abs=0.05)
+    assert -0.4 <= measurement['true_peak_db'] <= 0.2
+
+
+def test_block_size_does_not_change_result():
+    audio = _sequence((-30.0, 3.0), (-18.0, 4.0), (-26.0, 3.0))
+    reference = measure(audio, SAMPLE_RATE, block_size=len(audio))
+    for block_size in (1000, 4801, 1 << 16):
+        result = measure(audio, SAMPLE_RATE, block_size=block_size)
+        for key in ('integrated', 'loudness_range', 'true_peak_db', 'max_short_term'):
+            assert result[key] == pytest.approx(reference[key], abs=1e-6)
+
+
+def test_normalize_hits_target_in_one_pass():
+    audio = _sequence((-30.0, 5.0), (-24.0, 5.0))
+    output, before, gain_db = normalize_loudness(audio, SAMPLE_RATE, target_lufs=-16.0, ceiling_db=None)
+    assert gain_db == pytest.approx(-16.0 - before['integrated'])
+    assert measure(output, SAMPLE_RATE)['integrated'] == pytest.approx(-16.0, abs=0.05)
+    # 真峰值上限优先于响度目标
+    limited = loudness_gain_db(before, target_lufs=0.0, ceiling_db=-1.0)
+    assert limited == pytest.approx(-1.0 - before['true_peak_db'])
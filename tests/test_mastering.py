@@ -0,0 +1,44 @@
+"""
+智能母带测试：增强版母带处理的结果直接提交（不再额外测量响度、调整增益），
+达到模式的目标响度且不超过真峰值上限
+"""
+
+import numpy as np
+import pytest
+
+from src.audio_processing import loudness
+from src.audio_processing.loudness import MASTER_LOUDNESS_TARGETS, measure
+from src.audio_processing.processor import AudioProcessor
+from src.effects.enhanced_mastering import EnhancedMasteringProcessor
+
+SAMPLE_RATE = 44100
+
+
+def _music(seconds, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    tones = sum(np.sin(2 * np.pi * f * t) for f in (110.0, 220.0, 3520.0))
+    beat = np.exp(-30.0 * (t % 0.25)) * rng.standard_normal(len(t))
+    return np.stack([0.06 * tones + 0.2 * beat, 0.06 * np.roll(tones, 11) + 0.2 * beat], axis=1).astype(np.float32)
+
+
+@pytest.mark.parametrize("mode", ["smart", "streaming", "dynamic"])
+def test_smart_master_commits_enhanced_result(mode, monkeypatch):
+    audio = _music(6.0)
+    processor = AudioProcessor()
+    processor.sample_rate = SAMPLE_RATE
+    processor.history.reset(audio)
+
+    def second_pass(*args, **kwargs):
+        raise AssertionError("增强版母带处理之后不应再调整一次响度")
+
+    monkeypatch.setattr(loudness, 'normalize_loudness', second_pass)
+    assert processor.smart_master(mode)
+    monkeypatch.undo()
+    expected = EnhancedMasteringProcessor(SAMPLE_RATE).one_click_master(audio, mode=mode)
+    np.testing.assert_array_equal(processor.audio_data, expected)
+
+    target_lufs, ceiling_db = MASTER_LOUDNESS_TARGETS[mode]
+    measurement = measure(processor.audio_data, SAMPLE_RATE)
+    assert measurement['integrated'] == pytest.approx(target_lufs, abs=0.5)
+    assert measurement['true_peak_db'] <= ceiling_db + 0.1
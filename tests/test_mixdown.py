@@ -0,0 +1,134 @@
+"""
+多轨混音测试：等功率声像在居中和两端的增益、静音优先于独奏、不同采样率的音轨对齐到会话采样率（结果缓存），
+按块写入 out 的混音结果与整段一次求和一致
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.audio_processing.mixdown import MixdownEngine, pan_gains, track_gains
+
+SAMPLE_RATE = 44100
+
+
+def _track(audio, volume=1.0, pan=0.0, muted=False, solo=False, sample_rate=SAMPLE_RATE):
+    return SimpleNamespace(audio_data=audio, volume=volume, pan=pan, muted=muted, solo=solo, sample_rate=sample_rate)
+
+
+def _noise(frames, channels=None, seed=0):
+    rng = np.random.default_rng(seed)
+    shape = (frames,) if channels is None else (frames, channels)
+    return (0.2 * rng.standard_normal(shape)).astype(np.float32)
+
+
+def _reference_mix(tracks):
+    """整段一次求和：每轨补齐长度、转为立体声后乘以增益再相加"""
+    soloed = any(track.solo for track in tracks)
+    gains = [track_gains(track, soloed) for track in tracks]
+    length = max(len(track.audio_data) for track, g in zip(tracks, gains) if g is not None)
+    total = np.zeros((length, 2))
+    for track, g in zip(tracks, gains):
+        if g is None:
+            continue
+        audio = track.audio_data
+        stereo = np.stack([audio, audio], axis=1) if audio.ndim == 1 else audio[:, [0, min(1, audio.shape[1] - 1)]]
+        total[:len(stereo)] += stereo * np.array(g)
+    return total
+
+
+def test_pan_law_centre_and_edges():
+    assert pan_gains(0.0) == pytest.approx((1.0, 1.0))
+    assert pan_gains(-1.0) == pytest.approx((np.sqrt(2.0), 0.0), abs=1e-12)
+    assert pan_gains(1.0) == pytest.approx((0.0, np.sqrt(2.0)), abs=1e-12)
+    # 超出范围时按两端处理
+    assert pan_gains(-3.0) == pytest.approx(pan_gains(-1.0))
+    assert pan_gains(2.0) == pytest.approx(pan_gains(1.0))
+
+
+@pytest.mark.parametrize("pan", [-1.0, -0.5, 0.0, 0.3, 1.0])
+def test_pan_law_keeps_power(pan):
+    left, right = pan_gains(pan)
+    assert left ** 2 + right ** 2 == pytest.approx(2.0)
+
+
+def test_mute_takes_precedence_over_solo():
+    audio = _noise(10)
+    assert track_gains(_track(audio, volume=0.5, pan=0.0)) == pytest.approx((0.5, 0.5))
+    assert track_gains(_track(audio, muted=True)) is None
+    assert track_gains(_track(audio, muted=True, solo=True), soloed=True) is None
+    assert track_gains(_track(audio, solo=True), soloed=True) == pytest.approx((1.0, 1.0))
+    assert track_gains(_track(audio), soloed=True) is None
+
+
+def test_solo_excludes_other_tracks():
+    engine = MixdownEngine(SAMPLE_RATE, block_size=1000)
+    solo = _track(_noise(3000, seed=1), solo=True, pan=-1.0)
+    tracks = [_track(_noise(5000, seed=2)), solo, _track(_noise(4000, seed=3), solo=True, muted=True)]
+    mixed = engine.mix(tracks)
+    # 只剩独奏且未静音的音轨：长度取该音轨，全部在左声道
+    assert mixed.shape == (3000, 2)
+    np.testing.assert_allclose(mixed[:, 0], solo.audio_data * np.sqrt(2.0), atol=1e-6)
+    np.testing.assert_allclose(mixed[:, 1], 0.0, atol=1e-6)
+
+
+def test_blockwise_mix_into_out_matches_one_shot_sum():
+    tracks = [
+        _track(_noise(10000, seed=1), volume=0.8, pan=-0.3),  # 单声道
+        _track(_noise(7321, 1, seed=2), volume=1.2, pan=0.6),  # (帧, 1)
+        _track(_noise(12345, 2, seed=3), volume=0.5, pan=0.2),  # 立体声
+        _track(_noise(9000, 2, seed=4), muted=True),
+    ]
+    engine = MixdownEngine(SAMPLE_RATE, block_size=1000)
+    out = np.full((20000, 2), np.nan, dtype=np.float32)
+    reports = []
+    mixed = engine.mix(tracks, out=out, progress=reports.append)
+
+    assert mixed.shape == (12345, 2) and np.shares_memory(mixed, out)
+    np.testing.assert_allclose(mixed, _reference_mix(tracks), atol=1e-6)
+    assert np.isnan(out[12345:]).all()  # 混音长度之外的部分不写入
+    assert reports[-1] == 1.0 and reports == sorted(reports) and len(reports) == 13
+    np.testing.assert_array_equal(MixdownEngine(SAMPLE_RATE, block_size=1 << 16).mix(tracks), mixed)
+
+
+def test_short_out_is_replaced():
+    engine = MixdownEngine(SAMPLE_RATE, block_size=1000)
+    tracks = [_track(_noise(5000))]
+    out = np.zeros((100, 2), dtype=np.float32)
+    mixed = engine.mix(tracks, out=out)
+    assert mixed.shape == (5000, 2) and not np.shares_memory(mixed, out)
+
+
+def test_tracks_aligned_to_session_rate():
+    from scipy.signal import resample_poly
+    t = np.arange(22050) / 22050
+    tone = (0.5 * np.sin(2 * np.pi * 1000.0 * t)).astype(np.float32)
+    low = _track(tone, sample_rate=22050)
+    native = _track(_noise(30000))
+    engine = MixdownEngine(SAMPLE_RATE, block_size=4096)
+
+    aligned = engine.aligned_audio(low)
+    assert len(aligned) == 44100
+    np.testing.assert_allclose(aligned, resample_poly(tone, 2, 1), atol=1e-6)
+    assert engine.aligned_audio(low) is aligned  # 同一音频只转换一次
+    assert engine.aligned_audio(native) is native.audio_data  # 采样率相同时不复制
+
+    # 1kHz 正弦转换后频率不变
+    spectrum = np.abs(np.fft.rfft(aligned * np.hanning(len(aligned))))
+    assert np.fft.rfftfreq(len(aligned), 1.0 / SAMPLE_RATE)[spectrum.argmax()] == pytest.approx(1000.0, abs=2.0)
+
+    mixed = engine.mix([low, native])
+    assert mixed.shape == (44100, 2)
+    np.testing.assert_allclose(mixed[:, 0], aligned + np.pad(native.audio_data, (0, 44100 - 30000)), atol=1e-6)
+
+
+def test_mix_to_file_matches_mix(tmp_path):
+    import soundfile as sf
+    tracks = [_track(_noise(5000, seed=1), pan=0.4), _track(_noise(3000, 2, seed=2), volume=0.7)]
+    engine = MixdownEngine(SAMPLE_RATE, block_size=1024)
+    path = tmp_path / 'mix.wav'
+    assert engine.mix_to_file(tracks, str(path), subtype='FLOAT') == 5000
+    written, rate = sf.read(str(path), dtype='float32')
+    assert rate == SAMPLE_RATE
+    np.testing.assert_array_equal(written, engine.mix(tracks))
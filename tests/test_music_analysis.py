@@ -0,0 +1,107 @@
+"""
+扒谱音乐分析测试：用构造的色度矩阵检查和弦模板打分（一次矩阵乘法的结果与逐个模板计算余弦相似度一致）、
+和弦段的切分（过短的段并入前一段、静音和无和弦不返回），用已知调的三和弦进行检查调性估计，
+用等间隔起音强度检查速度估计
+"""
+
+import numpy as np
+import pytest
+
+from src.audio_processing.music_analysis import (CHORD_NAMES, CHORD_PRIOR, CHORD_QUALITIES, CHORD_TEMPLATES,
+                                                 NOTE_NAMES, chord_segments, estimate_key, estimate_tempo)
+
+SAMPLE_RATE = 22050
+HOP = 512
+FRAMES_PER_SECOND = SAMPLE_RATE / HOP
+
+
+def _chroma(*pitch_classes):
+    column = np.zeros(12, dtype=np.float32)
+    column[list(pitch_classes)] = 1.0
+    return column
+
+
+def _analysis(sections):
+    """[(色度列或None, 秒)] 拼成分析结果；None 为静音（能量 -80dB）"""
+    columns, energy = [], []
+    for column, seconds in sections:
+        frames = int(round(seconds * FRAMES_PER_SECOND))
+        silent = column is None
+        columns.append(np.tile(np.zeros((12, 1), dtype=np.float32) if silent else column[:, None], (1, frames)))
+        energy.append(np.full(frames, -80.0 if silent else -6.0))
+    return {'chroma': np.concatenate(columns, axis=1), 'energy_db': np.concatenate(energy),
+            'hop_length': HOP, 'sample_rate': SAMPLE_RATE}
+
+
+def _names(segments):
+    return [CHORD_NAMES[index] for index in segments['chord']]
+
+
+def test_templates_cover_all_roots_and_qualities():
+    assert CHORD_TEMPLATES.shape == (12 * len(CHORD_QUALITIES), 12)
+    np.testing.assert_allclose(np.linalg.norm(CHORD_TEMPLATES, axis=1), 1.0, rtol=1e-6)
+    assert CHORD_NAMES[:12] == NOTE_NAMES and CHORD_NAMES[12 + 9] == 'Am'
+
+
+@pytest.mark.parametrize("name", ['C', 'F#', 'Am', 'Eb7', 'Bbmaj7', 'Dm7', 'Bdim', 'Gsus4'])
+def test_matmul_scores_match_per_template_cosine(name):
+    name = name.replace('Eb', 'D#').replace('Bb', 'A#')
+    index = CHORD_NAMES.index(name)
+    quality = index // 12
+    root = index % 12
+    column = _chroma(*[(root + interval) % 12 for interval in CHORD_QUALITIES[quality][1]])
+    segments = chord_segments(_analysis([(column, 3.0)]))
+    assert _names(segments) == [name]
+
+    # 逐个模板计算余弦相似度加先验扣分：最高分的模板和得分与矩阵乘法的结果一致
+    unit = column / np.linalg.norm(column)
+    expected = np.array([np.dot(template, unit) for template in CHORD_TEMPLATES]) + CHORD_PRIOR
+    assert int(expected.argmax()) == index
+    assert segments['score'][0] == pytest.approx(expected.max(), rel=1e-5)
+
+
+def test_chord_segments_split_progression():
+    c, am, g7, f = _chroma(0, 4, 7), _chroma(9, 0, 4), _chroma(7, 11, 2, 5), _chroma(5, 9, 0)
+    analysis = _analysis([(c, 2.0), (am, 2.0), (f, 0.2), (g7, 2.0), (None, 1.0), (_chroma(2), 1.0), (c, 2.0)])
+    segments = chord_segments(analysis, window=0.1)
+    # 0.2秒的F短于最短和弦段，并入前一段Am；静音和单个音（低于相似度阈值）不返回
+    assert _names(segments) == ['C', 'Am', 'G7', 'C']
+    np.testing.assert_allclose(segments['start'], [0.0, 2.0, 4.2, 8.2], atol=0.1)
+    np.testing.assert_allclose(segments['end'], [2.0, 4.2, 6.2, 10.2], atol=0.1)
+    assert (segments['score'] > 0.9).all()
+
+
+def test_chord_segments_empty():
+    analysis = {'chroma': np.zeros((12, 0)), 'energy_db': np.zeros(0), 'hop_length': HOP, 'sample_rate': SAMPLE_RATE}
+    assert len(chord_segments(analysis)) == 0
+    assert len(chord_segments(_analysis([(None, 2.0)]))) == 0
+
+
+def _progression(*triads):
+    chroma = np.zeros((12, 4 * len(triads)))
+    for i, triad in enumerate(triads):
+        chroma[list(triad), 4 * i:4 * i + 4] = 1.0
+    return {'chroma': chroma}
+
+
+def test_estimate_key_from_triads():
+    # D大调 I-IV-V-I
+    tonic, mode, correlation = estimate_key(_progression((2, 6, 9), (7, 11, 2), (9, 1, 4), (2, 6, 9)))
+    assert (tonic, mode) == ('D', '大调') and correlation > 0.8
+    # a小调 i-iv-V-i（属和弦含导音G#）
+    assert estimate_key(_progression((9, 0, 4), (2, 5, 9), (4, 8, 11), (9, 0, 4)))[:2] == ('A', '小调')
+    # 整体移调后主音随之移动
+    shifted = _progression((7, 11, 2), (0, 4, 7), (2, 6, 9), (7, 11, 2))
+    assert estimate_key(shifted)[:2] == ('G', '大调')
+    assert estimate_key({'chroma': np.zeros((12, 10))}) == ('C', '大调', 0.0)
+
+
+@pytest.mark.parametrize("bpm", [90.0, 120.0])
+def test_estimate_tempo_from_regular_onsets(bpm):
+    pytest.importorskip("librosa")
+    envelope = np.zeros(int(20 * FRAMES_PER_SECOND))
+    beats = np.rint(np.arange(0.0, 20.0, 60.0 / bpm) * FRAMES_PER_SECOND).astype(int)
+    envelope[beats[beats < len(envelope)]] = 1.0
+    analysis = {'onset_envelope': envelope, 'sample_rate': SAMPLE_RATE, 'hop_length': HOP}
+    assert estimate_tempo(analysis) == pytest.approx(bpm, rel=0.05)
+    assert estimate_tempo(dict(analysis, onset_envelope=np.zeros(100)), default=100.0) == 100.0
@@ -0,0 +1,123 @@
+"""
+分段并行音准修正测试：切分点落在静音间隙中、等功率淡入淡出的平方和为1、
+逐样本确定的修正算法并行与串行处理结果一致、WORLD修正并行与串行的幅度谱误差低于 -30 dB
+"""
+
+import numpy as np
+import pytest
+
+from src.audio_processing.parallel_pitch import (equal_power_fades, find_phrase_boundaries,
+                                                 parallel_pitch_correction, stitch_segments)
+
+SAMPLE_RATE = 8000
+GAPS = [(9.8, 10.1), (19.0, 19.4), (31.0, 31.3)]  # 静音间隙（秒）
+
+
+def _phrases(seconds=40.0, channels=None):
+    """带颤音的乐句，GAPS 处为完全静音"""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    audio = 0.4 * np.sin(2 * np.pi * 220.0 * t + 3.0 * np.sin(2 * np.pi * 5.0 * t))
+    for start, end in GAPS:
+        audio[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)] = 0.0
+    audio = audio.astype(np.float32)
+    return audio if channels is None else np.stack([audio, 0.5 * audio], axis=1)
+
+
+def _vocal(seconds=30.0, sample_rate=16000, seed=0):
+    """与基准测试相同的合成人声：带轻微颤音和泛音的乐句，句间有0.3~0.8秒的停顿"""
+    rng = np.random.default_rng(seed)
+    total = int(seconds * sample_rate)
+    audio = np.zeros(total, dtype=np.float32)
+    pos = 0
+    while pos < total:
+        t = np.arange(min(int(rng.uniform(2.0, 6.0) * sample_rate), total - pos)) / sample_rate
+        f0 = 220 * 2 ** (rng.integers(-5, 8) / 12 + rng.normal(0, 0.2) / 12)
+        phase = 2 * np.pi * np.cumsum(f0 * (1 + 0.01 * np.sin(2 * np.pi * 5.5 * t))) / sample_rate
+        audio[pos:pos + len(t)] = 0.3 * sum(np.sin(k * phase) / k for k in range(1, 6)) * np.hanning(len(t))
+        pos += len(t) + int(rng.uniform(0.3, 0.8) * sample_rate)
+    return audio + (rng.standard_normal(total) * 1e-4).astype(np.float32)
+
+
+def _correct(audio, sample_rate):
+    """逐样本确定的修正（短FIR平滑 + 软削波），输出只取决于附近的输入"""
+    kernel = np.hanning(17) / np.hanning(17).sum()
+    smooth = np.apply_along_axis(lambda x: np.convolve(x, kernel, mode='same'), 0, audio)
+    return np.tanh(2.0 * smooth).astype(np.float32)
+
+
+def _world_tune(audio, sample_rate):
+    """合成相位取决于处理起点的修正（WORLD分解后贴合半音）"""
+    from src.audio_processing.world_pitch_engine import WorldPitchEngine
+    return WorldPitchEngine(max_workers=1).render(audio, sample_rate, strength=0.7)
+
+
+def _spectral_error_db(reference, result, n_fft=2048):
+    """幅度谱误差（相对参考信号能量，dB）"""
+    from scipy.signal import stft
+    _, _, ref_spec = stft(reference, nperseg=n_fft)
+    _, _, out_spec = stft(result, nperseg=n_fft)
+    error = np.sum((np.abs(ref_spec) - np.abs(out_spec)) ** 2)
+    return 10 * np.log10(error / np.sum(np.abs(ref_spec) ** 2) + 1e-12)
+
+
+def test_boundaries_fall_in_silent_gaps():
+    audio = _phrases()
+    splits = find_phrase_boundaries(audio, SAMPLE_RATE, target_segment=10.0, min_segment=4.0, max_segment=15.0)
+    assert len(splits) == len(GAPS)
+    for split, (start, end) in zip(splits, GAPS):
+        assert start * SAMPLE_RATE <= split <= end * SAMPLE_RATE
+    lengths = np.diff([0] + splits + [len(audio)])
+    assert lengths.min() >= 4.0 * SAMPLE_RATE and lengths.max() <= 15.0 * SAMPLE_RATE
+
+
+def test_boundaries_without_gaps_respect_max_segment():
+    t = np.arange(50 * SAMPLE_RATE) / SAMPLE_RATE
+    audio = (0.4 * np.sin(2 * np.pi * 220.0 * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 0.3 * t))).astype(np.float32)
+    splits = find_phrase_boundaries(audio, SAMPLE_RATE, target_segment=10.0, min_segment=4.0, max_segment=15.0)
+    assert splits
+    lengths = np.diff([0] + splits)
+    assert lengths.min() >= 4.0 * SAMPLE_RATE - 512 and lengths.max() <= 15.0 * SAMPLE_RATE
+
+
+@pytest.mark.parametrize("length", [1, 16, 161])
+def test_equal_power_fades_sum_to_unity(length):
+    fade_in, fade_out = equal_power_fades(length)
+    np.testing.assert_allclose(fade_in ** 2 + fade_out ** 2, 1.0, atol=1e-12)
+    assert np.all(np.diff(fade_in) > 0) or length == 1
+    np.testing.assert_allclose(fade_in, fade_out[::-1], atol=1e-12)
+
+
+def test_stitch_keeps_samples_outside_crossfades():
+    total, crossfade = 1000, 40
+    bounds = [0, 300, 700, total]
+    pieces = [np.full(min(end + crossfade // 2, total) - max(start - crossfade // 2, 0), i + 1.0)
+              for i, (start, end) in enumerate(zip(bounds[:-1], bounds[1:]))]
+    output = stitch_segments(pieces, bounds, total, crossfade)
+    assert output.shape == (total,)
+    np.testing.assert_array_equal(output[:280], 1.0)
+    np.testing.assert_array_equal(output[320:680], 2.0)
+    np.testing.assert_array_equal(output[720:], 3.0)
+
+
+@pytest.mark.parametrize("channels", [None, 2])
+def test_parallel_matches_serial(channels):
+    audio = _phrases(channels=channels)
+    serial = _correct(audio, SAMPLE_RATE)
+    reports = []
+    parallel = parallel_pitch_correction(audio, SAMPLE_RATE, _correct, workers=2, target_segment=10.0,
+                                         min_segment=4.0, max_segment=15.0, progress=reports.append)
+    assert parallel.shape == serial.shape
+    assert len(reports) > 1 and reports == sorted(reports) and reports[-1] == 1.0
+    # 切分点在静音中，交叉淡化区间内两段都为0，整段输出与串行一致
+    np.testing.assert_allclose(parallel, serial, atol=1e-6)
+
+
+def test_parallel_world_correction_within_tolerance():
+    pytest.importorskip("pyworld")
+    sample_rate = 16000
+    audio = _vocal(sample_rate=sample_rate)
+    serial = _world_tune(audio, sample_rate)
+    parallel = parallel_pitch_correction(audio, sample_rate, _world_tune, workers=2, target_segment=10.0,
+                                         min_segment=4.0, max_segment=15.0)
+    assert parallel.shape == serial.shape
+    assert _spectral_error_db(serial, parallel) < -30.0
@@ -0,0 +1,79 @@
+"""
+峰值金字塔测试：查询列数不超过像素数、各列包络与直接扫描采样一致、增量重建与完整构建一致
+"""
+
+import numpy as np
+import pytest
+
+from src.audio_processing.peak_pyramid import PeakPyramid, PeakPyramidCache, changed_range
+
+SAMPLE_RATE = 44100
+
+
+def _noise(frames, channels=None, seed=0):
+    rng = np.random.default_rng(seed)
+    shape = (frames,) if channels is None else (frames, channels)
+    return rng.uniform(-1.0, 1.0, shape).astype(np.float32)
+
+
+def _reference(audio, starts):
+    """按相邻两列的起始位置直接扫描采样得到前 len(starts)-1 列的 (最小值, 最大值, RMS)"""
+    mins, maxs, rms = [], [], []
+    for lo, hi in zip(starts[:-1], starts[1:]):
+        column = audio[lo:hi]
+        squares = np.square(column, dtype=np.float64)
+        mins.append(column.min())
+        maxs.append(column.max())
+        rms.append(np.sqrt(squares.mean() if column.ndim == 1 else squares.mean(axis=1).mean()))
+    return np.array(mins), np.array(maxs), np.array(rms)
+
+
+@pytest.mark.parametrize("start, end, pixels", [
+    (0, 1000, 800),  # 每像素1.25个采样
+    (0, 1003, 500),  # 每像素约2个采样
+    (12345, 12345 + 30000, 700),
+    (0, 10 * SAMPLE_RATE, 800),  # 整段，使用金字塔级别
+    (3 * SAMPLE_RATE + 17, 7 * SAMPLE_RATE, 333),
+    (100, 160, 1000),  # 采样数少于像素数
+])
+def test_query_columns_never_exceed_pixels(start, end, pixels):
+    audio = _noise(10 * SAMPLE_RATE)
+    starts, mins, maxs, rms = PeakPyramid(audio).query(start, end, pixels)
+
+    assert 0 < len(starts) <= pixels
+    assert len(mins) == len(maxs) == len(rms) == len(starts)
+    assert starts[0] <= start and np.all(np.diff(starts) > 0)
+
+
+def test_query_matches_direct_scan():
+    audio = _noise(5 * SAMPLE_RATE, channels=2, seed=1)
+    pyramid = PeakPyramid(audio)
+    for start, end, pixels in [(0, 900, 800), (1000, 1000 + 64 * 800 * 3, 800), (0, len(audio), 640)]:
+        starts, mins, maxs, rms = pyramid.query(start, end, pixels)
+        ref_min, ref_max, ref_rms = _reference(audio, starts)
+        np.testing.assert_array_equal(mins[:-1], ref_min)
+        np.testing.assert_array_equal(maxs[:-1], ref_max)
+        np.testing.assert_allclose(rms[:-1], ref_rms, rtol=1e-5)
+        # 最后一列至少覆盖到查询区间末尾（按块对齐时可能延伸到块尾）
+        assert mins[-1] <= audio[starts[-1]:end].min() and maxs[-1] >= audio[starts[-1]:end].max()
+
+
+def test_derive_rebuilds_only_changed_range():
+    audio = _noise(3 * SAMPLE_RATE, seed=2)
+    audio.setflags(write=False)
+    edited = audio.copy()
+    edited[50000:50100] *= 0.1
+    edited.setflags(write=False)
+
+    start, end = changed_range(audio, edited)
+    assert start <= 50000 and end >= 50100
+
+    cache = PeakPyramidCache()
+    cache.get(audio)
+    derived = cache.get(edited)
+    fresh = PeakPyramid(edited)
+    assert len(derived.levels) == len(fresh.levels)
+    for derived_level, fresh_level in zip(derived.levels, fresh.levels):
+        for a, b in zip(derived_level, fresh_level):
+            np.testing.assert_allclose(a, b, rtol=1e-6)
+    assert cache.get(edited) is derived
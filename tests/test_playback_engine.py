@@ -0,0 +1,180 @@
+"""
+播放引擎测试：不打开声卡、停止供数线程后手动供数，直接调用 fill() 检查
+A/B交叉淡化（超过回调长度时按回调长度截断）、跳转后作废进行中的读写、
+缓冲欠载与播放结束的区分，以及重采样输出时回调中不分配内存
+"""
+
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from src.audio_processing.playback_engine import PlaybackEngine
+
+SAMPLE_RATE = 44100
+BLOCK = 128
+
+
+def _engine(processed, original=None, block_size=BLOCK, **kwargs):
+    """停止供数线程的引擎，由测试调用 _feed() 写入缓冲"""
+    engine = PlaybackEngine(SAMPLE_RATE, 2, block_size=block_size, **kwargs)
+    engine.close()
+    engine.set_sources(processed, original, keep_position=False)
+    engine.playing = True
+    return engine
+
+
+def _feed(engine):
+    while engine._feed_once():
+        pass
+
+
+def _fill(engine, frames=BLOCK):
+    out = np.full((frames, 2), np.nan, dtype=np.float32)
+    engine.fill(out)
+    return out
+
+
+def _constant(value, frames=SAMPLE_RATE):
+    return np.full((frames, 2), value, dtype=np.float32)
+
+
+def _ramp(frames=SAMPLE_RATE):
+    """每帧的值等于帧号，便于从输出反推读取位置"""
+    return np.repeat(np.arange(frames, dtype=np.float32)[:, None], 2, axis=1)
+
+
+def test_plays_processed_source():
+    engine = _engine(_ramp(), _constant(-1.0))
+    _feed(engine)
+    np.testing.assert_array_equal(_fill(engine)[:, 0], np.arange(BLOCK))
+    np.testing.assert_array_equal(_fill(engine)[:, 1], np.arange(BLOCK, 2 * BLOCK))
+    assert engine.position == 2 * BLOCK and engine.underruns == 0
+
+
+def test_crossfade_capped_at_callback_length():
+    # 10ms = 441帧，超过128帧的回调：在一次回调内从处理后淡化到原始
+    engine = _engine(_constant(1.0), _constant(-1.0), crossfade_ms=10.0)
+    _feed(engine)
+    _fill(engine)
+    engine.switch_to(1)
+    out = _fill(engine)[:, 0]
+    weights = np.arange(1, BLOCK + 1) / BLOCK
+    np.testing.assert_allclose(out, 1.0 - 2.0 * weights, atol=1e-6)
+    assert out[-1] == pytest.approx(-1.0)
+    np.testing.assert_array_equal(_fill(engine), -1.0)
+
+
+def test_crossfade_shorter_than_callback():
+    # 1ms = 44帧：淡化完成后本次回调剩余部分直接输出目标音源
+    engine = _engine(_constant(1.0), _constant(-1.0), crossfade_ms=1.0)
+    _feed(engine)
+    engine.switch_to(1)
+    out = _fill(engine)[:, 0]
+    fade = int(1.0 * SAMPLE_RATE / 1000)
+    np.testing.assert_allclose(out[:fade], 1.0 - 2.0 * np.arange(1, fade + 1) / fade, atol=1e-6)
+    np.testing.assert_array_equal(out[fade:], -1.0)
+    # 切回时从原始淡化回处理后
+    assert engine.toggle() == 0
+    out = _fill(engine)[:, 0]
+    assert out[0] > -1.0 and out[fade - 1] == pytest.approx(1.0)
+    np.testing.assert_array_equal(out[fade:], 1.0)
+
+
+def test_seek_discards_buffer():
+    engine = _engine(_ramp())
+    _feed(engine)
+    _fill(engine)
+    engine.seek(10000)
+    # 供数线程尚未重新填充：输出静音、计为欠载、位置不前进
+    np.testing.assert_array_equal(_fill(engine), 0.0)
+    assert engine.underruns == 1 and engine.position == 10000
+    _feed(engine)
+    np.testing.assert_array_equal(_fill(engine)[:, 0], np.arange(10000, 10000 + BLOCK))
+
+
+def test_seek_during_feed_drops_write():
+    engine = _engine(_ramp())
+    copy_sources = engine._copy_sources
+
+    def copy_then_seek(start, offset, frames):
+        copy_sources(start, offset, frames)
+        engine.seek(5000)
+
+    engine._copy_sources = copy_then_seek
+    assert engine._feed_once()
+    # 写入期间发生了跳转：本次写入作废，缓冲中仍然没有数据
+    assert engine._write == 0 and engine.position == 5000
+    engine._copy_sources = copy_sources
+    _feed(engine)
+    np.testing.assert_array_equal(_fill(engine)[:, 0], np.arange(5000, 5000 + BLOCK))
+
+
+def test_seek_during_fill_keeps_new_position():
+    engine = _engine(_ramp())
+    _feed(engine)
+    mix_into = engine._mix_into
+
+    def mix_then_seek(*args):
+        mix_into(*args)
+        engine.seek(7000)
+
+    engine._mix_into = mix_then_seek
+    _fill(engine)
+    # 回调期间发生了跳转：不提交本次读取，位置停在跳转目标
+    assert engine.position == 7000 and engine.underruns == 0
+
+
+def test_underrun_outputs_silence_for_missing_frames():
+    engine = _engine(_ramp(20000))
+    assert engine._feed_once()  # 只写入一段（FEED_CHUNK 帧）
+    written = engine._write
+    while engine._write - engine._read >= BLOCK:
+        _fill(engine)
+    remaining = engine._write - engine._read
+    out = _fill(engine)
+    np.testing.assert_array_equal(out[:remaining, 0], np.arange(written - remaining, written))
+    np.testing.assert_array_equal(out[remaining:], 0.0)
+    assert engine.underruns == 1 and not engine.finished
+    assert engine.position == written
+
+
+def test_finishes_at_end_of_source():
+    length = 3 * BLOCK + 44
+    engine = _engine(_ramp(length))
+    _feed(engine)
+    for _ in range(3):
+        _fill(engine)
+    out = _fill(engine)
+    np.testing.assert_array_equal(out[:44, 0], np.arange(3 * BLOCK, length))
+    np.testing.assert_array_equal(out[44:], 0.0)
+    assert engine.finished and engine.underruns == 0 and engine.position == length
+
+
+def test_paused_engine_outputs_silence():
+    engine = _engine(_ramp())
+    _feed(engine)
+    engine.playing = False
+    np.testing.assert_array_equal(_fill(engine), 0.0)
+    assert engine.position == 0
+
+
+def test_resampled_fill_does_not_allocate():
+    block = 2048
+    engine = _engine(_constant(0.5, 4 * SAMPLE_RATE), _constant(-0.5, 4 * SAMPLE_RATE), block_size=block)
+    engine.set_output_rate(48000)
+    _feed(engine)
+    out = np.empty((block, 2), dtype=np.float32)
+    engine.fill(out)
+    tracemalloc.start()
+    try:
+        for i in range(6):
+            if i == 3:
+                engine.switch_to(1)
+            engine.fill(out[:block - 7 * i])
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # 2048帧立体声的一块输出就有16KB；只允许锁、切片视图等对象本身的少量内存
+    assert peak < 8192
+    assert engine.underruns == 0
@@ -0,0 +1,114 @@
+"""
+流式重采样测试：结果与回调块大小无关、长时间运行的输入/输出帧数比例准确、
+滤波器按比例缓存、正弦信号的信噪失真比、传入 out 时不分配内存
+"""
+
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from src.audio_processing.resampler import TAPS_PER_PHASE, StreamingResampler, polyphase_filter, rate_ratio
+
+RATE_PAIRS = [(44100, 48000), (48000, 44100), (96000, 44100), (22050, 48000)]
+
+
+def _tone(sample_rate, seconds=1.0, frequency=1000.0, channels=2):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    tone = (0.5 * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+    return np.repeat(tone[:, None], channels, axis=1)
+
+
+def _stream(resampler, audio, block_sizes):
+    """按声卡回调方式逐块转换（块大小依次取 block_sizes 循环），返回输出和消耗的输入帧数"""
+    outputs, position, k = [], 0, 0
+    while True:
+        frames = block_sizes[k % len(block_sizes)]
+        needed = resampler.input_frames(frames)
+        if position + needed > len(audio):
+            break
+        out = np.empty((frames, resampler.channels), dtype=np.float32)
+        resampler.process(audio[position:position + needed], out)
+        outputs.append(out)
+        position += needed
+        k += 1
+    return np.concatenate(outputs), position
+
+
+def _sinad_db(signal, sample_rate, frequency=1000.0, width_hz=20.0):
+    windowed = signal * np.blackman(len(signal))
+    power = np.abs(np.fft.rfft(windowed)) ** 2
+    freqs = np.fft.rfftfreq(len(signal), 1.0 / sample_rate)
+    tone = np.abs(freqs - frequency) <= width_hz
+    return 10 * np.log10(power[tone].sum() / power[~tone].sum())
+
+
+def test_rate_ratio():
+    assert rate_ratio(44100, 48000) == (160, 147)
+    assert rate_ratio(96000, 48000) == (1, 2)
+    assert rate_ratio(48000, 48000) == (1, 1)
+
+
+@pytest.mark.parametrize("input_rate, output_rate", RATE_PAIRS)
+def test_output_independent_of_callback_size(input_rate, output_rate):
+    audio = _tone(input_rate, 0.5)
+    reference, _ = _stream(StreamingResampler(input_rate, output_rate, 2), audio, [4096])
+    varied, _ = _stream(StreamingResampler(input_rate, output_rate, 2), audio, [1, 37, 512, 129, 1000])
+    n = min(len(reference), len(varied))
+    np.testing.assert_allclose(varied[:n], reference[:n], atol=1e-6)
+
+
+@pytest.mark.parametrize("input_rate, output_rate", RATE_PAIRS)
+def test_rate_and_quality(input_rate, output_rate):
+    resampler = StreamingResampler(input_rate, output_rate, 2)
+    audio = _tone(input_rate, 2.0)
+    output, consumed = _stream(resampler, audio, [512])
+
+    # 输入/输出帧数的比例与采样率之比一致（误差不超过一个输出帧对应的输入帧数）
+    assert abs(len(output) * input_rate / output_rate - consumed) <= max(1.0, input_rate / output_rate)
+    steady = output[resampler.taps * 4:]
+    np.testing.assert_array_equal(steady[:, 0], steady[:, 1])
+    assert _sinad_db(steady[:, 0], output_rate) > 80.0
+
+
+def test_filter_design_is_cached_and_read_only():
+    first = StreamingResampler(44100, 48000)
+    second = StreamingResampler(44100, 48000, channels=2)
+    assert first.bank is second.bank is polyphase_filter(160, 147, TAPS_PER_PHASE)
+    assert not first.bank.flags.writeable
+    # 直流增益：每个相位的系数和约为1
+    np.testing.assert_allclose(first.bank.sum(axis=1), 1.0, atol=1e-3)
+
+
+def test_passthrough_copies_input():
+    resampler = StreamingResampler(48000, 48000, 2)
+    audio = _tone(48000, 0.1)
+    assert resampler.passthrough and resampler.input_frames(256) == 256
+    output = resampler.process(audio[:256])
+    np.testing.assert_array_equal(output, audio[:256])
+    assert output is not audio
+
+
+@pytest.mark.parametrize("input_rate, output_rate", RATE_PAIRS)
+def test_process_into_out_does_not_allocate(input_rate, output_rate):
+    resampler = StreamingResampler(input_rate, output_rate, 2, max_frames=4096)
+    audio = _tone(input_rate, 2.0)
+    out = np.empty((4096, 2), dtype=np.float32)
+    position = 0
+
+    def callback(frames):
+        nonlocal position
+        needed = resampler.input_frames(frames)
+        resampler.process(audio[position:position + needed], out[:frames])
+        position += needed
+
+    callback(4096)
+    tracemalloc.start()
+    try:
+        for frames in [4096, 37, 4095, 1, 2048]:
+            callback(frames)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # 只允许切片视图等对象本身的少量内存，不能有与块大小相关的数组分配（4096帧立体声的输出就有32KB）
+    assert peak < 8192
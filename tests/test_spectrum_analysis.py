@@ -0,0 +1,45 @@
+"""
+频谱分析测试：立体声分块只混合该块覆盖的采样，结果与先整段混合为单声道相同
+"""
+
+import numpy as np
+
+from src.audio_processing import spectrum_analysis
+from src.audio_processing.spectrum_analysis import STFT_FFT, STFT_HOP, TILE_FRAMES, SpectrumAnalysis
+
+SAMPLE_RATE = 44100
+
+
+def _stereo(seconds, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    left = 0.5 * np.sin(2 * np.pi * 440.0 * t) + 0.05 * rng.standard_normal(len(t))
+    right = 0.5 * np.sin(2 * np.pi * 660.0 * t) + 0.05 * rng.standard_normal(len(t))
+    return np.stack([left, right], axis=1).astype(np.float32)
+
+
+def test_stereo_tiles_match_mono_downmix():
+    audio = _stereo(20.0)
+    mono = audio.mean(axis=1)
+    stereo_analysis = SpectrumAnalysis(audio, SAMPLE_RATE)
+    mono_analysis = SpectrumAnalysis(mono, SAMPLE_RATE)
+    assert stereo_analysis.n_tiles > 3
+
+    for index in (0, 1, stereo_analysis.n_tiles - 1):
+        np.testing.assert_allclose(stereo_analysis.tile(index), mono_analysis.tile(index), atol=1e-3)
+
+
+def test_tile_downmixes_only_its_own_samples(monkeypatch):
+    audio = _stereo(20.0)
+    mixed = []
+    mono = spectrum_analysis._mono
+    monkeypatch.setattr(spectrum_analysis, "_mono", lambda x: mixed.append(len(x)) or mono(x))
+
+    analysis = SpectrumAnalysis(audio, SAMPLE_RATE)
+    for index in range(analysis.n_tiles):
+        analysis.tile(index)
+
+    tile_span = (TILE_FRAMES - 1) * STFT_HOP + STFT_FFT
+    assert len(mixed) == analysis.n_tiles
+    assert max(mixed) <= tile_span
+    assert sum(mixed) < 1.1 * len(audio) + analysis.n_tiles * STFT_FFT
@@ -0,0 +1,112 @@
+"""
+五线谱排版与渲染测试：已知音符列表按每页8行、每行4小节分页（最后一页只有剩余的小节和行数），
+音符和和弦标记分到所在的页、横坐标落在所在小节内，SVG输出可被解析且符头数与该页音符数一致，
+多进程渲染与单进程结果相同
+"""
+
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pytest
+
+from src.audio_processing import staff_image_generator
+from src.audio_processing.audio_to_midi import NOTE_DTYPE
+from src.audio_processing.staff_image_generator import (CLEF_WIDTH, HEADER, MARGIN, MEASURES_PER_SYSTEM, STAFF_SPACE,
+                                                        SYSTEM_SPACING, SYSTEMS_PER_PAGE, layout, page_paths,
+                                                        render_pages)
+
+TEMPO = 120.0
+MEASURE_SECONDS = 2.0  # 120BPM 下一个4/4小节
+SVG = '{http://www.w3.org/2000/svg}'
+XLINK_HREF = '{http://www.w3.org/1999/xlink}href'
+
+
+def _notes(measures, per_measure=2, pitch=67):
+    """每小节 per_measure 个四分音符，从小节开头起依次排列"""
+    count = measures * per_measure
+    notes = np.zeros(count, dtype=NOTE_DTYPE)
+    index = np.arange(count)
+    notes['start'] = index // per_measure * MEASURE_SECONDS + index % per_measure * 0.5
+    notes['end'] = notes['start'] + 0.5
+    notes['pitch'] = pitch + index % 5
+    notes['velocity'] = 80
+    return notes
+
+
+def test_pages_split_measures_with_leftover_last_page():
+    measures = 2 * MEASURES_PER_SYSTEM * SYSTEMS_PER_PAGE + 6  # 两整页之后剩6小节
+    chords = [(m * MEASURE_SECONDS, f"C{m}") for m in (0, 40, 69)]
+    # 音符打乱顺序输入，排版时按开始时间排序
+    notes = np.random.default_rng(0).permutation(_notes(measures))
+    pages = layout(notes, TEMPO, title='Demo', chords=chords)
+
+    assert [page['number'] for page in pages] == [1, 2, 3]
+    assert all(page['page_count'] == 3 for page in pages)
+    assert [page['first_measure'] for page in pages] == [0, 32, 64]
+    assert [page['systems'] for page in pages] == [SYSTEMS_PER_PAGE, SYSTEMS_PER_PAGE, 2]
+    assert [len(page['x']) for page in pages] == [64, 64, 12]
+    assert [[name for _, _, name in page['chords']] for page in pages] == [['C0'], ['C40'], ['C69']]
+
+    # 每行4小节：音符横坐标落在所在小节的范围内
+    for page in pages:
+        width = page['measure_width']
+        column = np.arange(len(page['x'])) // 2 % MEASURES_PER_SYSTEM
+        left = MARGIN + CLEF_WIDTH + column * width
+        assert ((page['x'] > left) & (page['x'] < left + width)).all()
+    # 最后一页的6个小节占两行（第一线的纵坐标区分行）：第二行只有2个小节的音符
+    last = pages[-1]
+    bottoms, counts = np.unique(np.round(last['y'] + last['step'] * STAFF_SPACE / 2, 6), return_counts=True)
+    np.testing.assert_allclose(bottoms, HEADER + 4 * STAFF_SPACE + np.arange(2) * SYSTEM_SPACING)
+    assert counts.tolist() == [8, 4]
+
+
+def test_single_page_and_empty_layout():
+    pages = layout(_notes(3), TEMPO)
+    assert len(pages) == 1 and pages[0]['systems'] == 1 and len(pages[0]['x']) == 6
+    empty = layout(np.zeros(0, dtype=NOTE_DTYPE), TEMPO)
+    assert len(empty) == 1 and len(empty[0]['x']) == 0
+
+
+def test_page_paths():
+    assert page_paths('score.svg', 1) == ['score.svg']
+    assert page_paths('out/score.svg', 3) == ['out/score_p001.svg', 'out/score_p002.svg', 'out/score_p003.svg']
+
+
+def _parse(path):
+    root = ET.parse(path).getroot()
+    assert root.tag == SVG + 'svg'
+    return root
+
+
+def test_render_svg_pages_parse(tmp_path):
+    pages = layout(_notes(70), TEMPO, title='A & B <demo>', chords=[(0.0, 'Am')])
+    paths = render_pages(pages, str(tmp_path / 'score.svg'), format='svg', workers=1)
+    assert paths == page_paths(str(tmp_path / 'score.svg'), 3)
+
+    for page, path in zip(pages, paths):
+        root = _parse(path)
+        uses = [element.get(XLINK_HREF) for element in root.iter(SVG + 'use')]
+        assert uses.count('#head') == len(page['x'])  # 四分音符为实心符头
+        assert uses.count('#treble') == page['systems']
+        texts = [element.text for element in root.iter(SVG + 'text')]
+        assert 'A & B <demo>' in texts and f"{page['number']} / 3" in texts
+    assert 'Am' in [element.text for element in _parse(paths[0]).iter(SVG + 'text')]
+
+
+def test_parallel_render_matches_serial(tmp_path, monkeypatch):
+    pages = layout(_notes(70), TEMPO, title='Demo')
+    serial = render_pages(pages, str(tmp_path / 'serial.svg'), format='svg', workers=1)
+    monkeypatch.setattr(staff_image_generator, 'PARALLEL_MIN_PAGES', 2)
+    parallel = render_pages(pages, str(tmp_path / 'parallel.svg'), format='svg', workers=2)
+    assert len(parallel) == 3 and parallel == sorted(parallel)
+    for a, b in zip(serial, parallel):
+        with open(a, encoding='utf-8') as fa, open(b, encoding='utf-8') as fb:
+            assert fa.read() == fb.read()
+
+
+def test_render_png_page(tmp_path):
+    pytest.importorskip("matplotlib")
+    pages = layout(_notes(5), TEMPO, title='Demo')
+    path, = render_pages(pages, str(tmp_path / 'score.png'), format='png', workers=1)
+    with open(path, 'rb') as f:
+        assert f.read(8) == b'\x89PNG\r\n\x1a\n'
@@ -0,0 +1,74 @@
+"""
+流式处理测试：分块结果与整段处理一致、与块大小无关，流式基础母带达到与整段处理相同的目标响度
+"""
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from src.audio_processing.loudness import measure
+from src.audio_processing.processor import AudioProcessor
+from src.audio_processing.streaming import StreamingProcessor
+from src.batch import parse_chain, streaming_params
+
+SAMPLE_RATE = 44100
+BANDS = [3.0, -2.0, 0.0, 4.0, -3.0]
+
+
+@pytest.fixture
+def stereo_file(tmp_path):
+    """带直流偏移的立体声测试音频（首个样本不为0）"""
+    rng = np.random.default_rng(0)
+    t = np.arange(SAMPLE_RATE * 3) / SAMPLE_RATE
+    left = 0.2 * np.sin(2 * np.pi * 220 * t) + 0.05 * rng.standard_normal(len(t))
+    right = 0.15 * np.sin(2 * np.pi * 330 * t) + 0.05 * rng.standard_normal(len(t))
+    audio = np.stack([left + 0.3, right - 0.2], axis=1).astype(np.float32)
+    path = str(tmp_path / "input.wav")
+    sf.write(path, audio, SAMPLE_RATE, subtype='FLOAT')
+    return path, audio
+
+
+def _stream(path, tmp_path, block_size=4096, **params):
+    output = str(tmp_path / f"out_{block_size}.wav")
+    StreamingProcessor(block_size).process_file(path, output, **params)
+    return sf.read(output, dtype='float32')[0]
+
+
+def _whole(audio):
+    processor = AudioProcessor()
+    processor.sample_rate = SAMPLE_RATE
+    processor.audio_data = audio.copy()
+    return processor
+
+
+def test_streaming_eq_matches_whole_file(stereo_file, tmp_path):
+    path, audio = stereo_file
+    processor = _whole(audio)
+    assert processor.equalize(BANDS)
+    streamed = _stream(path, tmp_path, bands=BANDS)
+    assert streamed.shape == audio.shape
+    np.testing.assert_allclose(streamed, processor.audio_data, atol=1e-4)
+
+
+def test_streaming_is_independent_of_block_size(stereo_file, tmp_path):
+    path, _ = stereo_file
+    small = _stream(path, tmp_path, 1000, bands=BANDS, master_mode='loud')
+    large = _stream(path, tmp_path, 65536, bands=BANDS, master_mode='loud')
+    np.testing.assert_allclose(small, large, atol=1e-6)
+
+
+def test_streaming_basic_master_matches_whole_file(stereo_file, tmp_path):
+    path, audio = stereo_file
+    processor = _whole(audio)
+    assert processor.equalize(BANDS) and processor.apply_basic_mastering(-16.0)
+    streamed = _stream(path, tmp_path, bands=BANDS, target_lufs=-16.0)
+    assert measure(streamed, SAMPLE_RATE)['integrated'] == pytest.approx(-16.0, abs=0.05)
+    np.testing.assert_allclose(streamed, processor.audio_data, atol=1e-4)
+
+
+def test_streaming_params_reject_chains_it_cannot_reproduce():
+    assert streaming_params(parse_chain("geq:1/2,master:loud,basic_master:-16")) == ([1.0, 2.0], 'loud', -16.0)
+    assert streaming_params(parse_chain("basic_master"))[2] == -14.0
+    for chain in ("master,eq", "geq:1,geq:2", "eq,geq:1", "basic_master,master", "pitch,eq"):
+        with pytest.raises(ValueError):
+            streaming_params(parse_chain(chain))
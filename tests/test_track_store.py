@@ -0,0 +1,147 @@
+"""
+磁盘音轨存储测试：导入文件时写入不超过按文件头帧数分配的长度（帧数不准确时截断或补零）、
+按块写入与只读映射、采样率转换补偿滤波器群延迟并复用已转换的文件、
+只释放区间内完整的页面且释放后数据仍可读取
+"""
+
+import mmap
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.audio_processing import track_store
+from src.audio_processing.track_store import TrackStore, release_pages, resample_file
+
+SAMPLE_RATE = 44100
+
+
+def _noise(frames, channels=2, seed=0):
+    rng = np.random.default_rng(seed)
+    return (0.2 * rng.standard_normal((frames, channels))).astype(np.float32)
+
+
+def _wav(path, audio, sample_rate=SAMPLE_RATE):
+    import soundfile as sf
+    sf.write(str(path), audio, sample_rate, subtype='FLOAT')
+    return str(path)
+
+
+def test_write_returns_read_only_mapping(tmp_path):
+    store = TrackStore(str(tmp_path), block_size=1000)
+    audio = _noise(5500)
+    track = store.write(audio, name='vocal take')
+    assert isinstance(track, np.memmap) and not track.flags.writeable
+    assert track.filename.startswith(str(tmp_path))
+    np.testing.assert_array_equal(track, audio)
+    mono = store.write(audio[:, 0])
+    assert mono.shape == (5500, 1)
+
+
+@pytest.mark.parametrize("header_frames", [4000, 7000], ids=["header-short", "header-long"])
+def test_import_clamps_to_header_frames(tmp_path, monkeypatch, header_frames):
+    import soundfile as sf
+    audio = _noise(5500)
+    path = _wav(tmp_path / 'take.wav', audio)
+    real_info = sf.info
+
+    def wrong_header(filepath):
+        info = real_info(filepath)
+        return SimpleNamespace(frames=header_frames, channels=info.channels, samplerate=info.samplerate)
+
+    monkeypatch.setattr(sf, 'info', wrong_header)
+    track, sample_rate = TrackStore(str(tmp_path / 'session'), block_size=1000).import_file(path)
+    assert sample_rate == SAMPLE_RATE
+    # 按文件头分配的长度不变：实际帧数更多时截断，更少时补零
+    assert track.shape == (header_frames, 2)
+    kept = min(header_frames, len(audio))
+    np.testing.assert_array_equal(track[:kept], audio[:kept])
+    np.testing.assert_array_equal(track[kept:], 0.0)
+
+
+def test_import_matches_file(tmp_path):
+    audio = _noise(12345)
+    track, _ = TrackStore(str(tmp_path / 'session'), block_size=1000).import_file(_wav(tmp_path / 'a.wav', audio))
+    np.testing.assert_array_equal(track, audio)
+
+
+@pytest.mark.parametrize("source_rate, target_rate", [(44100, 48000), (48000, 44100), (22050, 44100), (96000, 44100)])
+def test_resample_file_compensates_delay(tmp_path, source_rate, target_rate):
+    store = TrackStore(str(tmp_path), block_size=4096)
+    t = np.arange(source_rate) / source_rate
+    tone = (0.5 * np.sin(2 * np.pi * 440.0 * t)).astype(np.float32)
+    source = store.write(tone)
+    converted = resample_file(source, source_rate, target_rate, block_size=4096)
+
+    frames = int(np.ceil(len(tone) * target_rate / source_rate))
+    assert converted.shape == (frames, 1)
+    # 延迟补偿后与目标采样率下直接采样的正弦对齐（两端滤波器未填满的部分除外），没有半个采样的错位
+    expected = 0.5 * np.sin(2 * np.pi * 440.0 * np.arange(frames) / target_rate)
+    middle = slice(frames // 10, -frames // 10)
+    np.testing.assert_allclose(converted[middle, 0], expected[middle], atol=1e-4)
+
+
+def test_resample_file_reuses_converted_file(tmp_path):
+    store = TrackStore(str(tmp_path), block_size=4096)
+    source = store.write(_noise(20000, 1))
+    first = resample_file(source, 44100, 48000)
+    mtime = os.path.getmtime(first.filename)
+    second = resample_file(source, 44100, 48000)
+    assert second.filename == first.filename
+    assert os.path.getmtime(second.filename) == mtime
+    np.testing.assert_array_equal(first, second)
+
+
+def test_release_pages_only_whole_pages_in_range(tmp_path, monkeypatch):
+    if not hasattr(mmap, 'MADV_DONTNEED'):
+        pytest.skip("平台不支持 madvise")
+    store = TrackStore(str(tmp_path))
+    audio = _noise(50000)
+    track = store.write(audio)
+    calls = []
+    real_mapping = track_store._mapping
+
+    class Recorder:
+        """转发到真实映射并记录 madvise 的区间"""
+
+        def __init__(self, mm):
+            self.mm = mm
+
+        def __len__(self):
+            return len(self.mm)
+
+        def madvise(self, option, start, length):
+            calls.append((start, length))
+            self.mm.madvise(option, start, length)
+
+    def recording_mapping(array):
+        mapping = real_mapping(array)
+        return None if mapping is None else (Recorder(mapping[0]), mapping[1])
+
+    monkeypatch.setattr(track_store, '_mapping', recording_mapping)
+
+    view = track[123:]  # 视图的起点不在页边界上
+    _, origin = real_mapping(view)
+    base = view.__array_interface__['data'][0] - origin
+    frame_bytes = view.strides[0]
+    release_pages(view, 1000, 9000)
+    assert len(calls) == 1
+    start, length = calls[0]
+    assert start % mmap.PAGESIZE == 0 and length % mmap.PAGESIZE == 0
+    assert base + 1000 * frame_bytes <= start
+    assert start + length <= base + 9000 * frame_bytes
+    assert start - (base + 1000 * frame_bytes) < mmap.PAGESIZE
+    assert base + 9000 * frame_bytes - (start + length) < mmap.PAGESIZE
+
+    # 区间不足一整页时不释放；释放后数据从文件重新读入
+    release_pages(view, 1000, 1100)
+    assert len(calls) == 1
+    np.testing.assert_array_equal(view, audio[123:])
+
+
+def test_release_pages_ignores_plain_arrays():
+    audio = _noise(1000)
+    release_pages(audio, 0, 1000)
+    release_pages(audio[::-1], 0, 1000)
+    assert track_store.is_mapped(audio) is False
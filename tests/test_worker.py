@@ -0,0 +1,72 @@
+"""
+后台处理进程测试：在线程中运行 worker_main，通过管道提交处理请求，检查带 progress 参数的处理方法
+按块回报单调递增的进度、最后回复处理结果，以及不接受 progress 的调用和出错时的回复
+"""
+
+import threading
+from multiprocessing import Pipe
+
+import numpy as np
+import pytest
+
+from src.audio_processing.worker import worker_main
+from src.effects.filter_bank import FILTER_BLOCK_SIZE
+
+SAMPLE_RATE = 44100
+
+
+def _noise(frames, channels=2, seed=0):
+    rng = np.random.default_rng(seed)
+    return (0.2 * rng.standard_normal((frames, channels))).astype(np.float32)
+
+
+@pytest.fixture
+def worker():
+    conn, child = Pipe()
+    thread = threading.Thread(target=worker_main, args=(child,), daemon=True)
+    thread.start()
+    yield conn
+    conn.send(None)
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+
+
+def _run(conn, method_name, audio, kwargs):
+    """提交一个请求，返回 (进度列表, 最后的回复)"""
+    conn.send((method_name, audio, SAMPLE_RATE, kwargs))
+    reports = []
+    while True:
+        assert conn.poll(60), "处理进程没有回复"
+        message = conn.recv()
+        if message[0] != 'progress':
+            return reports, message
+        reports.append(message[1])
+
+
+def test_equalize_reports_progress_per_block(worker):
+    audio = _noise(3 * FILTER_BLOCK_SIZE + 1000)
+    reports, reply = _run(worker, 'equalize', audio, {'bands': [3, 0, -2, 0, 0, 1, 0, 0, 0]})
+    assert reply[:2] == ('done', True)
+    assert reply[2].shape == audio.shape and not np.array_equal(reply[2], audio)
+    assert len(reports) == 4 and reports == sorted(reports) and reports[-1] == pytest.approx(1.0)
+
+
+def test_linear_phase_equalize_reports_progress(worker):
+    reports, reply = _run(worker, 'equalize', _noise(SAMPLE_RATE * 5), {'bands': [0, 2, 0, 0, -3, 0, 0, 0, 0],
+                                                                        'linear_phase': True})
+    assert reply[:2] == ('done', True)
+    assert reports and reports == sorted(reports) and reports[-1] == pytest.approx(1.0)
+
+
+def test_master_reports_progress(worker):
+    reports, reply = _run(worker, 'master', _noise(SAMPLE_RATE * 3), {'preset': 'balanced'})
+    assert reply[:2] == ('done', True)
+    assert reports and reports == sorted(reports) and reports[-1] == pytest.approx(1.0)
+
+
+def test_method_without_progress_and_errors(worker):
+    audio = _noise(1000)
+    reports, reply = _run(worker, 'apply_basic_mastering', audio, {})
+    assert reports == [] and reply[:2] == ('done', True)
+    reports, reply = _run(worker, 'equalize', audio, {'no_such_option': 1})
+    assert reports == [] and reply[0] == 'error' and 'TypeError' in reply[1]
@@ -0,0 +1,77 @@
+"""
+WORLD音高引擎测试：分段并行合成的接缝处电平不凹陷、不凸起（整段都是有声音频，区间边界无法移到无声帧上），
+片段预览只分析所需片段且与整段合成电平一致
+"""
+
+import numpy as np
+import pytest
+
+from src.audio_processing import world_pitch_engine
+from src.audio_processing.processor import AudioProcessor
+from src.audio_processing.world_pitch_engine import WorldPitchEngine, _crossfade_gains
+
+SAMPLE_RATE = 16000
+WINDOW = SAMPLE_RATE // 50
+
+
+def _voiced(seconds):
+    """带轻微颤音的谐波音，全程有声"""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    phase = 2 * np.pi * np.cumsum(220.0 * (1.0 + 0.01 * np.sin(2 * np.pi * 5.0 * t))) / SAMPLE_RATE
+    return (0.3 * np.sin(phase) + 0.15 * np.sin(2 * phase) + 0.08 * np.sin(3 * phase)).astype(np.float32)
+
+
+def _levels_db(audio):
+    n = len(audio) // WINDOW
+    frames = audio[:n * WINDOW].astype(np.float64).reshape(n, WINDOW)
+    return 20 * np.log10(np.sqrt(np.mean(frames ** 2, axis=1)) + 1e-12)
+
+
+@pytest.mark.parametrize("r", [0.0, 0.5, 1.0])
+def test_crossfade_gains_keep_level(r):
+    rng = np.random.default_rng(0)
+    common, own_tail, own_head = rng.standard_normal((3, 4096))
+    mix = np.sqrt(r)
+    tail = mix * common + np.sqrt(1 - r) * own_tail
+    head = mix * common + np.sqrt(1 - r) * own_head
+    fade_out, fade_in = _crossfade_gains(tail, head)
+    # 两段都是单位功率、相关系数为 r 时，拼接结果的期望功率
+    power = fade_out ** 2 + fade_in ** 2 + 2 * r * fade_out * fade_in
+    assert np.abs(10 * np.log10(power)).max() < 0.2
+
+
+def test_segment_seams_have_no_level_dip(monkeypatch):
+    pytest.importorskip("pyworld")
+    monkeypatch.setattr(world_pitch_engine, "SEGMENT_FRAMES", 400)  # 5ms帧，每2秒一个接缝
+    engine = WorldPitchEngine(max_workers=2, cache_size=0)
+    reports = []
+    levels = _levels_db(engine.render(_voiced(6.0), SAMPLE_RATE, semitones=1.0, progress=reports.append))
+    # 分析完成报告一半，之后每合成完一个区间报告一次
+    assert reports[0] == pytest.approx(0.5) and reports == sorted(reports) and reports[-1] == pytest.approx(1.0)
+
+    reference = np.median(levels[10:-10])
+    for seam in (2.0, 4.0):
+        index = int(seam * SAMPLE_RATE) // WINDOW
+        around = levels[index - 3:index + 4] - reference
+        assert np.abs(around).max() < 1.0, f"{seam}s 接缝处电平偏差 {around}"
+
+
+def test_preview_analyzes_only_the_excerpt(monkeypatch):
+    pytest.importorskip("pyworld")
+    engine = WorldPitchEngine(max_workers=1)
+    monkeypatch.setattr(world_pitch_engine, "_shared_engine", engine)
+    processor = AudioProcessor()
+    processor.sample_rate = SAMPLE_RATE
+    audio = _voiced(8.0)
+    processor.history.reset(audio)
+
+    analyzed = []
+    analyze_channel = engine._analyze_channel
+    monkeypatch.setattr(engine, "_analyze_channel",
+                        lambda channel, sr: analyzed.append(len(channel)) or analyze_channel(channel, sr))
+    preview = processor.preview_pitch(semitones=2.0, start=3.0, duration=2.0)
+
+    assert len(preview) == 2 * SAMPLE_RATE
+    assert analyzed and max(analyzed) < 4 * SAMPLE_RATE
+    full = engine.render(audio, SAMPLE_RATE, semitones=2.0)[3 * SAMPLE_RATE:5 * SAMPLE_RATE]
+    assert abs(np.median(_levels_db(preview)) - np.median(_levels_db(full))) < 0.5